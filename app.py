@@ -1,11 +1,14 @@
-from flask import Flask, render_template, request, jsonify, url_for, session, json
+from flask import Flask, render_template, request, jsonify, url_for, session, json, Response, stream_with_context
 from ce3 import Assistant
+from assistant_pool import AssistantPool
 import os
 import subprocess
+import uuid
 from werkzeug.utils import secure_filename
 import base64
 from config import Config
 from dotenv import load_dotenv
+from omni_core.transport import get_transport
 
 # Load environment variables from .env
 load_dotenv()
@@ -135,10 +138,20 @@ def initialize_session():
     if 'current_model' not in session:
         session['current_model'] = PROVIDER_CONFIG[session['current_provider']]['default_model']
         print(f"[DEBUG] Initialized session with model: {session['current_model']}")
+    if 'assistant_id' not in session:
+        session['assistant_id'] = uuid.uuid4().hex
 
-# Initialize assistant with default settings
+# Initialize assistant with default settings. It loads the tools once;
+# each browser session chats with its own Assistant sharing that registry.
 assistant = Assistant(provider=default_provider)
 assistant.model = PROVIDER_CONFIG[default_provider]['default_model']
+
+def _create_assistant(provider, registry=None):
+    """Build an Assistant for a new browser session"""
+    return Assistant(provider=provider, registry=registry)
+
+assistants = AssistantPool(_create_assistant)
+assistants.add_registry(default_provider, assistant.tool_registry)
 current_provider = default_provider
 current_parameters = PROVIDER_CONFIG[default_provider]['parameters'].copy()
 
@@ -378,10 +391,6 @@ def switch_model():
         session['current_model'] = model
         session['current_provider'] = provider
         
-        # Update assistant's provider and model
-        assistant.provider = provider
-        assistant.model = model
-        
         return jsonify({
             'success': True,
             'model': model,
@@ -451,6 +460,50 @@ def debug_provider():
         'available_providers': list(PROVIDER_CONFIG.keys())
     })
 
+@app.route('/debug/transport', methods=['GET'])
+def debug_transport():
+    """Debug endpoint to check shared HTTP connection pool usage"""
+    return jsonify(get_transport().stats().to_dict())
+
+@app.route('/debug/sessions', methods=['GET'])
+def debug_sessions():
+    """Debug endpoint to check the per-session assistant pool"""
+    return jsonify(assistants.stats())
+
+@app.route('/debug/tools', methods=['GET'])
+def debug_tools():
+    """Debug endpoint to check tool dispatch latency"""
+    return jsonify(assistants.tool_stats())
+
+def _session_id():
+    """Return the id that keys this browser session's assistant"""
+    if 'assistant_id' not in session:
+        session['assistant_id'] = uuid.uuid4().hex
+    return session['assistant_id']
+
+def _session_model():
+    """Return the session's model and the provider that serves it"""
+    current_model = session.get('current_model')
+    if not current_model:
+        current_model = PROVIDER_CONFIG['cborg']['default_model']
+        session['current_model'] = current_model
+    
+    print(f"[DEBUG] Using model: {current_model}")
+    
+    # Determine provider from model name
+    provider = 'cborg' if '/' in current_model else 'ollama'
+    print(f"[DEBUG] Using provider: {provider}")
+    return current_model, provider
+
+def _configure_assistant(session_assistant, model, provider, settings):
+    """Point a session's assistant at its model and settings"""
+    assistants.use_provider(session_assistant, provider)
+    session_assistant.model = model
+
+    # Update temperature if provided
+    if settings.get('temperature'):
+        session_assistant.temperature = float(settings['temperature'])
+
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
@@ -462,39 +515,24 @@ def chat():
         settings = data.get('settings', {})
         
         try:
-            current_model = session.get('current_model')
-            if not current_model:
-                current_model = PROVIDER_CONFIG['cborg']['default_model']
-                session['current_model'] = current_model
+            model, provider = _session_model()
             
-            print(f"[DEBUG] Using model: {current_model}")
-            
-            # Determine provider from model name
-            provider = 'cborg' if '/' in current_model else 'ollama'
-            print(f"[DEBUG] Using provider: {provider}")
-            
-            try:
-                # Update the assistant's provider and model
-                if assistant.provider != provider:
-                    assistant.provider = provider
-                assistant.model = current_model
-
-                # Update temperature if provided
-                if settings.get('temperature'):
-                    assistant.temperature = float(settings['temperature'])
-
-                # Handle image data if present
-                if 'image_data' in data and 'media_type' in data:
-                    response = assistant.chat_with_image(message, data['image_data'], data['media_type'])
-                else:
-                    response = assistant.chat(message)
-
-                print(f"[DEBUG] Response received from {provider}")
-                return jsonify({'response': response})
+            with assistants.lease(_session_id(), provider) as session_assistant:
+                _configure_assistant(session_assistant, model, provider, settings)
                 
-            except Exception as e:
-                print(f"[ERROR] {provider} error: {str(e)}")
-                return jsonify({'error': f"{provider} error: {str(e)}"}), 500
+                try:
+                    # Handle image data if present
+                    if 'image_data' in data and 'media_type' in data:
+                        response = session_assistant.chat_with_image(message, data['image_data'], data['media_type'])
+                    else:
+                        response = session_assistant.chat(message)
+
+                    print(f"[DEBUG] Response received from {provider}")
+                    return jsonify({'response': response})
+                    
+                except Exception as e:
+                    print(f"[ERROR] {provider} error: {str(e)}")
+                    return jsonify({'error': f"{provider} error: {str(e)}"}), 500
                 
         except Exception as e:
             print(f"[ERROR] Error in chat endpoint: {str(e)}")
@@ -504,6 +542,52 @@ def chat():
         print(f"[ERROR] Error parsing request: {str(e)}")
         return jsonify({'error': f"Error parsing request: {str(e)}"}), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream the assistant's reply as server-sent events"""
+    data = request.get_json(silent=True)
+    if not data or 'message' not in data:
+        return jsonify({'error': 'No message provided'}), 400
+
+    message = data['message']
+    settings = data.get('settings', {})
+    image_data = data.get('image_data') or data.get('image')
+
+    try:
+        model, provider = _session_model()
+        session_id = _session_id()
+    except Exception as e:
+        print(f"[ERROR] Error in chat stream endpoint: {str(e)}")
+        return jsonify({'error': f"Error in chat endpoint: {str(e)}"}), 500
+
+    # Multimodal messages use the OpenAI-style content list
+    if image_data:
+        media_type = data.get('media_type', 'image/jpeg')
+        user_input = [
+            {'type': 'text', 'text': message},
+            {'type': 'image_url', 'image_url': {'url': f"data:{media_type};base64,{image_data}"}}
+        ]
+    else:
+        user_input = message
+
+    def generate():
+        try:
+            # The lease is held until the stream finishes
+            with assistants.lease(session_id, provider) as session_assistant:
+                _configure_assistant(session_assistant, model, provider, settings)
+                for event in session_assistant.chat_stream(user_input):
+                    yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            print(f"[ERROR] {provider} stream error: {str(e)}")
+            yield f"data: {json.dumps({'type': 'error', 'content': f'{provider} error: {str(e)}'})}\n\n"
+        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -539,8 +623,8 @@ def upload_file():
 @app.route('/reset', methods=['POST'])
 def reset():
     try:
-        # Reset the assistant's conversation history
-        assistant.reset()
+        # Drop this session's assistant; the next message starts a fresh one
+        assistants.discard(_session_id())
         return jsonify({'status': 'success'})
     except Exception as e:
         print(f"Error in reset: {str(e)}")
@@ -0,0 +1,198 @@
+# assistant_pool.py
+"""
+Per-session Assistant instances for the web app.
+
+Every browser session gets its own Assistant so conversations never share
+history. Assistants are kept in a bounded pool: idle sessions expire, the
+least recently used session is evicted when the pool is full, and each
+session's history is trimmed to a byte budget after every turn.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from config import Config
+from tool_registry import ToolRegistry
+
+
+class _PoolEntry:
+    """An Assistant together with its bookkeeping."""
+
+    def __init__(self, assistant):
+        self.assistant = assistant
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()  # One request per conversation at a time
+
+
+class AssistantPool:
+    """
+    A bounded, thread-safe pool of Assistants keyed by session id.
+
+    factory is called as factory(provider=..., registry=...) to build a new
+    Assistant. The tool registry is loaded by the first Assistant of each
+    provider and handed to every later one, so constructing an Assistant
+    does not import and instantiate the tool modules again.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[..., Any],
+        max_sessions: int = Config.WEB_MAX_SESSIONS,
+        idle_timeout: float = Config.WEB_SESSION_IDLE_TIMEOUT,
+        max_history_bytes: int = Config.WEB_SESSION_MAX_HISTORY_BYTES
+    ):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_history_bytes = max_history_bytes
+        self._entries: "OrderedDict[str, _PoolEntry]" = OrderedDict()
+        self._registries: Dict[str, ToolRegistry] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def add_registry(self, provider: str, registry: ToolRegistry) -> None:
+        """Seed the tool registry cache, e.g. from an Assistant built at startup."""
+        if isinstance(registry, ToolRegistry):
+            self._registries[provider] = registry
+
+    def registry(self, provider: str) -> Optional[ToolRegistry]:
+        """Return the cached tool registry for provider, if one has been loaded."""
+        return self._registries.get(provider)
+
+    def get(self, session_id: str, provider: str):
+        """
+        Return the Assistant for session_id, creating it if needed.
+        """
+        with self._lock:
+            self._evict_idle()
+            entry = self._entries.get(session_id)
+            if entry is None:
+                entry = _PoolEntry(self._create(provider))
+                self._entries[session_id] = entry
+                self._evict_overflow(keep=session_id)
+            self._entries.move_to_end(session_id)
+            entry.last_used = time.monotonic()
+            return entry.assistant
+
+    @contextmanager
+    def lease(self, session_id: str, provider: str):
+        """
+        Hold the session's Assistant for the duration of a request.
+        Requests for the same session are serialized; other sessions run in
+        parallel. The history is trimmed when the lease is released.
+        """
+        assistant = self.get(session_id, provider)
+        with self._lock:
+            entry = self._entries.get(session_id)
+        lock = entry.lock if entry is not None else threading.Lock()
+        with lock:
+            try:
+                yield assistant
+            finally:
+                self.trim_history(assistant)
+                if entry is not None:
+                    entry.last_used = time.monotonic()
+
+    def use_provider(self, assistant, provider: str) -> None:
+        """
+        Switch an Assistant to another provider, reusing that provider's
+        tool registry when it is already loaded.
+        """
+        if assistant.provider == provider:
+            return
+        assistant.provider = provider
+        assistant.provider_context = assistant._create_provider_context()
+        registry = self.registry(provider)
+        if registry is None:
+            registry = assistant._load_tools()
+            self.add_registry(provider, registry)
+        assistant.set_tool_registry(registry)
+
+    def discard(self, session_id: str) -> None:
+        """Drop the Assistant for session_id, if there is one."""
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def peek(self, session_id: str):
+        """Return the Assistant for session_id without creating one."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return entry.assistant if entry is not None else None
+
+    def trim_history(self, assistant) -> int:
+        """
+        Drop the oldest turns of the conversation until it fits in
+        max_history_bytes. A turn starts at a user message, so tool results
+        are never separated from the assistant message that requested them.
+        Returns the number of messages removed.
+        """
+        history = getattr(assistant, 'conversation_history', None)
+        if not isinstance(history, list) or not self.max_history_bytes:
+            return 0
+
+        sizes = [len(json.dumps(message, default=str)) for message in history]
+        total = sum(sizes)
+        start = 0
+        while total > self.max_history_bytes and start < len(history):
+            # Drop a whole turn: the next user message up to the following one
+            end = start + 1
+            while end < len(history) and history[end].get('role') != 'user':
+                end += 1
+            if end >= len(history):
+                break  # Never drop the turn in progress
+            total -= sum(sizes[start:end])
+            start = end
+
+        if start:
+            del history[:start]
+            logging.info(f"Trimmed {start} messages from an assistant's history")
+        return start
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool usage for the debug endpoint."""
+        with self._lock:
+            return {
+                'sessions': len(self._entries),
+                'max_sessions': self.max_sessions,
+                'evictions': self.evictions,
+                'tool_registries': sorted(self._registries)
+            }
+
+    def tool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the tool dispatch timings of each provider's registry."""
+        return {provider: registry.stats() for provider, registry in self._registries.items()}
+
+    def _create(self, provider: str):
+        """Build a new Assistant, loading tools only on first use."""
+        registry = self.registry(provider)
+        assistant = self.factory(provider=provider, registry=registry)
+        if registry is None:
+            self.add_registry(provider, getattr(assistant, 'tool_registry', None))
+        return assistant
+
+    def _evict_idle(self) -> None:
+        """Remove sessions that have not been used within idle_timeout."""
+        if not self.idle_timeout:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        # Entries are kept in LRU order, so stop at the first recent one
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if entry.last_used >= cutoff or entry.lock.locked():
+                break
+            del self._entries[session_id]
+            self.evictions += 1
+
+    def _evict_overflow(self, keep: str) -> None:
+        """Remove least recently used sessions beyond max_sessions."""
+        for session_id in list(self._entries):
+            if len(self._entries) <= self.max_sessions:
+                break
+            if session_id == keep or self._entries[session_id].lock.locked():
+                continue  # Still serving a request
+            del self._entries[session_id]
+            self.evictions += 1
@@ -0,0 +1,149 @@
+"""Compare WebScraperTool's extraction with the BeautifulSoup version it replaced.
+
+Usage:
+    python benchmarks/webextract_bench.py PAGE.html [PAGE.html ...]
+
+Each page is extracted by legacy_extract, a copy of the html.parser
+implementation WebScraperTool used before omni_core.webextract, and by
+extract_page. The script prints the best time of several runs and the
+estimated output tokens for both. The table in the commit that added
+webextract used these pages from a local Rust documentation install
+(rustup component add rust-docs), under
+~/.rustup/toolchains/stable-x86_64-unknown-linux-gnu/share/doc/rust/html:
+book/ch04-01-what-is-ownership.html, std/vec/struct.Vec.html,
+rustc/lints/listing/warn-by-default.html, book/print.html and
+src/std/path.rs.html.
+"""
+
+import os
+import re
+import sys
+import time
+import warnings
+
+from bs4 import BeautifulSoup, Comment
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from omni_core.repomap import estimate_text_tokens  # noqa: E402
+from omni_core.webextract import extract_page  # noqa: E402
+
+RUNS = 3  # Best of this many runs, or one for pages over LARGE_PAGE bytes
+LARGE_PAGE = 1024 * 1024
+
+
+def legacy_extract(text):
+    """The extraction WebScraperTool used before omni_core.webextract, unchanged."""
+    soup = BeautifulSoup(text, 'html.parser')
+
+    # Remove script, style, and other irrelevant elements
+    for elem in soup(["script", "style", "noscript", "iframe", "svg", "canvas", "object"]):
+        elem.decompose()
+
+    # Remove comments
+    for comment in soup.find_all(text=lambda text: isinstance(text, Comment)):
+        comment.extract()
+
+    # Identify main content container
+    main_container = (
+        soup.find('main') or
+        soup.find('article') or
+        soup.find(attrs={'id': re.compile(r'(main|content|article)', re.I)}) or
+        soup.find(attrs={'class': re.compile(r'(main|content|article)', re.I)})
+    )
+
+    # If no main-like container found, fallback to body or entire doc
+    if not main_container:
+        main_container = soup.find('body')
+    if not main_container:
+        main_container = soup
+
+    # Remove elements likely not part of main content
+    # including nav, footer, aside, forms, and common ad-based sections
+    for tag_name in ["nav", "footer", "aside", "form", "header"]:
+        for elem in main_container.find_all(tag_name):
+            elem.decompose()
+
+    # Remove known ad or irrelevant containers by class or id hints
+    # E.g., "sidebar", "ad", "advertisement"
+    for elem in main_container.find_all(attrs={'class': re.compile(r'(sidebar|nav|menu|ad|advert)', re.I)}):
+        elem.decompose()
+    for elem in main_container.find_all(attrs={'id': re.compile(r'(sidebar|nav|menu|ad|advert)', re.I)}):
+        elem.decompose()
+
+    # Remove empty elements that are not headings or block-level content
+    for elem in main_container.find_all(lambda e: (e.name not in ['h1','h2','h3','h4','h5','h6','p','div','ul','ol','li','section','article','main'] and not e.get_text(strip=True))):
+        elem.decompose()
+
+    # Extract page title
+    title_elem = soup.find('title')
+    page_title = title_elem.get_text(strip=True) if title_elem else ''
+
+    # Extract meta description
+    meta_desc = ''
+    desc_tag = soup.find('meta', attrs={"name": "description"})
+    if desc_tag and desc_tag.get('content'):
+        meta_desc = desc_tag['content'].strip()
+
+    # Convert main content to text
+    # We'll use get_text with a separator to maintain some structure
+    # but we need to carefully handle headings.
+    # Let's extract text in a structured way:
+    # We'll join block-level elements with newlines, and strip excess whitespace.
+    block_elements = ['p','h1','h2','h3','h4','h5','h6','li','section','article','main','div']
+    text_chunks = []
+    for elem in main_container.find_all(block_elements):
+        # Get the text, strip whitespace
+        block_text = elem.get_text(" ", strip=True)
+        if block_text:
+            text_chunks.append(block_text)
+
+    cleaned_text = "\n\n".join(text_chunks)
+
+    if not cleaned_text.strip():
+        # If no text found, return a default message
+        return "No readable content found on the webpage."
+
+    # Construct final output
+    output_parts = []
+    if page_title:
+        output_parts.append(f"Title: {page_title}")
+    if meta_desc:
+        output_parts.append(f"Description: {meta_desc}")
+    output_parts.append("Content:")
+    output_parts.append(cleaned_text)
+
+    final_output = "\n\n".join(output_parts)
+
+    return final_output
+
+
+def best_time(function, argument, runs):
+    best, output = float("inf"), None
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main(paths):
+    warnings.filterwarnings("ignore")  # bs4 deprecation warnings from the legacy code
+    print(f"{'page':40s} {'size':>8s} {'old ms':>8s} {'old tok':>8s} {'new ms':>8s} {'new tok':>8s}")
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        runs = 1 if len(data) > LARGE_PAGE else RUNS
+        old_seconds, old = best_time(lambda d: legacy_extract(d.decode("utf-8", "replace")), data, runs)
+        new_seconds, new = best_time(lambda d: extract_page(d).render(), data, runs)
+        print(
+            f"{os.path.basename(path)[:40]:40s} {len(data) / 1024:7.0f}K "
+            f"{old_seconds * 1000:8.0f} {estimate_text_tokens(old):8d} "
+            f"{new_seconds * 1000:8.0f} {estimate_text_tokens(new):8d}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    main(sys.argv[1:])
@@ -5,7 +5,9 @@ from rich.markdown import Markdown
 from rich.live import Live
 from rich.spinner import Spinner
 from rich.panel import Panel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import copy
 import importlib
 import inspect
 import pkgutil
@@ -13,17 +15,30 @@ import os
 import json
 import sys
 import logging
-import requests
 from dotenv import load_dotenv
-import ollama  # Add ollama import
 import re
+import time
 import uuid
+from pathlib import Path
 
 from config import Config
-from tools.base import BaseTool, ProviderContext  # Remove get_tools import
+from tools.base import BaseTool, ProviderContext, unwrap_result  # Remove get_tools import
+from tools.filecontentreadertool import FileContentReaderTool
 from prompt_toolkit import prompt
 from prompt_toolkit.styles import Style
 from prompts.system_prompts import SystemPrompts
+from omni_core.config import ProviderConfig
+from omni_core.prompt import SystemPromptBuilder
+from omni_core.repomap import get_repo_map
+from omni_core.context import (
+    ContextManager, SlidingWindowPolicy, SummaryPolicy, ToolResultElisionPolicy, estimate_tokens
+)
+from omni_core.providers import cborg
+from omni_core.providers.anthropic import AnthropicProvider
+from omni_core.providers.ollama import OllamaProvider
+from omni_core.runner import run_sync, iterate_sync
+from omni_core.scheduler import ToolScheduler
+from tool_registry import ReloadReport, ToolManifest, ToolRegistry
 
 # Load environment variables
 load_dotenv()
@@ -44,24 +59,29 @@ class Assistant:
     - Tool execution upon request from model responses.
     """
 
-    def __init__(self, provider='anthropic'):
-        """Initialize the assistant with the specified provider"""
+    def __init__(self, provider='anthropic', registry=None):
+        """
+        Initialize the assistant with the specified provider.
+        registry can be a ToolRegistry already loaded for this provider,
+        which skips importing the tool modules again.
+        """
         self._provider = None  # Private provider field
         self.conversation_history: List[Dict[str, Any]] = []
         self.console = Console()
         self.thinking_enabled = getattr(Config, 'ENABLE_THINKING', False)
         self.temperature = getattr(Config, 'DEFAULT_TEMPERATURE', 0.7)
         self.total_tokens_used = 0
+        self.max_tool_rounds = getattr(Config, 'MAX_TOOL_ROUNDS', 10)
+        self.tool_scheduler = ToolScheduler(getattr(Config, 'MAX_PARALLEL_TOOLS', 8))
+        self.prompt_builder = SystemPromptBuilder(SystemPrompts.DEFAULT, SystemPrompts.TOOL_USAGE)
+        self.repo_map = ""  # Outline of the working directory, refreshed every message
         
         # Set provider first
         self.provider = provider
+        self.context = self._create_context_manager()
         # Then load tools with proper provider context
-        self.provider_context = ProviderContext(
-            provider_type=self.provider,
-            model=self.model,
-            parameters={'temperature': self.temperature}
-        )
-        self.tools = self._load_tools()
+        self.provider_context = self._create_provider_context()
+        self.set_tool_registry(registry if registry is not None else self._load_tools())
 
     @property
     def provider(self):
@@ -92,322 +112,499 @@ class Assistant:
 
         self._provider = value
 
+    def _create_provider_context(self) -> ProviderContext:
+        """
+        Describe the current provider and model to the tools loaded for it.
+        """
+        return ProviderContext(
+            provider_type=self.provider,
+            model=self.model,
+            parameters={'temperature': self.temperature}
+        )
+
+    def _create_context_manager(self) -> ContextManager:
+        """
+        Build the context manager that keeps the history sent with each
+        request within Config.MAX_CONTEXT_TOKENS. Turns that no longer fit
+        are summarized in the background when Config.CONTEXT_SUMMARY_MODEL is set.
+        """
+        policies = [ToolResultElisionPolicy()]
+        if getattr(Config, 'CONTEXT_SUMMARY_MODEL', None):
+            policies.append(SummaryPolicy(self._summarize_turns))
+        policies.append(SlidingWindowPolicy())
+        return ContextManager(getattr(Config, 'MAX_CONTEXT_TOKENS', 100000), policies)
+
+    def _context_window(self, system_prompt: str) -> List[Dict[str, Any]]:
+        """
+        Return the part of the conversation history that fits the context
+        budget next to the system prompt and the tool specs.
+        """
+        reserve_tokens = estimate_tokens({'role': 'system', 'content': system_prompt})
+        reserve_tokens += estimate_tokens({'role': 'system', 'content': json.dumps(self.tools)})
+        return self.context.assemble(self.conversation_history, reserve_tokens=reserve_tokens)
+
+    async def _summarize_turns(self, messages: List[Dict[str, Any]], previous: str) -> str:
+        """
+        Summarize turns dropped from the context window with
+        Config.CONTEXT_SUMMARY_MODEL, folding in the previous summary.
+        """
+        transcript = []
+        if previous:
+            transcript.append(f"Summary so far:\n{previous}")
+        for msg in messages:
+            content = msg.get('content', '')
+            if isinstance(content, list):
+                content = ' '.join(part.get('text', '') for part in content if isinstance(part, dict))
+            transcript.append(f"{msg.get('role')}: {content}")
+        request = [
+            {'role': 'system', 'content': SystemPrompts.CONTEXT_SUMMARY},
+            {'role': 'user', 'content': '\n\n'.join(transcript)}
+        ]
+
+        model = Config.CONTEXT_SUMMARY_MODEL
+        if self.provider == 'anthropic':
+            result = await self._anthropic_provider().chat_completion(request, model=model, max_tokens=1000)
+        elif self.provider == 'cborg':
+            result = await cborg.chat_completion(request, model=model, temperature=0.2)
+        else:
+            provider = OllamaProvider(ProviderConfig(name='ollama', model=model, base_url=self.base_url))
+            result = await provider.chat(request, temperature=0.2)
+        return result['choices'][0]['message']['content']
+
+    def _prepare_messages(self) -> List[Dict[str, Any]]:
+        """
+        Flatten the conversation history for the chat completion APIs.
+        Tool messages are only sent together with the last assistant message
+        that requested them. Older turns are left out once the history
+        exceeds the context budget.
+        """
+        messages = []
+        last_assistant_with_tools = None
+        history = self._context_window(self._system_prompt())
+        
+        for msg in history:
+            content = msg.get('content', '')
+            role = msg.get('role', '')
+            
+            # For assistant messages with tool calls, track the last one
+            if role == 'assistant' and 'tool_calls' in msg:
+                last_assistant_with_tools = {
+                    'role': role,
+                    'content': content,
+                    'tool_calls': msg['tool_calls']
+                }
+                continue
+            
+            # For regular messages just pass content
+            if role != 'tool':  # Skip tool messages as they'll be added with their assistant
+                messages.append({
+                    'role': role,
+                    'content': content
+                })
+        
+        # If we have a pending assistant+tools message and it's followed by tool results,
+        # add them together
+        if last_assistant_with_tools:
+            messages.append(last_assistant_with_tools)
+            # Add the corresponding tool results
+            tool_results = [msg for msg in history 
+                          if msg.get('role') == 'tool' and 
+                          any(call['id'] == msg.get('tool_call_id') 
+                              for call in last_assistant_with_tools['tool_calls'])]
+            messages.extend(tool_results)
+
+        return messages
+
+    def _prepare_ollama_messages(self) -> List[Dict[str, Any]]:
+        """
+        Build the Ollama message list: a system prompt advertising the tools
+        in the <tool_calls> text format, followed by the text-only history.
+        """
+        messages = []
+        
+        # Extract just the function part for each tool
+        ollama_tools = [tool['function'] for tool in self.tools]
+        
+        # Create dynamic tool list for system prompt
+        tool_descriptions = "\n    Available Tools:\n"
+        for tool in ollama_tools:
+            tool_descriptions += f"    - {tool['name']}: {tool['description']}\n"
+        
+        # Add system prompt first with dynamic tool list
+        messages.append({
+            'role': 'system',
+            'content': f"{SystemPrompts.OLLAMA_DEFAULT}\n\n{tool_descriptions}\n\nTo use a tool, format your response like this:\n\n<tool_calls>\n{{\n    \"type\": \"function\",\n    \"function\": {{\n        \"name\": \"tool_name\",\n        \"parameters\": {{\n            // parameters here\n        }}\n    }}\n}}\n</tool_calls>"
+        })
+        
+        # Add as much conversation history as fits the context budget
+        for msg in self._context_window(messages[0]['content']):
+            content = msg['content']
+            if isinstance(content, list):
+                # Handle multimodal content
+                text_parts = []
+                for part in content:
+                    if part.get('type') == 'text':
+                        text_parts.append(part['text'])
+                content = ' '.join(text_parts)
+            messages.append({
+                'role': msg['role'],
+                'content': content
+            })
+
+        return messages
+
+    def _system_prompt(self) -> str:
+        """Return the system prompt sent with every completion request, built once."""
+        return self.prompt_builder.build(repo_map=self.repo_map)
+
+    def _render_repo_map(self) -> str:
+        """
+        Return the outline of the working directory's Python symbols that
+        fits Config.REPO_MAP_TOKENS, or an empty string if disabled.
+        """
+        max_tokens = getattr(Config, 'REPO_MAP_TOKENS', 0)
+        if max_tokens <= 0:
+            return ""
+        return get_repo_map(os.getcwd(), skip=FileContentReaderTool.skip_name).outline(max_tokens)
+
+    async def _arefresh_repo_map(self) -> None:
+        """
+        Refresh the repository map off the event loop. Only files changed
+        since the last refresh are parsed again.
+        """
+        try:
+            self.repo_map = await asyncio.to_thread(self._render_repo_map)
+        except Exception as e:
+            logging.warning(f"Could not build the repository map: {str(e)}")
+
+    def _anthropic_provider(self) -> AnthropicProvider:
+        """Return an Anthropic provider for the current settings."""
+        return AnthropicProvider(base_url=f"{self.base_url}/v1")
+
+    def _ollama_provider(self) -> OllamaProvider:
+        """Return an Ollama provider for the current model."""
+        return OllamaProvider(ProviderConfig(name='ollama', model=self.model, base_url=self.base_url))
+
+    def _track_usage(self, usage: Dict[str, Any]) -> None:
+        """
+        Add the tokens reported by a provider to the running total.
+        CBORG reports total_tokens, Anthropic reports input and output tokens.
+        """
+        if not usage:
+            return
+        if 'total_tokens' in usage:
+            self.total_tokens_used += usage['total_tokens'] or 0
+        else:
+            self.total_tokens_used += usage.get('input_tokens', 0) + usage.get('output_tokens', 0)
+
     def _get_completion(self):
         """
         Get a completion from the selected provider.
         Handles both text-only and multimodal messages.
+        Synchronous wrapper around _aget_completion.
         """
         try:
-            if self.provider == 'anthropic':
-                # Prepare conversation history for Anthropic
-                messages = []
-                last_assistant_with_tools = None
-                
-                for msg in self.conversation_history:
-                    content = msg.get('content', '')
-                    role = msg.get('role', '')
-                    
-                    # For assistant messages with tool calls, track the last one
-                    if role == 'assistant' and 'tool_calls' in msg:
-                        last_assistant_with_tools = {
-                            'role': role,
-                            'content': content,
-                            'tool_calls': msg['tool_calls']
-                        }
-                        continue
-                    
-                    # For regular messages just pass content
-                    if role != 'tool':  # Skip tool messages as they'll be added with their assistant
-                        messages.append({
-                            'role': role,
-                            'content': content
-                        })
-                
-                # If we have a pending assistant+tools message and it's followed by tool results,
-                # add them together
-                if last_assistant_with_tools:
-                    messages.append(last_assistant_with_tools)
-                    # Add the corresponding tool results
-                    tool_results = [msg for msg in self.conversation_history 
-                                  if msg.get('role') == 'tool' and 
-                                  any(call['id'] == msg.get('tool_call_id') 
-                                      for call in last_assistant_with_tools['tool_calls'])]
-                    messages.extend(tool_results)
-
-                # Make request to Anthropic API
-                response = requests.post(
-                    f"{self.base_url}/v1/messages",
-                    headers={
-                        'anthropic-version': '2023-06-01',
-                        'x-api-key': self.api_key,
-                        'Content-Type': 'application/json'
-                    },
-                    json={
-                        'model': self.model,
-                        'messages': [
-                            {'role': 'system', 'content': f"{SystemPrompts.DEFAULT}\n\n{SystemPrompts.TOOL_USAGE}"},
-                            *messages
-                        ],
-                        'temperature': self.temperature,
-                        'tools': self.tools,
-                        'tool_choice': 'auto'  # Enable automatic tool choice
-                    }
-                )
-                response.raise_for_status()
-                return response.json()
-
-            elif self.provider == 'cborg':
-                # Prepare conversation history for CBORG
-                messages = []
-                last_assistant_with_tools = None
-                
-                for msg in self.conversation_history:
-                    content = msg.get('content', '')
-                    role = msg.get('role', '')
-                    
-                    # For assistant messages with tool calls, track the last one
-                    if role == 'assistant' and 'tool_calls' in msg:
-                        last_assistant_with_tools = {
-                            'role': role,
-                            'content': content,
-                            'tool_calls': msg['tool_calls']
-                        }
-                        continue
-                    
-                    # For regular messages just pass content
-                    if role != 'tool':  # Skip tool messages as they'll be added with their assistant
-                        messages.append({
-                            'role': role,
-                            'content': content
-                        })
-                
-                # If we have a pending assistant+tools message and it's followed by tool results,
-                # add them together
-                if last_assistant_with_tools:
-                    messages.append(last_assistant_with_tools)
-                    # Add the corresponding tool results
-                    tool_results = [msg for msg in self.conversation_history 
-                                  if msg.get('role') == 'tool' and 
-                                  any(call['id'] == msg.get('tool_call_id') 
-                                      for call in last_assistant_with_tools['tool_calls'])]
-                    messages.extend(tool_results)
-
-                # Make request to CBORG API
-                response = requests.post(
-                    f"{self.base_url}/v1/chat/completions",
-                    headers={
-                        'Authorization': f'Bearer {self.api_key}',
-                        'Content-Type': 'application/json'
-                    },
-                    json={
-                        'model': self.model,
-                        'messages': [
-                            {'role': 'system', 'content': f"{SystemPrompts.DEFAULT}\n\n{SystemPrompts.TOOL_USAGE}"},
-                            *messages
-                        ],
-                        'temperature': self.temperature,
-                        'stream': False,
-                        'tools': self.tools,
-                        'tool_choice': 'auto'  # Enable automatic tool choice
-                    }
-                )
-                
-                if response.status_code != 200:
-                    raise Exception(f"CBORG API error: {response.text}")
-                
-                result = response.json()
-                
-                # Check for tool usage
-                assistant_message = result['choices'][0]['message']
-                tool_calls = assistant_message.get('tool_calls', [])
-                if tool_calls:
-                    self.console.print("\n[bold yellow]  Handling Tool Use...[/bold yellow]\n")
-                    
-                    tool_results = []
-                    for tool_call in tool_calls:
-                        # Create a tool use object compatible with our _execute_tool method
-                        tool_call = {
-                            'id': str(uuid.uuid4()),  # Generate a unique ID
-                            'type': 'function',
-                            'function': {
-                                'name': tool_call['function']['name'],
-                                'parameters': tool_call['function']['parameters']
-                            }
-                        }
-                        
-                        # Create tool use object
-                        tool_use = type('ToolUse', (), {
-                            'name': tool_call['function']['name'],
-                            'input': tool_call['function']['parameters']  # Use parameters directly
-                        })
-                        
-                        # Execute the tool
-                        self.console.print("\n[bold yellow]  Handling Tool Use...[/bold yellow]\n")
-                        result = self._execute_tool(tool_use)
-                        
-                        # Format tool result
-                        tool_result = {
-                            'role': 'tool',
-                            'content': str(result),
-                            'tool_call_id': tool_call['id'],
-                            'name': tool_call['function']['name']
-                        }
-                        
-                        # Add results to conversation history
-                        self.conversation_history.append({
-                            "role": "assistant",
-                            "content": assistant_message.get('content', '')
-                        })
-                        # Add each tool result as a separate message
-                        for tool_result in [tool_result]:
-                            self.conversation_history.append(tool_result)
-                        return self._get_completion()  # Recursive call to continue
-                
-                # If no tool usage, just return the response
+            return run_sync(self._aget_completion())
+        except Exception as e:
+            logging.error(f"Error in _get_completion: {str(e)}")
+            return f"Error: {str(e)}"
+
+    async def _aget_completion(self) -> str:
+        """
+        Get a completion from the selected provider, executing any tools the
+        model asks for until it produces a final answer.
+        """
+        for _ in range(self.max_tool_rounds):
+            content, tool_calls = await self._acomplete_round()
+            if not tool_calls:
                 self.conversation_history.append({
                     'role': 'assistant',
-                    'content': assistant_message.get('content', '')
+                    'content': content
                 })
-                
-                # Track token usage
-                if 'usage' in result:
-                    self.total_tokens_used += result['usage']['total_tokens']
-                
-                return assistant_message.get('content', '')
-
-            elif self.provider == 'ollama':
-                try:
-                    # Prepare conversation history for Ollama
-                    messages = []
-                    
-                    # Extract just the function part for each tool
-                    ollama_tools = [tool['function'] for tool in self.tools]
-                    
-                    # Create dynamic tool list for system prompt
-                    tool_descriptions = "\n    Available Tools:\n"
-                    for tool in ollama_tools:
-                        tool_descriptions += f"    - {tool['name']}: {tool['description']}\n"
-                    
-                    # Add system prompt first with dynamic tool list
-                    messages.append({
-                        'role': 'system',
-                        'content': f"{SystemPrompts.OLLAMA_DEFAULT}\n\n{tool_descriptions}\n\nTo use a tool, format your response like this:\n\n<tool_calls>\n{{\n    \"type\": \"function\",\n    \"function\": {{\n        \"name\": \"tool_name\",\n        \"parameters\": {{\n            // parameters here\n        }}\n    }}\n}}\n</tool_calls>"
+                return content
+
+            self.console.print("\n[bold yellow]  Handling Tool Use...[/bold yellow]\n")
+            await self._arun_tool_calls(content, tool_calls)
+
+        return self._tool_rounds_exhausted()
+
+    async def _acomplete_round(self) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Request a single completion from the selected provider.
+        Returns the assistant's text and the tool calls it requested.
+        """
+        if self.provider == 'anthropic':
+            result = await self._anthropic_provider().chat_completion(
+                [{'role': 'system', 'content': self._system_prompt()}, *self._prepare_messages()],
+                model=self.model,
+                temperature=self.temperature,
+                max_tokens=Config.MAX_TOKENS,
+                tools=self.tools,
+                tool_choice='auto',
+                cache_prompt=True
+            )
+            self._track_usage(result.get('usage'))
+            assistant_message = result['choices'][0]['message']
+            return assistant_message.get('content') or '', self._message_tool_calls(assistant_message)
+
+        elif self.provider == 'cborg':
+            result = await cborg.chat_completion(
+                [{'role': 'system', 'content': self._system_prompt()}, *self._prepare_messages()],
+                model=self.model,
+                temperature=self.temperature,
+                tools=self.tools,
+                tool_choice='auto'
+            )
+            self._track_usage(result.get('usage'))
+            assistant_message = result['choices'][0]['message']
+            return assistant_message.get('content') or '', self._message_tool_calls(assistant_message)
+
+        elif self.provider == 'ollama':
+            result = await self._ollama_provider().chat(
+                self._prepare_ollama_messages(),
+                temperature=self.temperature,
+                top_p=0.9
+            )
+            content = result['choices'][0]['message']['content']
+            return content, self._parse_ollama_tool_calls(content)
+
+        raise ValueError(f"Unsupported provider: {self.provider}")
+
+    @staticmethod
+    def _message_tool_calls(message: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Return the OpenAI-style tool calls of a completion message, giving an
+        id to any call that lacks one.
+        """
+        return [
+            {
+                'id': tool_call.get('id') or str(uuid.uuid4()),
+                'type': 'function',
+                'function': tool_call['function']
+            }
+            for tool_call in message.get('tool_calls') or []
+        ]
+
+    async def _arun_tool_calls(self, content: str, tool_calls: List[Dict[str, Any]]) -> None:
+        """
+        Record the assistant turn that requested tool_calls, execute the calls
+        and append their results to the conversation history in request order.
+        Read-only tools run concurrently; the results go back to the model in
+        a single follow-up request.
+        """
+        assistant_message = {
+            'role': 'assistant',
+            'content': content
+        }
+        if self.provider in ('cborg', 'anthropic'):
+            assistant_message['tool_calls'] = tool_calls
+        self.conversation_history.append(assistant_message)
+
+        tool_uses = [
+            type('ToolUse', (), {
+                'name': tool_call['function']['name'],
+                'input': self._parse_tool_arguments(tool_call['function'])
+            })
+            for tool_call in tool_calls
+        ]
+        results = await self.tool_scheduler.run(
+            tool_uses, self._aexecute_tool, lambda tool_use: self._is_read_only_tool(tool_use.name)
+        )
+        for tool_call, tool_use, result in zip(tool_calls, tool_uses, results):
+            self.conversation_history.append({
+                'role': 'tool',
+                'content': str(result),
+                'tool_call_id': tool_call['id'],
+                'name': tool_use.name
+            })
+
+    def _is_read_only_tool(self, name: str) -> bool:
+        """
+        Return True if the named tool may run alongside other tool calls.
+        The flag comes from the registry, so a lazily registered tool is not
+        imported on the event loop just to classify its call.
+        """
+        return self.tool_registry.is_read_only(name)
+
+    def _tool_rounds_exhausted(self) -> str:
+        """
+        Stop a turn that keeps requesting tools and tell the user why.
+        """
+        message = f"Stopped after {self.max_tool_rounds} rounds of tool use without a final answer."
+        logging.error(message)
+        self.conversation_history.append({
+            'role': 'assistant',
+            'content': message
+        })
+        return message
+
+    async def _astream_completion(self):
+        """
+        Stream a completion from the selected provider.
+        Yields event dicts: {'type': 'token', 'content': ...} for generated text
+        and {'type': 'tool', 'name': ...} whenever a tool is executed. Tool calls
+        are executed as soon as the model finishes requesting them and the
+        conversation continues in the same stream.
+        """
+        for _ in range(self.max_tool_rounds):
+            result: Dict[str, Any] = {}
+            async for event in self._astream_round(result):
+                yield event
+
+            if not result['tool_calls']:
+                self.conversation_history.append({
+                    'role': 'assistant',
+                    'content': result['content']
+                })
+                return
+
+            for tool_call in result['tool_calls']:
+                yield {'type': 'tool', 'name': tool_call['function']['name']}
+            await self._arun_tool_calls(result['content'], result['tool_calls'])
+
+        yield {'type': 'token', 'content': self._tool_rounds_exhausted()}
+
+    async def _astream_round(self, result: Dict[str, Any]):
+        """
+        Stream a single completion from the selected provider, yielding token
+        events. The full text and any tool calls are stored in result under
+        'content' and 'tool_calls' once the stream ends.
+        """
+        content_parts = []
+        tool_calls: List[Dict[str, Any]] = []
+
+        if self.provider == 'cborg':
+            # Tool calls arrive as deltas keyed by index
+            pending_calls: Dict[int, Dict[str, Any]] = {}
+            async for chunk in cborg.stream_chat_completion(
+                [{'role': 'system', 'content': self._system_prompt()}, *self._prepare_messages()],
+                model=self.model,
+                temperature=self.temperature,
+                tools=self.tools,
+                tool_choice='auto'
+            ):
+                self._track_usage(chunk.get('usage'))
+                choices = chunk.get('choices') or []
+                if not choices:
+                    continue
+                delta = choices[0].get('delta') or {}
+                if delta.get('content'):
+                    content_parts.append(delta['content'])
+                    yield {'type': 'token', 'content': delta['content']}
+                for call_delta in delta.get('tool_calls') or []:
+                    call = pending_calls.setdefault(call_delta.get('index', 0), {
+                        'id': None,
+                        'type': 'function',
+                        'function': {'name': '', 'arguments': ''}
                     })
-                    
-                    # Add conversation history
-                    for msg in self.conversation_history:
-                        content = msg['content']
-                        if isinstance(content, list):
-                            # Handle multimodal content
-                            text_parts = []
-                            for part in content:
-                                if part.get('type') == 'text':
-                                    text_parts.append(part['text'])
-                            content = ' '.join(text_parts)
-                        messages.append({
-                            'role': msg['role'],
-                            'content': content
-                        })
-
-                    # Create Ollama client and make request
-                    client = ollama.Client(host='http://localhost:11434')
-                    
-                    print("[DEBUG] Tools passed to Ollama:")
-                    for tool in ollama_tools:
-                        print(f"  - {tool['name']}: {tool['description'][:60]}...")
-                    
-                    response = client.chat(
-                        model=self.model,
-                        messages=messages,
-                        stream=False,
-                        options={
-                            'temperature': self.temperature,
-                            'top_p': 0.9,
-                            'tools': ollama_tools,  # Pass just the function part
-                            'tool_choice': 'auto'  # Enable automatic tool choice
-                        }
-                    )
-
-                    # Check for tool usage in the response text
-                    response_content = response['message']['content']
-                    print("[DEBUG] Response content:", response_content[:200], "...")  # Show first 200 chars
-                    tool_call_match = re.search(r'<tool_calls>(.*?)</tool_calls>', response_content, re.DOTALL)
-                    
-                    if tool_call_match:
-                        print("[DEBUG] Found tool call")
-                        try:
-                            # Parse the tool call JSON
-                            tool_call_text = tool_call_match.group(1).strip()
-                            print("[DEBUG] Tool call text:", tool_call_text)
-                            tool_call_json = json.loads(tool_call_text)
-                            
-                            # Validate tool call format
-                            if tool_call_json.get('type') != 'function' or 'function' not in tool_call_json:
-                                raise ValueError("Invalid tool call format: missing 'type' or 'function' field")
-                            
-                            # Create a tool call object
-                            tool_call = {
-                                'id': str(uuid.uuid4()),  # Generate a unique ID
-                                'type': 'function',
-                                'function': {
-                                    'name': tool_call_json['function']['name'],
-                                    'parameters': tool_call_json['function']['parameters']
-                                }
-                            }
-                            
-                            # Create tool use object
-                            tool_use = type('ToolUse', (), {
-                                'name': tool_call['function']['name'],
-                                'input': tool_call['function']['parameters']  # Use parameters directly
-                            })
-                            
-                            # Execute the tool
-                            self.console.print("\n[bold yellow]  Handling Tool Use...[/bold yellow]\n")
-                            result = self._execute_tool(tool_use)
-                            
-                            # Format tool result
-                            tool_result = {
-                                'role': 'tool',
-                                'content': str(result),
-                                'tool_call_id': tool_call['id'],
-                                'name': tool_call['function']['name']
-                            }
-                            
-                            # Add results to conversation history
-                            self.conversation_history.append({
-                                "role": "assistant",
-                                "content": response_content
-                            })
-                            self.conversation_history.append(tool_result)
-                            return self._get_completion()  # Recursive call to continue
-                        except json.JSONDecodeError as e:
-                            logging.error(f"Failed to parse tool call JSON: {str(e)}")
-                            return f"Error: Invalid tool call format - {str(e)}"
-                        except ValueError as e:
-                            logging.error(f"Invalid tool call format: {str(e)}")
-                            return f"Error: {str(e)}"
-                        except Exception as e:
-                            logging.error(f"Error handling tool call: {str(e)}")
-                            return f"Error handling tool call: {str(e)}"
-
-                    # If no tool usage, just return the response
-                    assistant_message = {
-                        'role': 'assistant',
-                        'content': response_content
-                    }
-                    self.conversation_history.append(assistant_message)
-                    return response_content
-
-                except Exception as e:
-                    logging.error(f"Ollama error: {str(e)}")
-                    return f"Error: {str(e)}"
+                    if call_delta.get('id'):
+                        call['id'] = call_delta['id']
+                    function = call_delta.get('function') or {}
+                    call['function']['name'] += function.get('name') or ''
+                    call['function']['arguments'] += function.get('arguments') or ''
+
+            for index in sorted(pending_calls):
+                call = pending_calls[index]
+                call['id'] = call['id'] or str(uuid.uuid4())
+                tool_calls.append(call)
+
+        elif self.provider == 'anthropic':
+            # tool_use blocks start with their id and name; the input arrives as JSON pieces
+            pending_uses: Dict[int, Dict[str, Any]] = {}
+            async for event in self._anthropic_provider().stream_chat_completion(
+                [{'role': 'system', 'content': self._system_prompt()}, *self._prepare_messages()],
+                model=self.model,
+                temperature=self.temperature,
+                max_tokens=Config.MAX_TOKENS,
+                tools=self.tools,
+                tool_choice='auto',
+                cache_prompt=True
+            ):
+                if event.get('type') == 'content_block_start':
+                    block = event.get('content_block') or {}
+                    if block.get('type') == 'tool_use':
+                        pending_uses[event.get('index', 0)] = {**block, 'partial_json': []}
+                elif event.get('type') == 'content_block_delta':
+                    delta = event.get('delta') or {}
+                    if delta.get('type') == 'input_json_delta':
+                        use = pending_uses.get(event.get('index', 0))
+                        if use is not None:
+                            use['partial_json'].append(delta.get('partial_json') or '')
+                    elif delta.get('text'):
+                        content_parts.append(delta['text'])
+                        yield {'type': 'token', 'content': delta['text']}
+                elif event.get('type') == 'message_start':
+                    usage = (event.get('message') or {}).get('usage') or {}
+                    self.total_tokens_used += usage.get('input_tokens', 0)
+                elif event.get('type') == 'message_delta':
+                    self.total_tokens_used += (event.get('usage') or {}).get('output_tokens', 0)
+
+            for index in sorted(pending_uses):
+                use = pending_uses[index]
+                arguments = ''.join(use.pop('partial_json'))
+                if arguments.strip():
+                    use['input'] = self._parse_tool_arguments({'arguments': arguments})
+                tool_calls.append(AnthropicProvider._from_tool_use(use))
+
+        elif self.provider == 'ollama':
+            async for chunk in self._ollama_provider().stream_chat_completion(
+                self._prepare_ollama_messages(),
+                temperature=self.temperature,
+                top_p=0.9
+            ):
+                text = (chunk.get('message') or {}).get('content')
+                if text:
+                    content_parts.append(text)
+                    yield {'type': 'token', 'content': text}
 
-            else:
-                raise ValueError(f"Unsupported provider: {self.provider}")
+        else:
+            raise ValueError(f"Unsupported provider: {self.provider}")
 
-        except Exception as e:
-            logging.error(f"Error in _get_completion: {str(e)}")
-            return f"Error: {str(e)}"
+        result['content'] = ''.join(content_parts)
+        if self.provider == 'ollama':
+            tool_calls = self._parse_ollama_tool_calls(result['content'])
+        result['tool_calls'] = tool_calls
+
+    @staticmethod
+    def _parse_tool_arguments(function: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Return the input of a tool call, accepting both 'parameters' dicts and
+        OpenAI-style JSON encoded 'arguments'.
+        """
+        if 'parameters' in function:
+            return function['parameters'] or {}
+        arguments = function.get('arguments') or {}
+        if isinstance(arguments, str):
+            try:
+                return json.loads(arguments) if arguments.strip() else {}
+            except json.JSONDecodeError:
+                logging.error(f"Failed to parse tool arguments: {arguments[:200]}")
+                return {}
+        return arguments
+
+    def _parse_ollama_tool_calls(self, content: str) -> List[Dict[str, Any]]:
+        """
+        Extract a <tool_calls> block from an Ollama response, if present.
+        """
+        tool_call_match = re.search(r'<tool_calls>(.*?)</tool_calls>', content, re.DOTALL)
+        if not tool_call_match:
+            return []
+        try:
+            tool_call_json = json.loads(tool_call_match.group(1).strip())
+        except json.JSONDecodeError as e:
+            logging.error(f"Failed to parse tool call JSON: {str(e)}")
+            return []
+        if tool_call_json.get('type') != 'function' or 'function' not in tool_call_json:
+            logging.error("Invalid tool call format: missing 'type' or 'function' field")
+            return []
+        return [{
+            'id': str(uuid.uuid4()),
+            'type': 'function',
+            'function': {
+                'name': tool_call_json['function']['name'],
+                'parameters': tool_call_json['function'].get('parameters', {})
+            }
+        }]
 
     def _execute_uv_install(self, package_name: str) -> bool:
         """
@@ -429,69 +626,154 @@ class Assistant:
             self.console.print(f"[red]Failed to install {package_name}. Output:[/red] {result}")
             return False
 
-    def _load_tools(self) -> List[Dict[str, Any]]:
+    def set_tool_registry(self, registry: ToolRegistry) -> None:
+        """
+        Use the tools in registry for both the specs sent to the model and
+        tool dispatch.
+        """
+        self.tool_registry = registry
+        self.tools = registry.specs
+
+    def _load_tools(self, previous: Optional[ToolRegistry] = None) -> ToolRegistry:
         """
-        Dynamically load all tool classes from the tools directory.
+        Load the tools in the tools directory.
+        Tools of modules described by the tool manifest are registered without
+        importing them; their module is imported on first use. Modules that are
+        new or changed are imported now and their manifest entry regenerated.
         If a dependency is missing, prompt the user to install it via uvpackagemanager.
         
+        Args:
+            previous: The registry being replaced. Tools of modules that have
+                not changed since it was loaded keep their instances. What
+                changed is stored in self.last_reload.
+        
         Returns:
-            A list of tools (dicts) containing their 'name', 'description', and 'input_schema'.
+            A ToolRegistry mapping tool names to instances, whose specs hold
+            each tool's 'name', 'description', and 'input_schema'.
         """
-        tools = []
+        started = time.perf_counter()
+        registry = ToolRegistry()
+        report = ReloadReport()
+        self.last_reload = report
         tools_path = getattr(Config, 'TOOLS_DIR', None)
 
         if tools_path is None:
             self.console.print("[red]TOOLS_DIR not set in Config[/red]")
-            return tools
+            return registry
 
         self.console.print(f"[cyan]Loading tools from: {tools_path}[/cyan]")
-
-        # Clear cached tool modules for fresh import
-        for module_name in list(sys.modules.keys()):
-            if module_name.startswith('tools.') and module_name != 'tools.base':
-                del sys.modules[module_name]
+        manifest = ToolManifest.load(getattr(Config, 'TOOLS_MANIFEST', Path(tools_path) / '.manifest.json'))
 
         try:
-            modules = list(pkgutil.iter_modules([str(tools_path)]))
+            modules = [m for m in pkgutil.iter_modules([str(tools_path)]) if m.name != 'base']
             self.console.print(f"[cyan]Found {len(modules)} modules[/cyan]")
             
             for module_info in modules:
-                if module_info.name == 'base':
-                    continue
+                if module_info.ispkg:
+                    module_path = Path(tools_path) / module_info.name / '__init__.py'
+                else:
+                    module_path = Path(tools_path) / f'{module_info.name}.py'
+
+                imported = not manifest.is_current(module_info.name, module_path)
+                if imported:
+                    self.console.print(f"[cyan]Loading module: {module_info.name}[/cyan]")
+                    module = self._import_tool_module(module_info.name)
+                    if module is None:
+                        continue  # Left out of the manifest so it is retried next time
+                    entries = self._extract_tools_from_module(module, registry)
+                    manifest.update(module_info.name, module_path, entries)
+
+                file_hash = manifest.file_hash_of(module_info.name)
+                registry.module_hashes[module_info.name] = file_hash
+                unchanged = previous is not None and previous.module_hashes.get(module_info.name) == file_hash
+                if previous is not None and not unchanged:
+                    if module_info.name in previous.module_hashes:
+                        report.modified.append(module_info.name)
+                        if not imported:
+                            # The manifest was refreshed elsewhere; never hand
+                            # out the copy of the module imported before the edit
+                            sys.modules.pop(f'tools.{module_info.name}', None)
+                    else:
+                        report.added.append(module_info.name)
 
-                self.console.print(f"[cyan]Loading module: {module_info.name}[/cyan]")
-
-                # Attempt loading the tool module
-                try:
-                    module = importlib.import_module(f'tools.{module_info.name}')
-                    self._extract_tools_from_module(module, tools)
-                except ImportError as e:
-                    # Handle missing dependencies
-                    missing_module = self._parse_missing_dependency(str(e))
-                    self.console.print(f"\n[yellow]Missing dependency:[/yellow] {missing_module} for tool {module_info.name}")
-                    user_response = input(f"Would you like to install {missing_module}? (y/n): ").lower()
-
-                    if user_response == 'y':
-                        success = self._execute_uv_install(missing_module)
-                        if success:
-                            # Retry loading the module after installation
-                            try:
-                                module = importlib.import_module(f'tools.{module_info.name}')
-                                self._extract_tools_from_module(module, tools)
-                            except Exception as retry_err:
-                                self.console.print(f"[red]Failed to load tool after installation: {str(retry_err)}[/red]")
-                        else:
-                            self.console.print(f"[red]Installation of {missing_module} failed. Skipping this tool.[/red]")
+                for entry in manifest.tools(module_info.name):
+                    spec = self._tool_spec(entry['name'], entry['description'], entry['input_schema'])
+                    if spec is None:
+                        continue
+                    instance = previous.loaded_tool(entry['name']) if unchanged else None
+                    if instance is not None:
+                        registry.register(instance, spec, entry['module'])
+                        report.reused += 1
                     else:
-                        self.console.print(f"[yellow]Skipping tool {module_info.name} due to missing dependency[/yellow]")
-                except Exception as mod_err:
-                    self.console.print(f"[red]Error loading module {module_info.name}:[/red] {str(mod_err)}")
+                        registry.register_lazy(
+                            entry['name'],
+                            entry['description'],
+                            spec,
+                            entry['module'],
+                            self._tool_loader(entry['module'], entry['class']),
+                            read_only=entry.get('read_only', False)
+                        )
+
+            module_names = [m.name for m in modules]
+            if previous is not None:
+                for module_name in previous.module_hashes:
+                    if module_name not in module_names:
+                        report.removed.append(module_name)
+                        sys.modules.pop(f'tools.{module_name}', None)
+
+            manifest.prune(module_names)
+            manifest.save()
 
         except Exception as overall_err:
             self.console.print(f"[red]Error in tool loading process:[/red] {str(overall_err)}")
 
-        self.console.print(f"[cyan]Successfully loaded {len(tools)} tools[/cyan]")
-        return tools
+        report.seconds = time.perf_counter() - started
+        self.console.print(f"[cyan]Successfully loaded {len(registry)} tools[/cyan]")
+        return registry
+
+    def _import_tool_module(self, module_name: str):
+        """
+        Import tools.<module_name> afresh, offering to install a missing
+        dependency. Returns None if the module cannot be imported.
+        """
+        full_name = f'tools.{module_name}'
+        # Drop the cached module so changes on disk are picked up
+        sys.modules.pop(full_name, None)
+
+        try:
+            return importlib.import_module(full_name)
+        except ImportError as e:
+            # Handle missing dependencies
+            missing_module = self._parse_missing_dependency(str(e))
+            self.console.print(f"\n[yellow]Missing dependency:[/yellow] {missing_module} for tool {module_name}")
+            user_response = input(f"Would you like to install {missing_module}? (y/n): ").lower()
+
+            if user_response == 'y':
+                success = self._execute_uv_install(missing_module)
+                if success:
+                    # Retry loading the module after installation
+                    try:
+                        return importlib.import_module(full_name)
+                    except Exception as retry_err:
+                        self.console.print(f"[red]Failed to load tool after installation: {str(retry_err)}[/red]")
+                else:
+                    self.console.print(f"[red]Installation of {missing_module} failed. Skipping this tool.[/red]")
+            else:
+                self.console.print(f"[yellow]Skipping tool {module_name} due to missing dependency[/yellow]")
+        except Exception as mod_err:
+            self.console.print(f"[red]Error loading module {module_name}:[/red] {str(mod_err)}")
+        return None
+
+    def _tool_loader(self, module_name: str, class_name: str):
+        """
+        Return a function that imports a tool's module and constructs the tool.
+        """
+        provider_context = self.provider_context  # Not self: the registry outlives this Assistant
+
+        def load():
+            module = importlib.import_module(module_name)
+            return getattr(module, class_name)(provider_context=provider_context)
+        return load
 
     def _parse_missing_dependency(self, error_str: str) -> str:
         """
@@ -504,12 +786,18 @@ class Assistant:
             missing_module = error_str
         return missing_module
 
-    def _extract_tools_from_module(self, module, tools: List[Dict[str, Any]]) -> None:
+    def _extract_tools_from_module(self, module, registry: ToolRegistry) -> List[Dict[str, Any]]:
         """
-        Given a tool module, find and instantiate all tool classes (subclasses of BaseTool).
-        Skips abstract base classes and loads their concrete implementations.
+        Given a tool module, find and instantiate all tool classes (subclasses of BaseTool)
+        and register them by name. Skips abstract base classes and loads their
+        concrete implementations.
+        
+        Returns:
+            Manifest entries (class, module, name, description, input_schema)
+            for every tool found, whether or not this provider accepts it.
         """
         provider_context = self.provider_context
+        entries = []
         print(f"Examining module {module.__name__}")
 
         for name, obj in inspect.getmembers(module):
@@ -526,49 +814,22 @@ class Assistant:
                             print(f"    Created instance")
                             if all(hasattr(tool_instance, attr) for attr in ['name', 'description', 'input_schema']):
                                 print(f"    Has all required attributes")
-                                
-                                # Validate tool attributes for CBORG
-                                if self.provider == 'cborg':
-                                    # Validate name is not empty and matches pattern
-                                    if not tool_instance.name or not tool_instance.name.strip():
-                                        print(f"    Skipping tool: empty name")
-                                        continue
-                                    if not all(c.isalnum() or c in '_-' for c in tool_instance.name):
-                                        print(f"    Skipping tool: name contains invalid characters")
-                                        continue
-                                        
-                                    # Validate description is not empty
-                                    if not tool_instance.description or not tool_instance.description.strip():
-                                        print(f"    Skipping tool: empty description")
-                                        continue
-
-                                    # Create tool spec
-                                    tool_spec = {
-                                        'name': tool_instance.name.strip(),
-                                        'description': tool_instance.description.strip(),
-                                        'parameters': tool_instance.input_schema
-                                    }
-                                    # Add both toolSpec and function fields
-                                    tools.append({
-                                        'toolSpec': tool_spec,
-                                        'function': tool_spec  # CBORG requires both fields
-                                    })
-                                else:
-                                    # Format tool for other providers
-                                    tools.append({
-                                        'type': 'function',
-                                        'function': {
-                                            'name': tool_instance.name,
-                                            'description': tool_instance.description,
-                                            'parameters': {
-                                                '$schema': 'https://json-schema.org/draft/2020-12/schema',
-                                                'type': 'object',
-                                                'properties': tool_instance.input_schema,
-                                                'required': list(tool_instance.input_schema.keys())
-                                            }
-                                        }
-                                    })
-                                print(f"    Successfully added tool: {tool_instance.name}")
+                                entries.append({
+                                    'class': obj.__name__,
+                                    'module': obj.__module__,
+                                    'name': tool_instance.name,
+                                    'description': tool_instance.description,
+                                    'input_schema': tool_instance.input_schema,
+                                    'read_only': bool(getattr(tool_instance, 'read_only', False))
+                                })
+                                tool_spec = self._tool_spec(
+                                    tool_instance.name,
+                                    tool_instance.description,
+                                    tool_instance.input_schema
+                                )
+                                if tool_spec is not None:
+                                    registry.register(tool_instance, tool_spec, module.__name__)
+                                    print(f"    Successfully added tool: {tool_instance.name}")
                             else:
                                 missing = [attr for attr in ['name', 'description', 'input_schema'] 
                                          if not hasattr(tool_instance, attr)]
@@ -577,22 +838,78 @@ class Assistant:
                             print(f"    Error initializing tool {name}: {str(tool_init_err)}")
                 else:
                     print(f"    Not a BaseTool subclass")
+        return entries
+
+    def _tool_spec(self, name: str, description: str, input_schema: Dict[str, Any]):
+        """
+        Format a tool for the current provider.
+        Returns None if the provider would reject the tool.
+        """
+        # Validate tool attributes for CBORG
+        if self.provider == 'cborg':
+            # Validate name is not empty and matches pattern
+            if not name or not name.strip():
+                print(f"    Skipping tool: empty name")
+                return None
+            if not all(c.isalnum() or c in '_-' for c in name):
+                print(f"    Skipping tool: name contains invalid characters")
+                return None
+                
+            # Validate description is not empty
+            if not description or not description.strip():
+                print(f"    Skipping tool: empty description")
+                return None
+
+            # Create tool spec
+            tool_spec = {
+                'name': name.strip(),
+                'description': description.strip(),
+                'parameters': input_schema
+            }
+            # Add both toolSpec and function fields
+            return {
+                'toolSpec': tool_spec,
+                'function': tool_spec  # CBORG requires both fields
+            }
+
+        # Format tool for other providers
+        return {
+            'type': 'function',
+            'function': {
+                'name': name,
+                'description': description,
+                'parameters': {
+                    '$schema': 'https://json-schema.org/draft/2020-12/schema',
+                    'type': 'object',
+                    'properties': input_schema,
+                    'required': list(input_schema.keys())
+                }
+            }
+        }
 
     def refresh_tools(self):
         """
         Refresh the list of tools and show newly discovered tools.
+        Only added or modified tool modules are imported again; tools from
+        unchanged modules keep their instances.
         """
-        current_tool_names = {tool['name'] for tool in self.tools}
-        self.tools = self._load_tools()
-        new_tool_names = {tool['name'] for tool in self.tools}
+        current_tool_names = set(self.tool_registry.names())
+        self.set_tool_registry(self._load_tools(previous=self.tool_registry))
+        new_tool_names = set(self.tool_registry.names())
         new_tools = new_tool_names - current_tool_names
 
+        report = self.last_reload
+        self.console.print(
+            f"\n[cyan]{report.summary()} ({report.seconds * 1000:.0f} ms, "
+            f"{report.reused} tools reused)[/cyan]"
+        )
+
         if new_tools:
             self.console.print("\n")
             for tool_name in new_tools:
-                tool_info = next((t for t in self.tools if t['name'] == tool_name), None)
-                if tool_info:
-                    description_lines = tool_info['description'].strip().split('\n')
+                description = self.tool_registry.description(tool_name)
+                if description:
+                    description_lines = description.strip().split('\n')
                     formatted_description = '\n    '.join(line.strip() for line in description_lines)
                     self.console.print(f"[bold green]NEW[/bold green] 🔧 [cyan]{tool_name}[/cyan]:\n    {formatted_description}")
         else:
@@ -603,7 +920,7 @@ class Assistant:
         Print a list of currently loaded tools.
         """
         self.console.print("\n[bold cyan]Available tools:[/bold cyan]")
-        tool_names = [tool['name'] for tool in self.tools]
+        tool_names = self.tool_registry.names()
         if tool_names:
             formatted_tools = ", ".join([f"🔧 [cyan]{name}[/cyan]" for name in tool_names])
         else:
@@ -680,65 +997,88 @@ class Assistant:
             return "[base64 data omitted]"
         return data
 
+    def _lookup_tool(self, name: str):
+        """
+        Look up a tool by name, importing its module on first use.
+        The registry may be shared with other sessions, so a tool built with
+        another Assistant's provider context is returned as a copy carrying
+        this Assistant's context.
+        Returns the tool instance and the lookup time, or None and an error message.
+        """
+        start = time.perf_counter()
+        try:
+            tool_instance = self.tool_registry.get(name)
+        except Exception as e:
+            self.console.print(f"[red]Error loading tool {name}:[/red] {str(e)}")
+            return None, f"Error: {str(e)}"
+        if tool_instance is None:
+            return None, f"Tool {name} not found"
+        if tool_instance.provider_context is not self.provider_context:
+            tool_instance = copy.copy(tool_instance)
+            tool_instance.provider_context = self.provider_context
+        return tool_instance, time.perf_counter() - start
+
     def _execute_tool(self, tool_use):
         """
         Given a tool usage request (with tool name and inputs),
-        dynamically load and execute the corresponding tool.
+        look up the loaded tool by name and execute it.
         """
-        try:
-            # Search for tool in all tool modules
-            tools_path = getattr(Config, 'TOOLS_DIR', None)
-            if not tools_path:
-                return "Error: TOOLS_DIR not set in Config"
-
-            # Attempt to find and execute the tool
-            for module_info in pkgutil.iter_modules([str(tools_path)]):
-                if module_info.name == 'base':
-                    continue
+        tool_instance, lookup = self._lookup_tool(tool_use.name)
+        if tool_instance is None:
+            return lookup
+
+        # Display tool usage if enabled
+        self._display_tool_usage(tool_use.name, tool_use.input, "Executing...")
 
-                try:
-                    module = importlib.import_module(f'tools.{module_info.name}')
-                    tool_instance = self._find_tool_instance_in_module(module, tool_use.name)
-                    
-                    if tool_instance:
-                        # Display tool usage if enabled
-                        self._display_tool_usage(tool_use.name, tool_use.input, "Executing...")
-                        
-                        # Execute the tool and get result
-                        result = tool_instance.execute(**tool_use.input)
-                        
-                        # Handle dictionary responses with 'response' key
-                        if isinstance(result, dict) and 'response' in result:
-                            return result['response']
-                        
-                        return str(result)
-                        
-                except Exception as e:
-                    self.console.print(f"[red]Error executing tool {tool_use.name}:[/red] {str(e)}")
-                    return f"Error: {str(e)}"
-
-            return f"Tool {tool_use.name} not found"
+        failed = False
+        start = time.perf_counter()
+        try:
+            # Execute the tool and get result
+            text, failed = unwrap_result(tool_instance.execute(**tool_use.input))
+            return text
 
         except Exception as e:
-            self.console.print(f"[red]Error in tool execution:[/red] {str(e)}")
+            failed = True
+            self.console.print(f"[red]Error executing tool {tool_use.name}:[/red] {str(e)}")
             return f"Error: {str(e)}"
 
-    def _find_tool_instance_in_module(self, module, tool_name: str):
+        finally:
+            self.tool_registry.record(
+                tool_use.name, lookup, time.perf_counter() - start, error=failed
+            )
+
+    async def _aexecute_tool(self, tool_use):
         """
-        Search a given module for a tool class matching tool_name and return an instance of it.
+        Execute a tool without blocking the event loop.
+        aexecute runs synchronous tools in a worker thread and gives up once
+        the tool's timeout passes, so a stuck tool cannot stall the chat.
         """
-        for name, obj in inspect.getmembers(module):
-            if (inspect.isclass(obj) and 
-                issubclass(obj, BaseTool) and 
-                obj != BaseTool and 
-                not inspect.isabstract(obj)):  # Skip abstract classes
-                try:
-                    tool_instance = obj(provider_context=self.provider_context)
-                    if tool_instance.name == tool_name:
-                        return tool_instance
-                except Exception as e:
-                    self.console.print(f"[red]Error creating tool instance {name}:[/red] {str(e)}")
-        return None
+        if self.tool_registry.is_loaded(tool_use.name):
+            tool_instance, lookup = self._lookup_tool(tool_use.name)
+        else:
+            # Importing a tool module can be slow
+            tool_instance, lookup = await asyncio.to_thread(self._lookup_tool, tool_use.name)
+        if tool_instance is None:
+            return lookup
+
+        # Display tool usage if enabled
+        self._display_tool_usage(tool_use.name, tool_use.input, "Executing...")
+
+        failed = False
+        start = time.perf_counter()
+        try:
+            text, failed = unwrap_result(await tool_instance.aexecute(**tool_use.input))
+            return text
+
+        except Exception as e:
+            failed = True
+            self.console.print(f"[red]Error executing tool {tool_use.name}:[/red] {str(e)}")
+            return f"Error: {str(e)}"
+
+        finally:
+            self.tool_registry.record(
+                tool_use.name, lookup, time.perf_counter() - start, error=failed
+            )
 
     def _display_token_usage(self, usage):
         """
@@ -767,21 +1107,51 @@ class Assistant:
 
         self.console.print("---")
 
+    def _handle_command(self, user_input) -> Optional[str]:
+        """
+        Handle the special commands. Returns the reply, or None if
+        user_input is not a command. Only text-only messages can be commands.
+        """
+        if not isinstance(user_input, str):
+            return None
+        if user_input.lower() == 'refresh':
+            self.refresh_tools()
+            return "Tools refreshed successfully!"
+        elif user_input.lower() == 'reset':
+            self.reset()
+            return "Conversation reset!"
+        elif user_input.lower() == 'quit':
+            return "Goodbye!"
+        return None
+
+    @staticmethod
+    def _is_command(user_input) -> bool:
+        """Return True if user_input is one of the special commands."""
+        return isinstance(user_input, str) and user_input.lower() in ('refresh', 'reset', 'quit')
+
     def chat(self, user_input):
         """
         Process a chat message from the user.
         user_input can be either a string (text-only) or a list (multimodal message)
+        Synchronous wrapper around achat.
         """
-        # Handle special commands only for text-only messages
-        if isinstance(user_input, str):
-            if user_input.lower() == 'refresh':
-                self.refresh_tools()
-                return "Tools refreshed successfully!"
-            elif user_input.lower() == 'reset':
-                self.reset()
-                return "Conversation reset!"
-            elif user_input.lower() == 'quit':
-                return "Goodbye!"
+        if self._is_command(user_input):
+            return self._handle_command(user_input)
+
+        # Show thinking indicator if enabled
+        if self.thinking_enabled:
+            with Live(Spinner('dots', text='Thinking...', style="cyan"), 
+                     refresh_per_second=10, transient=True):
+                return run_sync(self.achat(user_input))
+        return run_sync(self.achat(user_input))
+
+    async def achat(self, user_input):
+        """
+        Process a chat message from the user on the running event loop.
+        user_input can be either a string (text-only) or a list (multimodal message)
+        """
+        if self._is_command(user_input):
+            return await asyncio.to_thread(self._handle_command, user_input)
 
         try:
             # Add user message to conversation history
@@ -789,26 +1159,57 @@ class Assistant:
                 "role": "user",
                 "content": user_input  # This can be either string or list
             })
-
-            # Show thinking indicator if enabled
-            if self.thinking_enabled:
-                with Live(Spinner('dots', text='Thinking...', style="cyan"), 
-                         refresh_per_second=10, transient=True):
-                    response = self._get_completion()
-            else:
-                response = self._get_completion()
-
-            return response
+            await self._arefresh_repo_map()
+            return await self._aget_completion()
 
         except Exception as e:
             logging.error(f"Error in chat: {str(e)}")
             return f"Error: {str(e)}"
 
+    def chat_stream(self, user_input):
+        """
+        Process a chat message from the user and stream the reply.
+        Synchronous wrapper around achat_stream.
+        """
+        return iterate_sync(self.achat_stream(user_input))
+
+    async def achat_stream(self, user_input):
+        """
+        Process a chat message from the user and stream the reply.
+        Yields the same event dicts as _astream_completion so callers can
+        render tokens as soon as the provider produces them, followed by a
+        'usage' event with the running token total.
+        """
+        # Special commands answer immediately with a single token
+        if self._is_command(user_input):
+            reply = await asyncio.to_thread(self._handle_command, user_input)
+            yield {'type': 'token', 'content': reply}
+            return
+
+        self.conversation_history.append({
+            "role": "user",
+            "content": user_input
+        })
+
+        try:
+            await self._arefresh_repo_map()
+            async for event in self._astream_completion():
+                yield event
+            yield {
+                'type': 'usage',
+                'total_tokens': self.total_tokens_used,
+                'max_tokens': Config.MAX_CONVERSATION_TOKENS
+            }
+        except Exception as e:
+            logging.error(f"Error in chat_stream: {str(e)}")
+            yield {'type': 'error', 'content': f"Error: {str(e)}"}
+
     def reset(self):
         """
         Reset the assistant's memory and token usage.
         """
         self.conversation_history = []
+        self.context = self._create_context_manager()
         self.total_tokens_used = 0
         self.console.print("\n[bold green]🔄 Assistant memory has been reset![/bold green]")
 
@@ -24,16 +24,27 @@ class Config:
     # Token Limits
     MAX_TOKENS = 8000
     MAX_CONVERSATION_TOKENS = 200000  # Maximum tokens per conversation
+    MAX_CONTEXT_TOKENS = int(os.getenv('MAX_CONTEXT_TOKENS', 100000))  # History sent per request
+    CONTEXT_SUMMARY_MODEL = os.getenv('CONTEXT_SUMMARY_MODEL')  # Cheaper model summarizing dropped turns; unset disables
+    REPO_MAP_TOKENS = int(os.getenv('REPO_MAP_TOKENS', 1024))  # Outline of the working directory in the system prompt; 0 disables
 
     # Paths
     BASE_DIR = Path(__file__).parent
     TOOLS_DIR = BASE_DIR / "tools"
+    TOOLS_MANIFEST = BASE_DIR / ".tool_manifest.json"  # Cached tool descriptions
     PROMPTS_DIR = BASE_DIR / "prompts"
 
     # Assistant Configuration
     ENABLE_THINKING = True
     SHOW_TOOL_USAGE = True
     DEFAULT_TEMPERATURE = 0.7
+    MAX_TOOL_ROUNDS = 10  # Tool-use round trips per message before giving up
+    MAX_PARALLEL_TOOLS = 8  # Read-only tool calls from one response run concurrently
+
+    # Web Session Configuration
+    WEB_MAX_SESSIONS = int(os.getenv('WEB_MAX_SESSIONS', 64))  # Assistants kept in memory
+    WEB_SESSION_IDLE_TIMEOUT = int(os.getenv('WEB_SESSION_IDLE_TIMEOUT', 1800))  # Seconds
+    WEB_SESSION_MAX_HISTORY_BYTES = int(os.getenv('WEB_SESSION_MAX_HISTORY_BYTES', 2 * 1024 * 1024))
 
     # CBORG Configuration
     CBORG_CONFIG = {
@@ -0,0 +1,74 @@
+"""Atomic file replacement.
+
+Edits are written to a temporary file in the target's directory, flushed
+and fsynced, then renamed over the target. Readers and concurrent sessions
+see either the old or the new contents, never a partly written file, and a
+crash mid-write leaves the original in place.
+"""
+
+import os
+import shutil
+import tempfile
+import logging
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Permissions of newly created files follow the process umask, as with open()
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _fsync_directory(directory: str) -> None:
+    """Persist a rename by syncing its directory, where the platform allows it."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w", encoding: Optional[str] = "utf-8") -> Iterator[IO]:
+    """Open a temporary file that replaces path when the block exits cleanly.
+
+    Symlinks are followed, so the link target is replaced rather than the
+    link. The permissions of an existing file are kept. If the block raises,
+    the temporary file is removed and path is left untouched.
+
+    Args:
+        path: File to replace
+        mode: "w" or "wb"
+        encoding: Encoding for text mode
+    """
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    _fsync_directory(directory)
+    logger.debug(f"Replaced {path}")
+
+
+def atomic_write(path: str, data: Union[str, bytes], encoding: str = "utf-8") -> None:
+    """Replace the contents of path with data atomically."""
+    with atomic_open(path, "wb" if isinstance(data, bytes) else "w", encoding) as file:
+        file.write(data)
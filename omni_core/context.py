@@ -0,0 +1,306 @@
+"""Token-budgeted context window management for Omni Engineer.
+
+Conversation histories grow without bound, but the history sent with each
+request must fit a token budget. A ContextManager assembles the request from
+the full history by applying a chain of policies until the estimate fits:
+
+- tool results from earlier turns are elided,
+- turns dropped from the window are replaced by a summary that a cheaper
+  model writes in the background,
+- the oldest turns are dropped, keeping pinned messages (the system prompt
+  and the first user message, which usually states the goal).
+
+The history itself is never modified.
+"""
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+
+CHARS_PER_TOKEN = 4  # Rough average for English text and code
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separators
+IMAGE_TOKENS = 1000  # Flat estimate for an image part
+
+
+def estimate_tokens(message: Message) -> int:
+    """Estimate the number of tokens a message costs.
+    
+    Args:
+        message: A chat message with 'role' and 'content'
+        
+    Returns:
+        The estimated token count
+    """
+    content = message.get("content")
+    chars = 0
+    tokens = MESSAGE_OVERHEAD_TOKENS
+    if isinstance(content, str):
+        chars += len(content)
+    elif isinstance(content, list):
+        for part in content:
+            if not isinstance(part, dict):
+                chars += len(str(part))
+            elif part.get("type") == "text":
+                chars += len(part.get("text", ""))
+            elif part.get("type") in ("image", "image_url"):
+                tokens += IMAGE_TOKENS
+            else:
+                chars += len(json.dumps(part, default=str))
+    elif content is not None:
+        chars += len(str(content))
+    if message.get("tool_calls"):
+        chars += len(json.dumps(message["tool_calls"], default=str))
+    return tokens + -(-chars // CHARS_PER_TOKEN)
+
+
+def split_turns(messages: Sequence[Message]) -> Tuple[List[Message], List[List[Message]]]:
+    """Split messages into a prefix and turns.
+    
+    A turn starts at a user message and runs up to the next one, so an
+    assistant message requesting tools stays with its tool results.
+    
+    Returns:
+        The messages before the first user message, and the list of turns
+    """
+    prefix: List[Message] = []
+    turns: List[List[Message]] = []
+    for message in messages:
+        if message.get("role") == "user":
+            turns.append([message])
+        elif turns:
+            turns[-1].append(message)
+        else:
+            prefix.append(message)
+    return prefix, turns
+
+
+class ContextPolicy(ABC):
+    """Base class for context policies.
+    
+    A policy receives the messages assembled so far and returns a shorter
+    or equal list. Policies are only consulted while the request is over
+    budget.
+    """
+
+    @abstractmethod
+    def apply(self, messages: List[Message], manager: "ContextManager") -> List[Message]:
+        """Return the messages, shortened if the policy can."""
+        pass
+
+
+class ToolResultElisionPolicy(ContextPolicy):
+    """Replace the content of tool results from earlier turns with a stub."""
+
+    def __init__(self, keep_recent_turns: int = 1, min_tokens: int = 200):
+        """Initialize the policy.
+        
+        Args:
+            keep_recent_turns: Number of most recent turns left untouched
+            min_tokens: Tool results smaller than this are kept
+        """
+        self.keep_recent_turns = keep_recent_turns
+        self.min_tokens = min_tokens
+
+    def apply(self, messages: List[Message], manager: "ContextManager") -> List[Message]:
+        prefix, turns = split_turns(messages)
+        cutoff = max(len(turns) - self.keep_recent_turns, 0)
+        result = list(prefix)
+        for index, turn in enumerate(turns):
+            for message in turn:
+                if index < cutoff and message.get("role") == "tool":
+                    tokens = manager.count(message)
+                    if tokens >= self.min_tokens:
+                        message = {
+                            **message,
+                            "content": f"[Tool result elided to save context: about {tokens} tokens]"
+                        }
+                result.append(message)
+        return result
+
+
+class SummaryPolicy(ContextPolicy):
+    """Replace turns that no longer fit with a summary of them.
+    
+    Summaries are written by ``summarize`` (usually a cheaper model) in a
+    background task, so a request never waits for one: until the summary of
+    the dropped turns is ready, the request goes out without it.
+    """
+
+    def __init__(self, summarize: Callable[[List[Message], str], Awaitable[str]], max_summary_tokens: int = 1000):
+        """Initialize the policy.
+        
+        Args:
+            summarize: Coroutine function taking the turns to summarize and
+                the previous summary, returning the new summary
+            max_summary_tokens: Token budget for the summary message
+        """
+        self.summarize = summarize
+        self.max_summary_tokens = max_summary_tokens
+        self.summary = ""
+        self._covered: List[int] = []  # ids of the messages the summary covers
+        self._task: Optional[asyncio.Task] = None
+
+    def apply(self, messages: List[Message], manager: "ContextManager") -> List[Message]:
+        prefix, turns = split_turns(messages)
+        budget = manager.available - self.max_summary_tokens
+        kept = manager.fit_turns(prefix, turns, budget)
+        dropped = [m for turn in turns[:len(turns) - len(kept)] for m in turn if not manager.is_pinned(m)]
+        if not dropped:
+            return messages
+
+        self._schedule(dropped)
+        if not self.summary:
+            return messages  # Let the sliding window handle it until the summary is ready
+
+        summary_message = {
+            "role": "user",
+            "content": f"[Summary of the earlier conversation]\n{self.summary}"
+        }
+        manager.pin(summary_message)
+        pinned = [m for turn in turns[:len(turns) - len(kept)] for m in turn if manager.is_pinned(m)]
+        return prefix + pinned + [summary_message] + [m for turn in kept for m in turn]
+
+    def _schedule(self, dropped: List[Message]) -> None:
+        """Start summarizing newly dropped messages if no summary is running."""
+        dropped_ids = [id(m) for m in dropped]
+        if dropped_ids[:len(self._covered)] != self._covered:
+            # The history was reset or trimmed; start over
+            self.summary = ""
+            self._covered = []
+        new_messages = dropped[len(self._covered):]
+        if not new_messages or (self._task is not None and not self._task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Summaries need an event loop
+        self._task = loop.create_task(self._summarize(new_messages, dropped_ids))
+
+    async def _summarize(self, new_messages: List[Message], dropped_ids: List[int]) -> None:
+        try:
+            self.summary = await self.summarize(new_messages, self.summary)
+            self._covered = dropped_ids
+        except Exception as e:
+            logger.warning(f"Could not summarize earlier conversation: {str(e)}")
+
+
+class SlidingWindowPolicy(ContextPolicy):
+    """Drop the oldest turns, keeping pinned messages and the current turn."""
+
+    def apply(self, messages: List[Message], manager: "ContextManager") -> List[Message]:
+        prefix, turns = split_turns(messages)
+        kept = manager.fit_turns(prefix, turns, manager.available)
+        dropped = turns[:len(turns) - len(kept)]
+        pinned = [m for turn in dropped for m in turn if manager.is_pinned(m)]
+        return prefix + pinned + [m for turn in kept for m in turn]
+
+
+class ContextManager:
+    """Assembles requests from a conversation history within a token budget."""
+
+    def __init__(
+        self,
+        budget_tokens: int,
+        policies: Optional[List[ContextPolicy]] = None,
+        pin_first_user_message: bool = True
+    ):
+        """Initialize the context manager.
+        
+        Args:
+            budget_tokens: Maximum estimated tokens of history per request
+            policies: Policies applied in order while over budget. Defaults
+                to tool-result elision followed by a sliding window.
+            pin_first_user_message: Keep the first user message (the goal)
+                when older turns are dropped
+        """
+        self.budget_tokens = budget_tokens
+        self.policies = policies if policies is not None else [
+            ToolResultElisionPolicy(),
+            SlidingWindowPolicy()
+        ]
+        self.pin_first_user_message = pin_first_user_message
+        self.available = budget_tokens
+        self.last_tokens = 0
+        self._cache: Dict[int, Tuple[Message, int]] = {}
+        self._first_user: Optional[Message] = None
+        self._pinned: Dict[int, Message] = {}
+
+    def count(self, message: Message) -> int:
+        """Return the token estimate of a message, computed once per message."""
+        cached = self._cache.get(id(message))
+        if cached is not None and cached[0] is message:
+            return cached[1]
+        tokens = estimate_tokens(message)
+        self._cache[id(message)] = (message, tokens)
+        return tokens
+
+    def total(self, messages: Sequence[Message]) -> int:
+        """Return the token estimate of a list of messages."""
+        return sum(self.count(message) for message in messages)
+
+    def is_pinned(self, message: Message) -> bool:
+        """Return True if a message must never be dropped."""
+        if message.get("role") == "system":
+            return True
+        if self._pinned.get(id(message)) is message:
+            return True
+        return self.pin_first_user_message and message is self._first_user
+
+    def pin(self, message: Message) -> None:
+        """Keep a message added by a policy for the rest of this request."""
+        self._pinned[id(message)] = message
+
+    def fit_turns(self, prefix: List[Message], turns: List[List[Message]], budget: int) -> List[List[Message]]:
+        """Return the most recent turns that fit the budget with the prefix.
+        
+        The current (last) turn is always kept, as are the pinned messages
+        of the turns that are dropped.
+        """
+        used = self.total(prefix)
+        kept: List[List[Message]] = []
+        for index in range(len(turns) - 1, -1, -1):
+            turn_tokens = self.total(turns[index])
+            if kept and used + turn_tokens > budget:
+                # Older turns only contribute their pinned messages
+                used += sum(self.count(m) for turn in turns[:index + 1] for m in turn if self.is_pinned(m))
+                break
+            kept.insert(0, turns[index])
+            used += turn_tokens
+        return kept
+
+    def assemble(self, history: Sequence[Message], reserve_tokens: int = 0) -> List[Message]:
+        """Return the messages of history to send with the next request.
+        
+        Args:
+            history: The full conversation history
+            reserve_tokens: Tokens already used by the request outside the
+                history, such as the system prompt and tool specs
+                
+        Returns:
+            A new list of messages that fits the budget whenever possible
+        """
+        messages = list(history)
+        self._first_user = next((m for m in messages if m.get("role") == "user"), None)
+        self.available = max(self.budget_tokens - reserve_tokens, 0)
+        self._pinned = {}
+
+        # Forget estimates for messages that left the history
+        live = {id(m) for m in messages}
+        for key in [key for key in self._cache if key not in live]:
+            del self._cache[key]
+
+        tokens = self.total(messages)
+        for policy in self.policies:
+            if tokens <= self.available:
+                break
+            messages = policy.apply(messages, self)
+            tokens = self.total(messages)
+
+        self.last_tokens = tokens
+        return messages
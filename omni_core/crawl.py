@@ -0,0 +1,381 @@
+"""Concurrent batch fetching and polite crawling of web pages.
+
+A list of URLs, or seed URLs followed to a link depth, is fetched
+concurrently on the shared aiohttp pool, through the HTTP cache. Requests
+are limited per host and overall, robots.txt is checked with protego
+before a host's pages are fetched and its crawl delay honoured. Pages are
+deduplicated by normalised URL, both before fetching and after redirects,
+and by near-duplicate content: two pages whose sampled word shingles
+overlap by NEAR_DUPLICATE or more are reported once. Crawling proceeds one
+link depth at a time, so results come back in discovery order.
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import aiohttp
+from protego import Protego
+
+from .httpcache import HttpCache, get_cache, normalize_url
+from .transport import get_session
+from .webextract import DEFAULT_MAX_CHARS, ExtractedPage, extract_page
+
+logger = logging.getLogger(__name__)
+
+ROBOTS_AGENT = "OmniEngineer"
+USER_AGENT = f"Mozilla/5.0 (compatible; {ROBOTS_AGENT}/1.0)"
+CONCURRENCY = int(os.getenv("OMNI_CRAWL_CONCURRENCY", 16))
+PER_HOST = int(os.getenv("OMNI_CRAWL_PER_HOST", 4))
+MAX_PAGES = 50
+MAX_DEPTH = 3
+MAX_CRAWL_DELAY = 5.0  # Longer robots.txt crawl delays are shortened to this
+MIN_PAGE_CHARS = 4000  # Least content kept per page when the budget is split
+ROBOTS_BYTES = 512 * 1024
+PAGE_BYTES = 5 * 1024 * 1024
+SHINGLE_WORDS = 5
+SHINGLE_SAMPLE = 4  # Keep one shingle hash in this many
+NEAR_DUPLICATE = 0.9  # Jaccard similarity of sampled shingles
+SKIP_SUFFIXES = (
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".ico", ".pdf", ".zip", ".gz", ".tar",
+    ".mp3", ".mp4", ".webm", ".css", ".js", ".woff", ".woff2", ".ttf", ".exe", ".dmg",
+)
+WORD_PATTERN = re.compile(r"\w+")
+
+# Page statuses
+OK = "ok"
+ERROR = "error"
+BLOCKED = "blocked"
+DUPLICATE = "duplicate"
+
+
+@dataclass
+class PageResult:
+    """The outcome of one URL"""
+    url: str
+    depth: int = 0
+    status: str = OK
+    final_url: Optional[str] = None
+    page: Optional[ExtractedPage] = None
+    error: str = ""
+    duplicate_of: Optional[str] = None
+    from_cache: bool = False
+    fingerprint: FrozenSet[int] = frozenset()
+
+    def render(self) -> str:
+        """Format the result as the scraper reports it."""
+        head = f"=== {self.url} ==="
+        if self.status == OK:
+            return f"{head}\n{self.page.render()}"
+        if self.status == DUPLICATE:
+            return f"{head}\nSkipped: duplicate of {self.duplicate_of}"
+        if self.status == BLOCKED:
+            return f"{head}\nSkipped: disallowed by robots.txt"
+        return f"{head}\nError: {self.error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the result as a JSON-serialisable dictionary."""
+        return {
+            'url': self.url,
+            'depth': self.depth,
+            'status': self.status,
+            'final_url': self.final_url,
+            'title': self.page.title if self.page else None,
+            'error': self.error,
+            'duplicate_of': self.duplicate_of,
+            'from_cache': self.from_cache,
+        }
+
+
+@dataclass
+class CrawlReport:
+    """Every page of a batch or crawl, in discovery order"""
+    pages: List[PageResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def count(self, status: str) -> int:
+        """Number of pages with a status."""
+        return sum(1 for result in self.pages if result.status == status)
+
+    def summary(self) -> str:
+        """Describe the crawl in a line."""
+        cached = sum(1 for result in self.pages if result.status == OK and result.from_cache)
+        return (
+            f"Fetched {self.count(OK)} pages ({cached} from cache) in {self.seconds:.1f}s; "
+            f"{self.count(DUPLICATE)} duplicates, {self.count(BLOCKED)} blocked by robots.txt, "
+            f"{self.count(ERROR)} errors"
+        )
+
+    def render(self) -> str:
+        """Format the summary and every page."""
+        return "\n\n".join([self.summary()] + [result.render() for result in self.pages])
+
+
+def fingerprint(text: str) -> FrozenSet[int]:
+    """Return a sample of the hashes of a text's word shingles, for near-duplicate checks."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return frozenset({hash(tuple(words))}) if words else frozenset()
+    hashes = {hash(tuple(words[start:start + SHINGLE_WORDS])) for start in range(len(words) - SHINGLE_WORDS + 1)}
+    sampled = frozenset(value for value in hashes if value % SHINGLE_SAMPLE == 0)
+    return sampled or frozenset(hashes)
+
+
+def similarity(first: FrozenSet[int], second: FrozenSet[int]) -> float:
+    """Jaccard similarity of two fingerprints."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def _host(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc.lower()}"
+
+
+def _url_problem(url: str) -> Optional[str]:
+    """Return why a URL cannot be fetched, or None if it can."""
+    try:
+        parts = urlsplit(url)
+        parts.port  # Raises for ports out of range
+    except ValueError as e:
+        return f"invalid URL: {e}"
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return "invalid URL: not an http or https address"
+    return None
+
+
+def _crawlable(url: str) -> bool:
+    return _url_problem(url) is None and not urlsplit(url).path.lower().endswith(SKIP_SUFFIXES)
+
+
+class _Host:
+    """Concurrency limit, robots.txt rules and crawl delay of one host"""
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.robots: Optional[Protego] = None
+        self.robots_loaded = asyncio.Event()
+        self.robots_started = False
+        self.delay = 0.0
+        self.next_request = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait_turn(self) -> None:
+        """Wait until the crawl delay since the previous request has passed."""
+        if not self.delay:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_request > now:
+                await asyncio.sleep(self.next_request - now)
+            self.next_request = max(now, self.next_request) + self.delay
+
+
+class Crawler:
+    """Fetches pages concurrently with per-host limits and robots.txt checks"""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        cache: Optional[HttpCache] = None,
+        concurrency: int = CONCURRENCY,
+        per_host: int = PER_HOST,
+        respect_robots: bool = True,
+        timeout: float = 10,
+        max_bytes: int = PAGE_BYTES,
+        max_chars: Optional[int] = DEFAULT_MAX_CHARS,
+        refresh: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.session = session
+        self.cache = cache or get_cache()
+        self.per_host = per_host
+        self.respect_robots = respect_robots
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.refresh = refresh
+        self.headers = headers or {"User-Agent": USER_AGENT}
+        self._slots = asyncio.Semaphore(concurrency)
+        self._hosts: Dict[str, _Host] = {}
+
+    def _host_state(self, url: str) -> _Host:
+        host = _host(url)
+        if host not in self._hosts:
+            self._hosts[host] = _Host(self.per_host)
+        return self._hosts[host]
+
+    async def _load_robots(self, url: str, state: _Host) -> None:
+        """Fetch and parse a host's robots.txt once; a missing or unreadable file allows everything."""
+        if state.robots_started:
+            await state.robots_loaded.wait()
+            return
+        state.robots_started = True
+        robots_url = f"{_host(url)}/robots.txt"
+        try:
+            response = await self.cache.afetch(robots_url, self.session, headers=self.headers,
+                                               timeout=self.timeout, max_bytes=ROBOTS_BYTES)
+            state.robots = Protego.parse(response.text)
+            delay = state.robots.crawl_delay(ROBOTS_AGENT)
+            if delay:
+                state.delay = min(float(delay), MAX_CRAWL_DELAY)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.debug(f"No robots.txt rules for {robots_url}: {e}")
+        finally:
+            state.robots_loaded.set()
+
+    async def visit(self, url: str, depth: int = 0) -> PageResult:
+        """Fetch and extract one page."""
+        result = PageResult(url, depth)
+        state = self._host_state(url)
+        try:
+            if self.respect_robots:
+                await self._load_robots(url, state)
+                if state.robots is not None and not state.robots.can_fetch(url, ROBOTS_AGENT):
+                    result.status = BLOCKED
+                    return result
+            async with self._slots, state.semaphore:
+                await state.wait_turn()
+                response = await self.cache.afetch(url, self.session, headers=self.headers, timeout=self.timeout,
+                                                   refresh=self.refresh, max_bytes=self.max_bytes)
+        except aiohttp.ClientResponseError as e:
+            result.status, result.error = ERROR, f"{e.status} {e.message}"
+            return result
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            result.status, result.error = ERROR, str(e) or type(e).__name__
+            return result
+
+        result.final_url = response.url
+        result.from_cache = response.from_cache
+        content_type = response.headers.get("content-type", "")
+        if "html" in content_type or not content_type:
+            try:
+                result.page = await asyncio.to_thread(
+                    extract_page, response.content, response.url, content_type, response.truncated, self.max_chars
+                )
+            except Exception as e:
+                # One page that cannot be extracted must not fail the batch
+                logger.warning(f"Could not extract {url}: {e}")
+                result.status, result.error = ERROR, f"could not extract page: {e}"
+                return result
+        elif content_type.startswith("text/"):
+            text = response.text
+            cut = self.max_chars is not None and len(text) > self.max_chars
+            result.page = ExtractedPage(url=response.url, content=text[:self.max_chars] if cut else text,
+                                        truncated=response.truncated or cut)
+        else:
+            result.status, result.error = ERROR, f"unsupported content type {content_type.split(';')[0]}"
+            return result
+        result.fingerprint = fingerprint(result.page.content)
+        return result
+
+    async def crawl(self, urls: Sequence[str], depth: int = 0, max_pages: int = 10, same_host: bool = True) -> CrawlReport:
+        """Fetch URLs and, to the given link depth, the pages they link to.
+
+        Args:
+            urls: Pages to fetch, or seeds of the crawl
+            depth: Link depth to follow from the seeds; 0 fetches only the URLs
+            max_pages: Most pages to fetch
+            same_host: Only follow links to the hosts of the seeds
+        """
+        started = time.perf_counter()
+        report = CrawlReport()
+        seen: Dict[str, str] = {}  # Normalised URL -> URL first listed
+        kept: List[PageResult] = []  # Pages compared for near duplicates
+
+        level: List[str] = []
+        skipped: List[PageResult] = []  # Invalid or repeated seeds, reported after the first level
+        for url in urls:
+            problem = _url_problem(url)
+            if problem is not None:
+                skipped.append(PageResult(url, status=ERROR, error=problem))
+                continue
+            key = normalize_url(url)
+            if key in seen:
+                skipped.append(PageResult(url, status=DUPLICATE, duplicate_of=seen[key]))
+            elif len(level) < max_pages:
+                seen[key] = url
+                level.append(url)
+        scheduled = len(level)
+        hosts = {_host(url) for url in level}
+
+        if not level:
+            report.pages.extend(skipped)
+        for current in range(depth + 1):
+            if not level:
+                break
+            results = await asyncio.gather(*(self.visit(url, current) for url in level))
+            links: List[str] = []
+            for result in results:
+                report.pages.append(result)
+                if result.status != OK:
+                    continue
+                final = normalize_url(result.final_url or result.url)
+                if final != normalize_url(result.url) and final in seen:
+                    result.status, result.duplicate_of = DUPLICATE, seen[final]
+                    continue
+                seen.setdefault(final, result.url)
+                match = next(
+                    (other for other in kept if similarity(result.fingerprint, other.fingerprint) >= NEAR_DUPLICATE),
+                    None,
+                )
+                if match is not None:
+                    result.status, result.duplicate_of = DUPLICATE, match.url
+                    continue
+                kept.append(result)
+                links.extend(result.page.links)
+            report.pages.extend(skipped)
+            skipped = []
+
+            level = []
+            if current == depth:
+                break
+            for link in links:
+                if scheduled >= max_pages:
+                    break
+                if not _crawlable(link) or (same_host and _host(link) not in hosts):
+                    continue
+                key = normalize_url(link)
+                if key not in seen:
+                    seen[key] = link
+                    level.append(link)
+                    scheduled += 1
+
+        report.seconds = time.perf_counter() - started
+        logger.debug(f"{report.summary()}; cache {self.cache.stats.to_dict()}")
+        return report
+
+
+async def crawl(
+    urls: Sequence[str],
+    depth: int = 0,
+    max_pages: int = 10,
+    same_host: bool = True,
+    session: Optional[aiohttp.ClientSession] = None,
+    **options,
+) -> CrawlReport:
+    """Fetch a batch of URLs, or crawl from seeds to a link depth.
+
+    Args:
+        urls: Pages to fetch, or seeds of the crawl
+        depth: Link depth to follow from the seeds, at most MAX_DEPTH
+        max_pages: Most pages to fetch, at most MAX_PAGES
+        same_host: Only follow links to the hosts of the seeds
+        session: aiohttp session to use (default: the shared pool)
+        **options: Crawler settings
+
+    Returns:
+        Every page in discovery order
+    """
+    depth = max(0, min(depth, MAX_DEPTH))
+    max_pages = max(1, min(max_pages, MAX_PAGES))
+    if session is None:
+        session = await get_session()
+    crawler = Crawler(session, **options)
+    return await crawler.crawl(urls, depth, max_pages, same_host)
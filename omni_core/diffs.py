@@ -0,0 +1,363 @@
+"""Compact unified diffs of edits.
+
+Edit tools report what they changed as a unified diff rather than the whole
+file, so the conversation only grows by the changed lines and a little
+context around them.
+
+Lines are interned to integers and the common prefix and suffix are trimmed
+before a diff algorithm sees the rest, so small edits to large files cost
+little more than a scan. The algorithm is pluggable through DIFF_ENGINES:
+
+- patience (default): anchors on lines that occur once on each side, then
+  diffs the gaps between anchors with Myers
+- myers: the O(ND) shortest edit script, bounded by MAX_EDIT_COST; regions
+  needing more edits are reported as replaced
+- difflib: the standard library's SequenceMatcher, for comparison
+
+Large diffs are cut to a line budget for display by summarize_diff.
+"""
+
+import os
+import bisect
+import logging
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTEXT_LINES = 3
+NO_NEWLINE = "\\ No newline at end of file\n"
+DIFF_ALGORITHM = os.getenv("OMNI_DIFF_ALGORITHM", "patience")
+MAX_EDIT_COST = 1024  # Most insertions plus deletions Myers searches in one region
+DEFAULT_RENDER_LINES = 400
+MAX_LISTED_HUNKS = 20  # Hunk headers listed for the part of a diff that is cut
+
+# (first line in a, first line in b, number of equal lines)
+Match = Tuple[int, int, int]
+Opcode = Tuple[str, int, int, int, int]
+
+
+def _myers(a: Sequence[int], b: Sequence[int], max_cost: int = MAX_EDIT_COST) -> Optional[List[Match]]:
+    """Return the matches of a shortest edit script, or None if it costs more than max_cost."""
+    n, m = len(a), len(b)
+    if not n or not m:
+        return []
+    if abs(n - m) > max_cost:
+        return None
+    limit = min(n + m, max_cost)
+    offset = limit + 1
+    v = [0] * (2 * limit + 3)
+    # trace[d] holds the furthest x per diagonal k in -d-1..d+1 before step d
+    trace = []
+    for d in range(limit + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+    return None
+
+
+def _backtrack(trace: List[List[int]], n: int, m: int) -> List[Match]:
+    """Walk a Myers trace back from (n, m), collecting the diagonal runs."""
+    matches = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        base = d + 1
+        k = x - y
+        if k == -d or (k != d and v[base + k - 1] < v[base + k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[base + prev_k]
+        prev_y = prev_x - prev_k
+        run = min(x - prev_x, y - prev_y)
+        if run > 0:
+            matches.append((x - run, y - run, run))
+        x, y = prev_x, prev_y
+    matches.reverse()
+    return matches
+
+
+def _unique_anchors(a: Sequence[int], b: Sequence[int], alo: int, ahi: int, blo: int, bhi: int) -> List[Tuple[int, int]]:
+    """Return the longest increasing run of lines unique on both sides of a region."""
+    count_a = Counter(a[alo:ahi])
+    count_b = Counter(b[blo:bhi])
+    position = {a[i]: i for i in range(alo, ahi) if count_a[a[i]] == 1}
+    candidates = [(position[b[j]], j) for j in range(blo, bhi) if count_b[b[j]] == 1 and b[j] in position]
+
+    # Patience sorting of the a positions, in b order
+    tails: List[int] = []
+    tail_values: List[int] = []
+    previous: List[int] = [-1] * len(candidates)
+    for number, (i, _) in enumerate(candidates):
+        pile = bisect.bisect_left(tail_values, i)
+        if pile:
+            previous[number] = tails[pile - 1]
+        if pile == len(tails):
+            tails.append(number)
+            tail_values.append(i)
+        else:
+            tails[pile] = number
+            tail_values[pile] = i
+
+    anchors = []
+    number = tails[-1] if tails else -1
+    while number >= 0:
+        anchors.append(candidates[number])
+        number = previous[number]
+    anchors.reverse()
+    return anchors
+
+
+def _patience(a: Sequence[int], b: Sequence[int]) -> List[Match]:
+    """Match unique lines first, then diff the regions between them."""
+    matches: List[Match] = []
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        alo, ahi, blo, bhi = regions.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo, 1))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            matches.append((ahi, bhi, 1))
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+        if not anchors:
+            found = _myers(a[alo:ahi], b[blo:bhi]) or []
+            matches.extend((alo + i, blo + j, size) for i, j, size in found)
+            continue
+        for i, j in anchors:
+            matches.append((i, j, 1))
+            if alo < i or blo < j:
+                regions.append((alo, i, blo, j))
+            alo, blo = i + 1, j + 1
+        regions.append((alo, ahi, blo, bhi))
+    matches.sort()
+    return matches
+
+
+def _difflib(a: Sequence[int], b: Sequence[int]) -> List[Match]:
+    return [tuple(block) for block in SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks()[:-1]]
+
+
+# Each engine maps two sequences of line ids to their matching runs, in order
+DIFF_ENGINES: Dict[str, Callable[[Sequence[int], Sequence[int]], Optional[List[Match]]]] = {
+    "patience": _patience,
+    "myers": _myers,
+    "difflib": _difflib,
+}
+
+
+def matching_blocks(a: Sequence[str], b: Sequence[str], algorithm: Optional[str] = None) -> List[Match]:
+    """Return the runs of equal lines of two line lists.
+
+    Raises:
+        ValueError: If the algorithm is not in DIFF_ENGINES
+    """
+    name = algorithm or DIFF_ALGORITHM
+    engine = DIFF_ENGINES.get(name)
+    if engine is None:
+        raise ValueError(f"Unknown diff algorithm: {name}")
+
+    # Compare integers instead of strings
+    ids: Dict[str, int] = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+
+    n, m = len(a_ids), len(b_ids)
+    prefix = 0
+    while prefix < min(n, m) and a_ids[prefix] == b_ids[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < min(n, m) - prefix and a_ids[n - 1 - suffix] == b_ids[m - 1 - suffix]:
+        suffix += 1
+
+    found = engine(a_ids[prefix:n - suffix], b_ids[prefix:m - suffix]) or []
+    blocks = [(0, 0, prefix)] if prefix else []
+    blocks.extend((prefix + i, prefix + j, size) for i, j, size in found)
+    if suffix:
+        blocks.append((n - suffix, m - suffix, suffix))
+
+    # Join adjacent runs
+    merged: List[Match] = []
+    for i, j, size in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+        else:
+            merged.append((i, j, size))
+    return merged
+
+
+def opcodes(a: Sequence[str], b: Sequence[str], algorithm: Optional[str] = None) -> List[Opcode]:
+    """Return SequenceMatcher-style opcodes turning line list a into b."""
+    codes: List[Opcode] = []
+    i = j = 0
+    for ai, bj, size in matching_blocks(a, b, algorithm) + [(len(a), len(b), 0)]:
+        if i < ai and j < bj:
+            codes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            codes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            codes.append(("insert", i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            codes.append(("equal", ai, i, bj, j))
+    return codes
+
+
+def grouped_opcodes(codes: List[Opcode], context_lines: int) -> Iterator[List[Opcode]]:
+    """Group opcodes into hunks with context_lines of context, as difflib does."""
+    codes = list(codes) or [("equal", 0, 1, 0, 1)]
+    n = context_lines
+    tag, i1, i2, j1, j2 = codes[0]
+    if tag == "equal":
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    tag, i1, i2, j1, j2 = codes[-1]
+    if tag == "equal":
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        # A long run of equal lines ends one hunk and starts the next
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _hunk_range(start: int, length: int) -> str:
+    """Format a hunk range the way diff does: 'start,length', empty ranges start before."""
+    if length == 1:
+        return str(start + 1)
+    if not length:
+        return f"{start},0"
+    return f"{start + 1},{length}"
+
+
+def _emit(out: List[str], prefix: str, line: str) -> None:
+    out.append(prefix + line)
+    if not line.endswith("\n"):
+        out.append("\n" + NO_NEWLINE)
+
+
+def unified_diff(original: str, new: str, path: str, context_lines: int = DEFAULT_CONTEXT_LINES,
+                 start_line: int = 1, algorithm: Optional[str] = None) -> str:
+    """Return a unified diff between two versions of a file, or "" if they match.
+
+    Args:
+        original: Text before the edit
+        new: Text after the edit
+        path: File name used in the ---/+++ headers
+        context_lines: Unchanged lines shown around each change
+        start_line: Line number of the first line of both texts, for diffs of
+            a window of a file
+        algorithm: Name of an engine in DIFF_ENGINES (default DIFF_ALGORITHM)
+    """
+    a = original.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    offset = start_line - 1
+    out = [f"--- a/{path}\n", f"+++ b/{path}\n"]
+    for group in grouped_opcodes(opcodes(a, b, algorithm), max(context_lines, 0)):
+        first, last = group[0], group[-1]
+        out.append(
+            f"@@ -{_hunk_range(first[1] + offset, last[2] - first[1])}"
+            f" +{_hunk_range(first[3] + offset, last[4] - first[3])} @@\n"
+        )
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in a[i1:i2]:
+                    _emit(out, " ", line)
+                continue
+            for line in a[i1:i2]:
+                _emit(out, "-", line)
+            for line in b[j1:j2]:
+                _emit(out, "+", line)
+    if len(out) == 2:
+        return ""
+    return "".join(out)
+
+
+def _count_changes(lines: Sequence[str]) -> Tuple[int, int]:
+    """Return (added, removed) among the body lines of hunks."""
+    added = sum(1 for line in lines if line.startswith("+"))
+    removed = sum(1 for line in lines if line.startswith("-"))
+    return added, removed
+
+
+def diff_stats(diff: str) -> Tuple[int, int]:
+    """Return (lines added, lines removed) of a unified diff."""
+    # Lines before the first hunk are the ---/+++ headers
+    start = diff.find("@@")
+    if start == -1:
+        return 0, 0
+    return _count_changes([line for line in diff[start:].splitlines() if not line.startswith("@@")])
+
+
+def summarize_diff(diff: str, max_lines: int = DEFAULT_RENDER_LINES) -> str:
+    """Cut a diff to about max_lines for display, summarising the hunks left out.
+
+    Whole hunks are kept while they fit; a first hunk longer than the budget
+    is cut. The hunks left out are listed by header with their line counts.
+    """
+    lines = diff.splitlines(keepends=True)
+    if len(lines) <= max_lines:
+        return diff
+
+    header: List[str] = []
+    hunks: List[List[str]] = []
+    for line in lines:
+        if line.startswith("@@"):
+            hunks.append([line])
+        elif hunks:
+            hunks[-1].append(line)
+        else:
+            header.append(line)
+
+    out = list(header)
+    shown = 0
+    for hunk in hunks:
+        if len(out) + len(hunk) > max_lines:
+            break
+        out.extend(hunk)
+        shown += 1
+    hidden = hunks[shown:]
+    cut: List[str] = []
+    if not shown and hunks:
+        room = max(max_lines - len(out), 2)
+        out.extend(hunks[0][:room])
+        cut = hunks[0][room:]
+        hidden = hunks[1:]
+
+    added, removed = _count_changes(cut + [line for hunk in hidden for line in hunk[1:]])
+    if cut:
+        out.append(f"... {len(cut)} more lines of this hunk")
+        out.append(f" and {len(hidden)} more hunks" if hidden else "")
+        out.append(f" not shown (+{added} -{removed})\n")
+    else:
+        out.append(f"... {len(hidden)} more hunks not shown (+{added} -{removed})\n")
+    for hunk in hidden[:MAX_LISTED_HUNKS]:
+        hunk_added, hunk_removed = _count_changes(hunk[1:])
+        out.append(f"{hunk[0].rstrip()} +{hunk_added} -{hunk_removed}\n")
+    if len(hidden) > MAX_LISTED_HUNKS:
+        out.append(f"... and {len(hidden) - MAX_LISTED_HUNKS} more hunks\n")
+    return "".join(out)
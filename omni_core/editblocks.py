@@ -0,0 +1,313 @@
+"""Locate and apply SEARCH/REPLACE edit blocks in a single pass.
+
+The code editor model answers with blocks of text to find and the text to
+put in its place. All blocks are located against the original content
+first, then applied with one join, so a file with k blocks costs a few
+linear scans instead of k rebuilds of the whole string.
+
+A block is matched exactly when its text occurs once. Otherwise its lines
+are matched ignoring differences in whitespace, through an index from
+normalised line text to line numbers, and the replacement is re-indented to
+the file. Blocks that match several places, nothing, or overlap another
+block are reported with a reason instead of being applied somewhere
+arbitrary, so a retry can add the context that was missing.
+"""
+
+import re
+import bisect
+import logging
+from itertools import accumulate
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+BLOCK_PATTERN = re.compile(r'<SEARCH>\n(.*?)\n</SEARCH>\n<REPLACE>\n(.*?)\n</REPLACE>', re.DOTALL)
+TAG_PATTERN = re.compile(r'</?SEARCH>|</?REPLACE>')
+MAX_CANDIDATES = 5  # Line numbers reported for an ambiguous block
+
+# Edit statuses
+APPLIED = "applied"
+NOT_FOUND = "not_found"
+AMBIGUOUS = "ambiguous"
+OVERLAP = "overlap"
+EMPTY = "empty"
+
+
+@dataclass(frozen=True)
+class EditBlock:
+    """Text to find and the text that replaces it"""
+    search: str
+    replace: str
+
+    @classmethod
+    def coerce(cls, block: Union["EditBlock", Dict[str, str]]) -> "EditBlock":
+        """Accept a block or a {'search', 'replace'} dictionary."""
+        if isinstance(block, cls):
+            return block
+        return cls(block['search'].strip(), TAG_PATTERN.sub('', block['replace'].strip()))
+
+    def to_dict(self) -> Dict[str, str]:
+        """Return the block as a dictionary."""
+        return {'search': self.search, 'replace': self.replace}
+
+
+def parse_blocks(text: str) -> List[EditBlock]:
+    """Extract the SEARCH/REPLACE blocks of a model response.
+
+    Surrounding whitespace is stripped, and stray SEARCH/REPLACE tags are
+    removed from the replacement.
+    """
+    return [
+        EditBlock(search.strip(), TAG_PATTERN.sub('', replace.strip()))
+        for search, replace in BLOCK_PATTERN.findall(text)
+    ]
+
+
+@dataclass
+class EditResult:
+    """What happened to one block"""
+    index: int  # 1-based position of the block
+    status: str
+    match: Optional[str] = None  # "exact" or "whitespace"
+    start_line: Optional[int] = None  # Lines of the original content replaced
+    end_line: Optional[int] = None
+    candidates: List[int] = field(default_factory=list)  # Lines an ambiguous block matches
+
+    @property
+    def ok(self) -> bool:
+        """Whether the block was applied."""
+        return self.status == APPLIED
+
+    def describe(self) -> str:
+        """Explain the outcome in a sentence."""
+        if self.status == APPLIED:
+            how = " ignoring whitespace" if self.match == "whitespace" else ""
+            return f"replaced lines {self.start_line}-{self.end_line}{how}"
+        if self.status == AMBIGUOUS:
+            lines = ", ".join(str(line) for line in self.candidates)
+            return f"matches several places (lines {lines}); include more surrounding lines"
+        if self.status == OVERLAP:
+            return f"overlaps an earlier edit at lines {self.start_line}-{self.end_line}"
+        if self.status == EMPTY:
+            return "search text is empty"
+        return "content not found"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the result as a JSON-serialisable dictionary."""
+        return {
+            'index': self.index,
+            'status': self.status,
+            'match': self.match,
+            'start_line': self.start_line,
+            'end_line': self.end_line,
+            'candidates': self.candidates,
+            'message': self.describe(),
+        }
+
+
+@dataclass
+class EditReport:
+    """The edited content and the outcome of every block"""
+    content: str
+    blocks: List[EditBlock]
+    results: List[EditResult]
+
+    @property
+    def applied(self) -> List[EditResult]:
+        """Results of the blocks that were applied."""
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> List[EditResult]:
+        """Results of the blocks that were not applied."""
+        return [result for result in self.results if not result.ok]
+
+    def failure_summary(self) -> str:
+        """Describe the failed blocks, e.g. to ask the model to retry them."""
+        return "\n".join(
+            f"Edit {result.index} ({result.describe()}): {self.blocks[result.index - 1].search}"
+            for result in self.failed
+        )
+
+
+def _normalize(line: str) -> str:
+    """Collapse the whitespace of a line for tolerant matching."""
+    return " ".join(line.split())
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+class _Document:
+    """Line offsets of a text and, on demand, indexes from line text to line numbers."""
+
+    def __init__(self, content: str):
+        self.content = content
+        # Lines without their "\n"; CRLF lines keep their "\r"
+        self.lines = content.split("\n")
+        self.starts = list(accumulate((len(line) + 1 for line in self.lines), initial=0))
+        self._by_line: Optional[Dict[str, List[int]]] = None
+        self._keys: Optional[List[str]] = None
+        self._by_key: Optional[Dict[str, List[int]]] = None
+
+    def line_of(self, offset: int) -> int:
+        """Return the 1-based line containing an offset."""
+        return min(bisect.bisect_right(self.starts, offset), len(self.lines))
+
+    def _index(self) -> Tuple[List[str], Dict[str, List[int]]]:
+        if self._by_key is None:
+            self._keys = [_normalize(line) for line in self.lines]
+            self._by_key = {}
+            for number, key in enumerate(self._keys):
+                self._by_key.setdefault(key, []).append(number)
+        return self._keys, self._by_key
+
+    def find_exact(self, text: str) -> List[int]:
+        """Return the offsets where text occurs, at most MAX_CANDIDATES + 1.
+
+        Text spanning three or more lines has complete lines in its middle,
+        which are looked up in the line index instead of scanning the file.
+        """
+        parts = text.split("\n")
+        if len(parts) < 3:
+            offsets = []
+            offset = self.content.find(text)
+            while offset != -1 and len(offsets) <= MAX_CANDIDATES:
+                offsets.append(offset)
+                offset = self.content.find(text, offset + 1)
+            return offsets
+
+        if self._by_line is None:
+            self._by_line = {}
+            for number, line in enumerate(self.lines):
+                self._by_line.setdefault(line, []).append(number)
+        anchor = max(range(1, len(parts) - 1), key=lambda number: len(parts[number]))
+        head = sum(len(part) + 1 for part in parts[:anchor])
+        offsets = []
+        for number in self._by_line.get(parts[anchor], ()):
+            offset = self.starts[number] - head
+            if offset >= 0 and self.content.startswith(text, offset):
+                offsets.append(offset)
+                if len(offsets) > MAX_CANDIDATES:
+                    break
+        return offsets
+
+    def find_lines(self, keys: List[str]) -> List[int]:
+        """Return the 0-based lines where a run of normalised lines starts."""
+        lines, by_key = self._index()
+        count = len(keys)
+        return [
+            start for start in by_key.get(keys[0], ())
+            if lines[start:start + count] == keys
+        ]
+
+
+def _reindent(search_lines: List[str], replace_lines: List[str], file_lines: List[str]) -> List[str]:
+    """Shift replacement lines by the indentation the file has over the block.
+
+    The first lines of blocks usually lost their indentation to stripping,
+    so the first line takes the file's indentation and later lines are
+    shifted by the difference seen on the first indented search line.
+    """
+    first_indent = _indent(file_lines[0])
+    add, remove = "", ""
+    for search_line, file_line in zip(search_lines[1:], file_lines[1:]):
+        if search_line.strip():
+            search_indent, file_indent = _indent(search_line), _indent(file_line)
+            if file_indent.startswith(search_indent):
+                add = file_indent[len(search_indent):]
+            elif search_indent.startswith(file_indent):
+                remove = search_indent[len(file_indent):]
+            break
+
+    result = []
+    for number, line in enumerate(replace_lines):
+        if number == 0:
+            line = first_indent + line.lstrip()
+        elif line.strip():
+            if remove and line.startswith(remove):
+                line = line[len(remove):]
+            line = add + line
+        result.append(line)
+    return result
+
+
+def _locate(document: _Document, block: EditBlock, index: int) -> Tuple[EditResult, Optional[Tuple[int, int, str]]]:
+    """Find where a block applies: (result, (start, end, replacement) or None)."""
+    if not block.search:
+        return EditResult(index, EMPTY), None
+
+    offsets = document.find_exact(block.search)
+    if len(offsets) == 1:
+        start = offsets[0]
+        end = start + len(block.search)
+        result = EditResult(index, APPLIED, "exact", document.line_of(start), document.line_of(max(end - 1, start)))
+        return result, (start, end, block.replace)
+    if offsets:
+        return EditResult(index, AMBIGUOUS, candidates=[document.line_of(offset) for offset in offsets[:MAX_CANDIDATES]]), None
+
+    search_lines = block.search.splitlines()
+    keys = [_normalize(line) for line in search_lines]
+    starts = document.find_lines(keys)
+    if not starts:
+        return EditResult(index, NOT_FOUND), None
+    if len(starts) > 1:
+        return EditResult(index, AMBIGUOUS, candidates=[start + 1 for start in starts[:MAX_CANDIDATES]]), None
+
+    first = starts[0]
+    last = first + len(keys) - 1
+    file_lines = document.lines[first:last + 1]
+    # Keep the line break after the matched lines, and use the file's line breaks
+    newline = "\r\n" if file_lines[0].endswith("\r") else "\n"
+    end = document.starts[last] + len(file_lines[-1].rstrip("\r"))
+    replacement = newline.join(_reindent(search_lines, block.replace.splitlines(), file_lines))
+    result = EditResult(index, APPLIED, "whitespace", first + 1, last + 1)
+    return result, (document.starts[first], end, replacement)
+
+
+def apply_blocks(content: str, blocks: Iterable[Union[EditBlock, Dict[str, str]]]) -> EditReport:
+    """Apply SEARCH/REPLACE blocks to content.
+
+    Every block is located in the original content, so blocks cannot match
+    text inserted by another block. Blocks that overlap an earlier one are
+    not applied.
+
+    Args:
+        content: Text to edit
+        blocks: EditBlocks or {'search', 'replace'} dictionaries
+
+    Returns:
+        The edited content with a result per block
+    """
+    blocks = [EditBlock.coerce(block) for block in blocks]
+    document = _Document(content)
+    results: List[EditResult] = []
+    spans: List[Tuple[int, int, str, EditResult]] = []
+    for index, block in enumerate(blocks, 1):
+        result, span = _locate(document, block, index)
+        results.append(result)
+        if span is not None:
+            spans.append((*span, result))
+
+    # Apply in file order with one join, refusing overlapping spans
+    pieces: List[str] = []
+    position = 0
+    accepted_end = -1
+    accepted: Optional[EditResult] = None
+    for start, end, replacement, result in sorted(spans, key=lambda span: (span[0], span[3].index)):
+        if start < accepted_end or (start == accepted_end and start == end and accepted is not None):
+            result.status = OVERLAP
+            result.start_line, result.end_line = accepted.start_line, accepted.end_line
+            continue
+        pieces.append(content[position:start])
+        pieces.append(replacement)
+        position = end
+        accepted_end = end
+        accepted = result
+    pieces.append(content[position:])
+
+    report = EditReport("".join(pieces), blocks, results)
+    logger.debug(f"Applied {len(report.applied)} of {len(blocks)} edit blocks")
+    return report
@@ -0,0 +1,306 @@
+"""Relevance-pruned context for the code editor model.
+
+The code editor model only needs the files an edit can touch or depend on.
+Instead of every file in the conversation, the other files are scored by
+how they connect to the file being edited: imports in either direction,
+names one defines that the other uses (weighted by how specific the name
+is), and mentions in the instructions. Connected files are added best
+first until the token budget is spent. A file too large to include whole
+contributes only the definitions the target or the instructions refer to.
+Remembered edit instructions are kept only for the target and the files
+included.
+"""
+
+import os
+import re
+import ast
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple, TypeVar
+
+from .filestore import content_hash
+from .repomap import SOURCE_SUFFIXES, FileSymbols, estimate_text_tokens, name_weight, parse_symbols
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTEXT_TOKENS = 8000
+MEMORY_SHARE = 0.25  # Part of the budget remembered edits may use
+LARGE_FILE_SHARE = 0.4  # Files costing more than this part of the budget are cut to regions
+IMPORT_WEIGHT = 20.0
+MENTION_WEIGHT = 10.0
+MEMORY_PATTERN = re.compile(r"^Edit Instructions for (.+?):\n")
+WORD_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+PARSE_CACHE_ENTRIES = 256  # Parse results kept per kind, keyed by content hash
+
+Parsed = TypeVar("Parsed")
+
+
+@dataclass
+class EditContext:
+    """The other files and remembered edits selected for an edit"""
+    files: str = ""
+    memory: str = ""
+    included: List[str] = field(default_factory=list)
+    partial: Dict[str, List[Tuple[int, int]]] = field(default_factory=dict)  # path -> line ranges included
+    omitted: List[str] = field(default_factory=list)
+    tokens: int = 0
+
+
+class _ParseCache:
+    """LRU cache of parse results keyed by content hash, so no source text is kept"""
+
+    def __init__(self, parse: Callable[[str], Parsed], max_entries: int = PARSE_CACHE_ENTRIES):
+        self.parse = parse
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Parsed]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source: str, digest: Optional[str] = None) -> Parsed:
+        """Return the parse of source; digest is its content hash, if already known."""
+        digest = digest or content_hash(source)
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                return self._entries[digest]
+        parsed = self.parse(source)
+        with self._lock:
+            self._entries[digest] = parsed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parsed
+
+
+def _parse_imports(source: str) -> Tuple[str, ...]:
+    """Return the dotted module names a Python source imports, with their parents."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError, RecursionError):
+        return ()
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            # "from pkg import mod" may import a module as well as a name
+            modules = [f"{base}.{alias.name}" if base else alias.name for alias in node.names]
+            if base:
+                modules.append(base)
+        else:
+            continue
+        for module in modules:
+            parts = module.split(".")
+            names.update(".".join(parts[:end]) for end in range(1, len(parts) + 1))
+    return tuple(sorted(names))
+
+
+_symbols = _ParseCache(parse_symbols)
+_imports = _ParseCache(_parse_imports)
+
+
+def module_names(path: str) -> Set[str]:
+    """Return the dotted names a file could be imported as: mod, pkg.mod, ..."""
+    stem, suffix = os.path.splitext(os.path.normpath(path))
+    if suffix not in SOURCE_SUFFIXES:
+        return set()
+    parts = [part for part in stem.split(os.sep) if part and part not in (".", "..")]
+    if parts and parts[-1] == "__init__":
+        parts.pop()
+    return {".".join(parts[start:]) for start in range(len(parts))}
+
+
+def _is_source(path: str) -> bool:
+    return path.endswith(SOURCE_SUFFIXES)
+
+
+def score_file(
+    path: str,
+    content: str,
+    target_path: str,
+    target_content: str,
+    words: Set[str],
+    digest: Optional[str] = None,
+    target_digest: Optional[str] = None,
+) -> float:
+    """Score how closely a file is connected to the edit target.
+
+    Args:
+        path: File to score
+        content: Its contents
+        target_path: File being edited
+        target_content: Contents of the file being edited
+        words: Identifiers in the edit instructions
+        digest: Content hash of content, if known
+        target_digest: Content hash of target_content, if known
+    """
+    score = 0.0
+    base = os.path.splitext(os.path.basename(path))[0]
+    if base in words or os.path.basename(path) in words:
+        score += MENTION_WEIGHT
+    if not (_is_source(path) and _is_source(target_path)):
+        return score
+
+    if (module_names(path) & set(_imports.get(target_content, target_digest))
+            or module_names(target_path) & set(_imports.get(content, digest))):
+        score += IMPORT_WEIGHT
+    other, target = _symbols.get(content, digest), _symbols.get(target_content, target_digest)
+    defined = {symbol.name for symbol in other.definitions}
+    score += sum(name_weight(name) for name in defined & target.references.keys())
+    score += 0.5 * sum(name_weight(name) for name in {symbol.name for symbol in target.definitions} & other.references.keys())
+    score += sum(name_weight(name) for name in defined & words)
+    return score
+
+
+def relevant_regions(content: str, names: Set[str]) -> List[Tuple[int, int]]:
+    """Return the 1-based line ranges of the definitions of the given names.
+
+    Functions are included whole. A class keeps its header line and the
+    named methods, plus __init__ when the class itself is named; a class
+    named without any of its methods is included whole.
+    """
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError, RecursionError):
+        return []
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+    def span(node: ast.AST) -> Tuple[int, int]:
+        start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+        return start, node.end_lineno
+
+    regions = []
+    for node in tree.body:
+        if not isinstance(node, definitions):
+            continue
+        if not isinstance(node, ast.ClassDef):
+            if node.name in names:
+                regions.append(span(node))
+            continue
+        methods = [child for child in node.body if isinstance(child, definitions)]
+        named = [child for child in methods if child.name in names]
+        if node.name in names and not named:
+            regions.append(span(node))
+        elif named:
+            if node.name in names:
+                named += [child for child in methods if child.name == "__init__"]
+            regions.append((span(node)[0], node.lineno))
+            regions.extend(span(child) for child in named)
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(regions):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def render_regions(content: str, regions: Sequence[Tuple[int, int]]) -> str:
+    """Render line ranges of a file, marking the lines left out."""
+    lines = content.splitlines()
+    out = []
+
+    def gap(first: int, last: int) -> None:
+        if first == last:
+            out.append(f"... (line {first} omitted)")
+        elif first < last:
+            out.append(f"... (lines {first}-{last} omitted)")
+
+    previous = 0
+    for start, end in regions:
+        gap(previous + 1, start - 1)
+        out.extend(lines[start - 1:end])
+        previous = end
+    gap(previous + 1, len(lines))
+    return "\n".join(out)
+
+
+def select_edit_context(
+    target_path: str,
+    target_content: str,
+    instructions: str,
+    files: Mapping[str, str],
+    memory: Sequence[str] = (),
+    max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+) -> EditContext:
+    """Choose the other files and remembered edits to show with an edit.
+
+    Args:
+        target_path: File being edited
+        target_content: Its contents, sent separately
+        instructions: What the edit should do
+        files: Every file in the conversation, path to contents
+        memory: Remembered edit instructions, oldest first
+        max_tokens: Budget for the selected files and memory together
+
+    Returns:
+        The rendered context and what it includes
+    """
+    context = EditContext()
+    words = set(WORD_PATTERN.findall(instructions))
+    target_digest = content_hash(target_content)
+    target_symbols = _symbols.get(target_content, target_digest) if _is_source(target_path) else FileSymbols()
+    wanted = (set(target_symbols.references) | words) - {symbol.name for symbol in target_symbols.definitions}
+
+    hash_of = getattr(files, "hash_of", None)  # A FileContextStore already knows its hashes
+    scored = []
+    for path, content in files.items():
+        if path == target_path:
+            continue
+        digest = hash_of(path) if hash_of else None
+        score = score_file(path, content, target_path, target_content, words, digest, target_digest)
+        if score > 0:
+            scored.append((score, path, content))
+        else:
+            context.omitted.append(path)
+    scored.sort(key=lambda item: -item[0])
+
+    memory_tokens = sum(estimate_text_tokens(entry) for entry in memory)
+    budget = max_tokens - min(int(max_tokens * MEMORY_SHARE), memory_tokens)
+    sent = {target_content: target_path}  # Identical contents are only sent once
+    sections = []
+    for score, path, content in scored:
+        if content in sent:
+            text = f"--- {path} ---\n(identical to {sent[content]})"
+        else:
+            text = f"--- {path} ---\n{content}"
+            cost = estimate_text_tokens(text)
+            if cost > max_tokens * LARGE_FILE_SHARE or cost > budget - context.tokens:
+                regions = relevant_regions(content, wanted) if _is_source(path) else []
+                text = f"--- {path} (excerpt) ---\n{render_regions(content, regions)}" if regions else ""
+                if text:
+                    context.partial[path] = regions
+        cost = estimate_text_tokens(text)
+        if not text or context.tokens + cost > budget:
+            context.partial.pop(path, None)
+            context.omitted.append(path)
+            continue
+        if path not in context.partial:
+            sent.setdefault(content, path)
+        sections.append(text)
+        context.included.append(path)
+        context.tokens += cost
+    context.files = "\n\n".join(sections)
+
+    # Newest memories first, for the target and the files shown
+    relevant = {target_path, *context.included}
+    kept = []
+    for entry in reversed(memory):
+        match = MEMORY_PATTERN.match(entry)
+        if match and match.group(1) not in relevant:
+            continue
+        cost = estimate_text_tokens(entry)
+        if context.tokens + cost > max_tokens:
+            break
+        kept.append(entry)
+        context.tokens += cost
+    kept.reverse()
+    context.memory = "\n".join(f"Memory {number}:\n{entry}" for number, entry in enumerate(kept, 1))
+
+    logger.debug(
+        f"Edit context for {target_path}: {len(context.included)} files "
+        f"({len(context.partial)} excerpted), {len(context.omitted)} omitted, ~{context.tokens} tokens"
+    )
+    return context
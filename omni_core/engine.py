@@ -2,24 +2,33 @@ import os
 from dotenv import load_dotenv
 import json
 from tavily import TavilyClient
-import re
 import ollama
 import asyncio
-import difflib
 import time
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from rich.console import Console
 from rich.panel import Panel
 from rich.syntax import Syntax
 from rich.markdown import Markdown
 import asyncio
-import aiohttp
 from prompt_toolkit import PromptSession
 from prompt_toolkit.styles import Style
 import argparse
-from tools.base import ProviderContext
+from tools.base import ProviderContext, unwrap_result
 from tools.createfolderstool import CreateFoldersTool
+from tools.filecontentreadertool import FileContentReaderTool
+from .transport import get_session, close_transport
+from .context import ContextManager, estimate_tokens
+from .prompt import SystemPromptBuilder
+from .filestore import FileContextStore
+from .lineindex import read_lines
+from .editblocks import apply_blocks, parse_blocks
+from .atomicfile import atomic_write
+from .diffs import diff_stats, summarize_diff, unified_diff
+from .editcontext import select_edit_context
+from .repomap import get_repo_map
+from .scheduler import ToolScheduler
 
 # Provider configuration
 PROVIDER_CONFIG = {
@@ -54,7 +63,6 @@ async def get_user_input(prompt="You: "):
     session = PromptSession(style=style)
     return await session.prompt_async(prompt, multiline=False)
 
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
 import datetime
 
 # Load environment variables from .env file
@@ -75,7 +83,8 @@ console = Console()
 conversation_history = []
 
 # Store file contents (part of the context for MAINMODEL)
-file_contents = {}
+FILE_CONTEXT_MAX_BYTES = 16 * 1024 * 1024  # Least recently used files are dropped beyond this
+file_contents = FileContextStore(FILE_CONTEXT_MAX_BYTES)
 
 # Code editor memory (maintains some context for CODEEDITORMODEL between calls)
 code_editor_memory = []
@@ -86,9 +95,6 @@ code_editor_files = set()
 # automode flag
 automode = False
 
-# Store file contents
-file_contents = {}
-
 # Global dictionary to store running processes
 running_processes = {}
 
@@ -97,6 +103,24 @@ CONTINUATION_EXIT_PHRASE = "AUTOMODE_COMPLETE"
 MAX_CONTINUATION_ITERATIONS = 25
 MAX_CONTEXT_TOKENS = 200000  # Reduced to 200k tokens for context window
 
+# Tools without side effects; several calls to them from one response run concurrently.
+# read_file and read_multiple_files are not listed: they store into file_contents,
+# and FileContextStore is not safe to update from several threads.
+READ_ONLY_TOOLS = {"list_files", "tavily_search"}
+tool_scheduler = ToolScheduler()
+
+# Keeps the history sent to MAINMODEL within MAX_CONTEXT_TOKENS
+context_window = ContextManager(MAX_CONTEXT_TOKENS)
+
+# Outline of the working directory's Python symbols in the system prompt; 0 disables
+REPO_MAP_TOKENS = int(os.getenv("REPO_MAP_TOKENS", 1024))
+
+# Related files and remembered edits sent to CODEEDITORMODEL with an edit
+EDIT_CONTEXT_TOKENS = int(os.getenv("EDIT_CONTEXT_TOKENS", 8000))
+
+# Diff lines printed per edit; hunks beyond this are summarised
+DIFF_RENDER_LINES = int(os.getenv("DIFF_RENDER_LINES", 400))
+
 # Models
 # Models that maintain context memory across interactions
 MAINMODEL = "mistral-nemo"  # Maintains conversation history and file contents
@@ -130,7 +154,7 @@ Available tools and their optimal use cases:
    - Anticipate potential issues or conflicts that might arise from the changes and provide guidance on how to handle them.
 4. execute_code: Run Python code exclusively in the 'code_execution_env' virtual environment and analyze its output. Use this when you need to test code functionality or diagnose issues. Remember that all code execution happens in this isolated environment. This tool now returns a process ID for long-running processes.
 5. stop_process: Stop a running process by its ID. Use this when you need to terminate a long-running process started by the execute_code tool.
-6. read_file: Read the contents of an existing file.
+6. read_file: Read the contents of an existing file. Pass start_line and end_line to read only part of a large file.
 7. read_multiple_files: Read the contents of multiple existing files at once. Use this when you need to examine or work with multiple files simultaneously.
 8. list_files: List all files and directories in a specified folder.
 9. tavily_search: Perform a web search using the Tavily API for up-to-date information.
@@ -203,26 +227,52 @@ You are currently in automode. Follow these guidelines:
 Remember: Focus on completing the established goals efficiently and effectively. Avoid unnecessary conversations or requests for additional tasks.
 """
 
-
-def update_system_prompt(current_iteration: Optional[int] = None, max_iterations: Optional[int] = None) -> str:
-    global file_contents
-    chain_of_thought_prompt = """
+# Appended after the tool instructions in every system prompt
+CHAIN_OF_THOUGHT_PROMPT = """
     Answer the user's request using relevant tools (if they are available). Before calling a tool, do some analysis within <thinking></thinking> tags. First, think about which of the provided tools is the relevant tool to answer the user's request. Second, go through each of the required parameters of the relevant tool and determine if the user has directly provided or given enough information to infer a value. When deciding if the parameter can be inferred, carefully consider all the context to see if it supports a specific value. If all of the required parameters are present or can be reasonably inferred, close the thinking tag and proceed with the tool call. BUT, if one of the values for a required parameter is missing, DO NOT invoke the function (not even with fillers for the missing params) and instead, ask the user to provide the missing parameters. DO NOT ask for more information on optional parameters if it is not provided.
 
     Do not reflect on the quality of the returned search results in your response.
     """
-    
-    file_contents_prompt = "\n\nFile Contents:\n"
-    for path, content in file_contents.items():
-        file_contents_prompt += f"\n--- {path} ---\n{content}\n"
-    
+
+# Static instructions first, so the prompt prefix stays stable across turns
+system_prompt_builder = SystemPromptBuilder(BASE_SYSTEM_PROMPT, CHAIN_OF_THOUGHT_PROMPT)
+
+
+def update_system_prompt(
+    current_iteration: Optional[int] = None,
+    max_iterations: Optional[int] = None,
+    outline: Optional[str] = None,
+) -> str:
+    """Return the system prompt, rebuilt only when file contents or automode state change.
+
+    Async callers pass the repository outline, computed off the event loop
+    with repo_map_outline; it is computed here otherwise.
+    """
+    automode_prompt = ""
     if automode:
         iteration_info = ""
         if current_iteration is not None and max_iterations is not None:
             iteration_info = f"You are currently on iteration {current_iteration} out of {max_iterations} in automode."
-        return BASE_SYSTEM_PROMPT + file_contents_prompt + "\n\n" + AUTOMODE_SYSTEM_PROMPT.format(iteration_info=iteration_info) + "\n\n" + chain_of_thought_prompt
-    else:
-        return BASE_SYSTEM_PROMPT + file_contents_prompt + "\n\n" + chain_of_thought_prompt
+        automode_prompt = AUTOMODE_SYSTEM_PROMPT.format(iteration_info=iteration_info)
+    if outline is None:
+        outline = repo_map_outline()
+    return system_prompt_builder.build(file_contents, automode_prompt, outline)
+
+def repo_map_outline(paths: Optional[List[str]] = None) -> str:
+    """Return the outline of the working directory, focused on the given files (default: those in context).
+
+    This walks the tree and parses changed files, so async code runs it in a
+    worker thread with a snapshot of the paths.
+    """
+    if REPO_MAP_TOKENS <= 0:
+        return ""
+    try:
+        repo_map = get_repo_map(os.getcwd(), skip=FileContentReaderTool.skip_name)
+        focus = [os.path.abspath(path) for path in (file_contents if paths is None else paths)]
+        return repo_map.outline(REPO_MAP_TOKENS, focus=focus)
+    except Exception as e:
+        logging.warning(f"Could not build the repository map: {str(e)}")
+        return ""
 
 def createfolderstool(path):
     try:
@@ -242,25 +292,18 @@ def create_file(path, content=""):
         return f"Error creating file: {str(e)}"
 
 def highlight_diff(diff_text):
-    return Syntax(diff_text, "diff", theme="monokai", line_numbers=True)
+    # Long diffs are cut so rendering them does not hold up the loop
+    return Syntax(summarize_diff(diff_text, DIFF_RENDER_LINES), "diff", theme="monokai", line_numbers=True)
 
 def generate_and_apply_diff(original_content, new_content, path):
-    diff = list(difflib.unified_diff(
-        original_content.splitlines(keepends=True),
-        new_content.splitlines(keepends=True),
-        fromfile=f"a/{path}",
-        tofile=f"b/{path}",
-        n=3
-    ))
-
-    if not diff:
+    diff_text = unified_diff(original_content, new_content, path)
+
+    if not diff_text:
         return "No changes detected."
 
     try:
-        with open(path, 'w') as f:
-            f.writelines(new_content)
+        atomic_write(path, new_content)
 
-        diff_text = ''.join(diff)
         highlighted_diff = highlight_diff(diff_text)
 
         diff_panel = Panel(
@@ -272,8 +315,7 @@ def generate_and_apply_diff(original_content, new_content, path):
 
         console.print(diff_panel)
 
-        added_lines = sum(1 for line in diff if line.startswith('+') and not line.startswith('+++'))
-        removed_lines = sum(1 for line in diff if line.startswith('-') and not line.startswith('---'))
+        added_lines, removed_lines = diff_stats(diff_text)
 
         summary = f"Changes applied to {path}:\n"
         summary += f"  Lines added: {added_lines}\n"
@@ -294,14 +336,14 @@ def generate_and_apply_diff(original_content, new_content, path):
 async def generate_edit_instructions(file_path, file_content, instructions, project_context, full_file_contents):
     global code_editor_tokens, code_editor_memory, code_editor_files
     try:
-        # Prepare memory context (this is the only part that maintains some context between calls)
-        memory_context = "\n".join([f"Memory {i+1}:\n{mem}" for i, mem in enumerate(code_editor_memory)])
-
-        # Prepare full file contents context, excluding the file being edited if it's already in code_editor_files
-        full_file_contents_context = "\n\n".join([
-            f"--- {path} ---\n{content}" for path, content in full_file_contents.items()
-            if path != file_path or path not in code_editor_files
-        ])
+        # Only remembered edits and files connected to the target are sent,
+        # within EDIT_CONTEXT_TOKENS. The file being edited is in the prompt
+        # on its own.
+        edit_context = select_edit_context(
+            file_path, file_content, instructions, full_file_contents, code_editor_memory, EDIT_CONTEXT_TOKENS
+        )
+        memory_context = edit_context.memory
+        full_file_contents_context = edit_context.files
 
         system_prompt = f"""
         You are an AI coding agent that generates edit instructions for code files. Your task is to analyze the provided code and generate SEARCH/REPLACE blocks for necessary changes. Follow these steps:
@@ -318,7 +360,7 @@ async def generate_edit_instructions(file_path, file_content, instructions, proj
         4. Consider the memory of previous edits:
         {memory_context}
 
-        5. Consider the full context of all files in the project:
+        5. Consider the related files in the project (excerpts show only the relevant definitions):
         {full_file_contents_context}
 
         6. Generate SEARCH/REPLACE blocks for each necessary change. Each block should:
@@ -332,7 +374,7 @@ async def generate_edit_instructions(file_path, file_content, instructions, proj
            - Consider the overall structure and purpose of the code
            - Follow best practices and coding standards for the language
            - Maintain consistency with the project context and previous edits
-           - Take into account the full context of all files in the project
+           - Take into account the related files
 
         IMPORTANT: RETURN ONLY THE SEARCH/REPLACE BLOCKS. NO EXPLANATIONS OR COMMENTS.
         USE THE FOLLOWING FORMAT FOR EACH BLOCK:
@@ -365,7 +407,9 @@ async def generate_edit_instructions(file_path, file_content, instructions, proj
         edit_instructions = parse_search_replace_blocks(response.content[0].text)
 
         # Update code editor memory (this is the only part that maintains some context between calls)
-        code_editor_memory.append(f"Edit Instructions for {file_path}:\n{response.content[0].text}")
+        memory = f"Edit Instructions for {file_path}:\n{response.content[0].text}"
+        if memory not in code_editor_memory:  # Retries often return the same instructions
+            code_editor_memory.append(memory)
 
         # Add the file to code_editor_files set
         code_editor_files.add(file_path)
@@ -379,17 +423,7 @@ async def generate_edit_instructions(file_path, file_content, instructions, proj
 
 
 def parse_search_replace_blocks(response_text):
-    blocks = []
-    pattern = r'<SEARCH>\n(.*?)\n</SEARCH>\n<REPLACE>\n(.*?)\n</REPLACE>'
-    matches = re.findall(pattern, response_text, re.DOTALL)
-    
-    for search, replace in matches:
-        blocks.append({
-            'search': search.strip(),
-            'replace': replace.strip()
-        })
-    
-    return json.dumps(blocks)  # Keep returning JSON string
+    return [block.to_dict() for block in parse_blocks(response_text)]
 
 
 async def edit_and_apply(path, instructions, project_context, is_automode=False, max_retries=3):
@@ -402,10 +436,9 @@ async def edit_and_apply(path, instructions, project_context, is_automode=False,
             file_contents[path] = original_content
 
         for attempt in range(max_retries):
-            edit_instructions_json = await generate_edit_instructions(path, original_content, instructions, project_context, file_contents)
+            edit_instructions = await generate_edit_instructions(path, original_content, instructions, project_context, file_contents)
             
-            if edit_instructions_json:
-                edit_instructions = json.loads(edit_instructions_json)  # Parse JSON here
+            if edit_instructions:
                 console.print(Panel(f"Attempt {attempt + 1}/{max_retries}: The following SEARCH/REPLACE blocks have been generated:", title="Edit Instructions", style="cyan"))
                 for i, block in enumerate(edit_instructions, 1):
                     console.print(f"Block {i}:")
@@ -438,70 +471,34 @@ async def edit_and_apply(path, instructions, project_context, is_automode=False,
 
 
 async def apply_edits(file_path, edit_instructions, original_content):
-    changes_made = False
-    edited_content = original_content
-    total_edits = len(edit_instructions)
-    failed_edits = []
-
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-        console=console
-    ) as progress:
-        edit_task = progress.add_task("[cyan]Applying edits...", total=total_edits)
-
-        for i, edit in enumerate(edit_instructions, 1):
-            search_content = edit['search'].strip()
-            replace_content = edit['replace'].strip()
-            
-            # Use regex to find the content, ignoring leading/trailing whitespace
-            pattern = re.compile(re.escape(search_content), re.DOTALL)
-            match = pattern.search(edited_content)
-            
-            if match:
-                # Replace the content, preserving the original whitespace
-                start, end = match.span()
-                # Strip <SEARCH> and <REPLACE> tags from replace_content
-                replace_content_cleaned = re.sub(r'</?SEARCH>|</?REPLACE>', '', replace_content)
-                edited_content = edited_content[:start] + replace_content_cleaned + edited_content[end:]
-                changes_made = True
-                
-                # Display the diff for this edit
-                diff_result = generate_diff(search_content, replace_content, file_path)
-                console.print(Panel(diff_result, title=f"Changes in {file_path} ({i}/{total_edits})", style="cyan"))
-            else:
-                console.print(Panel(f"Edit {i}/{total_edits} not applied: content not found", style="yellow"))
-                failed_edits.append(f"Edit {i}: {search_content}")
-
-            progress.update(edit_task, advance=1)
+    # All blocks are located in one pass and applied with a single rebuild
+    report = apply_blocks(original_content, edit_instructions)
+    total_edits = len(report.results)
+
+    for block, result in zip(report.blocks, report.results):
+        if result.ok:
+            diff_result = generate_diff(block.search, block.replace, file_path)
+            console.print(Panel(diff_result, title=f"Changes in {file_path} ({result.index}/{total_edits}, {result.describe()})", style="cyan"))
+        else:
+            console.print(Panel(f"Edit {result.index}/{total_edits} not applied: {result.describe()}", style="yellow"))
 
+    changes_made = bool(report.applied)
     if not changes_made:
         console.print(Panel("No changes were applied. The file content already matches the desired state.", style="green"))
     else:
         # Write the changes to the file
-        with open(file_path, 'w') as file:
-            file.write(edited_content)
+        atomic_write(file_path, report.content)
         console.print(Panel(f"Changes have been written to {file_path}", style="green"))
 
-    return edited_content, changes_made, "\n".join(failed_edits)
+    return report.content, changes_made, report.failure_summary()
 
 def generate_diff(original, new, path):
-    diff = list(difflib.unified_diff(
-        original.splitlines(keepends=True),
-        new.splitlines(keepends=True),
-        fromfile=f"a/{path}",
-        tofile=f"b/{path}",
-        n=3
-    ))
-
-    diff_text = ''.join(diff)
+    diff_text = unified_diff(original, new, path)
     highlighted_diff = highlight_diff(diff_text)
 
     return highlighted_diff
 
-def read_file(path):
+def read_file(path, start_line=None, end_line=None):
     global file_contents
     try:
         if not os.path.exists(path):
@@ -509,6 +506,14 @@ def read_file(path):
                 "content": f"Error: File '{path}' not found",
                 "is_error": True
             }
+        if start_line is not None or end_line is not None:
+            # A window is returned directly instead of pinning the whole file
+            # in the system prompt
+            window = read_lines(path, start_line or 1, end_line)
+            return {
+                "content": f"{window.header()}\n{window.text}",
+                "is_error": False
+            }
         with open(path, 'r') as f:
             content = f.read()
         file_contents[path] = content
@@ -628,15 +633,15 @@ async def execute_tool(tool_call: Dict[str, Any], provider_context: Optional[Pro
         # Create tool instance with provider context
         tool_instance = tool_class(provider_context=provider_context)
 
-        # Execute tool
-        result = await tool_instance.execute(**tool_input)
+        # Execute tool; sync tools run in a thread and every tool has a deadline
+        result = await tool_instance.aexecute(**tool_input)
 
         # Format response
-        if isinstance(result, dict) and "content" in result:
-            return result
+        content, is_error = unwrap_result(result)
         return {
-            "content": result,
-            "is_error": False
+            "content": content,
+            "is_error": is_error,
+            "metadata": result.get("metadata", {}) if isinstance(result, dict) else {}
         }
 
     except KeyError as e:
@@ -735,8 +740,9 @@ async def chat_with_ollama(user_input, image_path=None, current_iteration=None,
     messages = filtered_conversation_history + current_conversation
 
     try:
-        # Update system prompt if needed
-        system_prompt = update_system_prompt(current_iteration, max_iterations)
+        # Update system prompt if needed; the repository outline is built off the event loop
+        outline = await asyncio.to_thread(repo_map_outline, list(file_contents))
+        system_prompt = update_system_prompt(current_iteration, max_iterations, outline)
 
         # Get provider config
         provider = PROVIDER_CONFIG['ollama']
@@ -746,8 +752,11 @@ async def chat_with_ollama(user_input, image_path=None, current_iteration=None,
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         
-        # Add conversation history
-        messages.extend(conversation_history)
+        # Add as much conversation history as fits the context budget
+        reserve_tokens = estimate_tokens({"role": "user", "content": user_input})
+        if system_prompt:
+            reserve_tokens += estimate_tokens(messages[0])
+        messages.extend(context_window.assemble(conversation_history, reserve_tokens=reserve_tokens))
         
         # Add current message
         messages.append({"role": "user", "content": user_input})
@@ -798,6 +807,8 @@ async def chat_with_ollama(user_input, image_path=None, current_iteration=None,
         files_in_context = "No files in context. Read, create, or edit files to add."
     console.print(Panel(files_in_context, title="Files in Context", title_align="left", border_style="white", expand=False))
 
+    # Parse every call first so independent ones can run together
+    parsed_calls = []
     for tool_call in tool_calls:
         tool_name = tool_call['function']['name']
         tool_arguments = tool_call['function']['arguments']
@@ -813,45 +824,46 @@ async def chat_with_ollama(user_input, image_path=None, current_iteration=None,
 
         console.print(Panel(f"Tool Used: {tool_name}", style="green"))
         console.print(Panel(f"Tool Input: {json.dumps(tool_input, indent=2)}", style="green"))
-
-        tool_result = await execute_tool(tool_call)
-        
-        if tool_result["is_error"]:
-            console.print(Panel(tool_result["content"], title="Tool Execution Error", style="bold red"))
-        else:
-            console.print(Panel(tool_result["content"], title_align="left", title="Tool Result", style="green"))
+        parsed_calls.append((tool_call, tool_name))
+
+    if parsed_calls:
+        # Read-only calls run concurrently; results keep the request order
+        tool_results = await tool_scheduler.run(
+            tool_calls,
+            execute_tool,
+            lambda tool_call: tool_call['function']['name'] in READ_ONLY_TOOLS
+        )
 
         current_conversation.append({
             "role": "assistant",
             "content": None,
-            "tool_calls": [tool_call]
+            "tool_calls": tool_calls
         })
 
-        current_conversation.append({
-            "role": "tool",
-            "content": tool_result["content"],
-            "tool_call_id": tool_call.get('id', 'unknown_id')  # Use 'unknown_id' if 'id' is not present
-        })
+        for (tool_call, tool_name), tool_result in zip(parsed_calls, tool_results):
+            if tool_result["is_error"]:
+                console.print(Panel(tool_result["content"], title=f"Tool Execution Error: {tool_name}", style="bold red"))
+            else:
+                console.print(Panel(tool_result["content"], title_align="left", title=f"Tool Result: {tool_name}", style="green"))
 
-        # Update the file_contents dictionary if applicable
-        if tool_name in ['create_file', 'edit_and_apply', 'read_file'] and not tool_result["is_error"]:
-            if 'path' in tool_input:
-                file_path = tool_input['path']
-                if "File contents updated in system prompt" in tool_result["content"] or \
-                   "File created and added to system prompt" in tool_result["content"] or \
-                   "has been read and stored in the system prompt" in tool_result["content"]:
-                    # The file_contents dictionary is already updated in the tool function
-                    pass
+            current_conversation.append({
+                "role": "tool",
+                "content": tool_result["content"],
+                "tool_call_id": tool_call.get('id', 'unknown_id')  # Use 'unknown_id' if 'id' is not present
+            })
 
+        # The file_contents store is updated by the file tools themselves
         messages = filtered_conversation_history + current_conversation
 
         try:
-            # Update system prompt if needed
-            system_prompt = update_system_prompt(current_iteration, max_iterations)
+            # Update system prompt if needed; the repository outline is built off the event loop
+            outline = await asyncio.to_thread(repo_map_outline, list(file_contents))
+            system_prompt = update_system_prompt(current_iteration, max_iterations, outline)
 
             # Prepend the system message to the messages list
             messages_with_system = [{"role": "system", "content": system_prompt}] + messages
             
+            # One follow-up request carries every tool result
             tool_response = await client.chat(
                 model=TOOLCHECKERMODEL,
                 messages=messages_with_system,
@@ -888,7 +900,7 @@ def reset_code_editor_memory():
 def reset_conversation():
     global conversation_history, file_contents, code_editor_files
     conversation_history = []
-    file_contents = {}
+    file_contents = FileContextStore(FILE_CONTEXT_MAX_BYTES)
     code_editor_files = set()
     reset_code_editor_memory()
     console.print(Panel("Conversation history, file contents, code editor memory, and code editor files have been reset.", title="Reset", style="bold green"))
@@ -953,6 +965,7 @@ async def main():
 
         if user_input.lower() == 'exit':
             console.print(Panel("Thank you for chatting. Goodbye!", title_align="left", title="Goodbye", style="bold green"))
+            await close_transport()
             break
 
         if user_input.lower() == 'reset':
@@ -1027,30 +1040,30 @@ async def chat_with_cborg(user_input, image_path=None, current_iteration=None, m
         # Prepare the messages
         messages = [{"role": "user", "content": user_input}]
 
-        # Make request to CBORG API
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{PROVIDER_CONFIG['cborg']['base_url']}/v1/chat/completions",
-                headers={
-                    'Authorization': f'Bearer {api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': PROVIDER_CONFIG['cborg']['default_model'],
-                    'messages': messages,
-                    'temperature': PROVIDER_CONFIG['cborg']['parameters']['temperature'],
-                    'stream': False
-                }
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"CBORG API error: {error_text}")
-                
-                result = await response.json()
-                
-                # Extract the response
-                assistant_message = result['choices'][0]['message']['content']
-                return assistant_message
+        # Make request to CBORG API over the shared connection pool
+        session = await get_session()
+        async with session.post(
+            f"{PROVIDER_CONFIG['cborg']['base_url']}/v1/chat/completions",
+            headers={
+                'Authorization': f'Bearer {api_key}',
+                'Content-Type': 'application/json'
+            },
+            json={
+                'model': PROVIDER_CONFIG['cborg']['default_model'],
+                'messages': messages,
+                'temperature': PROVIDER_CONFIG['cborg']['parameters']['temperature'],
+                'stream': False
+            }
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"CBORG API error: {error_text}")
+            
+            result = await response.json()
+            
+            # Extract the response
+            assistant_message = result['choices'][0]['message']['content']
+            return assistant_message
 
     except Exception as e:
         logging.error(f"Error in chat_with_cborg: {str(e)}")
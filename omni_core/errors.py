@@ -7,6 +7,8 @@ from typing import Optional, Dict, Any
 import aiohttp
 from rich.console import Console
 
+from .transport import get_session
+
 console = Console()
 
 class OmniError(Exception):
@@ -53,22 +55,19 @@ async def check_connection(url: str) -> None:
     Raises:
         ConnectionError: If the URL is not accessible
     """
-    session = aiohttp.ClientSession()
+    session = await get_session()
     try:
-        async with session:
-            async with await session.get(url) as response:
-                if response.status != 200:
-                    raise ConnectionError(
-                        f"Failed to connect to {url}",
-                        {"status": response.status, "reason": response.reason}
-                    )
+        async with await session.get(url) as response:
+            if response.status != 200:
+                raise ConnectionError(
+                    f"Failed to connect to {url}",
+                    {"status": response.status, "reason": response.reason}
+                )
     except aiohttp.ClientError as e:
         raise ConnectionError(
             f"Failed to connect to {url}",
             {"error": str(e)}
         )
-    finally:
-        await session.close()
 
 def validate_api_key(key: Optional[str], provider: str) -> None:
     """Validate that an API key is present and well-formed.
@@ -107,28 +106,25 @@ async def check_model_availability(provider: str, model: str, base_url: str) ->
         ConnectionError: If there are connectivity issues
     """
     if provider == "ollama":
-        session = aiohttp.ClientSession()
+        session = await get_session()
         try:
-            async with session:
-                async with await session.get(f"{base_url}/api/tags") as response:
-                    if response.status != 200:
-                        raise ModelError(
-                            f"Failed to get model list from {provider}",
-                            {"status": response.status, "reason": response.reason}
-                        )
-                    models = await response.json()
-                    if not any(m["name"] == model for m in models["models"]):
-                        raise ModelError(
-                            f"Model {model} not available for {provider}",
-                            {"available_models": [m["name"] for m in models["models"]]}
-                        )
+            async with await session.get(f"{base_url}/api/tags") as response:
+                if response.status != 200:
+                    raise ModelError(
+                        f"Failed to get model list from {provider}",
+                        {"status": response.status, "reason": response.reason}
+                    )
+                models = await response.json()
+                if not any(m["name"] == model for m in models["models"]):
+                    raise ModelError(
+                        f"Model {model} not available for {provider}",
+                        {"available_models": [m["name"] for m in models["models"]]}
+                    )
         except aiohttp.ClientError as e:
             raise ConnectionError(
                 f"Failed to connect to {provider}",
                 {"error": str(e)}
             )
-        finally:
-            await session.close()
     elif provider == "cborg":
         # CBORG model availability check will be implemented when we add CBORG support
         pass
@@ -0,0 +1,216 @@
+"""Content-addressed store for the file contents kept in context.
+
+The engine keeps the text of every file it reads, creates or edits so the
+model can see it. In a long session that grows without bound, and the same
+text is often stored under several paths or read again unchanged. The store
+here keeps each distinct text once, keyed by its hash, maps paths to hashes,
+compresses entries that have not been used recently and evicts the least
+recently used paths once a byte cap is reached.
+"""
+
+import hashlib
+import logging
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, MutableMapping, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-256 hex digest of a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class StoreStats:
+    """Snapshot of file context store usage"""
+    paths: int = 0
+    blobs: int = 0
+    stored_bytes: int = 0  # Bytes held, after compression
+    raw_bytes: int = 0  # Bytes the blobs would take uncompressed
+    compressed_blobs: int = 0
+    dedup_hits: int = 0  # Writes whose content was already stored
+    evictions: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the statistics as a JSON-serialisable dictionary."""
+        return asdict(self)
+
+
+class _Blob:
+    """A stored text, possibly compressed."""
+
+    __slots__ = ("data", "size", "compressed", "paths")
+
+    def __init__(self, text: str):
+        self.data = text.encode("utf-8")
+        self.size = len(self.data)
+        self.compressed = False
+        self.paths: Set[str] = set()
+
+    @property
+    def stored_size(self) -> int:
+        return len(self.data)
+
+    def text(self) -> str:
+        data = zlib.decompress(self.data) if self.compressed else self.data
+        return data.decode("utf-8")
+
+    def compress(self) -> None:
+        packed = zlib.compress(self.data, 6)
+        if len(packed) < self.size:  # Keep incompressible data as is
+            self.data = packed
+            self.compressed = True
+
+
+class FileContextStore(MutableMapping):
+    """A mapping of path to file text backed by content-addressed storage.
+    
+    It can be used wherever a dict of path to contents is expected. Reading a
+    path with ``[]`` or ``get`` or writing it marks it as recently used;
+    iterating does not, so rendering every file into a prompt leaves the
+    eviction order alone. ``version`` changes on every modification, like
+    TrackedDict, so prompt caches can tell when the contents changed.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, hot_entries: int = 8, compress_min_bytes: int = 4096):
+        """Initialize the store.
+        
+        Args:
+            max_bytes: Cap on stored bytes; least recently used paths are
+                evicted beyond it. None disables the cap.
+            hot_entries: Number of most recently used blobs kept uncompressed
+            compress_min_bytes: Blobs smaller than this are never compressed
+        """
+        self.max_bytes = max_bytes
+        self.hot_entries = hot_entries
+        self.compress_min_bytes = compress_min_bytes
+        self.version = 0
+        self._paths: "OrderedDict[str, str]" = OrderedDict()  # path -> hash, least recent first
+        self._blobs: "OrderedDict[str, _Blob]" = OrderedDict()  # hash -> blob, least recent first
+        self._stored_bytes = 0
+        self._dedup_hits = 0
+        self._evictions = 0
+
+    # Mapping interface
+
+    def __getitem__(self, path: str) -> str:
+        digest = self._paths[path]
+        self._touch(path, digest)
+        return self._blobs[digest].text()
+
+    def __setitem__(self, path: str, text: str) -> None:
+        digest = content_hash(text)
+        if self._paths.get(path) == digest:
+            self._touch(path, digest)
+            return  # Unchanged; keep the version so prompts stay cached
+
+        self._release(path)
+        blob = self._blobs.get(digest)
+        if blob is None:
+            blob = self._blobs[digest] = _Blob(text)
+            self._stored_bytes += blob.stored_size
+        else:
+            self._dedup_hits += 1
+        blob.paths.add(path)
+        self._paths[path] = digest
+        self._touch(path, digest)
+        self.version += 1
+        self._compress_cold()
+        self._evict()
+
+    def __delitem__(self, path: str) -> None:
+        if path not in self._paths:
+            raise KeyError(path)
+        self._release(path)
+        self.version += 1
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._paths))
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._paths
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate over (path, text) pairs without changing the eviction order."""
+        for path, digest in list(self._paths.items()):
+            yield path, self._blobs[digest].text()
+
+    def values(self) -> Iterator[str]:
+        for _, text in self.items():
+            yield text
+
+    def clear(self) -> None:
+        self._paths.clear()
+        self._blobs.clear()
+        self._stored_bytes = 0
+        self.version += 1
+
+    # Content addressing
+
+    def hash_of(self, path: str) -> Optional[str]:
+        """Return the content hash stored for a path, if any."""
+        return self._paths.get(path)
+
+    def paths_of(self, digest: str) -> Set[str]:
+        """Return the paths whose content has the given hash."""
+        blob = self._blobs.get(digest)
+        return set(blob.paths) if blob is not None else set()
+
+    def stats(self) -> StoreStats:
+        """Return a snapshot of the store usage."""
+        return StoreStats(
+            paths=len(self._paths),
+            blobs=len(self._blobs),
+            stored_bytes=self._stored_bytes,
+            raw_bytes=sum(blob.size for blob in self._blobs.values()),
+            compressed_blobs=sum(1 for blob in self._blobs.values() if blob.compressed),
+            dedup_hits=self._dedup_hits,
+            evictions=self._evictions,
+        )
+
+    # Internals
+
+    def _touch(self, path: str, digest: str) -> None:
+        """Mark a path and its blob as most recently used."""
+        self._paths.move_to_end(path)
+        self._blobs.move_to_end(digest)
+
+    def _release(self, path: str) -> None:
+        """Remove a path, dropping its blob when no other path uses it."""
+        digest = self._paths.pop(path, None)
+        if digest is None:
+            return
+        blob = self._blobs[digest]
+        blob.paths.discard(path)
+        if not blob.paths:
+            del self._blobs[digest]
+            self._stored_bytes -= blob.stored_size
+
+    def _compress_cold(self) -> None:
+        """Compress blobs outside the most recently used ones."""
+        cold = len(self._blobs) - self.hot_entries
+        for blob in list(self._blobs.values())[:max(cold, 0)]:
+            if blob.compressed or blob.size < self.compress_min_bytes:
+                continue
+            before = blob.stored_size
+            blob.compress()
+            self._stored_bytes += blob.stored_size - before
+
+    def _evict(self) -> None:
+        """Evict least recently used paths until under the byte cap.
+        
+        The most recently written path is always kept.
+        """
+        if self.max_bytes is None:
+            return
+        while self._stored_bytes > self.max_bytes and len(self._paths) > 1:
+            path = next(iter(self._paths))
+            logger.debug(f"Evicting {path} from the file context")
+            self._release(path)
+            self._evictions += 1
@@ -0,0 +1,387 @@
+"""Fast, gitignore-aware directory walking and file reading for tools.
+
+Tools that read whole directories need to skip what the project ignores,
+tell text from binary files without trusting extensions and avoid reading
+megabytes they will not return. The walker uses os.scandir, so file sizes
+come from the directory listing, honours .gitignore files (including those
+of enclosing directories up to the repository root) and reads files on a
+thread pool within per-file and total byte caps.
+"""
+
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SNIFF_BYTES = 8192  # Bytes inspected to tell text from binary
+DEFAULT_MAX_FILE_BYTES = 1024 * 1024
+DEFAULT_MAX_TOTAL_BYTES = 4 * 1024 * 1024
+
+
+def is_binary(sample: bytes) -> bool:
+    """Guess whether data is binary from its first bytes.
+    
+    Data containing NUL bytes or that is not valid UTF-8 is considered binary.
+    """
+    if b"\0" in sample:
+        return True
+    try:
+        sample.decode("utf-8")
+        return False
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is fine
+        return e.start < len(sample) - 3
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore glob to a regular expression."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("/**", i) and i + 3 == len(pattern):
+            parts.append("/.*")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+class GitIgnore:
+    """The rules of one .gitignore file."""
+
+    def __init__(self, lines: Iterable[str]):
+        """Parse gitignore lines.
+        
+        Args:
+            lines: The lines of a .gitignore file
+        """
+        self.rules: List[Tuple["re.Pattern[str]", bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip("\r")
+            if not line.strip() or line.startswith("#"):
+                continue
+            if not line.endswith("\\ "):
+                line = line.rstrip()
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            elif line.startswith("\\!") or line.startswith("\\#"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            regex = _glob_to_regex(line.lstrip("/"))
+            if not anchored:
+                regex = "(?:.*/)?" + regex
+            self.rules.append((re.compile(regex + r"\Z", re.DOTALL), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path: str) -> Optional["GitIgnore"]:
+        """Parse a .gitignore file, returning None if it cannot be read."""
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as file:
+                return cls(file)
+        except OSError:
+            return None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Return True if ignored, False if re-included, None if no rule matches.
+        
+        Args:
+            rel_path: Path relative to the directory of the .gitignore, with
+                forward slashes
+            is_dir: Whether the path is a directory
+        """
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negate
+        return result
+
+
+@dataclass
+class WalkStats:
+    """What a directory read returned and skipped"""
+    files_read: int = 0
+    bytes_read: int = 0
+    skipped_ignored: int = 0  # Matched .gitignore or the ignore patterns
+    skipped_binary: int = 0
+    skipped_too_large: int = 0  # Over the per-file cap
+    skipped_total_cap: int = 0  # Left out once the total cap was reached
+    skipped_bytes: int = 0  # Size of the files skipped for their size or the caps
+    errors: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the statistics as a JSON-serialisable dictionary."""
+        return asdict(self)
+
+
+def _to_posix(path: str) -> str:
+    return path.replace(os.sep, "/")
+
+
+def _enclosing_ignores(directory: str) -> List[Tuple[str, GitIgnore]]:
+    """Return the .gitignore rules of the directories above one in its repository.
+    
+    Nothing is returned when the directory is not inside a git repository.
+    """
+    directory = os.path.abspath(directory)
+    parents = []
+    current = os.path.dirname(directory)
+    while True:
+        parents.append(current)
+        if os.path.isdir(os.path.join(current, ".git")):
+            break
+        parent = os.path.dirname(current)
+        if parent == current:
+            return []  # Not in a repository
+        current = parent
+    if os.path.isdir(os.path.join(directory, ".git")):
+        return []
+    ignores = []
+    for parent in reversed(parents):
+        gitignore = GitIgnore.from_file(os.path.join(parent, ".gitignore"))
+        if gitignore is not None:
+            ignores.append((parent, gitignore))
+    return ignores
+
+
+def walk_files(
+    root: str,
+    skip: Optional[Callable[[str, bool], bool]] = None,
+    stats: Optional[WalkStats] = None,
+    use_gitignore: bool = True
+) -> Iterator[Tuple[str, int]]:
+    """Yield (path, size) for the files under root, in sorted order.
+    
+    Takes the same arguments as walk_stat.
+    """
+    for path, st in walk_stat(root, skip, stats, use_gitignore):
+        yield path, st.st_size
+
+
+def walk_stat(
+    root: str,
+    skip: Optional[Callable[[str, bool], bool]] = None,
+    stats: Optional[WalkStats] = None,
+    use_gitignore: bool = True
+) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield (path, stat) for the files under root, in sorted order.
+    
+    Args:
+        root: Directory to walk
+        skip: Called with an entry name and whether it is a directory;
+            returns True to leave the entry out. .git directories are
+            always left out.
+        stats: Counts the entries left out in skipped_ignored
+        use_gitignore: Honour .gitignore files
+    """
+    stats = stats if stats is not None else WalkStats()
+    ignores: List[Tuple[str, GitIgnore]] = _enclosing_ignores(root) if use_gitignore else []
+    abs_root = os.path.abspath(root)
+    stack: List[Tuple[str, str, List[Tuple[str, GitIgnore]]]] = [(root, abs_root, ignores)]
+
+    while stack:
+        directory, abs_directory, ignores = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError:
+            stats.errors += 1
+            continue
+
+        if use_gitignore and any(entry.name == ".gitignore" for entry in entries):
+            gitignore = GitIgnore.from_file(os.path.join(directory, ".gitignore"))
+            if gitignore is not None:
+                ignores = ignores + [(abs_directory, gitignore)]
+
+        subdirectories = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file(follow_symlinks=False):
+                    continue  # Symlinks, sockets and the like
+            except OSError:
+                stats.errors += 1
+                continue
+
+            if (
+                (is_dir and entry.name == ".git")
+                or (skip is not None and skip(entry.name, is_dir))
+                or _ignored(entry.path, is_dir, ignores)
+            ):
+                stats.skipped_ignored += 1
+                continue
+
+            if is_dir:
+                subdirectories.append((entry.path, os.path.join(abs_directory, entry.name), ignores))
+            else:
+                try:
+                    yield entry.path, entry.stat(follow_symlinks=False)
+                except OSError:
+                    stats.errors += 1
+
+        # Pop subdirectories in name order
+        stack.extend(reversed(subdirectories))
+
+
+def _ignored(path: str, is_dir: bool, ignores: List[Tuple[str, GitIgnore]]) -> bool:
+    """Apply gitignore rules, the deepest file first."""
+    abs_path = os.path.abspath(path)
+    for base, gitignore in reversed(ignores):
+        result = gitignore.match(_to_posix(os.path.relpath(abs_path, base)), is_dir)
+        if result is not None:
+            return result
+    return False
+
+
+def read_text(path: str, max_bytes: int = DEFAULT_MAX_FILE_BYTES) -> Tuple[Optional[str], str]:
+    """Read a text file.
+    
+    Returns:
+        (text, status) where status is "ok", "binary", "too_large" or an
+        error message, and text is None unless status is "ok"
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read(max_bytes + 1)
+    except PermissionError:
+        return None, "Error: Permission denied"
+    except IsADirectoryError:
+        return None, "Error: Path is a directory"
+    except OSError as e:
+        return None, f"Error: {str(e)}"
+    if len(data) > max_bytes:
+        return None, "too_large"
+    if is_binary(data[:SNIFF_BYTES]):
+        return None, "binary"
+    try:
+        return data.decode("utf-8"), "ok"
+    except UnicodeDecodeError:
+        return None, "binary"
+
+
+def read_files(
+    files: Iterable[Tuple[str, int]],
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    max_total_bytes: int = DEFAULT_MAX_TOTAL_BYTES,
+    workers: Optional[int] = None,
+    stats: Optional[WalkStats] = None
+) -> Dict[str, str]:
+    """Read text files concurrently within size caps.
+    
+    Takes the same arguments as iter_files.
+        
+    Returns:
+        Mapping of path to text, in the order of files
+    """
+    return dict(iter_files(files, max_file_bytes, max_total_bytes, workers, stats))
+
+
+def iter_files(
+    files: Iterable[Tuple[str, int]],
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    max_total_bytes: int = DEFAULT_MAX_TOTAL_BYTES,
+    workers: Optional[int] = None,
+    stats: Optional[WalkStats] = None
+) -> Iterator[Tuple[str, str]]:
+    """Read text files concurrently within size caps, yielding them in order.
+    
+    Files are admitted in order using their listed sizes, so the result does
+    not depend on thread timing. Binary and oversized files are left out and
+    counted in stats. Only a few files per worker are read ahead of the
+    consumer, so memory stays bounded however many files are listed, and
+    closing the iterator early stops reading.
+    
+    Args:
+        files: (path, size) pairs, for example from walk_files
+        max_file_bytes: Files larger than this are skipped
+        max_total_bytes: Files past this running total are skipped
+        workers: Reader threads; defaults to the executor's choice
+        stats: Receives the counts
+        
+    Yields:
+        (path, text) in the order of files
+    """
+    stats = stats if stats is not None else WalkStats()
+
+    def admitted() -> Iterator[Tuple[str, int]]:
+        total = 0
+        for path, size in files:
+            if size > max_file_bytes:
+                stats.skipped_too_large += 1
+                stats.skipped_bytes += size
+            elif total + size > max_total_bytes:
+                stats.skipped_total_cap += 1
+                stats.skipped_bytes += size
+            else:
+                total += size
+                yield path, size
+
+    def finish(path: str, size: int, future) -> Optional[Tuple[str, str]]:
+        text, status = future.result()
+        if status == "ok":
+            stats.files_read += 1
+            stats.bytes_read += size
+            return path, text
+        if status == "binary":
+            stats.skipped_binary += 1
+        elif status == "too_large":  # Grew since it was listed
+            stats.skipped_too_large += 1
+        else:
+            stats.errors += 1
+        return None
+
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)  # ThreadPoolExecutor's default
+    read_ahead = 2 * workers
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending: Deque[Tuple[str, int, Any]] = deque()
+    try:
+        for path, size in admitted():
+            pending.append((path, size, executor.submit(read_text, path, max_file_bytes)))
+            if len(pending) >= read_ahead:
+                result = finish(*pending.popleft())
+                if result is not None:
+                    yield result
+        while pending:
+            result = finish(*pending.popleft())
+            if result is not None:
+                yield result
+    finally:
+        for _, _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
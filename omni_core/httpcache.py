@@ -0,0 +1,440 @@
+"""Disk-backed HTTP cache with conditional revalidation.
+
+Pages fetched by the web tools are stored on disk, keyed by their
+normalised URL, together with the ETag and Last-Modified validators the
+server sent. A page younger than its time to live (the server's max-age,
+or DEFAULT_TTL) is served without a request. An older page is revalidated
+with If-None-Match / If-Modified-Since, so an unchanged page costs a 304
+instead of a download. The most recently used pages are also kept in
+memory, and the cache directory is bounded in bytes by evicting the least
+recently used entries. Each entry is two files: the body as raw bytes and
+its metadata as JSON, so reading the cache never runs code from it.
+
+Downloads can be capped in bytes: the body is streamed and the connection
+closed once the cap is reached, and the response is marked truncated.
+fetch uses requests; afetch is the same on an aiohttp session, for
+concurrent fetches on the event loop.
+"""
+
+import os
+import time
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiohttp
+import requests
+
+from .atomicfile import atomic_write
+
+logger = logging.getLogger(__name__)
+
+ENTRY_FORMAT = 3  # Bump when the stored layout changes
+ENTRY_SUFFIX = ".json"  # Metadata; written after the body, so its presence marks a complete entry
+BODY_SUFFIX = ".body"
+LEGACY_SUFFIX = ".entry"  # Pickled entries of format 2, removed on load
+DEFAULT_TTL = 3600.0  # Seconds a page is served without revalidation
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+MEMORY_ENTRIES = 64  # Pages also kept in memory
+CHUNK_BYTES = 64 * 1024
+DEFAULT_CACHE_DIR = os.getenv(
+    "OMNI_HTTP_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".http_cache")
+)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+
+def normalize_url(url: str) -> str:
+    """Return a canonical form of a URL for cache keys and deduplication.
+
+    The scheme and host are lowercased, default ports, fragments and
+    tracking parameters dropped, query parameters sorted and an empty path
+    becomes "/".
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        host = f"{parts.username}@{host}"
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+@dataclass
+class CacheStats:
+    """Counters of a cache"""
+    hits: int = 0  # Served from the cache without a request
+    revalidated: int = 0  # Served from the cache after a 304
+    misses: int = 0  # Downloaded
+    stores: int = 0
+    evictions: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the counters as a dictionary."""
+        return asdict(self)
+
+
+@dataclass
+class CachedResponse:
+    """A stored HTTP response"""
+    url: str
+    status: int
+    headers: Dict[str, str]  # Lowercased names
+    content: bytes
+    encoding: Optional[str]
+    stored_at: float
+    expires_at: float
+    from_cache: bool = False
+    truncated: bool = False  # The body stops at a download limit
+
+    @property
+    def text(self) -> str:
+        """The body decoded with the response's encoding."""
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        """Whether the response may be used without revalidation."""
+        return (time.time() if now is None else now) < self.expires_at
+
+
+def _max_age(headers: Mapping[str, str], default: float) -> Optional[float]:
+    """Return how long a response may be cached, or None if it must not be stored."""
+    directives = {}
+    for part in headers.get("cache-control", "").lower().split(","):
+        name, _, value = part.strip().partition("=")
+        directives[name] = value.strip('"')
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    try:
+        return float(directives["max-age"])
+    except (KeyError, ValueError):
+        return default
+
+
+def _read_capped(response: Any, max_bytes: int) -> Tuple[bytes, bool]:
+    """Read a streamed body up to max_bytes, returning it and whether it was cut."""
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(CHUNK_BYTES):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > max_bytes:
+            return b"".join(chunks)[:max_bytes], True
+    return b"".join(chunks), False
+
+
+class HttpCache:
+    """HTTP responses cached in a directory, least recently used first out"""
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL,
+        memory_entries: int = MEMORY_ENTRIES,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()  # Entry file name -> bytes, oldest use first
+        self._memory: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._load()
+
+    def _load(self) -> None:
+        """Register the entries already on disk, ordered by last use."""
+        try:
+            found = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        sizes = {entry.name: entry.stat().st_size for entry in found}
+        metadata = []
+        for entry in found:
+            if entry.name.endswith(LEGACY_SUFFIX):
+                os.unlink(entry.path)
+            elif entry.name.endswith(ENTRY_SUFFIX):
+                metadata.append(entry)
+        for entry in sorted(metadata, key=lambda entry: entry.stat().st_mtime):
+            name = entry.name[:-len(ENTRY_SUFFIX)]
+            size = sizes[entry.name] + sizes.get(name + BODY_SUFFIX, 0)
+            self._sizes[name] = size
+            self._bytes += size
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _paths(self, name: str) -> Tuple[str, str]:
+        """Return the metadata and body paths of an entry."""
+        base = os.path.join(self.directory, name)
+        return base + ENTRY_SUFFIX, base + BODY_SUFFIX
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        """Return the stored response for a URL, fresh or not."""
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                name = self._name(key)
+                if name in self._sizes:
+                    self._sizes.move_to_end(name)
+                return entry
+
+        name = self._name(key)
+        metadata_path, body_path = self._paths(name)
+        try:
+            with open(metadata_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("format") != ENTRY_FORMAT or data.get("key") != key:
+                return None
+            with open(body_path, "rb") as file:
+                content = file.read()
+            if len(content) != data["size"]:  # Caught between writing the body and the metadata
+                return None
+            entry = CachedResponse(content=content, **data["response"])
+            os.utime(metadata_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry {metadata_path}: {e}")
+            self._remove(name)
+            return None
+        with self._lock:
+            if name in self._sizes:
+                self._sizes.move_to_end(name)
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _remove(self, name: str) -> None:
+        with self._lock:
+            self._bytes -= self._sizes.pop(name, 0)
+        self._unlink(name)
+
+    def _unlink(self, name: str) -> None:
+        for path in self._paths(name):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def store(self, url: str, status: int, headers: Mapping[str, str], content: bytes,
+              encoding: Optional[str], truncated: bool = False, final_url: Optional[str] = None) -> CachedResponse:
+        """Store a response unless its headers forbid it, and return it.
+
+        The response is stored under url; final_url is where redirects led.
+        """
+        headers = {name.lower(): value for name, value in headers.items()}
+        now = time.time()
+        max_age = _max_age(headers, self.ttl)
+        entry = CachedResponse(final_url or url, status, headers, content, encoding, now, now + (max_age or 0.0),
+                               truncated=truncated)
+        if max_age is not None:
+            self._write(normalize_url(url), entry)
+        return entry
+
+    def revalidate(self, url: str, entry: CachedResponse, headers: Mapping[str, str]) -> CachedResponse:
+        """Renew the stored response of url after the server answered 304 Not Modified."""
+        merged = dict(entry.headers)
+        merged.update({name.lower(): value for name, value in headers.items()})
+        now = time.time()
+        max_age = _max_age(merged, self.ttl)
+        renewed = replace(entry, headers=merged, stored_at=now, expires_at=now + (max_age or 0.0), from_cache=False)
+        if max_age is not None:
+            self._write(normalize_url(url), renewed)
+        return replace(renewed, from_cache=True)
+
+    def _write(self, key: str, entry: CachedResponse) -> None:
+        response = asdict(entry)
+        del response["content"]
+        metadata = json.dumps(
+            {"format": ENTRY_FORMAT, "key": key, "size": len(entry.content), "response": response}
+        ).encode("utf-8")
+        size = len(metadata) + len(entry.content)
+        if size > self.max_bytes:
+            return
+        name = self._name(key)
+        metadata_path, body_path = self._paths(name)
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write(body_path, entry.content)
+        atomic_write(metadata_path, metadata)
+
+        evicted = []
+        with self._lock:
+            self._bytes += size - self._sizes.pop(name, 0)
+            self._sizes[name] = size
+            self._remember(key, entry)
+            self.stats.stores += 1
+            while self._bytes > self.max_bytes and len(self._sizes) > 1:
+                old, size = self._sizes.popitem(last=False)
+                self._bytes -= size
+                evicted.append(old)
+                self.stats.evictions += 1
+            if evicted:
+                # Evicted pages must not be served from memory either
+                names = set(evicted)
+                for memory_key in [k for k in self._memory if self._name(k) in names]:
+                    del self._memory[memory_key]
+        for old in evicted:
+            self._unlink(old)
+
+    @staticmethod
+    def conditional_headers(entry: CachedResponse) -> Dict[str, str]:
+        """Return the validators to send when revalidating a stored response."""
+        headers = {}
+        if "etag" in entry.headers:
+            headers["If-None-Match"] = entry.headers["etag"]
+        if "last-modified" in entry.headers:
+            headers["If-Modified-Since"] = entry.headers["last-modified"]
+        return headers
+
+    def fetch(
+        self,
+        url: str,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 10,
+        refresh: bool = False,
+        max_bytes: Optional[int] = None,
+        session: Any = requests,
+    ) -> CachedResponse:
+        """GET a URL through the cache.
+
+        Args:
+            url: Page to fetch
+            headers: Request headers
+            timeout: Request timeout in seconds
+            refresh: Revalidate even a fresh stored response
+            max_bytes: Stop downloading the body after this many bytes
+            session: requests module or Session to send requests with
+
+        Raises:
+            requests.RequestException: If the request fails or the server
+                answers with an error status
+        """
+        entry = self.lookup(url)
+        if entry is not None and not refresh and entry.is_fresh():
+            self.stats.hits += 1
+            return replace(entry, from_cache=True)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            request_headers.update(self.conditional_headers(entry))
+        if max_bytes is None:
+            response = session.get(url, headers=request_headers, timeout=timeout)
+        else:
+            response = session.get(url, headers=request_headers, timeout=timeout, stream=True)
+        try:
+            if response.status_code == 304 and entry is not None:
+                self.stats.revalidated += 1
+                return self.revalidate(url, entry, response.headers)
+            response.raise_for_status()
+            if max_bytes is None:
+                content, truncated = response.content, False
+                encoding = response.encoding or response.apparent_encoding
+            else:
+                content, truncated = _read_capped(response, max_bytes)
+                encoding = response.encoding
+        finally:
+            if max_bytes is not None:
+                response.close()
+        self.stats.misses += 1
+        return self.store(url, response.status_code, response.headers, content, encoding, truncated,
+                          getattr(response, "url", None))
+
+    async def afetch(
+        self,
+        url: str,
+        session: aiohttp.ClientSession,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 10,
+        refresh: bool = False,
+        max_bytes: Optional[int] = None,
+    ) -> CachedResponse:
+        """GET a URL through the cache on an aiohttp session.
+
+        Disk access runs in worker threads. Arguments are those of fetch.
+
+        Raises:
+            aiohttp.ClientError: If the request fails or the server answers
+                with an error status
+            asyncio.TimeoutError: If the request takes longer than timeout
+        """
+        entry = await asyncio.to_thread(self.lookup, url)
+        if entry is not None and not refresh and entry.is_fresh():
+            self.stats.hits += 1
+            return replace(entry, from_cache=True)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            request_headers.update(self.conditional_headers(entry))
+        async with session.get(url, headers=request_headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status == 304 and entry is not None:
+                self.stats.revalidated += 1
+                return await asyncio.to_thread(self.revalidate, url, entry, response.headers)
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            truncated = False
+            async for chunk in response.content.iter_chunked(CHUNK_BYTES):
+                chunks.append(chunk)
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    # Leaving the block unread closes the connection
+                    truncated = True
+                    break
+            content = b"".join(chunks)
+            if truncated:
+                content = content[:max_bytes]
+            status, response_headers = response.status, response.headers
+            encoding, final_url = response.charset, str(response.url)
+        self.stats.misses += 1
+        return await asyncio.to_thread(self.store, url, status, response_headers, content, encoding,
+                                       truncated, final_url)
+
+    def clear(self) -> None:
+        """Remove every stored response."""
+        with self._lock:
+            names = list(self._sizes)
+            self._sizes.clear()
+            self._memory.clear()
+            self._bytes = 0
+        for name in names:
+            self._unlink(name)
+
+
+_caches: Dict[str, HttpCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(directory: str = DEFAULT_CACHE_DIR, **kwargs) -> HttpCache:
+    """Return the process-wide cache of a directory, creating it on first use."""
+    key = os.path.abspath(directory)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = HttpCache(key, **kwargs)
+            _caches[key] = cache
+        return cache
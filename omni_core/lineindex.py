@@ -0,0 +1,281 @@
+"""Ranged reads of large files through mmap and a cached line index.
+
+Reading a window of a big file should not cost the whole file. The first
+ranged read of a file maps it and records the byte offset of every line in
+a compact array; the index is cached per path and rebuilt when the file's
+modification time or size changes. Line and byte windows are then sliced
+straight out of the mapping, so only the requested bytes are copied into
+Python objects. Line-range edits use the same index to splice new text into
+a file while copying the rest of it through in chunks.
+"""
+
+import os
+import mmap
+import logging
+import threading
+from array import array
+from itertools import accumulate, islice
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+
+from .atomicfile import atomic_open
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WINDOW_BYTES = 256 * 1024  # Largest window returned by one read
+INDEX_CACHE_ENTRIES = 64
+SCAN_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class FileWindow:
+    """A window of a file returned by a ranged read"""
+    path: str
+    text: str
+    start_line: int  # 1-based, 0 for byte reads
+    end_line: int  # 1-based, inclusive
+    total_lines: int
+    start_byte: int
+    end_byte: int  # exclusive
+    file_size: int
+    truncated: bool = False  # True if the window was cut at max_bytes
+
+    def header(self) -> str:
+        """Describe the window, e.g. for a tool result."""
+        if self.start_line:
+            span = f"lines {self.start_line}-{self.end_line} of {self.total_lines}"
+        else:
+            span = f"bytes {self.start_byte}-{self.end_byte} of {self.file_size}"
+        note = " (truncated)" if self.truncated else ""
+        return f"[{self.path}: {span}{note}]"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the window as a JSON-serialisable dictionary."""
+        return asdict(self)
+
+
+def _open_map(file) -> Optional[mmap.mmap]:
+    """Map a file read-only; empty files cannot be mapped and give None."""
+    if os.fstat(file.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class LineIndex:
+    """Byte offsets of the lines of one version of a file.
+
+    ``offsets[i]`` is where line ``i + 1`` starts. A final line without a
+    trailing newline still counts as a line; an empty file has none.
+    """
+
+    def __init__(self, path: str, mtime_ns: int, size: int, offsets: array):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, path: str) -> "LineIndex":
+        """Scan a file and record where each of its lines starts."""
+        with open(path, "rb") as file:
+            st = os.fstat(file.fileno())
+            # 4-byte offsets are enough below 4 GiB and halve the index size
+            offsets = array("I" if st.st_size < 2 ** 32 else "Q")
+            mm = _open_map(file)
+            if mm is not None:
+                with mm:
+                    offsets.append(0)
+                    pos = 0
+                    while pos < st.st_size:
+                        chunk = mm[pos:pos + SCAN_CHUNK_BYTES]
+                        # Running sums of the line lengths are the offsets
+                        # just past each newline; this keeps the loop in C
+                        lengths = map((1).__add__, map(len, chunk.split(b"\n")[:-1]))
+                        offsets.extend(islice(accumulate(lengths, initial=pos), 1, None))
+                        pos += len(chunk)
+                    if offsets[-1] == st.st_size:
+                        offsets.pop()  # Nothing follows the final newline
+        return cls(path, st.st_mtime_ns, st.st_size, offsets)
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines in the file."""
+        return len(self.offsets)
+
+    def is_current(self, st: os.stat_result) -> bool:
+        """Check whether the index still describes the file on disk."""
+        return st.st_mtime_ns == self.mtime_ns and st.st_size == self.size
+
+    def span(self, start_line: int, end_line: int) -> Tuple[int, int]:
+        """Return the byte range of lines start_line..end_line (1-based, inclusive)."""
+        start = self.offsets[start_line - 1]
+        end = self.offsets[end_line] if end_line < self.line_count else self.size
+        return start, end
+
+    def line_at(self, offset: int) -> int:
+        """Return the 1-based line containing a byte offset."""
+        lo, hi = 0, self.line_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.offsets[mid] <= offset:
+                lo = mid + 1
+            else:
+                hi = mid
+        return max(lo, 1)
+
+
+_cache: "OrderedDict[str, LineIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def line_index(path: str) -> LineIndex:
+    """Return the line index of a file, rebuilding it if the file changed."""
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None and index.is_current(st):
+            _cache.move_to_end(key)
+            return index
+
+    index = LineIndex.build(key)
+    logger.debug(f"Indexed {index.line_count} lines of {key}")
+    with _cache_lock:
+        _cache[key] = index
+        _cache.move_to_end(key)
+        while len(_cache) > INDEX_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return index
+
+
+def invalidate(path: Optional[str] = None) -> None:
+    """Drop the cached index of a file, or of every file."""
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(path), None)
+
+
+def _slice(path: str, start: int, end: int) -> bytes:
+    """Copy bytes start..end of a file out of a read-only mapping."""
+    if end <= start:
+        return b""
+    with open(path, "rb") as file:
+        mm = _open_map(file)
+        if mm is None:
+            return b""
+        with mm:
+            return mm[start:end]
+
+
+def read_lines(
+    path: str,
+    start_line: int = 1,
+    end_line: Optional[int] = None,
+    max_bytes: int = DEFAULT_MAX_WINDOW_BYTES,
+) -> FileWindow:
+    """Read lines start_line..end_line (1-based, inclusive) of a file.
+
+    An end_line past the end of the file is clamped. The window stops at the
+    last whole line within max_bytes (at least one line is returned, cut at
+    max_bytes if it is longer).
+
+    Raises:
+        ValueError: If the line numbers are out of range
+    """
+    index = line_index(path)
+    total = index.line_count
+    if not total and start_line == 1:
+        return FileWindow(path, "", 0, 0, 0, 0, 0, index.size)
+    end_line = total if end_line is None else min(end_line, total)
+    if start_line < 1 or start_line > total or end_line < start_line:
+        raise ValueError(f"Invalid line range {start_line}-{end_line} for a file with {total} lines")
+
+    start, end = index.span(start_line, end_line)
+    truncated = False
+    if end - start > max_bytes:
+        truncated = True
+        # Keep whole lines while they fit
+        last = index.line_at(start + max_bytes) - 1
+        if last >= start_line:
+            end_line = last
+            end = index.span(start_line, end_line)[1]
+        else:
+            end_line = start_line
+            end = start + max_bytes
+
+    data = _slice(path, start, end)
+    text = data.decode("utf-8", errors="replace")
+    return FileWindow(path, text, start_line, end_line, total, start, end, index.size, truncated)
+
+
+def read_bytes(
+    path: str,
+    offset: int = 0,
+    length: Optional[int] = None,
+    max_bytes: int = DEFAULT_MAX_WINDOW_BYTES,
+) -> FileWindow:
+    """Read length bytes of a file starting at offset.
+
+    Characters cut at the edges of the window are replaced rather than
+    raising. The window's end_line is the line its last byte falls on.
+
+    Raises:
+        ValueError: If the offset or length is negative
+    """
+    if offset < 0 or (length is not None and length < 0):
+        raise ValueError("Byte offset and length must not be negative")
+    index = line_index(path)
+    length = max_bytes if length is None else length
+    truncated = length > max_bytes
+    end = min(offset + min(length, max_bytes), index.size)
+    start = min(offset, end)
+    text = _slice(path, start, end).decode("utf-8", errors="replace")
+    last = index.line_at(max(end - 1, start)) if index.line_count else 0
+    return FileWindow(path, text, 0, last, index.line_count, start, end, index.size, truncated)
+
+
+def _copy_range(mm: mmap.mmap, out, start: int, end: int) -> None:
+    """Write bytes start..end of a mapping to a file in chunks."""
+    for pos in range(start, end, SCAN_CHUNK_BYTES):
+        out.write(mm[pos:min(pos + SCAN_CHUNK_BYTES, end)])
+
+
+def splice_lines(path: str, start_line: int, end_line: int, text: str) -> Tuple[int, int]:
+    """Replace lines start_line..end_line (1-based, inclusive) of a file.
+
+    The text takes the place of the lines; if they ended with a line break
+    and the text does not, the same line break is added. An empty text
+    deletes the lines. The file is rewritten through a temporary file in the
+    same directory, copying the unchanged bytes in chunks, and replaced
+    atomically.
+
+    Returns:
+        (start_line, end_line) of the new text in the updated file
+
+    Raises:
+        ValueError: If the line numbers are out of range
+    """
+    index = line_index(path)
+    total = index.line_count
+    if start_line < 1 or end_line > total or start_line > end_line:
+        raise ValueError("Invalid line numbers")
+    start, end = index.span(start_line, end_line)
+
+    with atomic_open(path, "wb") as out:
+        # The mapping is closed before the file is replaced
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            tail = mm[max(end - 2, start):end]
+            newline = b"\r\n" if tail.endswith(b"\r\n") else b"\n" if tail.endswith(b"\n") else b""
+            data = text.encode("utf-8")
+            if data and newline and not data.endswith(b"\n"):
+                data += newline
+            _copy_range(mm, out, 0, start)
+            out.write(data)
+            _copy_range(mm, out, end, index.size)
+    invalidate(path)
+
+    new_lines = data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+    return start_line, start_line + new_lines - 1
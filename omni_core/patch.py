@@ -0,0 +1,357 @@
+"""Transactional multi-file patches.
+
+A patch is either a unified diff touching any number of files or a list of
+old_text/new_text edits across files. Every hunk is located and applied in
+memory first; files are written only if all of them apply, each through an
+atomic replace, and files already written are restored if a later write
+fails. The result records what happened to every hunk.
+
+Hunks are matched near the line numbers in their header, ignoring trailing
+whitespace and line endings. Context lines keep the file's own text, and
+added lines take the file's line endings.
+"""
+
+import os
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .atomicfile import atomic_write
+from .diffs import diff_stats, unified_diff
+from .editblocks import EditBlock, apply_blocks
+
+logger = logging.getLogger(__name__)
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+DEV_NULL = "/dev/null"
+
+# Hunk statuses
+APPLIED = "applied"
+FAILED = "failed"
+
+
+@dataclass
+class Hunk:
+    """One hunk of a unified diff"""
+    header: str
+    old_start: int  # 1-based, or the line after which an insertion goes
+    lines: List[Tuple[str, str]] = field(default_factory=list)  # (" ", "-" or "+", text with line break)
+
+    @property
+    def old_lines(self) -> List[str]:
+        """Lines the hunk expects in the file."""
+        return [text for tag, text in self.lines if tag != "+"]
+
+
+@dataclass
+class FilePatch:
+    """The changes to one file"""
+    path: str
+    hunks: List[Hunk] = field(default_factory=list)
+    edits: List[EditBlock] = field(default_factory=list)
+    create: bool = False
+    delete: bool = False
+
+
+@dataclass
+class HunkResult:
+    """What happened to one hunk or edit"""
+    path: str
+    index: int  # 1-based within its file
+    status: str
+    line: Optional[int] = None  # Line of the original file where it applied
+    offset: int = 0  # Distance from the line in the hunk header
+    message: str = ""
+
+    @property
+    def ok(self) -> bool:
+        """Whether the hunk applied."""
+        return self.status == APPLIED
+
+    def describe(self) -> str:
+        """Explain the outcome in a line."""
+        text = f"{self.path} hunk {self.index}: {self.status}"
+        if self.ok and self.line is not None:
+            text += f" at line {self.line}"
+            if self.offset:
+                text += f" (offset {self.offset:+d})"
+        if self.message:
+            text += f" - {self.message}"
+        return text
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the result as a JSON-serialisable dictionary."""
+        return {
+            'path': self.path,
+            'index': self.index,
+            'status': self.status,
+            'line': self.line,
+            'offset': self.offset,
+            'message': self.message,
+        }
+
+
+@dataclass
+class PatchResult:
+    """The outcome of a patch"""
+    applied: bool
+    hunks: List[HunkResult]
+    files: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # path -> (lines added, lines removed)
+    created: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    dry_run: bool = False
+
+    def summary(self) -> str:
+        """Describe the patch and every hunk."""
+        failed = [hunk for hunk in self.hunks if not hunk.ok]
+        if self.error:
+            head = f"Patch not applied: {self.error}; no files were changed"
+        elif failed:
+            head = f"Patch not applied: {len(failed)} of {len(self.hunks)} hunks failed; no files were changed"
+        else:
+            added = sum(counts[0] for counts in self.files.values())
+            removed = sum(counts[1] for counts in self.files.values())
+            verb = "would apply" if self.dry_run else "applied"
+            head = f"Patch {verb}: {len(self.hunks)} hunks in {len(self.files)} files (+{added} -{removed})"
+        lines = [head]
+        for path, (added, removed) in self.files.items():
+            note = " (created)" if path in self.created else " (deleted)" if path in self.deleted else ""
+            lines.append(f"{path}: +{added} -{removed}{note}")
+        lines.extend(hunk.describe() for hunk in self.hunks)
+        return "\n".join(lines)
+
+
+def _patch_path(header: str) -> str:
+    """Return the path of a ---/+++ line without a/ or b/ prefix or timestamp."""
+    path = header[4:].rstrip("\r\n").split("\t")[0].strip()
+    if path != DEV_NULL and path[:2] in ("a/", "b/"):
+        path = path[2:]
+    return path
+
+
+def parse_patch(text: str) -> List[FilePatch]:
+    """Parse a unified diff into per-file patches.
+
+    Lines outside file headers and hunks, such as "diff --git" or prose, are
+    ignored.
+
+    Raises:
+        ValueError: If the diff has no hunks or a hunk is malformed
+    """
+    patches: List[FilePatch] = []
+    current: Optional[FilePatch] = None
+    lines = text.splitlines(keepends=True)
+    number = 0
+    while number < len(lines):
+        line = lines[number]
+        if line.startswith("--- ") and number + 1 < len(lines) and lines[number + 1].startswith("+++ "):
+            old_path, new_path = _patch_path(line), _patch_path(lines[number + 1])
+            current = FilePatch(
+                old_path if new_path == DEV_NULL else new_path,
+                create=old_path == DEV_NULL,
+                delete=new_path == DEV_NULL,
+            )
+            patches.append(current)
+            number += 2
+            continue
+
+        match = HUNK_HEADER.match(line)
+        if not match:
+            number += 1
+            continue
+        if current is None:
+            raise ValueError(f"Hunk without a file header at line {number + 1}")
+        old_count = 1 if match[2] is None else int(match[2])
+        new_count = 1 if match[4] is None else int(match[4])
+        hunk = Hunk(line.rstrip("\r\n"), int(match[1]))
+        number += 1
+        while number < len(lines) and (old_count > 0 or new_count > 0 or lines[number].startswith("\\")):
+            body = lines[number]
+            tag = body[:1]
+            if tag == "\\":
+                # "\ No newline at end of file" applies to the line before
+                if hunk.lines:
+                    previous_tag, previous = hunk.lines[-1]
+                    hunk.lines[-1] = (previous_tag, previous.rstrip("\r\n"))
+            elif tag in (" ", "-", "+") or body in ("\n", "\r\n"):
+                if tag not in ("-", "+"):
+                    tag = " "
+                    old_count -= 1
+                    new_count -= 1
+                elif tag == "-":
+                    old_count -= 1
+                else:
+                    new_count -= 1
+                hunk.lines.append((tag, body[1:] if body not in ("\n", "\r\n") else body))
+            else:
+                raise ValueError(f"Malformed hunk line {number + 1}: {body.rstrip()}")
+            number += 1
+        if old_count or new_count:
+            raise ValueError(f"Hunk line counts do not match its header: {hunk.header}")
+        current.hunks.append(hunk)
+
+    patches = [patch for patch in patches if patch.hunks]
+    if not patches:
+        raise ValueError("No hunks found in patch")
+    return patches
+
+
+def edits_to_patches(edits: Sequence[Dict[str, str]]) -> List[FilePatch]:
+    """Group {'path', 'old_text', 'new_text'} edits into per-file patches, in order."""
+    patches: Dict[str, FilePatch] = {}
+    for edit in edits:
+        path = edit['path']
+        patches.setdefault(path, FilePatch(path)).edits.append(EditBlock(edit['old_text'], edit['new_text']))
+    return list(patches.values())
+
+
+def _key(line: str) -> str:
+    return line.rstrip()
+
+
+def _apply_hunks(content: str, patch: FilePatch) -> Tuple[str, List[HunkResult]]:
+    """Apply the hunks of a file patch to its content."""
+    lines = content.splitlines(keepends=True)
+    newline = "\r\n" if lines and lines[0].endswith("\r\n") else "\n"
+    keys = [_key(line) for line in lines]
+    by_key: Dict[str, List[int]] = {}
+    for number, key in enumerate(keys):
+        by_key.setdefault(key, []).append(number)
+
+    out: List[str] = []
+    results: List[HunkResult] = []
+    position = 0  # First original line not yet copied
+    drift = 0  # Offset of the previous hunk, applied to the next one's expected line
+    for index, hunk in enumerate(patch.hunks, 1):
+        old = [_key(line) for line in hunk.old_lines]
+        expected = (hunk.old_start if not old else hunk.old_start - 1) + drift
+        if not old:
+            at = min(max(expected, position), len(lines))
+        else:
+            starts = [
+                start for start in by_key.get(old[0], ())
+                if start >= position and keys[start:start + len(old)] == old
+            ]
+            if not starts:
+                results.append(HunkResult(patch.path, index, FAILED, message=f"context not found for {hunk.header}"))
+                continue
+            at = min(starts, key=lambda start: (abs(start - expected), start))
+
+        out.extend(lines[position:at])
+        line = at
+        for tag, text in hunk.lines:
+            if tag == " ":
+                out.append(lines[line])
+                line += 1
+            elif tag == "-":
+                line += 1
+            else:
+                if newline == "\r\n" and text.endswith("\n") and not text.endswith("\r\n"):
+                    text = text[:-1] + newline
+                out.append(text)
+        position = line
+        offset = at - (expected - drift)
+        drift = offset
+        results.append(HunkResult(patch.path, index, APPLIED, at + 1, offset))
+    out.extend(lines[position:])
+    return "".join(out), results
+
+
+def _apply_edits(content: str, patch: FilePatch) -> Tuple[str, List[HunkResult]]:
+    """Apply the old_text/new_text edits of a file patch to its content."""
+    report = apply_blocks(content, patch.edits)
+    results = [
+        HunkResult(patch.path, result.index, APPLIED if result.ok else FAILED, result.start_line,
+                   message="" if result.ok else result.describe())
+        for result in report.results
+    ]
+    return report.content, results
+
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        return file.read()
+
+
+def apply_patch(patches: Sequence[FilePatch], root: Optional[str] = None, dry_run: bool = False) -> PatchResult:
+    """Validate every hunk, then write all changed files or none.
+
+    Args:
+        patches: Per-file patches from parse_patch or edits_to_patches
+        root: Directory relative paths are resolved against (default: cwd)
+        dry_run: Validate and report without writing
+
+    Returns:
+        The outcome of every hunk, and of the write if one was attempted
+    """
+    hunks: List[HunkResult] = []
+    originals: Dict[str, Optional[str]] = {}  # None for files that do not exist yet
+    changes: Dict[str, Optional[str]] = {}  # None for files to delete
+    result = PatchResult(False, hunks, dry_run=dry_run)
+
+    for patch in patches:
+        path = os.path.join(root, patch.path) if root else patch.path
+        count = len(patch.hunks) or len(patch.edits)
+        if path in changes:
+            hunks.extend(HunkResult(patch.path, index, FAILED, message="file appears twice in the patch")
+                         for index in range(1, count + 1))
+            continue
+        exists = os.path.isfile(path)
+        problem = None
+        if patch.create and exists:
+            problem = "file already exists"
+        elif not patch.create and not exists:
+            problem = "file not found"
+        if problem is None:
+            try:
+                original = _read(path) if exists else ""
+            except (OSError, UnicodeDecodeError) as e:
+                problem = f"cannot read file: {str(e)}"
+        if problem is not None:
+            hunks.extend(HunkResult(patch.path, index, FAILED, message=problem) for index in range(1, count + 1))
+            continue
+
+        new, file_hunks = _apply_edits(original, patch) if patch.edits else _apply_hunks(original, patch)
+        hunks.extend(file_hunks)
+        if patch.delete and new:
+            hunks.append(HunkResult(patch.path, len(file_hunks) + 1, FAILED,
+                                    message="file to delete has lines the patch does not remove"))
+        originals[path] = original if exists else None
+        changes[path] = None if patch.delete else new
+        result.files[patch.path] = diff_stats(unified_diff(original, new, patch.path, context_lines=0))
+        if patch.create:
+            result.created.append(patch.path)
+        if patch.delete:
+            result.deleted.append(patch.path)
+
+    if any(not hunk.ok for hunk in hunks) or dry_run:
+        return result
+
+    written: List[str] = []
+    try:
+        for path, new in changes.items():
+            if new is None:
+                os.remove(path)
+            else:
+                if originals[path] is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                atomic_write(path, new.encode("utf-8"))
+            written.append(path)
+    except OSError as e:
+        logger.warning(f"Patch write failed, restoring {len(written)} files: {str(e)}")
+        for path in reversed(written):
+            original = originals[path]
+            try:
+                if original is None:
+                    os.remove(path)
+                else:
+                    atomic_write(path, original.encode("utf-8"))
+            except OSError as restore_error:
+                logger.error(f"Could not restore {path}: {str(restore_error)}")
+        result.error = f"writing {path} failed ({str(e)})"
+        return result
+
+    result.applied = True
+    return result
@@ -0,0 +1,207 @@
+"""System prompt assembly for Omni Engineer.
+
+The system prompt is rebuilt for every request and every tool follow-up, but
+its parts change rarely: the instructions never change, the file contents
+change when a file is read or edited, and only the automode section changes
+between iterations. The builder here caches each part and lays the prompt out
+stable-first, so both the local string building and the provider's prefill of
+the unchanged prefix (Anthropic prompt caching, Ollama's KV cache) are reused.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+
+class TrackedDict(dict):
+    """A dict that counts its modifications.
+    
+    ``version`` changes whenever an item is set, removed or cleared, which
+    lets caches built from the dict tell when they are stale.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def _touch(self) -> None:
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._touch()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._touch()
+
+    def clear(self):
+        super().clear()
+        self._touch()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._touch()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._touch()
+        return result
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._touch()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._touch()
+
+
+@dataclass(frozen=True)
+class PromptSegment:
+    """A part of the system prompt.
+    
+    Attributes:
+        text: The segment text
+        cacheable: Whether the prompt up to and including this segment is
+            worth a provider cache breakpoint
+    """
+    text: str
+    cacheable: bool = True
+
+
+class SystemPrompt(str):
+    """A system prompt that remembers the segments it was built from.
+    
+    It is a plain string wherever one is expected; providers that support
+    prompt caching use ``blocks`` to place cache breakpoints between segments.
+    """
+
+    segments: Tuple[PromptSegment, ...]
+
+    def __new__(cls, segments: List[PromptSegment]):
+        segments = tuple(segment for segment in segments if segment.text)
+        prompt = super().__new__(cls, "".join(segment.text for segment in segments))
+        prompt.segments = segments
+        return prompt
+
+    def blocks(self, cache: bool = True) -> List[Dict[str, Any]]:
+        """Return the prompt as Anthropic text blocks.
+        
+        Args:
+            cache: Mark the end of every cacheable segment with a cache
+                breakpoint
+        """
+        blocks = []
+        for segment in self.segments:
+            block: Dict[str, Any] = {"type": "text", "text": segment.text}
+            if cache and segment.cacheable:
+                block["cache_control"] = {"type": "ephemeral"}
+            blocks.append(block)
+        return blocks
+
+
+def unique_contents(files: Mapping[str, str], seen: Optional[Dict[str, str]] = None) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """Iterate over files, pointing repeated contents at their first path.
+    
+    Args:
+        files: Mapping of path to contents
+        seen: Contents already sent, mapped to the name they were sent as
+        
+    Yields:
+        (path, content, same_as) where same_as names the earlier file with
+        identical content, or is None for content not seen before
+    """
+    seen = dict(seen) if seen else {}
+    for path, content in files.items():
+        same_as = seen.setdefault(content, path)
+        yield path, content, None if same_as == path else same_as
+
+
+_NO_FILES = TrackedDict()
+
+
+class SystemPromptBuilder:
+    """Builds the system prompt, rebuilding only the parts that changed.
+    
+    The layout is: instructions, then the repository map, then file
+    contents, then the volatile section (automode state). File contents are
+    only re-rendered when the files mapping is replaced or, for a
+    TrackedDict, modified.
+    """
+
+    def __init__(self, *instructions: str):
+        """Initialize the builder.
+        
+        Args:
+            *instructions: Static prompt parts, joined by blank lines
+        """
+        self.instructions = PromptSegment("\n\n".join(part.strip("\n") for part in instructions if part))
+        self.builds = 0  # Times the prompt was actually assembled
+        self._files_version: Optional[int] = None
+        self._files_ref: Optional[Mapping[str, str]] = None
+        self._files_segment = PromptSegment("")
+        self._prompt: Optional[SystemPrompt] = None
+        self._volatile: Optional[str] = None
+        self._repo_map: Optional[str] = None
+
+    def _files_changed(self, files: Mapping[str, str]) -> bool:
+        version = getattr(files, "version", None)
+        if version is None:
+            return True  # Plain mappings cannot be tracked
+        return files is not self._files_ref or version != self._files_version
+
+    @staticmethod
+    def render_files(files: Mapping[str, str]) -> str:
+        """Render file contents as a prompt section, empty without files.
+        
+        A file whose contents match an earlier one is rendered as a
+        reference instead of being repeated.
+        """
+        if not files:
+            return ""
+        parts = ["\n\nFile Contents:\n"]
+        for path, content, same_as in unique_contents(files):
+            if same_as is None:
+                parts.append(f"\n--- {path} ---\n{content}\n")
+            else:
+                parts.append(f"\n--- {path} ---\n(identical to {same_as})\n")
+        return "".join(parts)
+
+    def build(self, files: Optional[Mapping[str, str]] = None, volatile: str = "", repo_map: str = "") -> SystemPrompt:
+        """Return the system prompt for the given state.
+        
+        Args:
+            files: Mapping of file path to contents included in the prompt
+            volatile: Text that changes often, placed last
+            repo_map: Outline of the repository's symbols (see repomap)
+            
+        Returns:
+            The cached prompt if nothing changed, otherwise a new one
+        """
+        files = files if files is not None else _NO_FILES
+        files_changed = self._files_changed(files)
+        if (
+            not files_changed
+            and self._prompt is not None
+            and volatile == self._volatile
+            and repo_map == self._repo_map
+        ):
+            return self._prompt
+
+        if files_changed:
+            self._files_ref = files
+            self._files_version = getattr(files, "version", None)
+            self._files_segment = PromptSegment(self.render_files(files))
+
+        self._volatile = volatile
+        self._repo_map = repo_map
+        self._prompt = SystemPrompt([
+            self.instructions,
+            PromptSegment(f"\n\nRepository Map:\n{repo_map}" if repo_map else ""),
+            self._files_segment,
+            PromptSegment(f"\n\n{volatile}" if volatile else "", cacheable=False),
+        ])
+        self.builds += 1
+        return self._prompt
@@ -1,3 +1,3 @@
 """Provider implementations."""
 
-from .cborg import list_models, chat_completion
+from .cborg import list_models, chat_completion, stream_chat_completion
@@ -3,9 +3,16 @@ Anthropic provider for chat completion and model management.
 """
 
 import os
-import aiohttp
 import json
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+
+from ..prompt import SystemPrompt
+from ..response import iter_sse_json
+from ..transport import get_session
+
+MAX_CACHE_BREAKPOINTS = 4  # Anthropic rejects requests with more cache_control blocks
+EPHEMERAL_CACHE = {"type": "ephemeral"}
+
 
 class AnthropicProvider:
     """Provider for Anthropic's Claude models."""
@@ -47,31 +54,17 @@ class AnthropicProvider:
             }
         ]
 
-    async def chat_completion(
+    def _build_request(
         self,
-        messages: List[Dict[str, str]],
-        model: Optional[str] = None,
-        temperature: float = 0.7,
-        top_p: float = 0.9,
-        seed: Optional[int] = None,
+        messages: List[Dict[str, Any]],
+        model: Optional[str],
+        temperature: float,
+        top_p: float,
+        seed: Optional[int],
+        stream: bool,
         **kwargs
-    ) -> Dict[str, Any]:
-        """Generate a chat completion using Anthropic's API.
-        
-        Args:
-            messages: List of message dictionaries with 'role' and 'content'
-            model: Model to use for completion
-            temperature: Sampling temperature (0-1)
-            top_p: Nucleus sampling parameter (0-1)
-            seed: Random seed for reproducibility
-            **kwargs: Additional parameters to pass to the API
-        
-        Returns:
-            API response containing the completion
-            
-        Raises:
-            Exception: If the API request fails
-        """
+    ) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+        """Build the model name, request body and headers for a messages call."""
         if not model:
             model = self.model
             
@@ -86,6 +79,21 @@ class AnthropicProvider:
         for msg in messages:
             if msg["role"] == "system":
                 system_message = msg["content"]
+            elif msg["role"] == "tool":
+                result = {
+                    "type": "tool_result",
+                    "tool_use_id": msg["tool_call_id"],
+                    "content": msg["content"]
+                }
+                previous = user_messages[-1]["content"] if user_messages else None
+                if isinstance(previous, list) and previous and previous[-1].get("type") == "tool_result":
+                    previous.append(result)  # Results of one turn go in a single message
+                else:
+                    user_messages.append({"role": "user", "content": [result]})
+            elif msg.get("tool_calls"):
+                content = [{"type": "text", "text": msg["content"]}] if msg["content"] else []
+                content.extend(self._to_tool_use(call) for call in msg["tool_calls"])
+                user_messages.append({"role": "assistant", "content": content})
             else:
                 user_messages.append({
                     "role": "user" if msg["role"] == "user" else "assistant",
@@ -107,36 +115,216 @@ class AnthropicProvider:
         if seed is not None:
             data["seed"] = seed
             
+        if kwargs.get("tools"):
+            data["tools"] = [self._to_anthropic_tool(spec) for spec in kwargs["tools"]]
+            
+        if kwargs.get("tool_choice"):
+            data["tool_choice"] = self._to_anthropic_tool_choice(kwargs["tool_choice"])
+            
+        if stream:
+            data["stream"] = True
+            
+        if kwargs.get("cache_prompt"):
+            self._add_cache_breakpoints(data)
+            
         headers = {
             "Content-Type": "application/json",
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01"
         }
+        return model, data, headers
+
+    @staticmethod
+    def _to_anthropic_tool(spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert an OpenAI-style function spec to an Anthropic tool.
+        
+        Specs already in Anthropic's format are returned unchanged.
+        """
+        if spec.get("type") != "function" or "function" not in spec:
+            return spec
+        function = spec["function"]
+        return {
+            "name": function["name"],
+            "description": function.get("description", ""),
+            "input_schema": function.get("parameters") or {"type": "object", "properties": {}}
+        }
+
+    @staticmethod
+    def _to_anthropic_tool_choice(choice: Any) -> Dict[str, Any]:
+        """Convert an OpenAI-style tool_choice ('auto', 'required', 'none' or
+        a named function) to Anthropic's format."""
+        if isinstance(choice, str):
+            return {"type": "any" if choice == "required" else choice}
+        if choice.get("type") == "function":
+            return {"type": "tool", "name": choice["function"]["name"]}
+        return choice
+
+    @staticmethod
+    def _to_tool_use(call: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert an OpenAI-style tool call to an Anthropic tool_use block."""
+        arguments = call["function"].get("arguments") or {}
+        if isinstance(arguments, str):
+            arguments = json.loads(arguments) if arguments.strip() else {}
+        return {
+            "type": "tool_use",
+            "id": call["id"],
+            "name": call["function"]["name"],
+            "input": arguments
+        }
+
+    @staticmethod
+    def _from_tool_use(block: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert an Anthropic tool_use block to an OpenAI-style tool call."""
+        return {
+            "id": block["id"],
+            "type": "function",
+            "function": {
+                "name": block["name"],
+                "arguments": json.dumps(block.get("input") or {})
+            }
+        }
+
+    @staticmethod
+    def _add_cache_breakpoints(data: Dict[str, Any]) -> None:
+        """Mark the stable prefix of a request for prompt caching.
+        
+        Breakpoints go after the tools, after each cacheable segment of the
+        system prompt and after the last message, so the next turn reuses
+        everything sent so far. System prompt breakpoints are dropped first,
+        earliest first, if the request would exceed the limit.
+        """
+        tools = data.get("tools")
+        if tools:
+            data["tools"] = [*tools[:-1], {**tools[-1], "cache_control": EPHEMERAL_CACHE}]
+            
+        messages = data.get("messages")
+        if messages:
+            last = messages[-1]
+            content = last["content"]
+            if isinstance(content, str):
+                content = [{"type": "text", "text": content}]
+            if content:
+                content = [*content[:-1], {**content[-1], "cache_control": EPHEMERAL_CACHE}]
+            messages[-1] = {**last, "content": content}
+            
+        system = data.get("system")
+        if not system:
+            return
+        if isinstance(system, SystemPrompt):
+            blocks = system.blocks()
+        elif isinstance(system, str):
+            blocks = [{"type": "text", "text": system, "cache_control": EPHEMERAL_CACHE}]
+        else:
+            blocks = [dict(block) for block in system]
+            
+        available = MAX_CACHE_BREAKPOINTS - bool(tools) - bool(messages)
+        marked = [block for block in blocks if "cache_control" in block]
+        for block in marked[:max(len(marked) - available, 0)]:
+            del block["cache_control"]
+        data["system"] = blocks
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        seed: Optional[int] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Generate a chat completion using Anthropic's API.
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/messages",
-                headers=headers,
-                json=data
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"Anthropic API error: {error_text}")
-                    
-                result = await response.json()
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            model: Model to use for completion
+            temperature: Sampling temperature (0-1)
+            top_p: Nucleus sampling parameter (0-1)
+            seed: Random seed for reproducibility
+            **kwargs: Additional parameters to pass to the API. Pass
+                cache_prompt=True to enable prompt caching. tools and
+                tool_choice may be given in OpenAI's format.
+        
+        Returns:
+            API response containing the completion, with any tool_use
+            blocks as OpenAI-style tool_calls on the message
+            
+        Raises:
+            Exception: If the API request fails
+        """
+        model, data, headers = self._build_request(
+            messages, model, temperature, top_p, seed, stream=False, **kwargs
+        )
+        
+        session = await get_session()
+        async with session.post(
+            f"{self.base_url}/messages",
+            headers=headers,
+            json=data
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Anthropic API error: {error_text}")
                 
-                # Convert Anthropic response format to our standard format
-                return {
-                    "choices": [{
-                        "message": {
-                            "role": "assistant",
-                            "content": result["content"][0]["text"]
-                        }
-                    }],
-                    "usage": result.get("usage", {}),
-                    "model": model
-                }
+            result = await response.json()
+            
+            # Convert Anthropic response format to our standard format
+            message = {
+                "role": "assistant",
+                "content": "".join(
+                    block.get("text", "")
+                    for block in result["content"]
+                    if block.get("type", "text") == "text"
+                )
+            }
+            tool_calls = [
+                self._from_tool_use(block)
+                for block in result["content"]
+                if block.get("type") == "tool_use"
+            ]
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return {
+                "choices": [{"message": message}],
+                "usage": result.get("usage", {}),
+                "model": model
+            }
+
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        seed: Optional[int] = None,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chat completion using Anthropic's API.
+        
+        Takes the same arguments as chat_completion.
+        
+        Yields:
+            Anthropic stream events (message_start, content_block_delta, ...)
+            
+        Raises:
+            Exception: If the API request fails
+        """
+        model, data, headers = self._build_request(
+            messages, model, temperature, top_p, seed, stream=True, **kwargs
+        )
+        
+        session = await get_session()
+        async with session.post(
+            f"{self.base_url}/messages",
+            headers=headers,
+            json=data
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Anthropic API error: {error_text}")
+                
+            async for event in iter_sse_json(response):
+                yield event
 
     async def close(self):
         """Clean up resources."""
-        pass  # No cleanup needed for this provider
+        pass  # Connections belong to the shared transport pool
@@ -1,9 +1,12 @@
 """CBORG provider implementation."""
 
 import os
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 from ..config import Configuration
-from ..response import make_request, ResponseError
+from ..response import make_request, iter_sse_json, ResponseError
+from ..transport import get_session
+
+CBORG_BASE_URL = "https://api.cborg.lbl.gov"
 
 # Model metadata with descriptions and capabilities
 MODEL_METADATA = {
@@ -115,11 +118,11 @@ async def list_models() -> List[Dict[str, str]]:
     """List available CBORG models."""
     api_key = os.getenv("CBORG_API_KEY")
     if not api_key:
-        raise ResponseError("CBORG API key not found", provider="cborg")
+        raise ResponseError("CBORG API key not found", {"provider": "cborg"})
         
     response = await make_request(
         "GET",
-        "https://api.cborg.lbl.gov/models",
+        f"{CBORG_BASE_URL}/models",
         provider="cborg",
         headers={"Authorization": f"Bearer {api_key}"}
     )
@@ -143,20 +146,80 @@ async def chat_completion(
     **kwargs
 ) -> Dict[str, Any]:
     """Send a chat completion request to CBORG."""
-    config = Configuration()
+    api_key = _api_key()
+    payload = _build_payload(messages, model, temperature, top_p, stream=False, **kwargs)
+    
+    response = await make_request(
+        "POST",
+        f"{CBORG_BASE_URL}/v1/chat/completions",
+        provider="cborg",
+        headers={"Authorization": f"Bearer {api_key}"},
+        json=payload
+    )
+    
+    return response
+
+async def stream_chat_completion(
+    messages: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    **kwargs
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream a chat completion from CBORG.
+    
+    Yields:
+        OpenAI-style ``chat.completion.chunk`` dictionaries as they arrive
+        
+    Raises:
+        ResponseError: If the API key is missing or the request fails
+    """
+    api_key = _api_key()
+    payload = _build_payload(messages, model, temperature, top_p, stream=True, **kwargs)
+    
+    session = await get_session()
+    async with session.post(
+        f"{CBORG_BASE_URL}/v1/chat/completions",
+        headers={"Authorization": f"Bearer {api_key}"},
+        json=payload
+    ) as response:
+        if response.status != 200:
+            text = await response.text()
+            raise ResponseError(
+                f"Request failed with status {response.status}",
+                {
+                    "status": response.status,
+                    "reason": response.reason,
+                    "text": text[:200]
+                }
+            )
+        async for chunk in iter_sse_json(response):
+            yield chunk
+
+def _api_key() -> str:
+    """Return the CBORG API key from the environment."""
     api_key = os.getenv("CBORG_API_KEY")
     if not api_key:
-        raise ResponseError("CBORG API key not found", provider="cborg")
-    
+        raise ResponseError("CBORG API key not found", {"provider": "cborg"})
+    return api_key
+
+def _build_payload(
+    messages: List[Dict[str, Any]],
+    model: Optional[str],
+    temperature: Optional[float],
+    top_p: Optional[float],
+    stream: bool,
+    **kwargs
+) -> Dict[str, Any]:
+    """Build the request body for a chat completion."""
     # Use default model if none specified
     if not model:
-        model = config.model
+        model = Configuration().model
     
-    # Build request payload
     payload = {
         "model": model,
         "messages": messages,
-        "stream": False
+        "stream": stream
     }
     
     # Add optional parameters if specified
@@ -167,13 +230,4 @@ async def chat_completion(
     
     # Add any additional parameters
     payload.update(kwargs)
-    
-    response = await make_request(
-        "POST",
-        "https://api.cborg.lbl.gov/v1/chat/completions",
-        provider="cborg",
-        headers={"Authorization": f"Bearer {api_key}"},
-        json=payload
-    )
-    
-    return response
+    return payload
@@ -1,7 +1,8 @@
 """Ollama provider implementation for model interaction."""
-import aiohttp
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 from ..config import ProviderConfig
+from ..response import iter_ndjson
+from ..transport import get_session
 
 
 class OllamaProvider:
@@ -22,16 +23,12 @@ class OllamaProvider:
         Returns:
             List of model information dictionaries
         """
-        session = aiohttp.ClientSession()
-        try:
-            async with session:
-                async with session.get(f"{self.base_url}/api/tags") as response:
-                    if response.status != 200:
-                        raise Exception(f"Failed to list models: {response.status}")
-                    data = await response.json()
-                    return data.get("models", [])
-        finally:
-            await session.close()
+        session = await get_session()
+        async with session.get(f"{self.base_url}/api/tags") as response:
+            if response.status != 200:
+                raise Exception(f"Failed to list models: {response.status}")
+            data = await response.json()
+            return data.get("models", [])
 
     async def chat_completion(
         self,
@@ -79,24 +76,103 @@ class OllamaProvider:
         if max_tokens is not None:
             data["num_predict"] = max_tokens
             
-        session = aiohttp.ClientSession()
-        try:
-            async with session:
-                async with session.post(
-                    f"{self.base_url}/api/generate",
-                    json=data
-                ) as response:
-                    if response.status != 200:
-                        raise Exception(f"Chat completion failed: {response.status}")
-                    result = await response.json()
-                    
-                    return {
-                        "choices": [{
+        session = await get_session()
+        async with session.post(
+            f"{self.base_url}/api/generate",
+            json=data
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Chat completion failed: {response.status}")
+            result = await response.json()
+            
+            return {
+                "choices": [{
+                    "message": {
+                        "role": "assistant",
+                        "content": result.get("response", "")
+                    }
+                }]
+            }
+
+    def _chat_payload(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        top_p: Optional[float],
+        stream: bool,
+    ) -> Dict[str, Any]:
+        """Build the request body for the /api/chat endpoint."""
+        options = {}
+        if temperature is not None:
+            options["temperature"] = temperature
+        if top_p is not None:
+            options["top_p"] = top_p
+        data = {
+            "model": self.config.model,
+            "messages": messages,
+            "stream": stream,
+        }
+        if options:
+            data["options"] = options
+        return data
 
-                                "role": "assistant",
-                                "content": result.get("response", "")
-                            }
-                        }]
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Generate a chat completion using the /api/chat endpoint.
+        
+        Unlike chat_completion, messages keep their roles instead of being
+        flattened into a single prompt.
+        
+        Args:
+            messages: List of message dictionaries with role and content
+            temperature: Optional sampling temperature
+            top_p: Optional nucleus sampling parameter
+            
+        Returns:
+            Response dictionary containing generated text
+        """
+        data = self._chat_payload(messages, temperature, top_p, stream=False)
+        session = await get_session()
+        async with session.post(f"{self.base_url}/api/chat", json=data) as response:
+            if response.status != 200:
+                raise Exception(f"Chat completion failed: {response.status}")
+            result = await response.json()
+            
+            return {
+                "choices": [{
+                    "message": {
+                        "role": "assistant",
+                        "content": result.get("message", {}).get("content", "")
                     }
-        finally:
-            await session.close()
+                }]
+            }
+
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chat completion from the /api/chat endpoint.
+        
+        Args:
+            messages: List of message dictionaries with role and content
+            temperature: Optional sampling temperature
+            top_p: Optional nucleus sampling parameter
+            
+        Yields:
+            Ollama chat chunks, each with a partial ``message``
+        """
+        data = self._chat_payload(messages, temperature, top_p, stream=True)
+        session = await get_session()
+        async with session.post(f"{self.base_url}/api/chat", json=data) as response:
+            if response.status != 200:
+                raise Exception(f"Chat completion failed: {response.status}")
+            async for chunk in iter_ndjson(response):
+                yield chunk
+                if chunk.get("done"):
+                    return
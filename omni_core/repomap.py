@@ -0,0 +1,390 @@
+"""Ranked outline of the Python symbols of a repository.
+
+Instead of pasting whole files into the prompt, the repository map gives
+the model a compact outline of the classes, functions and constants a
+codebase defines, most important first. Files are parsed with ``ast`` into
+definitions and the names they reference; parse results are cached by
+content hash, so only files whose contents changed are parsed again.
+
+Importance comes from the reference graph: a file that uses a name defined
+in another file links to it, PageRank over those links ranks the files and
+each file's rank flows to the symbols it references. The outline is cut to
+the highest ranked symbols that fit a token budget.
+"""
+
+import os
+import ast
+import math
+import time
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .context import CHARS_PER_TOKEN
+from .filestore import content_hash
+from .fswalk import DEFAULT_MAX_FILE_BYTES, WalkStats, read_text, walk_stat
+
+logger = logging.getLogger(__name__)
+
+SOURCE_SUFFIXES = (".py", ".pyi")
+MAX_SIGNATURE_CHARS = 120
+DAMPING = 0.85
+PAGERANK_ITERATIONS = 50
+MAX_CACHED_OUTLINES = 32  # Outlines kept per budget and focus
+
+
+@dataclass(frozen=True)
+class Symbol:
+    """A definition in a source file"""
+    name: str
+    kind: str  # "class", "function", "method" or "constant"
+    line: int
+    signature: str
+    parent: Optional[str] = None  # Enclosing class of a method
+
+
+@dataclass
+class FileSymbols:
+    """What a source file defines and which names it uses"""
+    definitions: List[Symbol] = field(default_factory=list)
+    references: Dict[str, int] = field(default_factory=dict)
+
+
+def _signature(node: ast.AST) -> str:
+    """Render the header line of a definition."""
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(ast.unparse(base) for base in node.bases)
+        text = f"class {node.name}({bases})" if bases else f"class {node.name}"
+    else:
+        prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        text = f"{prefix} {node.name}({ast.unparse(node.args)})"
+        if node.returns is not None:
+            text += f" -> {ast.unparse(node.returns)}"
+    if len(text) > MAX_SIGNATURE_CHARS:
+        text = text[:MAX_SIGNATURE_CHARS - 3] + "..."
+    return text
+
+
+def parse_symbols(source: str) -> FileSymbols:
+    """Extract the definitions and name references of Python source.
+
+    Module-level classes, functions and UPPER_CASE constants are recorded,
+    as are the methods of module-level classes. Sources that do not parse
+    give an empty result.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError, RecursionError):
+        return FileSymbols()
+
+    symbols = FileSymbols()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.definitions.append(Symbol(node.name, "function", node.lineno, _signature(node)))
+        elif isinstance(node, ast.ClassDef):
+            symbols.definitions.append(Symbol(node.name, "class", node.lineno, _signature(node)))
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    symbols.definitions.append(
+                        Symbol(child.name, "method", child.lineno, _signature(child), node.name)
+                    )
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Name) and target.id.isupper():
+                    symbols.definitions.append(Symbol(target.id, "constant", node.lineno, target.id))
+
+    references: Dict[str, int] = defaultdict(int)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            references[node.id] += 1
+        elif isinstance(node, ast.Attribute):
+            references[node.attr] += 1
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                references[alias.name] += 1
+    symbols.references = dict(references)
+    return symbols
+
+
+def pagerank(
+    edges: Dict[str, Dict[str, float]],
+    nodes: Iterable[str],
+    personalization: Optional[Dict[str, float]] = None,
+) -> Dict[str, float]:
+    """Rank the nodes of a weighted directed graph.
+
+    Args:
+        edges: Source node to {target node: weight}
+        nodes: All nodes, including those without edges
+        personalization: Relative weight of the nodes random jumps land
+            on; uniform if not given
+
+    Returns:
+        Node to rank; the ranks sum to 1
+    """
+    nodes = list(nodes)
+    if not nodes:
+        return {}
+    jump = {node: 1.0 for node in nodes}
+    if personalization:
+        focused = {node: weight for node, weight in personalization.items() if node in jump and weight > 0}
+        if focused:
+            jump = {node: focused.get(node, 0.0) for node in nodes}
+    total = sum(jump.values())
+    jump = {node: weight / total for node, weight in jump.items()}
+    out_weight = {source: sum(targets.values()) for source, targets in edges.items()}
+
+    rank = dict(jump)
+    for _ in range(PAGERANK_ITERATIONS):
+        # Nodes without outgoing links spread their rank like a jump
+        dangling = sum(rank[node] for node in nodes if not out_weight.get(node))
+        new_rank = {node: (1 - DAMPING + DAMPING * dangling) * jump[node] for node in nodes}
+        for source, targets in edges.items():
+            if not out_weight.get(source):
+                continue
+            share = DAMPING * rank[source] / out_weight[source]
+            for target, weight in targets.items():
+                new_rank[target] += share * weight
+        delta = sum(abs(new_rank[node] - rank[node]) for node in nodes)
+        rank = new_rank
+        if delta < 1e-9:
+            break
+    return rank
+
+
+def name_weight(name: str) -> float:
+    """Weigh how much a reference to a name says about a dependency.
+
+    Long snake_case or CamelCase identifiers are specific to a codebase;
+    short or private names (get, text, _helper) are shared by unrelated
+    code, and dunder methods are called implicitly.
+    """
+    if name.startswith("__") and name.endswith("__"):
+        return 0.0
+    if name.startswith("_"):
+        return 0.1
+    distinctive = "_" in name or (name.lower() != name and name.upper() != name)
+    if distinctive and len(name) >= 8:
+        return 10.0
+    if len(name) <= 4:
+        return 0.1
+    return 1.0
+
+
+def estimate_text_tokens(text: str) -> int:
+    """Estimate the tokens of plain text, as context.estimate_tokens does."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+class RepoMap:
+    """Symbol index of the Python files under a directory.
+
+    Paths are relative to the root. The index is refreshed from the file
+    system at most every refresh_interval seconds.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        skip: Optional[Callable[[str, bool], bool]] = None,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        refresh_interval: float = 2.0,
+    ):
+        """Initialize the map.
+
+        Args:
+            root: Directory to index
+            skip: Entry names to leave out, as for fswalk.walk_files
+            max_file_bytes: Larger files are left out
+            refresh_interval: Seconds during which a refreshed index is
+                considered current
+        """
+        self.root = os.path.abspath(root)
+        self.skip = skip
+        self.max_file_bytes = max_file_bytes
+        self.refresh_interval = refresh_interval
+        self.parses = 0  # Files actually parsed, for tests and statistics
+        self._files: Dict[str, Tuple[int, int, str]] = {}  # path -> (mtime_ns, size, hash)
+        self._by_hash: Dict[str, FileSymbols] = {}
+        self._checked_at: Optional[float] = None
+        self._rendered: Dict[Tuple, str] = {}
+        self._lock = threading.RLock()
+
+    def update(self, force: bool = False) -> bool:
+        """Re-scan the files, parsing those whose contents changed.
+
+        Returns:
+            True if any file was added, changed or removed
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+                return False
+            self._checked_at = now
+
+            changed = False
+            seen = set()
+            for path, st in walk_stat(self.root, skip=self.skip, stats=WalkStats()):
+                if not path.endswith(SOURCE_SUFFIXES) or st.st_size > self.max_file_bytes:
+                    continue
+                rel_path = os.path.relpath(path, self.root)
+                seen.add(rel_path)
+                entry = self._files.get(rel_path)
+                if entry is not None and entry[:2] == (st.st_mtime_ns, st.st_size):
+                    continue
+                text, status = read_text(path, self.max_file_bytes)
+                if status != "ok":
+                    continue
+                digest = content_hash(text)
+                if digest not in self._by_hash:
+                    self._by_hash[digest] = parse_symbols(text)
+                    self.parses += 1
+                changed = changed or entry is None or entry[2] != digest
+                self._files[rel_path] = (st.st_mtime_ns, st.st_size, digest)
+
+            for rel_path in [path for path in self._files if path not in seen]:
+                del self._files[rel_path]
+                changed = True
+            if changed:
+                # Drop parse results no file refers to any more
+                live = {digest for _, _, digest in self._files.values()}
+                self._by_hash = {digest: symbols for digest, symbols in self._by_hash.items() if digest in live}
+                self._rendered.clear()
+            return changed
+
+    def symbols(self, rel_path: str) -> FileSymbols:
+        """Return the parsed symbols of an indexed file."""
+        return self._by_hash[self._files[rel_path][2]]
+
+    @property
+    def files(self) -> List[str]:
+        """Paths of the indexed files."""
+        return sorted(self._files)
+
+    def rank(self, focus: Optional[Iterable[str]] = None) -> List[Tuple[float, str, Symbol]]:
+        """Rank every definition by how much the rest of the code uses it.
+
+        Args:
+            focus: Paths (relative to the root or absolute) whose
+                neighbourhood should rank higher, e.g. files being edited
+
+        Returns:
+            (rank, path, symbol) tuples, highest rank first
+        """
+        with self._lock:
+            files = {path: self.symbols(path) for path in self._files}
+
+        defined_in: Dict[str, Set[str]] = defaultdict(set)
+        for path, symbols in files.items():
+            for symbol in symbols.definitions:
+                defined_in[symbol.name].add(path)
+
+        # Weighted links from the files using a name to those defining it
+        edges: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        uses: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for path, symbols in files.items():
+            for name, count in symbols.references.items():
+                definers = defined_in.get(name)
+                if not definers:
+                    continue
+                weight = name_weight(name) * math.sqrt(count) / len(definers)
+                if len(definers) > 5:
+                    weight *= 0.1  # Names defined everywhere say little
+                if not weight:
+                    continue
+                for definer in definers:
+                    if definer != path:
+                        edges[path][definer] += weight
+                        uses[(definer, name)][path] += weight
+
+        personalization = None
+        if focus:
+            personalization = {}
+            for path in focus:
+                if os.path.isabs(path):
+                    path = os.path.relpath(path, self.root)
+                personalization[os.path.normpath(path)] = 1.0
+        file_rank = pagerank(edges, files, personalization)
+
+        ranked = []
+        for path, symbols in files.items():
+            names = len(symbols.definitions) or 1
+            for symbol in symbols.definitions:
+                # Each using file passes on the share of its rank it spends on this name
+                score = sum(
+                    file_rank[user] * weight / sum(edges[user].values())
+                    for user, weight in uses.get((path, symbol.name), {}).items()
+                )
+                # A little of the file's own rank keeps unused definitions ordered
+                score += 0.01 * file_rank[path] / names
+                ranked.append((score, path, symbol))
+        ranked.sort(key=lambda item: (-item[0], item[1], item[2].line))
+        return ranked
+
+    def render(self, selected: Iterable[Tuple[float, str, Symbol]]) -> str:
+        """Render symbols as an outline grouped by file.
+
+        Files appear in the order of their best ranked symbol, symbols in
+        source order. Methods are indented under their class, whose header
+        is shown even if the class itself was not selected.
+        """
+        by_file: Dict[str, Set[Symbol]] = {}
+        for _, path, symbol in selected:
+            by_file.setdefault(path, set()).add(symbol)
+
+        lines = []
+        for path, chosen in by_file.items():
+            lines.append(f"{path}:")
+            parents = {symbol.parent for symbol in chosen if symbol.parent}
+            for symbol in self.symbols(path).definitions:
+                if symbol in chosen or (symbol.kind == "class" and symbol.name in parents):
+                    indent = "    " if symbol.parent else "  "
+                    lines.append(f"{indent}{symbol.signature}")
+        return "\n".join(lines)
+
+    def outline(self, max_tokens: int = 1024, focus: Optional[Iterable[str]] = None) -> str:
+        """Return the best ranked outline that fits in max_tokens.
+
+        The index is refreshed first; outlines are cached until a file
+        changes.
+        """
+        with self._lock:
+            self.update()
+            focus = tuple(sorted(focus)) if focus else ()
+            key = (max_tokens, focus)
+            cached = self._rendered.get(key)
+            if cached is not None:
+                return cached
+
+            ranked = self.rank(focus)
+            # Find the most symbols whose outline fits
+            low, high, best = 0, len(ranked), ""
+            while low < high:
+                middle = (low + high + 1) // 2
+                text = self.render(ranked[:middle])
+                if estimate_text_tokens(text) <= max_tokens:
+                    low, best = middle, text
+                else:
+                    high = middle - 1
+            if len(self._rendered) >= MAX_CACHED_OUTLINES:
+                self._rendered.clear()
+            self._rendered[key] = best
+        logger.debug(f"Repository map of {self.root}: {low} of {len(ranked)} symbols in {estimate_text_tokens(best)} tokens")
+        return best
+
+_maps: Dict[str, RepoMap] = {}
+_maps_lock = threading.Lock()
+
+
+def get_repo_map(root: str, skip: Optional[Callable[[str, bool], bool]] = None, **kwargs) -> RepoMap:
+    """Return the process-wide map of a directory, creating it on first use."""
+    key = os.path.abspath(root)
+    with _maps_lock:
+        repo_map = _maps.get(key)
+        if repo_map is None:
+            repo_map = RepoMap(key, skip=skip, **kwargs)
+            _maps[key] = repo_map
+        return repo_map
@@ -6,13 +6,14 @@ This module handles response validation, format checking, and automatic retries.
 import json
 import asyncio
 import logging
-from typing import Any, Dict, Optional, TypeVar, Callable, Awaitable
+from typing import Any, AsyncIterator, Dict, Optional, TypeVar, Callable, Awaitable
 from dataclasses import dataclass
 from functools import wraps
 import aiohttp
 from rich.console import Console
 
 from .errors import ResponseError, ConnectionError
+from .transport import get_session
 
 console = Console()
 
@@ -100,6 +101,45 @@ async def validate_json_response(response: aiohttp.ClientResponse) -> Dict[str,
     
     return data
 
+async def iter_sse_json(response: aiohttp.ClientResponse) -> AsyncIterator[Dict[str, Any]]:
+    """Iterate over the JSON payloads of a server-sent event stream.
+    
+    Args:
+        response: The aiohttp response to read
+        
+    Yields:
+        The parsed ``data:`` payload of each event, until ``[DONE]``
+    """
+    async for raw_line in response.content:
+        line = raw_line.decode('utf-8').strip()
+        if not line.startswith('data:'):
+            continue
+        payload = line[len('data:'):].strip()
+        if payload == '[DONE]':
+            return
+        try:
+            yield json.loads(payload)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed stream event: {payload[:200]}")
+
+async def iter_ndjson(response: aiohttp.ClientResponse) -> AsyncIterator[Dict[str, Any]]:
+    """Iterate over a newline-delimited JSON stream.
+    
+    Args:
+        response: The aiohttp response to read
+        
+    Yields:
+        Each parsed JSON line
+    """
+    async for raw_line in response.content:
+        line = raw_line.decode('utf-8').strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed stream line: {line[:200]}")
+
 def validate_ollama_response(data: Dict[str, Any]) -> None:
     """Validate Ollama response format.
     
@@ -178,26 +218,26 @@ async def make_request(
         ConnectionError: If the request fails
         ResponseError: If the response is invalid
     """
-    async with aiohttp.ClientSession() as session:
-        async with await getattr(session, method.lower())(url, **kwargs) as response:
-            if response.status != 200:
-                raise ResponseError(
-                    f"Request failed with status {response.status}",
-                    {
-                        "status": response.status,
-                        "reason": response.reason,
-                        "url": url
-                    }
-                )
-            
-            data = await validate_json_response(response)
-            
-            # Validate provider-specific response format
-            if provider == "ollama":
-                validate_ollama_response(data)
-            elif provider == "cborg":
-                validate_cborg_response(data)
-            else:
-                raise ValueError(f"Unknown provider: {provider}")
-            
-            return data
+    session = await get_session()
+    async with await getattr(session, method.lower())(url, **kwargs) as response:
+        if response.status != 200:
+            raise ResponseError(
+                f"Request failed with status {response.status}",
+                {
+                    "status": response.status,
+                    "reason": response.reason,
+                    "url": url
+                }
+            )
+        
+        data = await validate_json_response(response)
+        
+        # Validate provider-specific response format
+        if provider == "ollama":
+            validate_ollama_response(data)
+        elif provider == "cborg":
+            validate_cborg_response(data)
+        else:
+            raise ValueError(f"Unknown provider: {provider}")
+        
+        return data
@@ -0,0 +1,109 @@
+"""Background event loop for calling async code from synchronous callers.
+
+Synchronous entry points (the Flask app, the ce3 CLI) submit coroutines to a
+single long-lived loop running in a daemon thread. Because every call lands
+on the same loop, the pooled HTTP transport is shared between calls and many
+conversations can be interleaved on one loop.
+"""
+
+import asyncio
+import threading
+from typing import AsyncIterator, Awaitable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class LoopRunner:
+    """Owns an event loop running forever in a background thread."""
+
+    def __init__(self, name: str = "omni-core-loop"):
+        """Initialize the runner.
+
+        Args:
+            name: Name of the background thread
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Return the background loop, starting it on first use."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name=self.name,
+                    daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the background loop and wait for its result.
+
+        Args:
+            coro: The coroutine to run
+            timeout: Optional number of seconds to wait for the result
+
+        Raises:
+            RuntimeError: If called from the background loop itself
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Cannot block on the background loop from inside it; await instead")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return future.result(timeout)
+
+    def iterate(self, agen: AsyncIterator[T]) -> Iterator[T]:
+        """Consume an async iterator from synchronous code.
+
+        Each item is produced on the background loop; the iterator is closed
+        on the loop if the caller stops early.
+        """
+        try:
+            while True:
+                try:
+                    item = self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            aclose = getattr(agen, 'aclose', None)
+            if aclose is not None:
+                self.run(aclose())
+
+    def stop(self) -> None:
+        """Stop the background loop and wait for its thread to exit."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join()
+        loop.close()
+
+
+_runner: Optional[LoopRunner] = None
+
+
+def get_runner() -> LoopRunner:
+    """Return the process-wide loop runner."""
+    global _runner
+    if _runner is None:
+        _runner = LoopRunner()
+    return _runner
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Run a coroutine on the shared background loop and return its result."""
+    return get_runner().run(coro, timeout)
+
+
+def iterate_sync(agen: AsyncIterator[T]) -> Iterator[T]:
+    """Iterate an async iterator on the shared background loop."""
+    return get_runner().iterate(agen)
@@ -0,0 +1,105 @@
+"""Scheduling of the tool calls requested in one model response.
+
+Models often ask for several tools at once, for example reading three
+files. Running them one after another wastes the time of all but the
+slowest. The scheduler runs calls that are safe to overlap concurrently and
+everything else on its own, in request order, so a write never races a read
+that the model asked for before or after it. Results always come back in
+request order.
+"""
+
+import asyncio
+import inspect
+import logging
+from concurrent.futures import Executor
+from typing import Awaitable, Callable, List, Optional, Sequence, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+Call = TypeVar("Call")
+Result = TypeVar("Result")
+
+
+class ToolScheduler:
+    """Runs tool calls concurrently where that is safe."""
+
+    def __init__(self, max_concurrency: int = 8, executor: Optional[Executor] = None):
+        """Initialize the scheduler.
+        
+        Args:
+            max_concurrency: Most calls running at the same time
+            executor: Executor for synchronous calls. Defaults to the event
+                loop's default thread pool.
+        """
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+
+    @staticmethod
+    def batches(calls: Sequence[Call], concurrent: Callable[[Call], bool]) -> List[List[Call]]:
+        """Group calls into batches that may run concurrently.
+        
+        Consecutive calls that are safe to overlap share a batch; any other
+        call forms a batch of its own.
+        """
+        batches: List[List[Call]] = []
+        open_batch = False
+        for call in calls:
+            if concurrent(call):
+                if not open_batch:
+                    batches.append([])
+                    open_batch = True
+                batches[-1].append(call)
+            else:
+                batches.append([call])
+                open_batch = False
+        return batches
+
+    async def _call(
+        self,
+        call: Call,
+        execute: Callable[[Call], Union[Result, Awaitable[Result]]],
+        semaphore: asyncio.Semaphore
+    ) -> Result:
+        async with semaphore:
+            if inspect.iscoroutinefunction(execute):
+                return await execute(call)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, execute, call)
+
+    async def run(
+        self,
+        calls: Sequence[Call],
+        execute: Callable[[Call], Union[Result, Awaitable[Result]]],
+        concurrent: Callable[[Call], bool] = lambda call: False
+    ) -> List[Result]:
+        """Execute calls and return their results in request order.
+        
+        Args:
+            calls: The tool calls from one model response
+            execute: Function or coroutine function running one call.
+                Functions run in the executor.
+            concurrent: Returns True for calls that may overlap other
+                concurrent calls, such as read-only tools
+                
+        Returns:
+            One result per call, in the order of calls
+            
+        Raises:
+            Exception: The first exception raised by a call, once every call
+                of its batch has finished
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: List[Result] = []
+        for batch in self.batches(calls, concurrent):
+            if len(batch) == 1:
+                results.append(await self._call(batch[0], execute, semaphore))
+                continue
+            outcomes = await asyncio.gather(
+                *(self._call(call, execute, semaphore) for call in batch),
+                return_exceptions=True
+            )
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+            results.extend(outcomes)
+        return results
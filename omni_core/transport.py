@@ -0,0 +1,233 @@
+"""Shared HTTP transport for Omni Engineer providers.
+
+This module owns the process-wide aiohttp connection pool. Providers ask the
+transport for a session instead of opening their own, so keep-alive
+connections, DNS lookups and TLS sessions are reused across turns.
+"""
+
+import os
+import asyncio
+import logging
+import weakref
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+def _env_number(name: str, default: Optional[float], cast=float) -> Optional[float]:
+    """Read a numeric setting from the environment, falling back to a default."""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    if value.lower() == "none":
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid value for {name}: {value!r}")
+        return default
+
+
+@dataclass
+class TransportConfig:
+    """Configuration for the pooled HTTP transport"""
+    limit: int = 100  # total simultaneous connections
+    limit_per_host: int = 10  # simultaneous connections per host
+    ttl_dns_cache: int = 300  # seconds
+    keepalive_timeout: float = 30.0  # seconds an idle connection is kept
+    total_timeout: Optional[float] = 300.0  # seconds for a whole request
+    connect_timeout: Optional[float] = 10.0  # seconds to acquire/open a connection
+    sock_read_timeout: Optional[float] = None  # seconds between reads (streaming)
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        """Build a configuration from OMNI_HTTP_* environment variables."""
+        defaults = cls()
+        return cls(
+            limit=int(_env_number("OMNI_HTTP_LIMIT", defaults.limit, int)),
+            limit_per_host=int(_env_number("OMNI_HTTP_LIMIT_PER_HOST", defaults.limit_per_host, int)),
+            ttl_dns_cache=int(_env_number("OMNI_HTTP_DNS_TTL", defaults.ttl_dns_cache, int)),
+            keepalive_timeout=_env_number("OMNI_HTTP_KEEPALIVE", defaults.keepalive_timeout),
+            total_timeout=_env_number("OMNI_HTTP_TIMEOUT", defaults.total_timeout),
+            connect_timeout=_env_number("OMNI_HTTP_CONNECT_TIMEOUT", defaults.connect_timeout),
+            sock_read_timeout=_env_number("OMNI_HTTP_READ_TIMEOUT", defaults.sock_read_timeout),
+        )
+
+    def client_timeout(self) -> aiohttp.ClientTimeout:
+        """Return the aiohttp timeout object for this configuration."""
+        return aiohttp.ClientTimeout(
+            total=self.total_timeout,
+            connect=self.connect_timeout,
+            sock_read=self.sock_read_timeout,
+        )
+
+
+@dataclass
+class PoolStats:
+    """Snapshot of connection pool usage"""
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    open_connections: int = 0
+    idle_connections: int = 0
+    sessions: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Fraction of requests that were served on an already open connection."""
+        acquired = self.connections_created + self.connections_reused
+        if not acquired:
+            return 0.0
+        return self.connections_reused / acquired
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the statistics as a JSON-serialisable dictionary."""
+        data = asdict(self)
+        data["reuse_ratio"] = round(self.reuse_ratio, 4)
+        return data
+
+
+class HTTPTransport:
+    """Lifecycle-managed pool of aiohttp sessions.
+
+    aiohttp sessions are bound to the event loop that created them, so the
+    transport keeps one session per running loop. Within a loop every caller
+    shares the same connector and therefore the same keep-alive pool.
+    """
+
+    def __init__(self, config: Optional[TransportConfig] = None):
+        """Initialize the transport.
+
+        Args:
+            config: Optional transport configuration. Read from the
+                environment if not provided.
+        """
+        self.config = config or TransportConfig.from_env()
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._connectors: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.TCPConnector]" = weakref.WeakKeyDictionary()
+        self._requests = 0
+        self._created = 0
+        self._reused = 0
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Build a trace config that feeds the pool statistics."""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            self._requests += 1
+
+        async def on_connection_create_end(session, context, params):
+            self._created += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self._reused += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    async def _create_session(self) -> Tuple[Any, aiohttp.TCPConnector]:
+        """Create a pooled session and its connector for the running loop."""
+        connector = aiohttp.TCPConnector(
+            limit=self.config.limit,
+            limit_per_host=self.config.limit_per_host,
+            ttl_dns_cache=self.config.ttl_dns_cache,
+            use_dns_cache=True,
+            keepalive_timeout=self.config.keepalive_timeout,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.config.client_timeout(),
+            trace_configs=[self._trace_config()],
+        )
+        # Enter the session once here; it is left open until close()
+        session = await session.__aenter__()
+        return session, connector
+
+    async def session(self) -> aiohttp.ClientSession:
+        """Return the shared session for the running event loop.
+
+        The session must not be closed by callers; use ``close`` instead.
+        """
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is not None and not getattr(session, "closed", False):
+            return session
+
+        if session is not None:
+            logger.debug("Replacing closed HTTP session")
+            await self._close_connector(loop)
+
+        session, connector = await self._create_session()
+        self._sessions[loop] = session
+        self._connectors[loop] = connector
+        return session
+
+    async def _close_connector(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Close the connector owned by the given loop, if any."""
+        connector = self._connectors.pop(loop, None)
+        if connector is not None and not connector.closed:
+            await connector.close()
+
+    async def close(self) -> None:
+        """Close the session and connection pool of the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.pop(loop, None)
+        if session is not None and not getattr(session, "closed", False):
+            await session.close()
+        await self._close_connector(loop)
+
+    def stats(self) -> PoolStats:
+        """Return a snapshot of the pool statistics across all loops."""
+        open_connections = 0
+        idle_connections = 0
+        for connector in list(self._connectors.values()):
+            if connector.closed:
+                continue
+            # aiohttp does not expose pool sizes publicly
+            idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+            active = len(getattr(connector, "_acquired", ()))
+            idle_connections += idle
+            open_connections += idle + active
+        return PoolStats(
+            requests=self._requests,
+            connections_created=self._created,
+            connections_reused=self._reused,
+            open_connections=open_connections,
+            idle_connections=idle_connections,
+            sessions=len(self._sessions),
+        )
+
+    def reset_stats(self) -> None:
+        """Reset the request and connection counters."""
+        self._requests = 0
+        self._created = 0
+        self._reused = 0
+
+
+_transport: Optional[HTTPTransport] = None
+
+
+def get_transport() -> HTTPTransport:
+    """Return the process-wide transport, creating it on first use."""
+    global _transport
+    if _transport is None:
+        _transport = HTTPTransport()
+    return _transport
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the pooled session for the running event loop."""
+    return await get_transport().session()
+
+
+async def close_transport() -> None:
+    """Close the process-wide transport for the running event loop."""
+    if _transport is not None:
+        stats = _transport.stats()
+        logger.info(f"Closing HTTP transport: {stats.to_dict()}")
+        await _transport.close()
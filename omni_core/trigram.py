@@ -0,0 +1,443 @@
+"""Trigram index for fast literal and regular expression code search.
+
+Every indexed file is broken into the set of three-character substrings of
+its lowercased text, and each trigram maps to the files containing it. A
+query is answered by extracting the literal runs any match must contain,
+intersecting the posting sets of their trigrams and only scanning the few
+candidate files with the real pattern.
+
+The index is kept per workspace root, persisted between sessions and
+updated incrementally: files whose modification time or size changed are
+re-indexed, removed files are dropped. Removal is lazy; postings of stale
+files are filtered at query time and the index is compacted once they pile
+up. The persisted copy is plain JSON, so loading it never runs code from
+the index directory.
+"""
+
+import os
+import re
+import json
+import time
+import atexit
+import hashlib
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+from .fswalk import DEFAULT_MAX_FILE_BYTES, WalkStats, read_text, walk_stat
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = 2  # Bump when the persisted layout changes
+INDEX_SUFFIX = ".json"
+LEGACY_SUFFIX = ".idx"  # Pickled indexes of format 1, removed on load
+SAVE_INTERVAL = 30.0  # Seconds between saves of an index that keeps changing
+DEFAULT_INDEX_DIR = os.getenv(
+    "OMNI_SEARCH_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".search_index")
+)
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return the trigrams of the lines of text, lowercased.
+
+    Repeated lines are only scanned once, so trigrams spanning a line break
+    are meaningless; queries never use them (see query_trigrams).
+    """
+    text = "\n".join(set(text.lower().split("\n")))
+    return set(map("".join, zip(text, text[1:], text[2:])))
+
+
+def query_trigrams(literals: Iterable[str]) -> Set[str]:
+    """Return the trigrams a file must have to contain all of the literals."""
+    keys: Set[str] = set()
+    for literal in literals:
+        for piece in literal.lower().split("\n"):
+            keys.update(piece[i:i + 3] for i in range(len(piece) - 2))
+    return keys
+
+
+def _required_runs(parsed) -> List[str]:
+    """Collect the literal runs every match of a parsed pattern contains."""
+    runs: List[str] = []
+    current: List[str] = []
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            current.append(chr(av))
+            continue
+        if current:
+            runs.append("".join(current))
+            current = []
+        if op is sre_constants.SUBPATTERN:
+            runs.extend(_required_runs(av[-1]))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            runs.extend(_required_runs(av[2]))
+        # Anything else (alternation, classes, optional parts) may match
+        # without a fixed literal and adds no constraint
+    if current:
+        runs.append("".join(current))
+    return runs
+
+
+def required_literals(pattern: str, regex: bool = True) -> List[str]:
+    """Return the literal substrings every match of a query must contain.
+
+    An empty list means the query cannot be narrowed and every file is a
+    candidate.
+    """
+    if not regex:
+        return [pattern]
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, RecursionError):
+        return []
+    return _required_runs(parsed)
+
+
+@dataclass
+class SearchHit:
+    """A matching line with its surrounding context"""
+    path: str
+    line: int  # 1-based
+    text: str
+    before: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the hit as a JSON-serialisable dictionary."""
+        return asdict(self)
+
+
+@dataclass
+class SearchStats:
+    """What a search and the index update before it did"""
+    files_indexed: int = 0
+    files_updated: int = 0
+    files_removed: int = 0
+    files_skipped: int = 0  # Binary or too large to index
+    candidates: int = 0
+    files_matched: int = 0
+    hits: int = 0
+    truncated: bool = False
+    update_ms: float = 0.0
+    search_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the statistics as a JSON-serialisable dictionary."""
+        data = asdict(self)
+        data["update_ms"] = round(self.update_ms, 2)
+        data["search_ms"] = round(self.search_ms, 2)
+        return data
+
+
+class TrigramIndex:
+    """Trigram index of the text files under one directory.
+
+    Paths are stored relative to the root. Files are identified by integer
+    ids; ``postings`` maps each trigram to the ids of the files containing
+    it, including ids of files that have since changed or been removed.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        skip: Optional[Callable[[str, bool], bool]] = None,
+        index_dir: Optional[str] = DEFAULT_INDEX_DIR,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    ):
+        """Initialize the index, loading a persisted copy if there is one.
+
+        Args:
+            root: Directory to index
+            skip: Entry names to leave out, as for fswalk.walk_files
+            index_dir: Directory the index is persisted in; None keeps it
+                in memory only
+            max_file_bytes: Larger files are not indexed
+        """
+        self.root = os.path.abspath(root)
+        self.skip = skip
+        self.max_file_bytes = max_file_bytes
+        self.index_path = None
+        if index_dir is not None:
+            digest = hashlib.sha1(self.root.encode("utf-8")).hexdigest()[:16]
+            self.index_path = os.path.join(index_dir, digest + INDEX_SUFFIX)
+        self.files: Dict[str, Tuple[int, int, int]] = {}  # path -> (id, mtime_ns, size)
+        self.skipped: Dict[str, Tuple[int, int]] = {}  # path -> (mtime_ns, size) of unindexable files
+        self.postings: Dict[str, Set[int]] = {}
+        self._paths: Dict[int, str] = {}  # live id -> path
+        self._next_id = 0
+        self._stale = 0
+        self._dirty = False
+        self._saved_at: Optional[float] = None  # Never saved by this process
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """Load the persisted index, ignoring it if unreadable or outdated."""
+        if self.index_path is None:
+            return
+        legacy_path = self.index_path[:-len(INDEX_SUFFIX)] + LEGACY_SUFFIX
+        if os.path.exists(legacy_path):
+            os.unlink(legacy_path)
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("format") != INDEX_FORMAT or data.get("root") != self.root:
+                return
+            files = {path: tuple(entry) for path, entry in data["files"].items()}
+            skipped = {path: tuple(entry) for path, entry in data["skipped"].items()}
+            postings = {trigram: set(ids) for trigram, ids in data["postings"].items()}
+            next_id, stale = int(data["next_id"]), int(data["stale"])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable search index {self.index_path}: {e}")
+            return
+        self.files, self.skipped, self.postings = files, skipped, postings
+        self._next_id, self._stale = next_id, stale
+        self._paths = {file_id: path for path, (file_id, _, _) in self.files.items()}
+
+    def save(self) -> None:
+        """Persist the index, replacing the previous copy atomically."""
+        if self.index_path is None:
+            return
+        directory = os.path.dirname(self.index_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file, self._lock:
+                data = {
+                    "format": INDEX_FORMAT,
+                    "root": self.root,
+                    "files": self.files,
+                    "skipped": self.skipped,
+                    "postings": {trigram: sorted(ids) for trigram, ids in self.postings.items()},
+                    "next_id": self._next_id,
+                    "stale": self._stale,
+                }
+                json.dump(data, file, separators=(",", ":"))
+                self._dirty = False
+            os.replace(tmp_path, self.index_path)
+            self._saved_at = time.monotonic()
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _add(self, rel_path: str, text: str, mtime_ns: int, size: int) -> None:
+        """Index the text of a file under a new id."""
+        file_id = self._next_id
+        self._next_id += 1
+        for trigram in trigrams(text):
+            posting = self.postings.get(trigram)
+            if posting is None:
+                self.postings[trigram] = {file_id}
+            else:
+                posting.add(file_id)
+        self.files[rel_path] = (file_id, mtime_ns, size)
+        self._paths[file_id] = rel_path
+
+    def _drop(self, rel_path: str) -> None:
+        """Forget a file; its postings are left for compaction."""
+        entry = self.files.pop(rel_path, None)
+        if entry is not None:
+            del self._paths[entry[0]]
+            self._stale += 1
+
+    def update(self, stats: Optional[SearchStats] = None) -> bool:
+        """Bring the index up to date with the files on disk.
+
+        Returns:
+            True if anything changed
+        """
+        stats = stats if stats is not None else SearchStats()
+        started = time.perf_counter()
+        changed = False
+        with self._lock:
+            seen = set()
+            for path, st in walk_stat(self.root, skip=self.skip, stats=WalkStats()):
+                rel_path = os.path.relpath(path, self.root)
+                seen.add(rel_path)
+                entry = self.files.get(rel_path)
+                if entry is not None and entry[1:] == (st.st_mtime_ns, st.st_size):
+                    continue
+                if self.skipped.get(rel_path) == (st.st_mtime_ns, st.st_size):
+                    continue
+
+                changed = True
+                self._drop(rel_path)
+                self.skipped.pop(rel_path, None)
+                text, status = read_text(path, self.max_file_bytes)
+                if status != "ok":
+                    self.skipped[rel_path] = (st.st_mtime_ns, st.st_size)
+                    continue
+                self._add(rel_path, text, st.st_mtime_ns, st.st_size)
+                stats.files_updated += 1
+
+            for rel_path in [path for path in self.files if path not in seen]:
+                self._drop(rel_path)
+                stats.files_removed += 1
+                changed = True
+            for rel_path in [path for path in self.skipped if path not in seen]:
+                del self.skipped[rel_path]
+                changed = True
+
+            if self._stale > max(len(self.files), 1000):
+                self._compact()
+
+            stats.files_indexed = len(self.files)
+            stats.files_skipped = len(self.skipped)
+            self._dirty = self._dirty or changed
+        stats.update_ms += (time.perf_counter() - started) * 1000
+        if changed:
+            logger.debug(f"Search index of {self.root} updated: {stats.to_dict()}")
+        return changed
+
+    def _compact(self) -> None:
+        """Rebuild the postings without the ids of stale files."""
+        live = set(self._paths)
+        for trigram in list(self.postings):
+            posting = self.postings[trigram] & live
+            if posting:
+                self.postings[trigram] = posting
+            else:
+                del self.postings[trigram]
+        self._stale = 0
+
+    def candidates(self, literals: Iterable[str]) -> List[str]:
+        """Return the paths of files that may contain all of the literals."""
+        with self._lock:
+            result: Optional[Set[int]] = None
+            # Rarest trigrams first keeps the intersection small
+            keys = query_trigrams(literals)
+            for trigram in sorted(keys, key=lambda key: len(self.postings.get(key, ()))):
+                posting = self.postings.get(trigram)
+                if not posting:
+                    return []
+                result = set(posting) if result is None else result & posting
+                if not result:
+                    return []
+            ids = set(self._paths) if result is None else result
+            return sorted(self._paths[file_id] for file_id in ids if file_id in self._paths)
+
+    def search(
+        self,
+        pattern: str,
+        regex: bool = False,
+        case_sensitive: bool = True,
+        context_lines: int = 2,
+        max_results: int = 50,
+        update: bool = True,
+    ) -> Tuple[List[SearchHit], SearchStats]:
+        """Find the lines matching a literal or regular expression.
+
+        Args:
+            pattern: Text or regular expression to look for
+            regex: Treat pattern as a regular expression
+            case_sensitive: Match case
+            context_lines: Lines of context before and after each hit
+            max_results: Stop after this many hits
+            update: Bring the index up to date first
+
+        Returns:
+            (hits, stats), hits in path and line order
+
+        Raises:
+            ValueError: If the regular expression is invalid
+        """
+        stats = SearchStats()
+        if update:
+            self.update(stats)
+            # Saving a big index takes a while; small edits are batched
+            if self._dirty and (self._saved_at is None or time.monotonic() - self._saved_at > SAVE_INTERVAL):
+                self.save()
+        else:
+            stats.files_indexed = len(self.files)
+            stats.files_skipped = len(self.skipped)
+
+        started = time.perf_counter()
+        flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+        try:
+            compiled = re.compile(pattern if regex else re.escape(pattern), flags)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}")
+
+        paths = self.candidates(required_literals(pattern, regex))
+        stats.candidates = len(paths)
+        hits: List[SearchHit] = []
+        for rel_path in paths:
+            text, status = read_text(os.path.join(self.root, rel_path), self.max_file_bytes)
+            if status != "ok":
+                continue
+            file_hits = self._match(compiled, rel_path, text, context_lines, max_results - len(hits))
+            if file_hits:
+                stats.files_matched += 1
+                hits.extend(file_hits)
+            if len(hits) >= max_results:
+                stats.truncated = True
+                break
+        stats.hits = len(hits)
+        stats.search_ms = (time.perf_counter() - started) * 1000
+        return hits, stats
+
+    @staticmethod
+    def _match(compiled: re.Pattern, rel_path: str, text: str, context_lines: int, limit: int) -> List[SearchHit]:
+        """Return the matching lines of one file, at most limit of them."""
+        hits: List[SearchHit] = []
+        lines: Optional[List[str]] = None
+        line = 1
+        position = 0
+        last_line = 0
+        for match in compiled.finditer(text):
+            line += text.count("\n", position, match.start())
+            position = match.start()
+            if line == last_line:
+                continue  # One hit per line
+            last_line = line
+            if lines is None:
+                lines = text.split("\n")
+            hits.append(SearchHit(
+                path=rel_path,
+                line=line,
+                text=lines[line - 1],
+                before=lines[max(line - 1 - context_lines, 0):line - 1],
+                after=lines[line:line + context_lines],
+            ))
+            if len(hits) >= limit:
+                break
+        return hits
+
+
+_indexes: Dict[str, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root: str, skip: Optional[Callable[[str, bool], bool]] = None, **kwargs) -> TrigramIndex:
+    """Return the process-wide index of a directory, creating it on first use."""
+    key = os.path.abspath(root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = TrigramIndex(key, skip=skip, **kwargs)
+            _indexes[key] = index
+        return index
+
+
+@atexit.register
+def _save_indexes() -> None:
+    """Save the indexes with changes not yet persisted."""
+    for index in list(_indexes.values()):
+        if index._dirty:
+            try:
+                index.save()
+            except Exception as e:
+                logger.warning(f"Could not save search index of {index.root}: {e}")
@@ -0,0 +1,247 @@
+"""Main-content extraction from HTML pages as markdown.
+
+A page is parsed once with lxml, and a single walk over the tree collects
+the title and meta description, drops scripts, navigation, hidden and
+advertising elements (without descending into them) and finds the main
+content container: <main>, <article>, role="main", then an element whose
+id or class names main content. Pages without one are handed to
+readability, which scores the already-pruned tree. The chosen subtree is
+slimmed (presentational tags and unused attributes stripped, text past
+the output limit cut off) and converted to markdown with markdownify, so
+headings, lists, links, code and tables keep their structure and each
+piece of text appears once.
+"""
+
+import os
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+import lxml.html
+from lxml import etree
+from markdownify import markdownify
+from readability import Document
+from readability.readability import Unparseable
+
+logger = logging.getLogger(__name__)
+
+DROP_TAGS = frozenset({
+    "script", "style", "noscript", "iframe", "svg", "canvas", "object", "embed", "template",
+    "nav", "footer", "aside", "form", "header", "button", "select", "input",
+})
+KEEP_TAGS = frozenset({"html", "head", "body", "main", "article"})  # Never dropped for their class or id
+JUNK_PATTERN = re.compile(
+    r"(?:^|[\s_-])(?:sidebar|nav|navbar|navigation|menu|ads?|advert\w*|banner|cookies?|popup|breadcrumbs?)(?:$|[\s_-])",
+    re.I,
+)
+MAIN_PATTERN = re.compile(r"(?:^|[\s_-])(?:main|content|article)(?:$|[\s_-])", re.I)
+HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.I)
+CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_.:-]+)""", re.I)
+HEADER_CHARSET = re.compile(r"charset=[\"']?([A-Za-z0-9_.:-]+)", re.I)
+XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+INLINE_UNWRAP = ("span", "font", "small", "abbr", "label", "time", "mark", "wbr", "bdi", "bdo")
+KEEP_ATTRIBUTES = frozenset({"href", "src", "alt", "title", "colspan", "rowspan"})
+DEFAULT_MAX_CHARS = int(os.getenv("OMNI_SCRAPE_MAX_CHARS", 100_000))  # Text kept from a page
+MIN_READABLE_CHARS = 200  # Below this, readability's pick is ignored in favour of the whole body
+
+
+@dataclass
+class ExtractedPage:
+    """The readable parts of a page"""
+    url: Optional[str] = None
+    title: str = ""
+    description: str = ""
+    content: str = ""  # Markdown
+    truncated: bool = False  # The download or the content stopped at a limit
+    links: List[str] = field(default_factory=list)  # Every link on the page, absolute if url was given
+
+    def render(self) -> str:
+        """Format the page as the scraper reports it."""
+        parts = []
+        if self.title:
+            parts.append(f"Title: {self.title}")
+        if self.description:
+            parts.append(f"Description: {self.description}")
+        parts.append("Content:")
+        parts.append(self.content)
+        if self.truncated:
+            parts.append("(The page was cut short; only its beginning is shown.)")
+        return "\n\n".join(parts)
+
+
+def detect_encoding(content: bytes, content_type: str = "") -> str:
+    """Return the encoding of an HTML document from its Content-Type, BOM or meta tag."""
+    match = HEADER_CHARSET.search(content_type or "")
+    if match:
+        return match.group(1)
+    if content.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    if content.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+    match = CHARSET_PATTERN.search(content[:4096])
+    return match.group(1).decode("ascii") if match else "utf-8"
+
+
+def parse_html(content: Union[bytes, str], content_type: str = "") -> Optional[lxml.html.HtmlElement]:
+    """Parse an HTML document, or return None if it has no elements."""
+    if isinstance(content, bytes):
+        encoding = detect_encoding(content, content_type)
+        try:
+            content = content.decode(encoding, errors="replace")
+        except LookupError:
+            content = content.decode("utf-8", errors="replace")
+    content = XML_DECLARATION.sub("", content, count=1)
+    if not content.strip():
+        return None
+    parser = lxml.html.HTMLParser(remove_comments=True, remove_pis=True)
+    try:
+        return lxml.html.document_fromstring(content, parser=parser)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def _is_junk(element: lxml.html.HtmlElement) -> bool:
+    if element.tag in DROP_TAGS:
+        return True
+    if element.get("hidden") is not None or element.get("aria-hidden") == "true":
+        return True
+    style = element.get("style")
+    if style and HIDDEN_STYLE.search(style):
+        return True
+    if element.tag in KEEP_TAGS:
+        return False
+    names = f"{element.get('id', '')} {element.get('class', '')}"
+    return bool(names.strip()) and JUNK_PATTERN.search(names) is not None
+
+
+def _prune(root: lxml.html.HtmlElement) -> Tuple[str, str, Optional[lxml.html.HtmlElement]]:
+    """Walk the tree once: drop junk and return the title, description and main container."""
+    title = description = ""
+    candidates = [None] * 4  # <main>, <article>, role="main", id or class naming main content
+    junk = []
+    stack = [root]
+    while stack:
+        element = stack.pop()
+        tag = element.tag
+        if not isinstance(tag, str):  # Entities left by the parser
+            continue
+        if tag == "title":
+            if not title:
+                title = element.text_content().strip()
+            continue
+        if tag == "meta":
+            if not description and (element.get("name") or "").lower() == "description":
+                description = (element.get("content") or "").strip()
+            continue
+        if _is_junk(element):
+            junk.append(element)
+            continue
+        if tag == "main":
+            candidates[0] = candidates[0] if candidates[0] is not None else element
+        elif tag == "article":
+            candidates[1] = candidates[1] if candidates[1] is not None else element
+        if candidates[2] is None and element.get("role") == "main":
+            candidates[2] = element
+        if candidates[3] is None and MAIN_PATTERN.search(f"{element.get('id', '')} {element.get('class', '')}"):
+            candidates[3] = element
+        stack.extend(reversed(element))
+
+    for element in junk:
+        if element.getparent() is not None:
+            element.drop_tree()
+    container = next((candidate for candidate in candidates if candidate is not None), None)
+    return title, description, container
+
+
+def _readable(root: lxml.html.HtmlElement, url: Optional[str]) -> Optional[lxml.html.HtmlElement]:
+    """Return the content readability picks from a pruned page."""
+    try:
+        summary = Document(root, url=url).summary(html_partial=True)
+    except Unparseable as e:
+        logger.debug(f"readability could not parse {url}: {e}")
+        return None
+    content = lxml.html.fromstring(summary)
+    if len(content.text_content().strip()) < MIN_READABLE_CHARS:
+        return None
+    return content
+
+
+def _cut_after(container: lxml.html.HtmlElement, element: lxml.html.HtmlElement) -> None:
+    """Remove everything in container that follows the text of element."""
+    for child in list(element):
+        element.remove(child)
+    node = element
+    while node is not container:
+        parent = node.getparent()
+        for sibling in list(node.itersiblings()):
+            parent.remove(sibling)
+        node.tail = None
+        node = parent
+
+
+def _slim(container: lxml.html.HtmlElement, max_chars: Optional[int]) -> bool:
+    """Strip what markdown does not use and cut the text after max_chars.
+
+    Returns:
+        Whether text was cut off
+    """
+    etree.strip_tags(container, *INLINE_UNWRAP)
+    size = 0
+    for element in container.iter(etree.Element):
+        attributes = element.attrib
+        for name in [name for name in attributes if name not in KEEP_ATTRIBUTES]:
+            del attributes[name]
+        size += len(element.text or "")
+        if max_chars is not None and size > max_chars:
+            _cut_after(container, element)
+            return True
+        if element is not container:
+            size += len(element.tail or "")
+    return False
+
+
+def to_markdown(html: str) -> str:
+    """Convert an HTML fragment to compact markdown."""
+    text = markdownify(html, heading_style="ATX", bullets="-", strip=["img"], bs4_options="lxml")
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def extract_page(
+    content: Union[bytes, str],
+    url: Optional[str] = None,
+    content_type: str = "",
+    truncated: bool = False,
+    max_chars: Optional[int] = DEFAULT_MAX_CHARS,
+) -> ExtractedPage:
+    """Extract the title, description and main content of an HTML page.
+
+    Args:
+        content: The page, as bytes or text
+        url: Where the page came from, used to resolve relative links
+        content_type: The Content-Type header, for the charset
+        truncated: Whether the page was cut off by a download limit
+        max_chars: Text to keep from the main content, or None for all of it
+
+    Returns:
+        The page with its main content as markdown
+    """
+    page = ExtractedPage(url=url, truncated=truncated)
+    root = parse_html(content, content_type)
+    if root is None:
+        return page
+    if url:
+        root.make_links_absolute(url, handle_failures="discard")
+    page.links = [str(href) for href in root.xpath("//a/@href")]
+
+    page.title, page.description, container = _prune(root)
+    if container is None:
+        container = _readable(root, url)
+    if container is None:
+        body = root.find("body")
+        container = body if body is not None else root
+    if _slim(container, max_chars):
+        page.truncated = True
+    page.content = to_markdown(lxml.html.tostring(container, encoding="unicode"))
+    return page
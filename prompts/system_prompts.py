@@ -362,3 +362,10 @@ class SystemPrompts:
     I can help with various development tasks while maintaining
     security and following best practices.
     """
+
+    CONTEXT_SUMMARY = """
+    Summarize the following part of a conversation between a user and a software
+    development assistant. The summary replaces these messages in the assistant's
+    context, so keep the user's goals, decisions made, file paths, commands, tool
+    results that still matter and any open questions. Be concise and factual.
+    """
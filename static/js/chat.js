@@ -323,11 +323,12 @@ document.getElementById('chat-form').addEventListener('submit', async (e) => {
     messageInput.value = '';
     resetTextarea();
     
+    // Add thinking indicator
+    const thinkingMessage = appendThinkingIndicator();
+    let streamingMessage = null;
+    
     try {
-        // Add thinking indicator
-        const thinkingMessage = appendThinkingIndicator();
-        
-        const response = await fetch('/chat', {
+        const response = await fetch('/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -335,31 +336,41 @@ document.getElementById('chat-form').addEventListener('submit', async (e) => {
             credentials: 'same-origin',  // Include cookies
             body: JSON.stringify({
                 message: message,
-                image: currentImageData  // This will be null if no image is selected
+                image_data: currentImageData,  // This will be null if no image is selected
+                media_type: currentMediaType
             })
         });
         
-        const data = await response.json();
-        
-        // Update token usage if provided in response
-        if (data.token_usage) {
-            updateTokenUsage(data.token_usage.total_tokens, data.token_usage.max_tokens);
-        }
-        
-        // Remove thinking indicator
-        if (thinkingMessage) {
-            thinkingMessage.remove();
+        if (!response.ok || !response.body) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.error || `Request failed with status ${response.status}`);
         }
         
-        // Show tool usage if present
-        if (data.tool_name) {
-            appendToolUsage(data.tool_name);
-        }
+        await readEventStream(response, (event) => {
+            if (event.type === 'token') {
+                // Replace the thinking indicator with the reply on the first token
+                if (!streamingMessage) {
+                    thinkingMessage.remove();
+                    streamingMessage = createStreamingMessage();
+                }
+                streamingMessage.append(event.content);
+            } else if (event.type === 'tool') {
+                if (streamingMessage) {
+                    streamingMessage.finish();
+                    streamingMessage = null;
+                }
+                appendToolUsage(event.name);
+            } else if (event.type === 'error') {
+                appendMessage(event.content);
+            } else if (event.type === 'usage') {
+                updateTokenUsage(event.total_tokens, event.max_tokens);
+            }
+        });
         
-        // Show response if we have one
-        if (data && data.response) {
-            appendMessage(data.response);
-        } else {
+        if (streamingMessage) {
+            streamingMessage.finish();
+        } else if (document.contains(thinkingMessage)) {
+            thinkingMessage.remove();
             appendMessage('Error: No response received');
         }
         
@@ -370,11 +381,116 @@ document.getElementById('chat-form').addEventListener('submit', async (e) => {
         
     } catch (error) {
         console.error('Error sending message:', error);
-        document.querySelector('.thinking-message')?.remove();
+        thinkingMessage.remove();
+        if (streamingMessage) {
+            streamingMessage.finish();
+        }
         appendMessage('Error: Failed to send message');
     }
 });
 
+// Read a text/event-stream response and hand each JSON event to onEvent
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const data = rawEvent
+                .split('\n')
+                .filter(line => line.startsWith('data:'))
+                .map(line => line.slice(5).trimStart())
+                .join('\n');
+            if (!data) continue;
+            
+            const event = JSON.parse(data);
+            if (event.type === 'done') return;
+            onEvent(event);
+        }
+    }
+}
+
+// Create an assistant message that renders markdown incrementally.
+// Completed blocks (text before a blank line outside a code fence) are
+// rendered and highlighted once; only the unfinished tail is re-parsed,
+// at most once per animation frame.
+function createStreamingMessage() {
+    appendMessage('');
+    const messagesDiv = document.getElementById('chat-messages');
+    const innerDiv = messagesDiv.querySelector('.message-wrapper:last-child .prose');
+    const committedDiv = document.createElement('div');
+    const tailDiv = document.createElement('div');
+    innerDiv.appendChild(committedDiv);
+    innerDiv.appendChild(tailDiv);
+    
+    let pending = '';
+    let scheduled = false;
+    
+    function commitCompletedBlocks() {
+        let offset = 0;
+        let fenceOpen = false;
+        let lastBoundary = -1;
+        const lines = pending.split('\n');
+        for (let i = 0; i < lines.length - 1; i++) {
+            if (lines[i].trimStart().startsWith('```')) {
+                fenceOpen = !fenceOpen;
+            }
+            offset += lines[i].length + 1;
+            if (!fenceOpen && lines[i + 1] === '' && i + 1 < lines.length - 1) {
+                lastBoundary = offset;
+            }
+        }
+        if (lastBoundary > 0) {
+            const block = document.createElement('div');
+            block.innerHTML = marked.parse(pending.slice(0, lastBoundary));
+            committedDiv.appendChild(block);
+            pending = pending.slice(lastBoundary);
+        }
+    }
+    
+    function render() {
+        scheduled = false;
+        try {
+            commitCompletedBlocks();
+            // Skip syntax highlighting for the tail; it is still changing
+            tailDiv.innerHTML = marked.parse(pending, { highlight: null });
+        } catch (e) {
+            console.error('Error parsing markdown:', e);
+            tailDiv.textContent = pending;
+        }
+        messagesDiv.scrollTop = messagesDiv.scrollHeight;
+    }
+    
+    return {
+        append(text) {
+            pending += text;
+            if (!scheduled) {
+                scheduled = true;
+                requestAnimationFrame(render);
+            }
+        },
+        finish() {
+            try {
+                tailDiv.innerHTML = marked.parse(pending);
+            } catch (e) {
+                console.error('Error parsing markdown:', e);
+                tailDiv.textContent = pending;
+            }
+            pending = '';
+            scheduled = true;  // Ignore any frame still queued
+            messagesDiv.scrollTop = messagesDiv.scrollHeight;
+        }
+    };
+}
+
 function resetTextarea() {
     const textarea = document.getElementById('message-input');
     textarea.style.height = '28px';
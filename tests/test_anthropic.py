@@ -5,6 +5,7 @@ import os
 from unittest.mock import patch, MagicMock
 import json
 from omni_core.providers.anthropic import AnthropicProvider
+from omni_core.prompt import SystemPromptBuilder
 
 class MockResponse:
     def __init__(self, json_data, status=200):
@@ -151,5 +152,116 @@ class TestAnthropicProvider(unittest.IsolatedAsyncioTestCase):
                 AnthropicProvider()
             self.assertIn("ANTHROPIC_API_KEY", str(context.exception))
 
+    async def test_chat_completion_tool_use(self):
+        """Test that tool_use blocks are returned as OpenAI-style tool calls."""
+        mock_response_data = {
+            "id": "msg_123",
+            "type": "message",
+            "role": "assistant",
+            "content": [
+                {"type": "text", "text": "Let me check."},
+                {"type": "tool_use", "id": "toolu_1", "name": "read_file", "input": {"path": "a.py"}}
+            ],
+            "model": "claude-haiku",
+            "stop_reason": "tool_use",
+            "usage": {"input_tokens": 10, "output_tokens": 20}
+        }
+        mock_session = MockClientSession(post_response=MockResponse(mock_response_data))
+
+        with patch('aiohttp.ClientSession', return_value=mock_session):
+            response = await self.provider.chat_completion(
+                messages=[{"role": "user", "content": "Read a.py"}],
+                model="anthropic/claude-haiku"
+            )
+
+        message = response["choices"][0]["message"]
+        self.assertEqual(message["content"], "Let me check.")
+        self.assertEqual(message["tool_calls"], [{
+            "id": "toolu_1",
+            "type": "function",
+            "function": {"name": "read_file", "arguments": '{"path": "a.py"}'}
+        }])
+
+    def test_openai_tools_are_converted(self):
+        """Test that OpenAI-style tools, tool_choice and tool turns are sent in Anthropic's format."""
+        tools = [{
+            "type": "function",
+            "function": {
+                "name": "read_file",
+                "description": "Read a file",
+                "parameters": {"type": "object", "properties": {"path": {"type": "string"}}}
+            }
+        }]
+        messages = [
+            {"role": "user", "content": "Read a.py and b.py"},
+            {"role": "assistant", "content": "", "tool_calls": [
+                {"id": "toolu_1", "type": "function", "function": {"name": "read_file", "arguments": '{"path": "a.py"}'}},
+                {"id": "toolu_2", "type": "function", "function": {"name": "read_file", "arguments": '{"path": "b.py"}'}}
+            ]},
+            {"role": "tool", "content": "print(1)", "tool_call_id": "toolu_1", "name": "read_file"},
+            {"role": "tool", "content": "print(2)", "tool_call_id": "toolu_2", "name": "read_file"}
+        ]
+
+        _, data, _ = self.provider._build_request(
+            messages, None, 0.7, 0.9, None, stream=False, tools=tools, tool_choice="auto"
+        )
+
+        self.assertEqual(data["tools"], [{
+            "name": "read_file",
+            "description": "Read a file",
+            "input_schema": {"type": "object", "properties": {"path": {"type": "string"}}}
+        }])
+        self.assertEqual(data["tool_choice"], {"type": "auto"})
+        self.assertEqual([m["role"] for m in data["messages"]], ["user", "assistant", "user"])
+        self.assertEqual(data["messages"][1]["content"][0],
+                         {"type": "tool_use", "id": "toolu_1", "name": "read_file", "input": {"path": "a.py"}})
+        self.assertEqual(data["messages"][2]["content"], [
+            {"type": "tool_result", "tool_use_id": "toolu_1", "content": "print(1)"},
+            {"type": "tool_result", "tool_use_id": "toolu_2", "content": "print(2)"}
+        ])
+
+    def test_prompt_caching_breakpoints(self):
+        """Test that cache_prompt marks the tools, system segments and last message."""
+        builder = SystemPromptBuilder("Instructions")
+        system = builder.build({"a.py": "print(1)"}, "Iteration 1 of 5")
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": "Hello!"},
+        ]
+        tools = [{"name": "one"}, {"name": "two"}]
+
+        _, data, _ = self.provider._build_request(
+            messages, None, 0.7, 0.9, None, stream=False, tools=tools, cache_prompt=True
+        )
+
+        self.assertEqual(data["tools"][-1]["cache_control"], {"type": "ephemeral"})
+        self.assertNotIn("cache_control", tools[-1])
+        self.assertEqual([("cache_control" in block) for block in data["system"]], [True, True, False])
+        self.assertEqual("".join(block["text"] for block in data["system"]), system)
+        self.assertEqual(data["messages"][-1]["content"][-1]["cache_control"], {"type": "ephemeral"})
+        self.assertEqual(data["messages"][-1]["content"][-1]["text"], "Hello!")
+
+    def test_prompt_caching_respects_breakpoint_limit(self):
+        """Test that the earliest system breakpoints are dropped over the limit."""
+        system = [{"type": "text", "text": t, "cache_control": {"type": "ephemeral"}} for t in "abc"]
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": "Hi"}]
+
+        _, data, _ = self.provider._build_request(
+            messages, None, 0.7, 0.9, None, stream=False, tools=[{"name": "one"}], cache_prompt=True
+        )
+
+        self.assertEqual([("cache_control" in block) for block in data["system"]], [False, True, True])
+        self.assertIn("cache_control", system[0])
+
+    def test_no_caching_by_default(self):
+        """Test that requests are unchanged without cache_prompt."""
+        system = SystemPromptBuilder("Instructions").build()
+        _, data, _ = self.provider._build_request(
+            [{"role": "system", "content": system}, {"role": "user", "content": "Hi"}],
+            None, 0.7, 0.9, None, stream=False
+        )
+        self.assertEqual(data["system"], "Instructions")
+        self.assertEqual(data["messages"][-1]["content"], "Hi")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,142 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from assistant_pool import AssistantPool
+from tool_registry import ToolRegistry
+
+
+class FakeAssistant:
+    """Minimal stand-in for ce3.Assistant"""
+
+    def __init__(self, provider, registry=None):
+        self.provider = provider
+        self.provider_context = self._create_provider_context()
+        self.loaded_tools = registry is None
+        self.set_tool_registry(registry if registry is not None else self._load_tools())
+        self.conversation_history = []
+
+    def _create_provider_context(self):
+        return {'provider_type': self.provider}
+
+    def set_tool_registry(self, registry):
+        self.tool_registry = registry
+        self.tools = registry.specs
+
+    def _load_tools(self):
+        registry = ToolRegistry()
+        registry.specs.append({'name': f'{self.provider}_tool'})
+        return registry
+
+
+class TestAssistantPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = AssistantPool(FakeAssistant, max_sessions=2, idle_timeout=60, max_history_bytes=0)
+
+    def test_sessions_are_isolated(self):
+        """Test that each session id gets its own assistant"""
+        first = self.pool.get('a', 'cborg')
+        self.assertIs(self.pool.get('a', 'cborg'), first)
+        self.assertIsNot(self.pool.get('b', 'cborg'), first)
+
+    def test_tool_specs_are_reused(self):
+        """Test that only the first assistant of a provider loads tools"""
+        first = self.pool.get('a', 'cborg')
+        second = self.pool.get('b', 'cborg')
+        self.assertTrue(first.loaded_tools)
+        self.assertFalse(second.loaded_tools)
+        self.assertIs(second.tool_registry, first.tool_registry)
+
+    def test_use_provider_updates_provider_context(self):
+        """Test switching providers describes the new provider to tools"""
+        assistant = self.pool.get('a', 'cborg')
+        self.pool.use_provider(assistant, 'ollama')
+        self.assertEqual(assistant.provider_context, {'provider_type': 'ollama'})
+
+    def test_lru_eviction(self):
+        """Test that the least recently used session is evicted when full"""
+        first = self.pool.get('a', 'cborg')
+        self.pool.get('b', 'cborg')
+        self.pool.get('a', 'cborg')  # 'b' is now least recently used
+        self.pool.get('c', 'cborg')
+
+        self.assertIsNone(self.pool.peek('b'))
+        self.assertIs(self.pool.peek('a'), first)
+        self.assertEqual(self.pool.stats()['evictions'], 1)
+
+    def test_idle_eviction(self):
+        """Test that idle sessions expire"""
+        with patch('assistant_pool.time.monotonic', return_value=1000.0):
+            self.pool.get('a', 'cborg')
+        with patch('assistant_pool.time.monotonic', return_value=1100.0):
+            self.pool.get('b', 'cborg')
+        self.assertIsNone(self.pool.peek('a'))
+
+    def test_busy_session_is_not_evicted(self):
+        """Test that a session serving a request survives overflow eviction"""
+        with self.pool.lease('a', 'cborg') as assistant:
+            self.pool.get('b', 'cborg')
+            self.pool.get('c', 'cborg')
+            self.assertIs(self.pool.peek('a'), assistant)
+        self.assertIsNone(self.pool.peek('b'))
+
+    def test_lease_serializes_one_session(self):
+        """Test that concurrent requests for one session run one at a time"""
+        active = []
+        overlap = []
+
+        def request():
+            with self.pool.lease('a', 'cborg'):
+                active.append(1)
+                overlap.append(len(active))
+                threading.Event().wait(0.01)
+                active.pop()
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(max(overlap), 1)
+
+    def test_use_provider_loads_specs_once(self):
+        """Test switching providers reuses that provider's specs"""
+        first = self.pool.get('a', 'cborg')
+        second = self.pool.get('b', 'cborg')
+        self.pool.use_provider(first, 'ollama')
+        self.pool.use_provider(second, 'ollama')
+        self.assertEqual(first.tools, [{'name': 'ollama_tool'}])
+        self.assertIs(second.tool_registry, first.tool_registry)
+
+    def test_trim_history_keeps_whole_turns(self):
+        """Test that history is trimmed by whole turns to the byte cap"""
+        self.pool.max_history_bytes = 300
+        assistant = self.pool.get('a', 'cborg')
+        assistant.conversation_history = [
+            {'role': 'user', 'content': 'x' * 100},
+            {'role': 'assistant', 'content': '', 'tool_calls': [{'id': '1'}]},
+            {'role': 'tool', 'content': 'y' * 100, 'tool_call_id': '1'},
+            {'role': 'assistant', 'content': 'done'},
+            {'role': 'user', 'content': 'second'},
+            {'role': 'assistant', 'content': 'reply'},
+        ]
+
+        removed = self.pool.trim_history(assistant)
+
+        self.assertEqual(removed, 4)
+        self.assertEqual(assistant.conversation_history[0], {'role': 'user', 'content': 'second'})
+
+    def test_trim_history_keeps_current_turn(self):
+        """Test that the turn in progress is never dropped"""
+        self.pool.max_history_bytes = 10
+        assistant = self.pool.get('a', 'cborg')
+        assistant.conversation_history = [
+            {'role': 'user', 'content': 'x' * 100},
+            {'role': 'assistant', 'content': 'y' * 100},
+        ]
+        self.assertEqual(self.pool.trim_history(assistant), 0)
+        self.assertEqual(len(assistant.conversation_history), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import stat
+import tempfile
+import unittest
+
+from omni_core.atomicfile import atomic_open, atomic_write
+from tools.diffeditortool import DiffEditorTool
+from tools.fileedittool import FileEditTool
+
+
+class TestAtomicWrite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'main.py')
+        with open(self.path, 'w') as file:
+            file.write('a = 1\nb = 2\n')
+        os.chmod(self.path, 0o640)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, path=None):
+        with open(path or self.path) as file:
+            return file.read()
+
+    def test_replaces_file_and_keeps_mode(self):
+        """Test that the file is replaced, keeps its mode, and follows symlinks"""
+        link = os.path.join(self.tmp.name, 'link.py')
+        os.symlink(self.path, link)
+        atomic_write(link, 'a = 3\n')
+        self.assertEqual(self.read(), 'a = 3\n')
+        self.assertTrue(os.path.islink(link))
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o640)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['link.py', 'main.py'])
+
+    def test_failed_write_leaves_original(self):
+        """Test that an error while writing leaves the file untouched"""
+        with self.assertRaises(RuntimeError):
+            with atomic_open(self.path) as file:
+                file.write('partial')
+                raise RuntimeError('interrupted')
+        self.assertEqual(self.read(), 'a = 1\nb = 2\n')
+        self.assertEqual(os.listdir(self.tmp.name), ['main.py'])
+
+    def test_edit_tools_return_diffs(self):
+        """Test that the edit tools report a diff instead of the file contents"""
+        result = DiffEditorTool()._execute(path=self.path, old_text='b = 2', new_text='b = 3', context_lines=0)
+        self.assertEqual(result, f'Successfully replaced text in {self.path}:\n--- a/{self.path}\n+++ b/{self.path}\n'
+                                 '@@ -2 +2 @@\n-b = 2\n+b = 3\n')
+        result = FileEditTool()._execute(file_path=self.path, edit_type='partial', new_content='',
+                                         search_pattern='a = (\\d)', replacement_text='a = \\1 + 1')
+        self.assertTrue(result.endswith('-a = 1\n+a = 1 + 1\n b = 3\n'))
+        result = FileEditTool()._execute(file_path=self.path, edit_type='full', new_content=self.read())
+        self.assertEqual(result, f'No changes made to {self.path}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,10 @@
 import unittest
 import asyncio
+import threading
 from typing import Dict, Any
 from unittest.mock import Mock, patch
 
-from tools.base import BaseTool, ProviderContext
+from tools.base import BaseTool, ProviderContext, call_cancelled, unwrap_result
 
 # Test data
 VALID_OLLAMA_CONTEXT = {
@@ -167,5 +168,114 @@ class TestBaseTool(unittest.TestCase):
         """Test validation of provider capabilities"""
         self.assertTrue(self.mock_tool_with_ollama.validate_provider_capabilities())
 
+class SlowTool(BaseTool):
+    """Synchronous tool that blocks for the given number of seconds"""
+    name = "slow_tool"
+    description = "Sleeps"
+    input_schema = {"type": "object", "properties": {"seconds": {"type": "number"}}}
+    timeout = 0.2
+
+    def _execute(self, seconds=0, **kwargs) -> str:
+        import time
+        time.sleep(seconds)
+        return f"slept {seconds}"
+
+
+class PollingTool(BaseTool):
+    """Synchronous tool that stops when its call is abandoned"""
+    name = "polling_tool"
+    description = "Polls"
+    input_schema = {"type": "object", "properties": {}}
+    timeout = 0.1
+
+    def __init__(self):
+        super().__init__()
+        self.stopped = threading.Event()
+
+    def _execute(self, **kwargs) -> str:
+        import time
+        while not call_cancelled():
+            time.sleep(0.01)
+        self.stopped.set()
+        return "stopped"
+
+
+class NativeTool(BaseTool):
+    """Tool with a native coroutine implementation"""
+    name = "native_tool"
+    description = "Awaits"
+    input_schema = {"type": "object", "properties": {}}
+
+    def _execute(self, **kwargs) -> str:
+        raise AssertionError("aexecute should use _aexecute")
+
+    async def _aexecute(self, **kwargs) -> str:
+        await asyncio.sleep(0)
+        return "native"
+
+
+class TestAsyncExecution(unittest.IsolatedAsyncioTestCase):
+    async def test_sync_tools_run_in_a_thread(self):
+        """Test that synchronous tools do not block the event loop"""
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await SlowTool().aexecute(seconds=0.1)
+        task.cancel()
+
+        self.assertEqual(result["response"], "slept 0.1")
+        self.assertGreater(ticks, 3)
+
+    async def test_native_coroutine(self):
+        """Test that tools overriding _aexecute run on the loop"""
+        result = await NativeTool().aexecute()
+        self.assertEqual(result["response"], "native")
+        self.assertFalse(result["metadata"]["timed_out"])
+
+    async def test_deadline(self):
+        """Test that a tool running past its timeout returns an error"""
+        result = await SlowTool().aexecute(seconds=1)
+        self.assertTrue(result["error"])
+        self.assertIn("timed out after 0.2 seconds", result["response"])
+        self.assertTrue(result["metadata"]["timed_out"])
+        self.assertLess(result["metadata"]["elapsed_ms"], 900)
+
+    async def test_abandoned_sync_tool_is_told_to_stop(self):
+        """Test that a timed-out synchronous tool sees call_cancelled()"""
+        tool = PollingTool()
+        result = await tool.aexecute()
+        self.assertIn("abandoned and may still finish", result["response"])
+        self.assertTrue(await asyncio.to_thread(tool.stopped.wait, 1))
+        self.assertFalse(call_cancelled())
+
+    async def test_cborg_format_errors(self):
+        """Test that timeouts use the provider's response format"""
+        tool = SlowTool(provider_context=ProviderContext(**VALID_CBORG_CONTEXT))
+        result = await tool.aexecute(seconds=1)
+        message = result["choices"][0]["message"]
+        self.assertTrue(message["error"])
+        self.assertIn("timed out", message["content"])
+
+    def test_timing_metadata_on_sync_execute(self):
+        """Test that synchronous results carry timing metadata"""
+        result = SlowTool().execute(seconds=0)
+        self.assertEqual(result["metadata"]["tool"], "slow_tool")
+        self.assertGreaterEqual(result["metadata"]["elapsed_ms"], 0)
+
+    def test_unwrap_result(self):
+        """Test that results of both provider formats unwrap to text"""
+        self.assertEqual(unwrap_result(SlowTool().execute(seconds=0)), ("slept 0", False))
+        cborg = SlowTool(provider_context=ProviderContext(**VALID_CBORG_CONTEXT))
+        text, failed = unwrap_result(cborg.execute(seconds="x"))
+        self.assertTrue(failed)
+        self.assertIn("Tool execution failed", text)
+
+
 if __name__ == '__main__':
     unittest.main()
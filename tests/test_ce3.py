@@ -1,9 +1,14 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock
 from ce3 import Assistant
 from tools.base import BaseTool, ProviderContext
+from tool_registry import ToolRegistry
+from omni_core.runner import run_sync
+import asyncio
+import time
 import types
 import os
+import tempfile
 from ce3 import Config
 
 class TestChatEngine(unittest.TestCase):
@@ -34,11 +39,12 @@ class TestChatEngine(unittest.TestCase):
         mock_module.MockTool = MockTool
         mock_module.__name__ = 'mock_module'
 
-        # Create empty tools list
-        tools = []
+        # Create empty tool registry
+        registry = ToolRegistry()
         
         # Extract the mock tool
-        self.engine._extract_tools_from_module(mock_module, tools)
+        self.engine._extract_tools_from_module(mock_module, registry)
+        tools = registry.specs
 
         # Verify tool formatting
         self.assertEqual(len(tools), 1)
@@ -81,8 +87,9 @@ class TestChatEngine(unittest.TestCase):
             input_schema = {"type": "object", "properties": {}}
             def _execute(self, **kwargs): return {}
 
-        tools = []
-        self.engine._extract_tools_from_module(create_mock_module(EmptyNameTool), tools)
+        registry = ToolRegistry()
+        self.engine._extract_tools_from_module(create_mock_module(EmptyNameTool), registry)
+        tools = registry.specs
         self.assertEqual(len(tools), 0, "Tool with empty name should be skipped")
 
         # Test invalid name characters
@@ -92,8 +99,9 @@ class TestChatEngine(unittest.TestCase):
             input_schema = {"type": "object", "properties": {}}
             def _execute(self, **kwargs): return {}
 
-        tools = []
-        self.engine._extract_tools_from_module(create_mock_module(InvalidNameTool), tools)
+        registry = ToolRegistry()
+        self.engine._extract_tools_from_module(create_mock_module(InvalidNameTool), registry)
+        tools = registry.specs
         self.assertEqual(len(tools), 0, "Tool with invalid name characters should be skipped")
 
         # Test empty description
@@ -103,8 +111,9 @@ class TestChatEngine(unittest.TestCase):
             input_schema = {"type": "object", "properties": {}}
             def _execute(self, **kwargs): return {}
 
-        tools = []
-        self.engine._extract_tools_from_module(create_mock_module(EmptyDescriptionTool), tools)
+        registry = ToolRegistry()
+        self.engine._extract_tools_from_module(create_mock_module(EmptyDescriptionTool), registry)
+        tools = registry.specs
         self.assertEqual(len(tools), 0, "Tool with empty description should be skipped")
 
         # Test valid tool
@@ -114,11 +123,141 @@ class TestChatEngine(unittest.TestCase):
             input_schema = {"type": "object", "properties": {}}
             def _execute(self, **kwargs): return {}
 
-        tools = []
-        self.engine._extract_tools_from_module(create_mock_module(ValidTool), tools)
+        registry = ToolRegistry()
+        self.engine._extract_tools_from_module(create_mock_module(ValidTool), registry)
+        tools = registry.specs
         self.assertEqual(len(tools), 1, "Valid tool should be added")
         self.assertEqual(tools[0]['toolSpec']['name'], "valid-name_123")
 
+    def test_execute_tool_uses_registry(self):
+        """Test that tool calls are dispatched by name and timed"""
+        class MockTool(BaseTool):
+            name = "mock_tool"
+            description = "A mock tool for testing"
+            input_schema = {"type": "object", "properties": {}}
+            def _execute(self, **kwargs):
+                return f"ran with {kwargs['value']}"
+
+        registry = ToolRegistry()
+        registry.register(MockTool(), {'function': {'name': 'mock_tool'}})
+        self.engine.set_tool_registry(registry)
+
+        tool_use = types.SimpleNamespace(name='mock_tool', input={'value': 1})
+        with patch('ce3.importlib.import_module') as mock_import:
+            self.engine._execute_tool(tool_use)
+            missing = self.engine._execute_tool(types.SimpleNamespace(name='missing', input={}))
+        mock_import.assert_not_called()
+
+        self.assertEqual(missing, "Tool missing not found")
+        self.assertEqual(registry.stats()['mock_tool']['calls'], 1)
+
+    def test_shared_tools_use_the_session_provider_context(self):
+        """Test that a tool from a shared registry runs with the calling session's context"""
+        class MockTool(BaseTool):
+            name = "mock_tool"
+            description = "A mock tool for testing"
+            input_schema = {"type": "object", "properties": {}}
+            def _execute(self, **kwargs):
+                return "ran"
+
+        shared = MockTool(provider_context=self.engine.provider_context)
+        registry = ToolRegistry()
+        registry.register(shared, {'function': {'name': 'mock_tool'}})
+        self.engine.set_tool_registry(registry)
+        other = Assistant(provider='cborg', registry=registry)
+        other.provider_context = ProviderContext(provider_type='ollama')
+
+        tool_instance, _ = other._lookup_tool('mock_tool')
+        self.assertIs(tool_instance.provider_context, other.provider_context)
+        self.assertIs(shared.provider_context, self.engine.provider_context)
+        self.assertIs(self.engine._lookup_tool('mock_tool')[0], shared)
+
+    def test_stuck_tool_times_out(self):
+        """Test that a tool running past its deadline does not stall the chat"""
+        class StuckTool(BaseTool):
+            name = "stuck_tool"
+            description = "Never finishes in time"
+            input_schema = {"type": "object", "properties": {}}
+            timeout = 0.1
+            def _execute(self, **kwargs):
+                time.sleep(0.5)
+                return "too late"
+
+        registry = ToolRegistry()
+        registry.register(StuckTool(), {'function': {'name': 'stuck_tool'}})
+        self.engine.set_tool_registry(registry)
+
+        result = run_sync(self.engine._aexecute_tool(types.SimpleNamespace(name='stuck_tool', input={})))
+
+        self.assertIn('timed out', result)
+        self.assertEqual(registry.stats()['stuck_tool']['errors'], 1)
+
+    def test_load_tools_uses_manifest(self):
+        """Test that a warm manifest advertises tools without importing them"""
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             patch.object(Config, 'TOOLS_MANIFEST', os.path.join(tmpdir, 'manifest.json')), \
+             patch('builtins.input', return_value='n'):
+            cold = self.engine._load_tools()
+            with patch.object(self.engine, '_import_tool_module', return_value=None) as mock_import:
+                warm = self.engine._load_tools()
+
+        self.assertEqual(warm.names(), cold.names())
+        self.assertEqual(warm.specs, cold.specs)
+        # Only modules that failed to import are retried
+        for call in mock_import.call_args_list:
+            self.assertNotIn(call[0][0], ('filecreatortool', 'fileedittool'))
+        self.assertFalse(warm.is_loaded('filecreatortool'))
+        self.assertIsNotNone(warm.get('filecreatortool'))
+
+    def test_refresh_reloads_only_changed_modules(self):
+        """Test that refresh reimports only added or modified tool modules"""
+        import sys
+        import tools
+
+        tool_source = (
+            "from tools.base import BaseTool\n"
+            "class {cls}(BaseTool):\n"
+            "    name = '{name}'\n"
+            "    description = '{description}'\n"
+            "    input_schema = {{}}\n"
+            "    def _execute(self, **kwargs):\n"
+            "        return '{name}'\n"
+        )
+
+        def write_tool(directory, name, description='A test tool'):
+            with open(os.path.join(directory, f'{name}.py'), 'w') as f:
+                f.write(tool_source.format(cls=name.title() + 'Tool', name=name, description=description))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_tool(tmpdir, 'reloadalpha')
+            write_tool(tmpdir, 'reloadbeta')
+            try:
+                with patch.object(Config, 'TOOLS_DIR', tmpdir), \
+                     patch.object(Config, 'TOOLS_MANIFEST', os.path.join(tmpdir, 'manifest.json')), \
+                     patch.object(tools, '__path__', list(tools.__path__) + [tmpdir]):
+                    first = self.engine._load_tools()
+                    alpha = first.get('reloadalpha')
+
+                    write_tool(tmpdir, 'reloadbeta', 'An edited test tool')
+                    write_tool(tmpdir, 'reloadgamma')
+                    second = self.engine._load_tools(previous=first)
+                    report = self.engine.last_reload
+
+                    self.assertEqual(report.added, ['reloadgamma'])
+                    self.assertEqual(report.modified, ['reloadbeta'])
+                    self.assertEqual(report.removed, [])
+                    self.assertIs(second.get('reloadalpha'), alpha)
+                    self.assertEqual(second.description('reloadbeta'), 'An edited test tool')
+
+                    os.remove(os.path.join(tmpdir, 'reloadgamma.py'))
+                    self.engine._load_tools(previous=second)
+                    self.assertEqual(self.engine.last_reload.removed, ['reloadgamma'])
+                    self.assertFalse(self.engine.last_reload.modified)
+                    self.assertNotIn('tools.reloadgamma', sys.modules)
+            finally:
+                for name in ('reloadalpha', 'reloadbeta', 'reloadgamma'):
+                    sys.modules.pop(f'tools.{name}', None)
+
     def test_anthropic_provider_initialization(self):
         """Test initializing the assistant with Anthropic provider"""
         # Set up environment
@@ -147,13 +286,12 @@ class TestChatEngine(unittest.TestCase):
         os.environ['ANTHROPIC_API_KEY'] = 'test_key'
         assistant = Assistant(provider='anthropic')
         
-        # Mock the requests.post call
-        with patch('requests.post') as mock_post:
-            mock_response = MagicMock()
-            mock_response.json.return_value = {
-                'content': [{'type': 'text', 'text': 'Test response'}]
+        # Mock the omni_core provider call
+        with patch('ce3.AnthropicProvider.chat_completion', new_callable=AsyncMock) as mock_completion:
+            mock_completion.return_value = {
+                'choices': [{'message': {'role': 'assistant', 'content': 'Test response'}}],
+                'usage': {'input_tokens': 10, 'output_tokens': 5}
             }
-            mock_post.return_value = mock_response
             
             # Add a test message
             assistant.conversation_history.append({
@@ -165,22 +303,208 @@ class TestChatEngine(unittest.TestCase):
             response = assistant._get_completion()
             
             # Verify the request
-            mock_post.assert_called_once()
-            args, kwargs = mock_post.call_args
+            mock_completion.assert_awaited_once()
+            args, kwargs = mock_completion.call_args
             
-            # Check URL
-            self.assertEqual(args[0], 'https://api.anthropic.com/v1/messages')
+            # Check messages
+            messages = args[0]
+            self.assertEqual(messages[0]['role'], 'system')
+            self.assertEqual(messages[-1], {'role': 'user', 'content': 'Test message'})
             
-            # Check headers
-            self.assertEqual(kwargs['headers']['anthropic-version'], '2023-06-01')
-            self.assertEqual(kwargs['headers']['x-api-key'], 'test_key')
-            
-            # Check request body
-            self.assertEqual(kwargs['json']['model'], Config.PROVIDER_MODELS['anthropic'])
-            self.assertEqual(kwargs['json']['temperature'], assistant.temperature)
-            self.assertEqual(kwargs['json']['tool_choice'], 'auto')
-            self.assertTrue('tools' in kwargs['json'])
-            self.assertTrue('messages' in kwargs['json'])
+            # Check request parameters
+            self.assertEqual(kwargs['model'], Config.PROVIDER_MODELS['anthropic'])
+            self.assertEqual(kwargs['temperature'], assistant.temperature)
+            self.assertEqual(kwargs['tool_choice'], 'auto')
+            self.assertTrue('tools' in kwargs)
+        
+        self.assertEqual(response, 'Test response')
+        self.assertEqual(assistant.total_tokens_used, 15)
+        self.assertEqual(assistant.conversation_history[-1]['content'], 'Test response')
+
+    def test_cborg_completion_runs_tools_until_answer(self):
+        """Test that tool rounds are handled in a loop on the async core"""
+        responses = [
+            {'choices': [{'message': {'content': '', 'tool_calls': [
+                {'id': 'call_1', 'type': 'function', 'function': {'name': 'mock_tool', 'arguments': '{"path": "x"}'}}
+            ]}}], 'usage': {'total_tokens': 10}},
+            {'choices': [{'message': {'content': 'Done'}}], 'usage': {'total_tokens': 5}}
+        ]
+
+        with patch('ce3.cborg.chat_completion', new_callable=AsyncMock, side_effect=responses) as mock_completion, \
+             patch.object(self.engine, '_aexecute_tool', new_callable=AsyncMock, return_value='tool output') as mock_execute:
+            response = self.engine.chat('hello')
+
+        self.assertEqual(response, 'Done')
+        self.assertEqual(mock_completion.await_count, 2)
+        self.assertEqual(mock_execute.call_args[0][0].input, {'path': 'x'})
+        self.assertEqual(self.engine.total_tokens_used, 15)
+
+        # The follow-up request carries the tool result for the requesting call
+        follow_up = mock_completion.call_args_list[1][0][0]
+        self.assertEqual(follow_up[-1]['role'], 'tool')
+        self.assertEqual(follow_up[-1]['tool_call_id'], 'call_1')
+        self.assertEqual(follow_up[-2]['tool_calls'][0]['id'], 'call_1')
+
+    @patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test_key'})
+    def test_anthropic_completion_runs_tools_until_answer(self):
+        """Test that Anthropic tool calls are executed and their results sent back"""
+        assistant = Assistant(provider='anthropic')
+        responses = [
+            {'choices': [{'message': {'content': 'Let me check.', 'tool_calls': [
+                {'id': 'toolu_1', 'type': 'function', 'function': {'name': 'mock_tool', 'arguments': '{"path": "x"}'}}
+            ]}}], 'usage': {'input_tokens': 10, 'output_tokens': 5}},
+            {'choices': [{'message': {'content': 'Done'}}], 'usage': {'input_tokens': 20, 'output_tokens': 2}}
+        ]
+
+        with patch('ce3.AnthropicProvider.chat_completion', new_callable=AsyncMock, side_effect=responses) as mock_completion, \
+             patch.object(assistant, '_aexecute_tool', new_callable=AsyncMock, return_value='tool output') as mock_execute:
+            response = assistant.chat('hello')
+
+        self.assertEqual(response, 'Done')
+        self.assertEqual(mock_execute.call_args[0][0].input, {'path': 'x'})
+        follow_up = mock_completion.call_args_list[1][0][0]
+        self.assertEqual(follow_up[-2]['tool_calls'][0]['id'], 'toolu_1')
+        self.assertEqual(follow_up[-1]['role'], 'tool')
+        self.assertEqual(follow_up[-1]['tool_call_id'], 'toolu_1')
+
+    def test_read_only_tool_calls_run_concurrently(self):
+        """Test that independent tool calls share one round and keep their order"""
+        responses = [
+            {'choices': [{'message': {'content': '', 'tool_calls': [
+                {'id': 'call_1', 'type': 'function', 'function': {'name': 'mock_tool', 'arguments': '{"path": "a"}'}},
+                {'id': 'call_2', 'type': 'function', 'function': {'name': 'mock_tool', 'arguments': '{"path": "b"}'}}
+            ]}}]},
+            {'choices': [{'message': {'content': 'Done'}}]}
+        ]
+        started = []
+
+        async def execute(tool_use):
+            started.append(tool_use.input['path'])
+            await asyncio.sleep(0.05)
+            # Both calls have started before either finishes
+            return f"read {tool_use.input['path']} with {len(started)} started"
+
+        with patch('ce3.cborg.chat_completion', new_callable=AsyncMock, side_effect=responses) as mock_completion, \
+             patch.object(self.engine, '_is_read_only_tool', return_value=True), \
+             patch.object(self.engine, '_aexecute_tool', side_effect=execute):
+            response = self.engine.chat('hello')
+
+        self.assertEqual(response, 'Done')
+        self.assertEqual(mock_completion.await_count, 2)
+        follow_up = mock_completion.call_args_list[1][0][0]
+        self.assertEqual(
+            [(m['tool_call_id'], m['content']) for m in follow_up if m['role'] == 'tool'],
+            [('call_1', 'read a with 2 started'), ('call_2', 'read b with 2 started')]
+        )
+
+    def test_tool_rounds_are_bounded(self):
+        """Test that a model which keeps calling tools is stopped"""
+        tool_response = {'choices': [{'message': {'content': '', 'tool_calls': [
+            {'id': 'call_1', 'type': 'function', 'function': {'name': 'mock_tool', 'arguments': '{}'}}
+        ]}}]}
+        self.engine.max_tool_rounds = 3
+
+        with patch('ce3.cborg.chat_completion', new_callable=AsyncMock, return_value=tool_response) as mock_completion, \
+             patch.object(self.engine, '_aexecute_tool', new_callable=AsyncMock, return_value='tool output'):
+            response = self.engine.chat('hello')
+
+        self.assertEqual(mock_completion.await_count, 3)
+        self.assertIn('Stopped after 3 rounds', response)
+
+    def test_long_history_is_sent_within_context_budget(self):
+        """Test that old turns are left out of requests once over budget"""
+        for i in range(50):
+            self.engine.conversation_history.append({'role': 'user', 'content': f'question {i} ' + 'x' * 2000})
+            self.engine.conversation_history.append({'role': 'assistant', 'content': f'answer {i} ' + 'y' * 2000})
+        self.engine.context.budget_tokens = 15000
+        response = {'choices': [{'message': {'content': 'Done'}}]}
+
+        with patch('ce3.cborg.chat_completion', new_callable=AsyncMock, return_value=response) as mock_completion:
+            self.engine.chat('hello')
+
+        sent = mock_completion.call_args[0][0]
+        self.assertLess(len(sent), len(self.engine.conversation_history))
+        self.assertEqual(sent[0]['role'], 'system')
+        self.assertTrue(sent[1]['content'].startswith('question 0'))
+        self.assertEqual(sent[-1]['content'], 'hello')
+
+    def test_cborg_streaming_with_tool_call(self):
+        """Test that streamed CBORG tokens and tool call deltas are handled"""
+        first_round = [
+            {'choices': [{'delta': {'content': 'Let me '}}]},
+            {'choices': [{'delta': {'content': 'check.'}}]},
+            {'choices': [{'delta': {'tool_calls': [{'index': 0, 'id': 'call_1', 'function': {'name': 'mock_tool', 'arguments': '{"pa'}}]}}]},
+            {'choices': [{'delta': {'tool_calls': [{'index': 0, 'function': {'arguments': 'th": "x"}'}}]}}]},
+        ]
+        second_round = [
+            {'choices': [{'delta': {'content': 'Done'}}]},
+            {'choices': [], 'usage': {'total_tokens': 42}},
+        ]
+        rounds = iter([first_round, second_round])
+        requests = []
+
+        async def fake_stream(messages, **kwargs):
+            requests.append(kwargs)
+            for chunk in next(rounds):
+                yield chunk
+
+        with patch('ce3.cborg.stream_chat_completion', side_effect=fake_stream), \
+             patch.object(self.engine, '_aexecute_tool', new_callable=AsyncMock, return_value='tool output') as mock_execute:
+            events = list(self.engine.chat_stream('hello'))
+
+        tokens = [e['content'] for e in events if e['type'] == 'token']
+        self.assertEqual(tokens, ['Let me ', 'check.', 'Done'])
+        self.assertIn({'type': 'tool', 'name': 'mock_tool'}, events)
+        self.assertEqual(events[-1]['type'], 'usage')
+        self.assertEqual(events[-1]['total_tokens'], 42)
+
+        tool_use = mock_execute.call_args[0][0]
+        self.assertEqual(tool_use.name, 'mock_tool')
+        self.assertEqual(tool_use.input, {'path': 'x'})
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[0]['tool_choice'], 'auto')
+
+        roles = [m['role'] for m in self.engine.conversation_history]
+        self.assertEqual(roles, ['user', 'assistant', 'tool', 'assistant'])
+        self.assertEqual(self.engine.conversation_history[-1]['content'], 'Done')
+
+    @patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test_key'})
+    def test_anthropic_streaming_with_tool_call(self):
+        """Test that streamed Anthropic tool_use blocks are executed"""
+        assistant = Assistant(provider='anthropic')
+        first_round = [
+            {'type': 'message_start', 'message': {'usage': {'input_tokens': 10}}},
+            {'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}},
+            {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': 'Let me check.'}},
+            {'type': 'content_block_start', 'index': 1, 'content_block': {'type': 'tool_use', 'id': 'toolu_1', 'name': 'mock_tool', 'input': {}}},
+            {'type': 'content_block_delta', 'index': 1, 'delta': {'type': 'input_json_delta', 'partial_json': '{"pa'}},
+            {'type': 'content_block_delta', 'index': 1, 'delta': {'type': 'input_json_delta', 'partial_json': 'th": "x"}'}},
+            {'type': 'message_delta', 'usage': {'output_tokens': 5}},
+        ]
+        second_round = [
+            {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': 'Done'}},
+        ]
+        rounds = iter([first_round, second_round])
+        requests = []
+
+        async def fake_stream(provider, messages, **kwargs):
+            requests.append((messages, kwargs))
+            for event in next(rounds):
+                yield event
+
+        with patch('ce3.AnthropicProvider.stream_chat_completion', new=fake_stream), \
+             patch.object(assistant, '_aexecute_tool', new_callable=AsyncMock, return_value='tool output') as mock_execute:
+            events = list(assistant.chat_stream('hello'))
+
+        tokens = [e['content'] for e in events if e['type'] == 'token']
+        self.assertEqual(tokens, ['Let me check.', 'Done'])
+        self.assertIn({'type': 'tool', 'name': 'mock_tool'}, events)
+        self.assertEqual(mock_execute.call_args[0][0].input, {'path': 'x'})
+        self.assertEqual(requests[0][1]['tool_choice'], 'auto')
+        self.assertIn('tools', requests[0][1])
+        follow_up = requests[1][0]
+        self.assertEqual(follow_up[-2]['tool_calls'][0]['id'], 'toolu_1')
+        self.assertEqual(follow_up[-1]['tool_call_id'], 'toolu_1')
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from tools.codesearchtool import CodeSearchTool
+
+
+class TestCodeSearchTool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'repo')
+        self.tool = CodeSearchTool()
+        self.tool.INDEX_DIR = os.path.join(self.tmp.name, 'index')
+        for path, data in {
+            'src/app.py': 'import os\n\nclass App:\n    pass\n',
+            'node_modules/lib.js': 'class App {}\n',
+        }.items():
+            full = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, 'w') as file:
+                file.write(data)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_search_output(self):
+        """Test that hits are listed with context and ignored directories are skipped"""
+        result = self.tool._execute(pattern='class App', path=self.root, context_lines=1)
+        path = os.path.join(self.root, 'src', 'app.py')
+        self.assertEqual(result, f'1 matches in 1 files (1 files indexed)\n{path}-2- \n{path}:3: class App:\n{path}-4-     pass')
+
+    def test_errors(self):
+        """Test that bad input is reported instead of raised"""
+        self.assertIn('No matches', self.tool._execute(pattern='missing', path=self.root))
+        self.assertTrue(self.tool._execute(pattern='(', path=self.root, regex=True).startswith('Error: Invalid regular expression'))
+        self.assertTrue(self.tool._execute(pattern='x', path=os.path.join(self.root, 'nope')).startswith('Error'))
+
+
+if __name__ == '__main__':
+    unittest.main()
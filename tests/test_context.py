@@ -0,0 +1,168 @@
+import asyncio
+import unittest
+
+from omni_core.context import (
+    ContextManager,
+    ContextPolicy,
+    SlidingWindowPolicy,
+    SummaryPolicy,
+    ToolResultElisionPolicy,
+    estimate_tokens,
+    split_turns,
+)
+
+
+def make_history(turns, size=400):
+    """Build a history of user/assistant turns with ~size/4 tokens per message"""
+    history = [{'role': 'system', 'content': 'You are helpful.'}]
+    for i in range(turns):
+        history.append({'role': 'user', 'content': f"question {i} " + 'x' * size})
+        history.append({'role': 'assistant', 'content': f"answer {i} " + 'y' * size})
+    return history
+
+
+class TestContextManager(unittest.TestCase):
+    def test_estimate_tokens(self):
+        """Test that estimates grow with content and count images flat"""
+        short = estimate_tokens({'role': 'user', 'content': 'hi'})
+        long = estimate_tokens({'role': 'user', 'content': 'x' * 400})
+        self.assertLess(short, long)
+        self.assertEqual(long, 104)
+        image = estimate_tokens({'role': 'user', 'content': [{'type': 'image', 'source': {}}]})
+        self.assertGreaterEqual(image, 1000)
+
+    def test_estimates_are_cached_per_message(self):
+        """Test that a message is only estimated once while it is in the history"""
+        manager = ContextManager(10000)
+        message = {'role': 'user', 'content': 'x' * 400}
+        self.assertEqual(manager.count(message), 104)
+        message['content'] = ''
+        self.assertEqual(manager.count(message), 104)
+
+        manager.assemble([])
+        self.assertEqual(manager.count(message), estimate_tokens(message))
+
+    def test_history_within_budget_is_unchanged(self):
+        """Test that nothing is dropped while the history fits"""
+        history = make_history(3)
+        manager = ContextManager(10000)
+        self.assertEqual(manager.assemble(history), history)
+
+    def test_sliding_window_keeps_pinned_and_recent_turns(self):
+        """Test that old turns are dropped but the system prompt and goal stay"""
+        history = make_history(20)
+        manager = ContextManager(1000, [SlidingWindowPolicy()])
+        messages = manager.assemble(history)
+
+        self.assertLessEqual(manager.last_tokens, 1000)
+        self.assertIs(messages[0], history[0])
+        self.assertIs(messages[1], history[1])  # The first user message
+        self.assertIs(messages[-1], history[-1])
+        self.assertLess(len(messages), len(history))
+        # Every kept turn starts with its user message
+        _, turns = split_turns(messages[2:])
+        self.assertTrue(all(turn[0]['role'] == 'user' for turn in turns))
+
+    def test_request_size_is_constant(self):
+        """Test that a growing history keeps the request within the budget"""
+        manager = ContextManager(2000)
+        sizes = [len(manager.assemble(make_history(turns))) for turns in (40, 80, 160)]
+        self.assertEqual(len(set(sizes)), 1)
+
+    def test_reserve_tokens_reduce_the_budget(self):
+        """Test that tokens used outside the history are reserved"""
+        history = make_history(10)
+        manager = ContextManager(3000)
+        full = manager.assemble(history)
+        reduced = manager.assemble(history, reserve_tokens=2000)
+        self.assertLess(len(reduced), len(full))
+
+    def test_current_turn_is_always_sent(self):
+        """Test that the current turn is kept even when it alone is over budget"""
+        history = make_history(2, size=4000)
+        manager = ContextManager(100)
+        messages = manager.assemble(history)
+        self.assertIs(messages[-1], history[-1])
+        self.assertIs(messages[-2], history[-2])
+
+    def test_tool_results_are_elided_before_turns_are_dropped(self):
+        """Test that large tool results of earlier turns are replaced with a stub"""
+        history = [
+            {'role': 'user', 'content': 'read the file'},
+            {'role': 'assistant', 'content': '', 'tool_calls': [{'id': 'call_1'}]},
+            {'role': 'tool', 'content': 'z' * 8000, 'tool_call_id': 'call_1'},
+            {'role': 'assistant', 'content': 'It is long.'},
+            {'role': 'user', 'content': 'thanks'},
+        ]
+        manager = ContextManager(500)
+        messages = manager.assemble(history)
+
+        self.assertEqual(len(messages), len(history))
+        self.assertIn('elided', messages[2]['content'])
+        self.assertEqual(messages[2]['tool_call_id'], 'call_1')
+        self.assertEqual(len(history[2]['content']), 8000)
+
+    def test_recent_tool_results_are_kept(self):
+        """Test that tool results of the current turn are not elided"""
+        policy = ToolResultElisionPolicy()
+        history = [
+            {'role': 'user', 'content': 'read the file'},
+            {'role': 'tool', 'content': 'z' * 8000, 'tool_call_id': 'call_1'},
+        ]
+        messages = policy.apply(history, ContextManager(100))
+        self.assertIs(messages[1], history[1])
+
+    def test_incomplete_policy_cannot_be_created(self):
+        """Test that a policy without apply fails when it is created"""
+        class Incomplete(ContextPolicy):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class TestSummaryPolicy(unittest.TestCase):
+    def test_dropped_turns_are_summarized_in_the_background(self):
+        """Test that dropped turns are replaced by a summary once it is ready"""
+        calls = []
+
+        async def summarize(messages, previous):
+            calls.append((len(messages), previous))
+            return 'The user asked many questions.'
+
+        async def scenario():
+            policy = SummaryPolicy(summarize, max_summary_tokens=100)
+            manager = ContextManager(1500, [policy, SlidingWindowPolicy()])
+            history = make_history(20)
+
+            # The first request goes out without waiting for the summary
+            first = manager.assemble(history)
+            self.assertFalse(any('[Summary' in str(m['content']) for m in first))
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+            second = manager.assemble(history)
+            self.assertLessEqual(manager.last_tokens, 1500)
+            self.assertIs(second[0], history[0])
+            self.assertIs(second[1], history[1])
+            self.assertTrue(second[2]['content'].startswith('[Summary of the earlier conversation]'))
+            self.assertIs(second[-1], history[-1])
+            return len(first), len(second)
+
+        asyncio.run(scenario())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0][1], '')
+
+    def test_summary_is_skipped_without_event_loop(self):
+        """Test that assembling outside an event loop falls back to the window"""
+        async def summarize(messages, previous):
+            raise AssertionError('not called')
+
+        manager = ContextManager(1000, [SummaryPolicy(summarize), SlidingWindowPolicy()])
+        messages = manager.assemble(make_history(20))
+        self.assertLessEqual(manager.last_tokens, 1000)
+        self.assertFalse(any('[Summary' in str(m['content']) for m in messages))
+
+
+if __name__ == '__main__':
+    unittest.main()
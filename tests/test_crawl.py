@@ -0,0 +1,152 @@
+"""Tests for concurrent batch fetching and crawling."""
+
+import asyncio
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from omni_core import crawl as crawl_module
+from omni_core.crawl import BLOCKED, DUPLICATE, ERROR, OK, USER_AGENT, crawl, fingerprint, similarity
+from omni_core.httpcache import HttpCache
+from omni_core.transport import close_transport
+
+ARTICLE = " ".join(f"Sentence {i} describes the configuration option number {i} in detail." for i in range(40))
+
+
+def page(title, body):
+    return web.Response(text=f"<html><head><title>{title}</title></head><body><main>{body}</main></body></html>",
+                        content_type="text/html")
+
+
+@pytest_asyncio.fixture
+async def site():
+    """Serve a small site and record how many requests run at once."""
+    state = {"active": 0, "peak": 0, "agents": set()}
+
+    async def handler(request):
+        state["agents"].add(request.headers.get("User-Agent"))
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.02)
+        state["active"] -= 1
+        name = request.match_info["name"]
+        if name == "index.html":
+            links = "".join(f'<a href="{href}">{href}</a> ' for href in (
+                "a.html", "a.html?utm_source=feed#top", "mirror.html", "private/secret.html",
+                "missing.html", "logo.png", "https://elsewhere.example/", "b.html",
+            ))
+            return page("Index", f"<p>{links}</p>")
+        if name in ("a.html", "mirror.html"):
+            return page(name, f"<p>{ARTICLE}</p>")
+        if name == "b.html":
+            return page("B", '<p>Other page about something else entirely.</p><a href="c.html">c</a>')
+        if name == "c.html":
+            return page("C", "<p>Third level.</p>")
+        if name.startswith("n"):
+            return page(name, f"<p>Unique page {name} with its own words {name * 3}.</p>")
+        raise web.HTTPNotFound()
+
+    async def robots(request):
+        state["agents"].add(request.headers.get("User-Agent"))
+        return web.Response(text="User-agent: *\nDisallow: /private/\n")
+
+    app = web.Application()
+    app.router.add_get("/robots.txt", robots)
+    app.router.add_get("/private/{name}", handler)
+    app.router.add_get("/{name}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    server = web.TCPSite(runner, "127.0.0.1", 0)
+    await server.start()
+    port = server._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", state
+    await runner.cleanup()
+
+
+def test_fingerprint_similarity():
+    """Test that near-identical texts are similar and different ones are not."""
+    original = fingerprint(ARTICLE)
+    assert similarity(original, fingerprint(ARTICLE + " Edited footer.")) >= 0.9
+    assert similarity(original, fingerprint("A different text about other things entirely here.")) < 0.1
+
+
+@pytest.mark.asyncio
+async def test_crawl_depth_robots_and_duplicates(site, tmp_path):
+    """Test a crawl that follows links, skips disallowed pages and reports duplicates once."""
+    base, _ = site
+    async with aiohttp.ClientSession() as session:
+        report = await crawl([f"{base}/index.html"], depth=1, max_pages=20, session=session,
+                             cache=HttpCache(str(tmp_path)))
+    statuses = {result.url.rsplit("/", 1)[-1]: result.status for result in report.pages}
+    assert statuses == {
+        "index.html": OK, "a.html": OK, "mirror.html": DUPLICATE, "secret.html": BLOCKED,
+        "missing.html": ERROR, "b.html": OK,
+    }
+    mirror = next(result for result in report.pages if result.url.endswith("mirror.html"))
+    assert mirror.duplicate_of.endswith("/a.html")
+    assert "404" in next(result.error for result in report.pages if result.url.endswith("missing.html"))
+    assert report.summary().startswith("Fetched 3 pages (0 from cache)")
+    assert "=== " + f"{base}/a.html ===\nTitle: a.html" in report.render()
+
+
+@pytest.mark.asyncio
+async def test_batch_per_host_limit_and_cache(site, tmp_path):
+    """Test that a batch respects the per-host limit and is served from the cache the second time."""
+    base, state = site
+    urls = [f"{base}/n{i}" for i in range(8)] + [f"{base.upper()}/n0"]
+    cache = HttpCache(str(tmp_path))
+    async with aiohttp.ClientSession() as session:
+        first = await crawl(urls, session=session, cache=cache, per_host=2)
+        second = await crawl(urls, session=session, cache=cache, per_host=2)
+    assert state["peak"] == 2
+    assert [result.status for result in first.pages] == [OK] * 8 + [DUPLICATE]
+    assert first.count(OK) == 8 and second.count(OK) == 8
+    assert all(result.from_cache for result in second.pages if result.status == OK)
+
+
+@pytest.mark.asyncio
+async def test_batch_with_bad_urls(site, tmp_path, monkeypatch):
+    """Test that invalid URLs and pages that cannot be extracted fail alone, not the batch."""
+    base, _ = site
+    real_extract = crawl_module.extract_page
+
+    def extract(content, url, *args):
+        if url.endswith("/b.html"):
+            raise RuntimeError("parser crashed")
+        return real_extract(content, url, *args)
+
+    monkeypatch.setattr(crawl_module, "extract_page", extract)
+    urls = [f"{base}/a.html", "http://[::1", f"{base}/b.html", "http://127.0.0.1:99999/", "mailto:someone"]
+    async with aiohttp.ClientSession() as session:
+        report = await crawl(urls, session=session, cache=HttpCache(str(tmp_path)))
+    results = {result.url: result for result in report.pages}
+    assert results[f"{base}/a.html"].status == OK
+    assert results[f"{base}/b.html"].status == ERROR
+    assert "parser crashed" in results[f"{base}/b.html"].error
+    for url in ("http://[::1", "http://127.0.0.1:99999/", "mailto:someone"):
+        assert results[url].status == ERROR and results[url].error.startswith("invalid URL")
+
+    async with aiohttp.ClientSession() as session:
+        report = await crawl(["http://[::1"], session=session, cache=HttpCache(str(tmp_path)))
+    assert [result.status for result in report.pages] == [ERROR]
+
+
+@pytest.mark.asyncio
+async def test_tool_batch(site, tmp_path):
+    """Test the scraper's batch mode, natively and from a synchronous call."""
+    from tools.webscrapertool import WebScraperTool
+
+    base, state = site
+    tool = WebScraperTool()
+    tool.CACHE_DIR = str(tmp_path)
+    result = await asyncio.to_thread(tool._execute, urls=[f"{base}/a.html", f"{base}/b.html"])
+    assert result.startswith("Fetched 2 pages (0 from cache)")
+    assert "Sentence 39" in result and "Other page" in result
+    result = await tool._aexecute(url=f"{base}/b.html", depth=1)
+    assert result.startswith("Fetched 2 pages (1 from cache)")
+    assert "Third level" in result
+    assert state["agents"] == {USER_AGENT}
+    await close_transport()
+    assert WebScraperTool()._execute().startswith("Error")
@@ -0,0 +1,92 @@
+import difflib
+import random
+import unittest
+
+from omni_core.diffs import DIFF_ENGINES, diff_stats, matching_blocks, opcodes, summarize_diff, unified_diff
+
+
+class TestUnifiedDiff(unittest.TestCase):
+    def test_matches_difflib(self):
+        """Test that diffs of whole files match difflib's output"""
+        original = ''.join(f'line {i}\n' for i in range(40))
+        new = original.replace('line 5\n', 'line five\n').replace('line 30\n', '')
+        expected = ''.join(difflib.unified_diff(
+            original.splitlines(keepends=True), new.splitlines(keepends=True), 'a/f.py', 'b/f.py', n=2
+        ))
+        self.assertEqual(unified_diff(original, new, 'f.py', context_lines=2), expected)
+        self.assertEqual(diff_stats(expected), (1, 2))
+        self.assertEqual(unified_diff(original, original, 'f.py'), '')
+
+    def test_window_offset_and_missing_newline(self):
+        """Test line numbers of window diffs and the end-of-file marker"""
+        diff = unified_diff('-- a\nb', '-- a\nc', 'f.py', context_lines=0, start_line=10)
+        self.assertEqual(diff, (
+            '--- a/f.py\n+++ b/f.py\n@@ -11 +11 @@\n'
+            '-b\n\\ No newline at end of file\n+c\n\\ No newline at end of file\n'
+        ))
+        self.assertEqual(diff_stats(unified_diff('-- a\n', '', 'f.py')), (0, 1))
+
+    def test_unknown_algorithm(self):
+        """Test that an unknown engine name is an error"""
+        with self.assertRaises(ValueError):
+            unified_diff('a\n', 'b\n', 'f.py', algorithm='nope')
+
+
+class TestDiffEngines(unittest.TestCase):
+    def apply(self, a, b, algorithm):
+        result = []
+        for tag, i1, i2, j1, j2 in opcodes(a, b, algorithm):
+            if tag == 'equal':
+                self.assertEqual(a[i1:i2], b[j1:j2])
+                result.extend(a[i1:i2])
+            else:
+                result.extend(b[j1:j2])
+        return result
+
+    def test_engines_transform_a_into_b(self):
+        """Test every engine's opcodes on random edits, and that Myers is minimal"""
+        rng = random.Random(7)
+        for _ in range(200):
+            a = [rng.choice('abcdefg') for _ in range(rng.randint(0, 30))]
+            b = list(a)
+            for _ in range(rng.randint(0, 8)):
+                position = rng.randint(0, len(b))
+                if rng.random() < 0.5 and position < len(b):
+                    del b[position]
+                else:
+                    b.insert(position, rng.choice('abcxyz'))
+            for algorithm in DIFF_ENGINES:
+                self.assertEqual(self.apply(a, b, algorithm), b)
+            equal = sum(size for _, _, size in matching_blocks(a, b, 'myers'))
+            longest = sum(block.size for block in difflib.SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks())
+            self.assertGreaterEqual(equal, longest)
+
+    def test_large_file(self):
+        """Test scattered changes in a 100k-line file"""
+        original = [f'line {i}\n' for i in range(100000)]
+        new = list(original)
+        for i in range(0, 100000, 1000):
+            new[i] = 'changed\n'
+        new.insert(50001, 'inserted\n')
+        for algorithm in ('patience', 'myers'):
+            diff = unified_diff(''.join(original), ''.join(new), 'big.py', context_lines=0, algorithm=algorithm)
+            self.assertEqual(diff_stats(diff), (101, 100))
+
+    def test_summarize_diff(self):
+        """Test that hunks beyond the budget are listed instead of shown"""
+        original = ''.join(f'line {i}\n' for i in range(1000))
+        new = original.replace('0\n', 'zero\n')
+        diff = unified_diff(original, new, 'f.py')
+        self.assertEqual(summarize_diff(diff, len(diff.splitlines())), diff)
+        summary = summarize_diff(diff, 30).splitlines()
+        # Headers and three whole hunks of eight lines fit in 30 lines
+        self.assertEqual(len(summary), 26 + 1 + 20 + 1)
+        self.assertEqual(summary[26], '... 97 more hunks not shown (+97 -97)')
+        self.assertEqual(summary[27], '@@ -28,7 +28,7 @@ +1 -1')
+        self.assertEqual(summary[-1], '... and 77 more hunks')
+        cut = summarize_diff(unified_diff(original, '', 'f.py'), 10).splitlines()
+        self.assertEqual(cut[-1], '... 993 more lines of this hunk not shown (+0 -993)')
+
+
+if __name__ == '__main__':
+    unittest.main()
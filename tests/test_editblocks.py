@@ -0,0 +1,86 @@
+import unittest
+
+from omni_core.editblocks import EditBlock, apply_blocks, parse_blocks
+
+
+SOURCE = (
+    'class Cart:\n'
+    '    def add(self, item):\n'
+    '        self.items.append(item)\n'
+    '\n'
+    '    def total(self):\n'
+    '        return sum(self.items)\n'
+)
+
+
+class TestParseBlocks(unittest.TestCase):
+    def test_blocks_are_parsed_without_tags(self):
+        """Test that blocks are extracted, stripped and cleaned of stray tags"""
+        text = (
+            'Here you go:\n'
+            '<SEARCH>\n  a = 1 \n</SEARCH>\n<REPLACE>\na = 2</REPLACE>\n</REPLACE>\n'
+            '<SEARCH>\nb\n</SEARCH>\n<REPLACE>\n\n</REPLACE>\n'
+        )
+        self.assertEqual(parse_blocks(text), [EditBlock('a = 1', 'a = 2'), EditBlock('b', '')])
+
+
+class TestApplyBlocks(unittest.TestCase):
+    def test_exact_blocks_are_applied_in_one_pass(self):
+        """Test that blocks given in any order are applied against the original"""
+        report = apply_blocks(SOURCE, [
+            {'search': 'return sum(self.items)', 'replace': 'return sum(self.items, 0)'},
+            EditBlock('def add(self, item):', 'def add(self, item, count=1):'),
+        ])
+        self.assertEqual(report.content, SOURCE.replace('item):', 'item, count=1):').replace('items)\n', 'items, 0)\n'))
+        self.assertEqual([(result.status, result.start_line, result.end_line) for result in report.results],
+                         [('applied', 6, 6), ('applied', 2, 2)])
+        self.assertEqual(report.failure_summary(), '')
+
+    def test_whitespace_tolerant_match_is_reindented(self):
+        """Test that a block with other indentation matches and keeps the file's"""
+        block = EditBlock(
+            'def total(self):\n    return sum(self.items)',
+            'def total(self):\n    if not self.items:\n        return 0\n    return sum(self.items)',
+        )
+        report = apply_blocks(SOURCE.replace('\n', '\r\n'), [block])
+        self.assertEqual(report.results[0].match, 'whitespace')
+        self.assertEqual((report.results[0].start_line, report.results[0].end_line), (5, 6))
+        self.assertTrue(report.content.endswith(
+            '    def total(self):\r\n'
+            '        if not self.items:\r\n'
+            '            return 0\r\n'
+            '        return sum(self.items)\r\n'
+        ))
+
+    def test_failures_are_reported(self):
+        """Test that ambiguous, missing, empty and overlapping blocks are not applied"""
+        report = apply_blocks(SOURCE, [
+            EditBlock('self.items', 'self.entries'),
+            EditBlock('def remove(self):', ''),
+            EditBlock('', 'x'),
+            EditBlock('def add(self, item):\n        self.items.append(item)', 'def add(self, item):\n        pass'),
+            EditBlock('self.items.append(item)', 'self.items.insert(0, item)'),
+        ])
+        self.assertEqual([result.status for result in report.results],
+                         ['ambiguous', 'not_found', 'empty', 'applied', 'overlap'])
+        self.assertEqual(report.results[0].candidates, [3, 6])
+        self.assertIn('pass', report.content)
+        self.assertNotIn('insert', report.content)
+        summary = report.failure_summary().splitlines()
+        self.assertEqual(summary[0], 'Edit 1 (matches several places (lines 3, 6); include more surrounding lines): self.items')
+        self.assertEqual(summary[-1], 'Edit 5 (overlaps an earlier edit at lines 2-3): self.items.append(item)')
+
+    def test_large_file_with_many_blocks(self):
+        """Test that many blocks on a large file are all applied"""
+        content = ''.join(f'value_{i} = {i}\n' for i in range(20000))
+        blocks = [EditBlock(f'value_{i} = {i}\n', f'value_{i} = {-i}\n') for i in range(0, 20000, 50)]
+        # Blocks spanning three lines are found through the line index
+        blocks += [EditBlock(f'{i} = {i}\nvalue_{i + 1} = {i + 1}\nvalue_', f'{i} = 0\nvalue_') for i in range(25, 20000, 50)]
+        report = apply_blocks(content, blocks)
+        self.assertEqual(len(report.applied), 800)
+        self.assertIn('value_19950 = -19950\nvalue_19951 = 19951\n', report.content)
+        self.assertIn('value_19975 = 0\nvalue_19977 = 19977\n', report.content)
+
+
+if __name__ == '__main__':
+    unittest.main()
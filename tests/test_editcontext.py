@@ -0,0 +1,95 @@
+import unittest
+
+from omni_core import editcontext
+from omni_core.editcontext import module_names, relevant_regions, select_edit_context
+from omni_core.filestore import FileContextStore, content_hash
+
+
+TARGET = (
+    'from shop.models import InventoryItem\n'
+    '\n'
+    'def render_inventory(items):\n'
+    '    return [InventoryItem(item).reserve_stock(1) for item in items]\n'
+)
+MODELS = (
+    'class InventoryItem:\n'
+    '    def __init__(self, name):\n'
+    '        self.name = name\n'
+    '\n'
+    '    def reserve_stock(self, count):\n'
+    '        return count\n'
+    '\n'
+    '    def unrelated_method(self):\n'
+    '        return None\n'
+)
+FILES = {
+    'shop/views.py': TARGET,
+    'shop/models.py': MODELS,
+    'shop/copy_of_models.py': MODELS,
+    'billing/invoice.py': 'def issue_invoice(order):\n    return order\n',
+    'README.md': 'Shop docs\n',
+}
+
+
+class TestEditContext(unittest.TestCase):
+    def test_module_names(self):
+        """Test the dotted names a file can be imported as"""
+        self.assertEqual(module_names('shop/models.py'), {'models', 'shop.models'})
+        self.assertEqual(module_names('pkg/__init__.py'), {'pkg'})
+        self.assertEqual(module_names('README.md'), set())
+
+    def test_only_connected_files_are_included(self):
+        """Test that unrelated files are left out and duplicates are referenced"""
+        context = select_edit_context('shop/views.py', TARGET, 'Add a discount', FILES)
+        self.assertEqual(context.included, ['shop/models.py', 'shop/copy_of_models.py'])
+        self.assertEqual(sorted(context.omitted), ['README.md', 'billing/invoice.py'])
+        self.assertIn('--- shop/models.py ---\nclass InventoryItem:', context.files)
+        self.assertIn('--- shop/copy_of_models.py ---\n(identical to shop/models.py)', context.files)
+
+        # Mentioning a file or one of its names in the instructions connects it
+        context = select_edit_context('shop/views.py', TARGET, 'Call issue_invoice and update README', FILES)
+        self.assertIn('billing/invoice.py', context.included)
+        self.assertIn('README.md', context.included)
+
+    def test_large_files_are_excerpted(self):
+        """Test that a file over its share of the budget keeps only referenced definitions"""
+        self.assertEqual(relevant_regions(MODELS, {'reserve_stock'}), [(1, 1), (5, 6)])
+        self.assertEqual(relevant_regions(MODELS, {'InventoryItem'}), [(1, 9)])
+        files = {'shop/models.py': MODELS + ''.join(f'\ndef filler_{i}():\n    pass\n' for i in range(50))}
+        context = select_edit_context('shop/views.py', TARGET, 'Add a discount', files, max_tokens=300)
+        # The class is used with one of its methods: its header, __init__ and that method
+        self.assertEqual(context.partial, {'shop/models.py': [(1, 3), (5, 6)]})
+        self.assertIn(
+            '--- shop/models.py (excerpt) ---\nclass InventoryItem:\n    def __init__(self, name):\n'
+            '        self.name = name\n... (line 4 omitted)\n'
+            '    def reserve_stock(self, count):\n        return count\n... (lines 7-',
+            context.files
+        )
+        self.assertLessEqual(context.tokens, 300)
+
+    def test_memory_is_filtered(self):
+        """Test that only remembered edits of related files are kept, newest first within budget"""
+        memory = [
+            'Edit Instructions for billing/invoice.py:\nold',
+            'Edit Instructions for shop/models.py:\nmodels',
+            'Edit Instructions for shop/views.py:\nviews',
+        ]
+        context = select_edit_context('shop/views.py', TARGET, 'Add a discount', FILES, memory)
+        self.assertEqual(
+            context.memory,
+            'Memory 1:\nEdit Instructions for shop/models.py:\nmodels\n'
+            'Memory 2:\nEdit Instructions for shop/views.py:\nviews'
+        )
+
+    def test_parses_are_cached_by_content_hash(self):
+        """Test that files from the store are parsed once and cached by their hash, not their text"""
+        store = FileContextStore()
+        store.update(FILES)
+        expected = select_edit_context('shop/views.py', TARGET, 'Add a discount', FILES)
+        self.assertEqual(select_edit_context('shop/views.py', TARGET, 'Add a discount', store), expected)
+        self.assertIn(content_hash(MODELS), editcontext._symbols._entries)
+        self.assertNotIn(MODELS, editcontext._symbols._entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
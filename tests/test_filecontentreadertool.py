@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import unittest
+
+from tools.filecontentreadertool import FileContentReaderTool
+
+
+class TestFileContentReaderTool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.tool = FileContentReaderTool()
+        files = {
+            'main.py': 'print(1)\n',
+            '.gitignore': 'generated/\n',
+            'generated/out.py': 'skip me',
+            'node_modules/lib.js': 'skip me too',
+            'payload.xyz': b'\0\1\2\3',
+            'notes.dat.txt': 'plain text',
+        }
+        for path, data in files.items():
+            full = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, 'wb' if isinstance(data, bytes) else 'w') as file:
+                file.write(data)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, *paths):
+        return json.loads(self.tool._execute(file_paths=list(paths)))
+
+    def test_read_directory(self):
+        """Test that directories are read without ignored or binary files"""
+        results = self.read(self.root)
+        summary = results.pop('_summary')
+        self.assertEqual(sorted(os.path.relpath(path, self.root) for path in results), ['main.py', 'notes.dat.txt'])
+        self.assertEqual(summary['files_read'], 2)
+        self.assertEqual(summary['skipped_binary'], 1)
+        self.assertEqual(summary['skipped_ignored'], 3)  # .gitignore, generated/ and node_modules/
+
+    def test_total_cap_is_reported(self):
+        """Test that files beyond the total size cap are counted, not returned"""
+        self.tool.MAX_TOTAL_BYTES = 12
+        results = self.read(self.root)
+        summary = results.pop('_summary')
+        self.assertEqual(len(results), 1)
+        self.assertEqual(summary['skipped_total_cap'], 2)
+        self.assertGreater(summary['skipped_bytes'], 0)
+
+    def test_read_single_files(self):
+        """Test that explicit files report errors in place of content"""
+        results = self.read(
+            os.path.join(self.root, 'main.py'),
+            os.path.join(self.root, 'payload.xyz'),
+            os.path.join(self.root, 'missing.py'),
+        )
+        self.assertNotIn('_summary', results)
+        self.assertEqual(results[os.path.join(self.root, 'main.py')], 'print(1)\n')
+        self.assertIn('binary', results[os.path.join(self.root, 'payload.xyz')])
+        self.assertEqual(results[os.path.join(self.root, 'missing.py')], 'Error: File not found')
+
+    def test_read_line_range(self):
+        """Test that a line range returns only that window with its position"""
+        path = os.path.join(self.root, 'long.txt')
+        with open(path, 'w') as file:
+            file.write(''.join(f'{i}\n' for i in range(1, 101)))
+        results = json.loads(self.tool._execute(file_paths=[path], start_line=5, end_line=6))
+        self.assertEqual(results[path], f'[{path}: lines 5-6 of 100] use start_line=7 to continue\n5\n6\n')
+
+    def test_large_file_returns_first_window(self):
+        """Test that files over the size cap return their first lines"""
+        self.tool.MAX_FILE_BYTES = 4
+        self.tool.MAX_WINDOW_BYTES = 6
+        results = self.read(os.path.join(self.root, 'notes.dat.txt'))
+        content = results[os.path.join(self.root, 'notes.dat.txt')]
+        self.assertTrue(content.endswith('(truncated)]\nplain '))
+
+    def test_text_format(self):
+        """Test that the text format frames raw contents with path headers"""
+        main = os.path.join(self.root, 'main.py')
+        notes = os.path.join(self.root, 'notes.dat.txt')
+        result = self.tool._execute(file_paths=[main, notes], output_format='text')
+        self.assertEqual(result, f'==> {main} <==\nprint(1)\n==> {notes} <==\nplain text\n')
+
+    def test_text_format_budgets(self):
+        """Test per-file truncation and the total budget of the text format"""
+        result = self.tool._execute(file_paths=[self.root], output_format='text', max_chars_per_file=5)
+        self.assertIn('plain\n[truncated 5 characters; use start_line=1 to continue]\n', result)
+        self.assertIn('==> _summary <==\nfiles_read=2 ', result)
+
+        main = os.path.join(self.root, 'main.py')
+        result = self.tool._execute(file_paths=[self.root], output_format='text', max_total_chars=len(main) + 20)
+        blocks = result.split('==> ')
+        self.assertEqual(blocks[1], f'{main} <==\nprint(1)\n')
+        self.assertIn('stopped_at_max_total_chars=True', blocks[2])
+        self.assertEqual(len(blocks), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
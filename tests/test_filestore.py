@@ -0,0 +1,102 @@
+import unittest
+
+from omni_core.filestore import FileContextStore, content_hash
+from omni_core.prompt import SystemPromptBuilder
+
+
+class TestFileContextStore(unittest.TestCase):
+    def test_mapping_interface(self):
+        """Test that the store behaves like a dict of path to text"""
+        store = FileContextStore()
+        store['a.py'] = 'print(1)'
+        self.assertEqual(store['a.py'], 'print(1)')
+        self.assertEqual(store.get('missing', ''), '')
+        self.assertIn('a.py', store)
+        self.assertEqual(dict(store.items()), {'a.py': 'print(1)'})
+        del store['a.py']
+        self.assertEqual(len(store), 0)
+        with self.assertRaises(KeyError):
+            del store['a.py']
+
+    def test_identical_content_is_stored_once(self):
+        """Test that paths with the same content share one blob"""
+        store = FileContextStore()
+        store['a.py'] = 'x = 1\n' * 100
+        store['b.py'] = 'x = 1\n' * 100
+        stats = store.stats()
+        self.assertEqual(stats.paths, 2)
+        self.assertEqual(stats.blobs, 1)
+        self.assertEqual(stats.dedup_hits, 1)
+        self.assertEqual(store.hash_of('a.py'), content_hash('x = 1\n' * 100))
+        self.assertEqual(store.paths_of(store.hash_of('a.py')), {'a.py', 'b.py'})
+
+        # The blob is freed with its last path
+        store['a.py'] = 'changed'
+        del store['b.py']
+        self.assertEqual(store.stats().blobs, 1)
+        self.assertEqual(store.stats().stored_bytes, len('changed'))
+
+    def test_rewriting_same_content_keeps_version(self):
+        """Test that unchanged writes do not invalidate prompt caches"""
+        store = FileContextStore()
+        store['a.py'] = 'text'
+        version = store.version
+        store['a.py'] = 'text'
+        self.assertEqual(store.version, version)
+        store['a.py'] = 'other'
+        self.assertNotEqual(store.version, version)
+
+    def test_lru_byte_cap(self):
+        """Test that the least recently used paths are evicted over the cap"""
+        store = FileContextStore(max_bytes=250, compress_min_bytes=10**9)
+        store['a.py'] = 'a' * 100
+        store['b.py'] = 'b' * 100
+        store['a.py']  # Use a.py so b.py is the least recent
+        store['c.py'] = 'c' * 100
+
+        self.assertEqual(sorted(store), ['a.py', 'c.py'])
+        self.assertLessEqual(store.stats().stored_bytes, 250)
+        self.assertEqual(store.stats().evictions, 1)
+
+    def test_iteration_does_not_change_eviction_order(self):
+        """Test that rendering every file does not count as using it"""
+        store = FileContextStore(max_bytes=250, compress_min_bytes=10**9)
+        store['a.py'] = 'a' * 100
+        store['b.py'] = 'b' * 100
+        list(store.items())
+        store['c.py'] = 'c' * 100
+        self.assertNotIn('a.py', store)
+
+    def test_newest_entry_is_kept_over_cap(self):
+        """Test that a single file larger than the cap is still kept"""
+        store = FileContextStore(max_bytes=10)
+        store['big.py'] = 'x' * 100
+        self.assertEqual(list(store), ['big.py'])
+
+    def test_cold_entries_are_compressed(self):
+        """Test that blobs outside the hot set are compressed transparently"""
+        store = FileContextStore(hot_entries=1, compress_min_bytes=100)
+        store['a.py'] = 'line of code\n' * 1000
+        store['b.py'] = 'other line\n' * 1000
+        stats = store.stats()
+        self.assertEqual(stats.compressed_blobs, 1)
+        self.assertLess(stats.stored_bytes, stats.raw_bytes)
+        self.assertEqual(store['a.py'], 'line of code\n' * 1000)
+
+    def test_prompt_builder_tracks_store_version(self):
+        """Test that the system prompt is cached against the store"""
+        store = FileContextStore()
+        builder = SystemPromptBuilder("Base")
+        store['a.py'] = 'same'
+        store['b.py'] = 'same'
+        prompt = builder.build(store)
+        self.assertIs(builder.build(store), prompt)
+        self.assertEqual(prompt.count('same'), 1)
+        self.assertIn('--- b.py ---\n(identical to a.py)', prompt)
+
+        store['c.py'] = 'new'
+        self.assertIn('new', builder.build(store))
+
+
+if __name__ == '__main__':
+    unittest.main()
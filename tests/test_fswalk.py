@@ -0,0 +1,153 @@
+import os
+import tempfile
+import unittest
+
+from omni_core.fswalk import GitIgnore, WalkStats, is_binary, iter_files, read_files, read_text, walk_files
+
+
+def write(root, path, data):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    mode = 'wb' if isinstance(data, bytes) else 'w'
+    with open(full, mode) as file:
+        file.write(data)
+    return full
+
+
+class TestGitIgnore(unittest.TestCase):
+    def test_patterns(self):
+        """Test the gitignore pattern forms"""
+        gitignore = GitIgnore([
+            '# comment',
+            '*.log',
+            '/build',
+            'docs/*.md',
+            'cache/',
+            '**/tmp/**',
+            '!keep.log',
+        ])
+        self.assertTrue(gitignore.match('app.log', False))
+        self.assertTrue(gitignore.match('src/deep/app.log', False))
+        self.assertFalse(gitignore.match('keep.log', False))
+        self.assertTrue(gitignore.match('build', True))
+        self.assertIsNone(gitignore.match('src/build', True))
+        self.assertTrue(gitignore.match('docs/readme.md', False))
+        self.assertIsNone(gitignore.match('docs/api/readme.md', False))
+        self.assertTrue(gitignore.match('src/cache', True))
+        self.assertIsNone(gitignore.match('src/cache', False))
+        self.assertTrue(gitignore.match('a/tmp/b.txt', False))
+        self.assertIsNone(gitignore.match('main.py', False))
+
+    def test_character_classes_and_escapes(self):
+        """Test bracket expressions and escaped characters"""
+        gitignore = GitIgnore(['file[0-9].txt', '\\#notes', 'a?c'])
+        self.assertTrue(gitignore.match('file1.txt', False))
+        self.assertIsNone(gitignore.match('filex.txt', False))
+        self.assertTrue(gitignore.match('#notes', False))
+        self.assertTrue(gitignore.match('abc', False))
+        self.assertIsNone(gitignore.match('a/c', False))
+
+
+class TestBinarySniffing(unittest.TestCase):
+    def test_is_binary(self):
+        """Test that binaries are detected from content, not extension"""
+        self.assertFalse(is_binary(b'print("hello")\n'))
+        self.assertFalse(is_binary('héllo wörld'.encode('utf-8')))
+        self.assertFalse(is_binary('é'.encode('utf-8')[:1]))  # Cut-off character
+        self.assertTrue(is_binary(b'\x89PNG\r\n\x1a\n\0\0\0'))
+        self.assertTrue(is_binary(b'\xff\xfe\xfa' + b'x' * 100))
+        self.assertFalse(is_binary(b''))
+
+    def test_read_text(self):
+        """Test that read_text reports binary and oversized files"""
+        with tempfile.TemporaryDirectory() as root:
+            text = write(root, 'image.txt', b'\0\1\2')
+            big = write(root, 'big.py', 'x' * 100)
+            self.assertEqual(read_text(text), (None, 'binary'))
+            self.assertEqual(read_text(big, max_bytes=50), (None, 'too_large'))
+            self.assertEqual(read_text(big), ('x' * 100, 'ok'))
+            self.assertEqual(read_text(os.path.join(root, 'missing'))[0], None)
+
+
+class TestWalker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, '.git'))
+        write(self.root, '.gitignore', '*.log\nbuild/\n')
+        write(self.root, 'main.py', 'print(1)\n')
+        write(self.root, 'debug.log', 'noise')
+        write(self.root, 'build/out.py', 'generated')
+        write(self.root, 'src/app.py', 'app\n')
+        write(self.root, 'src/.gitignore', 'secret.py\n!important.log\n')
+        write(self.root, 'src/secret.py', 'hidden')
+        write(self.root, 'src/important.log', 'keep me')
+        write(self.root, 'src/logo.png', b'\x89PNG\r\n\x1a\n\0\0')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def relative(self, paths):
+        return [os.path.relpath(path, self.root).replace(os.sep, '/') for path in paths]
+
+    def test_walk_honours_gitignore(self):
+        """Test that ignored files and directories are not listed"""
+        stats = WalkStats()
+        files = self.relative(path for path, _ in walk_files(self.root, stats=stats))
+        self.assertEqual(files, [
+            '.gitignore', 'main.py', 'src/.gitignore', 'src/app.py', 'src/important.log', 'src/logo.png'
+        ])
+        self.assertEqual(stats.skipped_ignored, 4)  # .git, debug.log, build/ and src/secret.py
+
+    def test_walk_skip_callback(self):
+        """Test that the skip callback filters names"""
+        files = self.relative(path for path, _ in walk_files(
+            self.root, skip=lambda name, is_dir: name.startswith('.')
+        ))
+        self.assertNotIn('.gitignore', files)
+        self.assertIn('src/app.py', files)
+
+    def test_enclosing_gitignore_applies_to_subdirectory(self):
+        """Test that walking a subdirectory honours the repository's .gitignore"""
+        write(self.root, 'src/trace.log', 'ignored by the root .gitignore')
+        files = self.relative(path for path, _ in walk_files(os.path.join(self.root, 'src')))
+        self.assertNotIn('src/trace.log', files)
+        self.assertIn('src/important.log', files)
+
+    def test_without_gitignore(self):
+        """Test that gitignore handling can be disabled"""
+        files = self.relative(path for path, _ in walk_files(self.root, use_gitignore=False))
+        self.assertIn('debug.log', files)
+        self.assertIn('build/out.py', files)
+
+    def test_read_files_caps(self):
+        """Test that reads skip binaries and respect the size caps"""
+        write(self.root, 'src/big.py', 'x' * 500)
+        stats = WalkStats()
+        files = list(walk_files(os.path.join(self.root, 'src'), stats=stats))
+        results = read_files(files, max_file_bytes=200, stats=stats)
+        self.assertNotIn(os.path.join(self.root, 'src', 'big.py'), results)
+        self.assertNotIn(os.path.join(self.root, 'src', 'logo.png'), results)
+        self.assertEqual(results[os.path.join(self.root, 'src', 'app.py')], 'app\n')
+        self.assertEqual(stats.skipped_too_large, 1)
+        self.assertEqual(stats.skipped_binary, 1)
+        self.assertEqual(stats.skipped_bytes, 500)
+
+        stats = WalkStats()
+        results = read_files([(p, s) for p, s in files if p.endswith('.py')], max_total_bytes=4, stats=stats)
+        self.assertEqual(list(results), [os.path.join(self.root, 'src', 'app.py')])
+        self.assertEqual(stats.skipped_total_cap, 1)
+
+    def test_iter_files_reads_ahead_lazily(self):
+        """Test that files are yielded in order and reading stops when closed"""
+        paths = [write(self.root, f'many/{i:02}.txt', str(i)) for i in range(40)]
+        stats = WalkStats()
+        results = iter_files(((path, 2) for path in paths), workers=2, stats=stats)
+        self.assertEqual(next(results), (paths[0], '0'))
+        self.assertEqual(next(results), (paths[1], '1'))
+        results.close()
+        self.assertLessEqual(stats.files_read, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
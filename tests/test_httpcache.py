@@ -0,0 +1,139 @@
+import os
+import json
+import pickle
+import tempfile
+import unittest
+
+import requests
+
+from omni_core.httpcache import HttpCache, normalize_url
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, content=b'', headers=None, encoding='utf-8'):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.encoding = encoding
+        self.apparent_encoding = 'utf-8'
+        self.url = None
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} error')
+
+
+class FakeSession:
+    """Answers GET requests from a queue of responses and records the headers sent"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.requests.append((url, dict(headers or {})))
+        return self.responses.pop(0)
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_normalize_url(self):
+        """Test that equivalent URLs share a cache key"""
+        self.assertEqual(
+            normalize_url('HTTPS://Docs.Example.com:443?b=2&a=1&utm_source=x#intro'),
+            'https://docs.example.com/?a=1&b=2',
+        )
+        self.assertEqual(normalize_url('http://example.com:8080/p'), 'http://example.com:8080/p')
+
+    def test_fresh_hit_and_revalidation(self):
+        """Test fresh pages served locally and stale ones revalidated with their validators"""
+        cache = HttpCache(self.directory, ttl=60)
+        session = FakeSession(FakeResponse(content=b'<p>docs</p>', headers={'ETag': '"v1"', 'Last-Modified': 'Mon'}))
+        first = cache.fetch('https://example.com/docs', session=session)
+        second = cache.fetch('https://EXAMPLE.com/docs#api', session=session)
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.text, '<p>docs</p>')
+        self.assertEqual(len(session.requests), 1)
+
+        # A new cache on the same directory reads the entry from disk; once stale it is revalidated
+        reopened = HttpCache(self.directory, ttl=60)
+        reopened.lookup('https://example.com/docs').expires_at = 0
+        session = FakeSession(FakeResponse(304, headers={'Cache-Control': 'max-age=600'}))
+        revalidated = reopened.fetch('https://example.com/docs', session=session)
+        self.assertTrue(revalidated.from_cache)
+        self.assertEqual(revalidated.content, b'<p>docs</p>')
+        self.assertEqual(session.requests[0][1], {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon'})
+        self.assertTrue(reopened.lookup('https://example.com/docs').is_fresh())
+        self.assertEqual(cache.stats.to_dict(), {'hits': 1, 'revalidated': 0, 'misses': 1, 'stores': 1, 'evictions': 0})
+        self.assertEqual(reopened.stats.revalidated, 1)
+
+    def test_no_store_and_errors(self):
+        """Test that uncacheable responses and error statuses are not stored"""
+        cache = HttpCache(self.directory)
+        session = FakeSession(
+            FakeResponse(content=b'secret', headers={'Cache-Control': 'private, no-store'}),
+            FakeResponse(404),
+        )
+        self.assertEqual(cache.fetch('https://example.com/a', session=session).content, b'secret')
+        self.assertIsNone(cache.lookup('https://example.com/a'))
+        with self.assertRaises(requests.HTTPError):
+            cache.fetch('https://example.com/b', session=session)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_size_bound_evicts_least_recently_used(self):
+        """Test that the directory stays under its byte limit, dropping the oldest use first"""
+        cache = HttpCache(self.directory, max_bytes=4000)
+        body = b'x' * 900
+        for name in 'abc':
+            cache.fetch(f'https://example.com/{name}', session=FakeSession(FakeResponse(content=body)))
+        cache.lookup('https://example.com/a')  # Now b is the least recently used
+        cache.fetch('https://example.com/d', session=FakeSession(FakeResponse(content=body)))
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assertIsNone(cache.lookup('https://example.com/b'))
+        self.assertIsNotNone(cache.lookup('https://example.com/a'))
+        self.assertLessEqual(sum(entry.stat().st_size for entry in os.scandir(self.directory)), 4000)
+
+    def test_byte_cap(self):
+        """Test that a capped download stops early and is marked truncated"""
+        cache = HttpCache(self.directory)
+        response = FakeResponse(content=b'x' * 200_000)
+        page = cache.fetch('https://example.com/big', max_bytes=100_000, session=FakeSession(response))
+        self.assertEqual(len(page.content), 100_000)
+        self.assertTrue(page.truncated)
+        self.assertTrue(response.closed)
+        self.assertTrue(cache.lookup('https://example.com/big').truncated)
+
+    def test_entries_are_not_pickled(self):
+        """Test that entries are stored as a raw body and JSON metadata, and old pickles are never loaded"""
+        legacy = os.path.join(self.directory, 'old.entry')
+        with open(legacy, 'wb') as file:
+            pickle.dump({'format': 2}, file)
+        cache = HttpCache(self.directory)
+        self.assertFalse(os.path.exists(legacy))
+
+        cache.fetch('https://example.com/a', session=FakeSession(FakeResponse(content=b'<p>hi</p>')))
+        names = sorted(os.listdir(self.directory))
+        self.assertEqual([os.path.splitext(name)[1] for name in names], ['.body', '.json'])
+        with open(os.path.join(self.directory, names[0]), 'rb') as file:
+            self.assertEqual(file.read(), b'<p>hi</p>')
+        with open(os.path.join(self.directory, names[1]), encoding='utf-8') as file:
+            self.assertEqual(json.load(file)['key'], 'https://example.com/a')
+        self.assertEqual(HttpCache(self.directory).lookup('https://example.com/a').content, b'<p>hi</p>')
+
+
+if __name__ == '__main__':
+    unittest.main()
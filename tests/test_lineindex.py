@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+
+from omni_core import lineindex
+from omni_core.lineindex import line_index, read_bytes, read_lines, splice_lines
+from tools.fileedittool import FileEditTool
+
+
+class TestLineIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'big.txt')
+        self.write(''.join(f'line {i}\n' for i in range(1, 1001)))
+        lineindex.invalidate()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data):
+        mode = 'wb' if isinstance(data, bytes) else 'w'
+        with open(self.path, mode) as file:
+            file.write(data)
+
+    def read(self):
+        with open(self.path, 'rb') as file:
+            return file.read()
+
+    def test_offsets(self):
+        """Test line offsets with and without a trailing newline"""
+        for data, offsets in [(b'', []), (b'a', [0]), (b'a\nb', [0, 2]), (b'a\nb\n', [0, 2]), (b'\n\n', [0, 1])]:
+            self.write(data)
+            lineindex.invalidate()
+            self.assertEqual(list(line_index(self.path).offsets), offsets)
+
+    def test_scan_across_chunks(self):
+        """Test that lines spanning scan chunks are indexed once"""
+        original = lineindex.SCAN_CHUNK_BYTES
+        lineindex.SCAN_CHUNK_BYTES = 7
+        try:
+            index = line_index(self.path)
+        finally:
+            lineindex.SCAN_CHUNK_BYTES = original
+        self.assertEqual(index.line_count, 1000)
+        self.assertEqual(read_lines(self.path, 998, 1000).text, 'line 998\nline 999\nline 1000\n')
+
+    def test_read_lines(self):
+        """Test that only the requested lines are returned"""
+        window = read_lines(self.path, 10, 12)
+        self.assertEqual(window.text, 'line 10\nline 11\nline 12\n')
+        self.assertEqual((window.start_line, window.end_line, window.total_lines), (10, 12, 1000))
+        self.assertEqual(window.header(), f'[{self.path}: lines 10-12 of 1000]')
+        self.assertEqual(read_lines(self.path, 999, 5000).end_line, 1000)
+        with self.assertRaises(ValueError):
+            read_lines(self.path, 1001)
+        with self.assertRaises(ValueError):
+            read_lines(self.path, 5, 4)
+
+    def test_read_lines_byte_cap(self):
+        """Test that windows stop at the last whole line within the cap"""
+        window = read_lines(self.path, 1, None, max_bytes=20)
+        self.assertTrue(window.truncated)
+        self.assertEqual(window.text, 'line 1\nline 2\n')
+        self.assertEqual(window.end_line, 2)
+        self.assertEqual(read_lines(self.path, 1, None, max_bytes=21).end_line, 3)
+        # A single line longer than the cap is cut
+        self.assertEqual(read_lines(self.path, 1, None, max_bytes=3).text, 'lin')
+
+    def test_read_bytes(self):
+        """Test byte windows and clamping at the end of the file"""
+        window = read_bytes(self.path, 7, 6)
+        self.assertEqual(window.text, 'line 2')
+        self.assertEqual(window.end_line, 2)
+        self.assertEqual(read_bytes(self.path, len(self.read()) - 3, 100).text, '00\n')
+        with self.assertRaises(ValueError):
+            read_bytes(self.path, -1)
+
+    def test_index_is_rebuilt_when_file_changes(self):
+        """Test that the cached index is invalidated by a new mtime or size"""
+        first = line_index(self.path)
+        self.assertIs(line_index(self.path), first)
+        self.write('one\ntwo\n')
+        self.assertEqual(read_lines(self.path).text, 'one\ntwo\n')
+        self.assertIsNot(line_index(self.path), first)
+
+    def test_splice_lines(self):
+        """Test that spliced lines keep the rest of the file byte for byte"""
+        self.write(b'a\r\nb\r\nc\r\nd')
+        self.assertEqual(splice_lines(self.path, 2, 3, 'x\r\ny\r\nz'), (2, 4))
+        self.assertEqual(self.read(), b'a\r\nx\r\ny\r\nz\r\nd')
+        splice_lines(self.path, 5, 5, 'e')
+        self.assertEqual(self.read(), b'a\r\nx\r\ny\r\nz\r\ne')
+        splice_lines(self.path, 1, 4, '')
+        self.assertEqual(self.read(), b'e')
+        with self.assertRaises(ValueError):
+            splice_lines(self.path, 1, 2, 'f')
+        self.assertEqual(os.listdir(self.tmp.name), ['big.txt'])
+
+    def test_file_edit_tool_line_edit(self):
+        """Test that line edits return a diff of the edited lines, not the whole file"""
+        result = FileEditTool()._execute(
+            file_path=self.path, edit_type='partial', new_content='changed', start_line=500, end_line=501,
+            context_lines=1
+        )
+        self.assertEqual(result, (
+            f'File successfully updated: {self.path}\n--- a/{self.path}\n+++ b/{self.path}\n'
+            '@@ -499,4 +499,3 @@\n line 499\n-line 500\n-line 501\n+changed\n line 502\n'
+        ))
+        self.assertEqual(read_lines(self.path, 499, 501).text, 'line 499\nchanged\nline 502\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from omni_core.atomicfile import atomic_write
+from omni_core.diffs import unified_diff
+from omni_core.patch import apply_patch, edits_to_patches, parse_patch
+from tools.patchtool import PatchTool
+
+
+class TestPatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write('app.py', ''.join(f'line {i}\n' for i in range(1, 21)))
+        self.write('util.py', 'def helper():\r\n    return 1\r\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def write(self, name, text):
+        with open(self.path(name), 'w', newline='') as file:
+            file.write(text)
+
+    def read(self, name):
+        with open(self.path(name), newline='') as file:
+            return file.read()
+
+    def test_multi_file_patch(self):
+        """Test hunks across files, with drifted line numbers, creation and deletion"""
+        self.write('old.py', 'x = 1\n')
+        patch = (
+            'diff --git a/app.py b/app.py\n'
+            '--- a/app.py\n+++ b/app.py\n'
+            '@@ -4,3 +4,3 @@\n line 6\n-line 7\n+line seven\n line 8\n'
+            '@@ -16,2 +16,3 @@\n line 18\n+line 18.5\n line 19\n'
+            '--- a/util.py\n+++ b/util.py\n'
+            '@@ -1,2 +1,2 @@\n def helper():\n-    return 1\n+    return 2\n'
+            '--- /dev/null\n+++ b/new/mod.py\n@@ -0,0 +1 @@\n+y = 2\n\\ No newline at end of file\n'
+            '--- a/old.py\n+++ /dev/null\n@@ -1 +0,0 @@\n-x = 1\n'
+        )
+        result = apply_patch(parse_patch(patch), root=self.root)
+        self.assertTrue(result.applied, result.summary())
+        self.assertIn('line 6\nline seven\nline 8\n', self.read('app.py'))
+        self.assertIn('line 18\nline 18.5\nline 19\n', self.read('app.py'))
+        self.assertEqual([(hunk.line, hunk.offset) for hunk in result.hunks[:2]], [(6, 2), (18, 2)])
+        self.assertEqual(self.read('util.py'), 'def helper():\r\n    return 2\r\n')
+        self.assertEqual(self.read('new/mod.py'), 'y = 2')
+        self.assertFalse(os.path.exists(self.path('old.py')))
+        self.assertTrue(result.summary().startswith('Patch applied: 5 hunks in 4 files (+4 -3)'))
+
+    def test_failed_hunk_changes_nothing(self):
+        """Test that one failing hunk leaves every file untouched"""
+        original = self.read('app.py')
+        patch = unified_diff(original, original.replace('line 2\n', 'line two\n'), 'app.py')
+        patch += '--- a/util.py\n+++ b/util.py\n@@ -1 +1 @@\n-def missing():\n+def found():\n'
+        result = apply_patch(parse_patch(patch), root=self.root)
+        self.assertFalse(result.applied)
+        self.assertEqual([hunk.status for hunk in result.hunks], ['applied', 'failed'])
+        self.assertIn('util.py hunk 1: failed - context not found', result.summary())
+        self.assertEqual(self.read('app.py'), original)
+
+    def test_write_failure_rolls_back(self):
+        """Test that files already written are restored when a later write fails"""
+        edits = [
+            {'path': self.path('app.py'), 'old_text': 'line 3\n', 'new_text': 'line three\n'},
+            {'path': self.path('util.py'), 'old_text': 'return 1', 'new_text': 'return 3'},
+        ]
+        original = self.read('app.py')
+        calls = []
+
+        def failing_write(path, data):
+            calls.append(path)
+            if path.endswith('util.py'):
+                raise OSError('disk full')
+            atomic_write(path, data)
+
+        with mock.patch('omni_core.patch.atomic_write', side_effect=failing_write):
+            result = apply_patch(edits_to_patches(edits))
+        self.assertFalse(result.applied)
+        self.assertIn('disk full', result.error)
+        self.assertEqual(self.read('app.py'), original)
+        self.assertEqual(len(calls), 3)  # app.py, util.py, then app.py restored
+
+    def test_tool(self):
+        """Test the tool's edits mode, dry runs and input errors"""
+        tool = PatchTool()
+        edits = [{'path': self.path('app.py'), 'old_text': 'line 1\n', 'new_text': 'first\n'}]
+        self.assertIn('would apply', tool._execute(edits=edits, dry_run=True))
+        self.assertNotIn('first', self.read('app.py'))
+        self.assertIn('applied at line 1', tool._execute(edits=edits))
+        self.assertTrue(self.read('app.py').startswith('first\n'))
+        ambiguous = tool._execute(edits=[{'path': self.path('app.py'), 'old_text': 'line 1', 'new_text': 'x'}])
+        self.assertIn('matches several places', ambiguous)
+        self.assertTrue(tool._execute().startswith('Error'))
+        self.assertTrue(tool._execute(patch='@@ -1 +1 @@\n-a\n+b\n').startswith('Error: Invalid patch'))
+
+
+if __name__ == '__main__':
+    unittest.main()
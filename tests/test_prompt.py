@@ -0,0 +1,100 @@
+import unittest
+
+from omni_core.prompt import PromptSegment, SystemPrompt, SystemPromptBuilder, TrackedDict
+
+
+class TestTrackedDict(unittest.TestCase):
+    def test_version_changes_on_modification(self):
+        """Test that every kind of modification bumps the version"""
+        files = TrackedDict()
+        versions = [files.version]
+        files['a'] = '1'
+        versions.append(files.version)
+        files.update(b='2')
+        versions.append(files.version)
+        files.setdefault('c', '3')
+        versions.append(files.version)
+        files.pop('a')
+        versions.append(files.version)
+        del files['b']
+        versions.append(files.version)
+        files.clear()
+        versions.append(files.version)
+        self.assertEqual(len(set(versions)), len(versions))
+
+    def test_reads_do_not_change_version(self):
+        """Test that reading leaves the version alone"""
+        files = TrackedDict(a='1')
+        version = files.version
+        files.get('a')
+        list(files.items())
+        files.setdefault('a', '2')
+        self.assertEqual(files.version, version)
+
+
+class TestSystemPromptBuilder(unittest.TestCase):
+    def setUp(self):
+        self.builder = SystemPromptBuilder("Base instructions", "Think first")
+        self.files = TrackedDict({'main.py': 'print(1)'})
+
+    def test_prompt_is_cached_until_files_change(self):
+        """Test that the prompt is only rebuilt when its inputs change"""
+        first = self.builder.build(self.files)
+        self.assertIs(self.builder.build(self.files), first)
+        self.assertEqual(self.builder.builds, 1)
+
+        self.files['util.py'] = 'x = 2'
+        second = self.builder.build(self.files)
+        self.assertIsNot(second, first)
+        self.assertIn('--- util.py ---\nx = 2', second)
+        self.assertEqual(self.builder.builds, 2)
+
+    def test_volatile_text_is_placed_last(self):
+        """Test that automode state follows the stable prefix"""
+        first = self.builder.build(self.files, "Iteration 1 of 3")
+        second = self.builder.build(self.files, "Iteration 2 of 3")
+        prefix = first[:-len("Iteration 1 of 3")]
+        self.assertTrue(second.startswith(prefix))
+        self.assertTrue(first.startswith("Base instructions\n\nThink first"))
+        self.assertFalse(first.segments[-1].cacheable)
+
+    def test_repo_map_precedes_files(self):
+        """Test that the repository map is its own segment before the files"""
+        prompt = self.builder.build(self.files, repo_map="main.py:\n  def main()")
+        self.assertIn("Repository Map:\nmain.py:\n  def main()\n\nFile Contents:", prompt)
+        self.assertIs(self.builder.build(self.files, repo_map="main.py:\n  def main()"), prompt)
+        self.assertIsNot(self.builder.build(self.files, repo_map="changed"), prompt)
+
+    def test_replaced_files_mapping_is_detected(self):
+        """Test that a new mapping with the same version is re-rendered"""
+        self.builder.build(self.files)
+        prompt = self.builder.build(TrackedDict({'other.py': ''}))
+        self.assertIn('other.py', prompt)
+        self.assertNotIn('main.py', prompt)
+
+    def test_plain_dicts_are_always_rendered(self):
+        """Test that untracked mappings are rendered on every build"""
+        files = {'a.py': '1'}
+        self.builder.build(files)
+        files['b.py'] = '2'
+        self.assertIn('b.py', self.builder.build(files))
+
+    def test_without_files(self):
+        """Test that no file section is added when there are no files"""
+        self.assertEqual(self.builder.build(), "Base instructions\n\nThink first")
+
+
+class TestSystemPrompt(unittest.TestCase):
+    def test_blocks(self):
+        """Test that segments become text blocks with cache breakpoints"""
+        prompt = SystemPrompt([PromptSegment("a"), PromptSegment(""), PromptSegment("b", cacheable=False)])
+        self.assertEqual(prompt, "ab")
+        self.assertEqual(prompt.blocks(), [
+            {"type": "text", "text": "a", "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": "b"},
+        ])
+        self.assertNotIn("cache_control", prompt.blocks(cache=False)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import time
+import unittest
+
+from omni_core.repomap import RepoMap, name_weight, pagerank, parse_symbols
+from tools.repomaptool import RepoMapTool
+
+
+SOURCES = {
+    'core/models.py': (
+        'MAX_ITEMS = 10\n'
+        '\n'
+        'class InventoryItem(Base):\n'
+        '    def __init__(self, name):\n'
+        '        self.name = name\n'
+        '\n'
+        '    async def reserve_stock(self, count: int) -> bool:\n'
+        '        return count < MAX_ITEMS\n'
+        '\n'
+        'def _private():\n'
+        '    pass\n'
+    ),
+    'core/views.py': (
+        'from core.models import InventoryItem\n'
+        '\n'
+        'def render_inventory(items):\n'
+        '    return [InventoryItem(item).reserve_stock(1) for item in items]\n'
+    ),
+    'app.py': (
+        'from core.views import render_inventory\n'
+        'from core.models import InventoryItem\n'
+        '\n'
+        'def main():\n'
+        '    render_inventory([InventoryItem("a")])\n'
+    ),
+    'broken.py': 'def oops(:\n',
+}
+
+
+class TestParsing(unittest.TestCase):
+    def test_definitions_and_references(self):
+        """Test the definitions and references found in a module"""
+        symbols = parse_symbols(SOURCES['core/models.py'])
+        self.assertEqual(
+            [(symbol.kind, symbol.signature, symbol.parent) for symbol in symbols.definitions],
+            [
+                ('constant', 'MAX_ITEMS', None),
+                ('class', 'class InventoryItem(Base)', None),
+                ('method', 'def __init__(self, name)', 'InventoryItem'),
+                ('method', 'async def reserve_stock(self, count: int) -> bool', 'InventoryItem'),
+                ('function', 'def _private()', None),
+            ]
+        )
+        self.assertEqual(symbols.references['MAX_ITEMS'], 1)
+        self.assertEqual(parse_symbols(SOURCES['broken.py']).definitions, [])
+
+    def test_name_weight(self):
+        """Test that specific names weigh more than generic or private ones"""
+        self.assertGreater(name_weight('render_inventory'), name_weight('render'))
+        self.assertGreater(name_weight('render'), name_weight('get'))
+        self.assertLess(name_weight('_private'), 1)
+        self.assertEqual(name_weight('__init__'), 0)
+
+    def test_pagerank(self):
+        """Test that linked and focused nodes rank higher"""
+        edges = {'a': {'c': 1.0}, 'b': {'c': 1.0}}
+        rank = pagerank(edges, ['a', 'b', 'c'])
+        self.assertAlmostEqual(sum(rank.values()), 1.0)
+        self.assertGreater(rank['c'], rank['a'])
+        focused = pagerank(edges, ['a', 'b', 'c'], {'a': 1.0})
+        self.assertGreater(focused['a'], focused['b'])
+
+
+class TestRepoMap(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for path, source in SOURCES.items():
+            self.write(path, source)
+        self.repo_map = RepoMap(self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, source):
+        full = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, 'w') as file:
+            file.write(source)
+        return full
+
+    def test_ranking(self):
+        """Test that the most referenced definitions rank first"""
+        self.repo_map.update()
+        ranked = [(path, symbol.name) for _, path, symbol in self.repo_map.rank()]
+        self.assertEqual(ranked[0], (os.path.join('core', 'models.py'), 'InventoryItem'))
+        self.assertLess(ranked.index((os.path.join('core', 'views.py'), 'render_inventory')),
+                        ranked.index(('app.py', 'main')))
+
+    def test_outline_fits_budget(self):
+        """Test that the outline keeps the best symbols within the budget"""
+        full = self.repo_map.outline(10000)
+        self.assertIn('  class InventoryItem(Base)\n    def __init__(self, name)', full)
+        small = self.repo_map.outline(12)
+        self.assertLessEqual(len(small), 12 * 4)
+        self.assertTrue(small.startswith(os.path.join('core', 'models.py') + ':\n  class InventoryItem(Base)'))
+        # A method pulls in its class header
+        models = os.path.join('core', 'models.py')
+        reserve_stock = self.repo_map.symbols(models).definitions[3]
+        methods = self.repo_map.render([(1.0, models, reserve_stock)])
+        self.assertEqual(methods.splitlines()[1:], ['  class InventoryItem(Base)', '    async def reserve_stock(self, count: int) -> bool'])
+
+    def test_only_changed_files_are_parsed(self):
+        """Test that parse results are reused until a file's content changes"""
+        self.repo_map.outline(100)
+        self.assertEqual(self.repo_map.parses, 4)
+        self.repo_map.update(force=True)
+        self.assertEqual(self.repo_map.parses, 4)
+
+        path = self.write('app.py', SOURCES['app.py'] + '\ndef extra_entry_point():\n    pass\n')
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        self.assertTrue(self.repo_map.update(force=True))
+        self.assertEqual(self.repo_map.parses, 5)
+        self.assertIn('def extra_entry_point()', self.repo_map.outline(10000))
+
+        os.remove(os.path.join(self.root, 'broken.py'))
+        self.assertTrue(self.repo_map.update(force=True))
+        self.assertNotIn('broken.py', self.repo_map.files)
+
+    def test_tool(self):
+        """Test the tool output and its handling of bad paths"""
+        tool = RepoMapTool()
+        self.assertIn('class InventoryItem(Base)', tool._execute(path=self.root, max_tokens=200))
+        self.assertTrue(tool._execute(path=os.path.join(self.root, 'missing')).startswith('Error'))
+
+
+if __name__ == '__main__':
+    unittest.main()
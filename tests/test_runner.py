@@ -0,0 +1,71 @@
+"""Tests for the background event loop runner."""
+
+import asyncio
+import threading
+
+import pytest
+
+from omni_core.runner import LoopRunner
+
+
+@pytest.fixture
+def runner():
+    """Provide a runner that is stopped after the test."""
+    loop_runner = LoopRunner(name="test-loop")
+    yield loop_runner
+    loop_runner.stop()
+
+
+def test_run_returns_result_on_background_thread(runner):
+    """Test that coroutines run on the runner's thread."""
+    async def current_thread_name():
+        await asyncio.sleep(0)
+        return threading.current_thread().name
+
+    assert runner.run(current_thread_name()) == "test-loop"
+    # The same loop is reused between calls
+    loop = runner.loop
+    assert runner.run(current_thread_name()) == "test-loop"
+    assert runner.loop is loop
+
+
+def test_run_propagates_exceptions(runner):
+    """Test that exceptions raised on the loop reach the caller."""
+    async def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        runner.run(fail())
+
+
+def test_iterate_async_generator(runner):
+    """Test consuming an async generator from synchronous code."""
+    closed = []
+
+    async def numbers():
+        try:
+            for i in range(5):
+                yield i
+        finally:
+            closed.append(True)
+
+    assert list(runner.iterate(numbers())) == [0, 1, 2, 3, 4]
+
+    # Stopping early closes the generator on the loop
+    for value in runner.iterate(numbers()):
+        if value == 1:
+            break
+    assert closed == [True, True]
+
+
+def test_run_from_loop_thread_is_rejected(runner):
+    """Test that blocking on the loop from inside it raises instead of deadlocking."""
+    async def nested():
+        coro = asyncio.sleep(0)
+        try:
+            runner.run(coro)
+        finally:
+            coro.close()
+
+    with pytest.raises(RuntimeError):
+        runner.run(nested())
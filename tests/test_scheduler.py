@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from omni_core.scheduler import ToolScheduler
+
+
+class TestToolScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_batches(self):
+        """Test that consecutive concurrent calls share a batch"""
+        batches = ToolScheduler.batches(['r1', 'r2', 'w1', 'r3', 'w2', 'w3'], lambda call: call.startswith('r'))
+        self.assertEqual(batches, [['r1', 'r2'], ['w1'], ['r3'], ['w2'], ['w3']])
+
+    async def test_concurrent_async_calls(self):
+        """Test that concurrent coroutine calls overlap and keep their order"""
+        async def execute(call):
+            await asyncio.sleep(0.05 if call == 'slow' else 0)
+            return call.upper()
+
+        start = time.perf_counter()
+        results = await ToolScheduler().run(['slow', 'a', 'slow', 'b'], execute, lambda call: True)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results, ['SLOW', 'A', 'SLOW', 'B'])
+        self.assertLess(elapsed, 0.09)
+
+    async def test_sync_calls_run_in_threads(self):
+        """Test that synchronous calls run concurrently in the executor"""
+        barrier = threading.Barrier(3, timeout=2)
+
+        def execute(call):
+            barrier.wait()  # Only passes if all three run at once
+            return threading.current_thread() is not threading.main_thread()
+
+        results = await ToolScheduler().run([1, 2, 3], execute, lambda call: True)
+        self.assertEqual(results, [True, True, True])
+
+    async def test_exclusive_calls_run_alone_in_order(self):
+        """Test that calls with side effects never overlap other calls"""
+        running = []
+        overlaps = []
+
+        async def execute(call):
+            running.append(call)
+            if len(running) > 1 and not call.startswith('r'):
+                overlaps.append(call)
+            await asyncio.sleep(0.01)
+            if len(running) > 1 and not call.startswith('r'):
+                overlaps.append(call)
+            running.remove(call)
+            return call
+
+        calls = ['r1', 'r2', 'w1', 'r3', 'r4', 'w2']
+        results = await ToolScheduler().run(calls, execute, lambda call: call.startswith('r'))
+        self.assertEqual(results, calls)
+        self.assertEqual(overlaps, [])
+
+    async def test_max_concurrency(self):
+        """Test that no more than max_concurrency calls run at once"""
+        active = 0
+        peak = 0
+
+        async def execute(call):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return call
+
+        await ToolScheduler(max_concurrency=2).run(list(range(6)), execute, lambda call: True)
+        self.assertEqual(peak, 2)
+
+    async def test_errors_are_raised_after_the_batch(self):
+        """Test that a failing call does not abandon the rest of its batch"""
+        finished = []
+
+        async def execute(call):
+            if call == 'bad':
+                raise ValueError('boom')
+            await asyncio.sleep(0.01)
+            finished.append(call)
+            return call
+
+        with self.assertRaises(ValueError):
+            await ToolScheduler().run(['bad', 'a', 'b'], execute, lambda call: True)
+        self.assertEqual(sorted(finished), ['a', 'b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from tool_registry import ReloadReport, ToolManifest, ToolRegistry
+from tools.base import BaseTool
+
+
+class EchoTool(BaseTool):
+    name = "echo"
+    description = "Echo the input"
+    input_schema = {"text": {"type": "string"}}
+
+    def _execute(self, text: str) -> str:
+        return text
+
+
+class TestToolRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ToolRegistry()
+        self.tool = EchoTool()
+        self.registry.register(self.tool, {'function': {'name': 'echo'}})
+
+    def test_lookup_by_name(self):
+        """Test that registered tools are found by name"""
+        self.assertIs(self.registry.get('echo'), self.tool)
+        self.assertIsNone(self.registry.get('missing'))
+        self.assertIn('echo', self.registry)
+        self.assertEqual(self.registry.module_of('echo'), __name__)
+
+    def test_duplicate_names_keep_first(self):
+        """Test that a tool imported by several modules is registered once"""
+        self.registry.register(EchoTool(), {'function': {'name': 'echo'}})
+        self.assertEqual(len(self.registry), 1)
+        self.assertEqual(len(self.registry.specs), 1)
+        self.assertIs(self.registry.get('echo'), self.tool)
+
+    def test_dispatch_stats(self):
+        """Test that dispatch timings are accumulated per tool"""
+        self.registry.record('echo', 0.000001, 0.5)
+        self.registry.record('echo', 0.000003, 1.5, error=True)
+
+        stats = self.registry.stats()['echo']
+        self.assertEqual(stats['calls'], 2)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['max_execute_seconds'], 1.5)
+        self.assertEqual(stats['mean_execute_ms'], 1000.0)
+        self.assertEqual(stats['mean_lookup_us'], 2.0)
+
+
+    def test_lazy_tool_loaded_once(self):
+        """Test that lazily registered tools are constructed on first use only"""
+        loader = MagicMock(return_value=EchoTool())
+        self.registry.register_lazy('lazy_echo', 'Lazy echo', {'function': {'name': 'lazy_echo'}}, __name__, loader)
+
+        self.assertIn('lazy_echo', self.registry)
+        self.assertFalse(self.registry.is_loaded('lazy_echo'))
+        self.assertEqual(self.registry.description('lazy_echo'), 'Lazy echo')
+        loader.assert_not_called()
+
+        first = self.registry.get('lazy_echo')
+        self.assertIs(self.registry.get('lazy_echo'), first)
+        self.assertTrue(self.registry.is_loaded('lazy_echo'))
+        loader.assert_called_once()
+
+    def test_read_only_without_loading(self):
+        """Test that a lazy tool's read_only flag is known before it is imported"""
+        loader = MagicMock(return_value=EchoTool())
+        self.registry.register_lazy('reader', 'Reader', {'function': {'name': 'reader'}}, __name__, loader,
+                                    read_only=True)
+        self.registry.register_lazy('writer', 'Writer', {'function': {'name': 'writer'}}, __name__, loader)
+
+        self.assertTrue(self.registry.is_read_only('reader'))
+        self.assertFalse(self.registry.is_read_only('writer'))
+        self.assertFalse(self.registry.is_read_only('missing'))
+        loader.assert_not_called()
+
+
+class TestToolManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.module_path = self.dir / 'echotool.py'
+        self.module_path.write_text('# echo tool\n')
+        self.manifest_path = self.dir / 'manifest.json'
+        self.entry = {'class': 'EchoTool', 'module': 'tools.echotool', 'name': 'echo',
+                      'description': 'Echo the input', 'input_schema': {'text': {'type': 'string'}}}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        """Test that saved entries are current when loaded again"""
+        manifest = ToolManifest.load(self.manifest_path)
+        self.assertFalse(manifest.is_current('echotool', self.module_path))
+        manifest.update('echotool', self.module_path, [self.entry])
+        manifest.save()
+
+        loaded = ToolManifest.load(self.manifest_path)
+        self.assertTrue(loaded.is_current('echotool', self.module_path))
+        self.assertEqual(loaded.tools('echotool'), [self.entry])
+        self.assertFalse(loaded.dirty)
+
+    def test_touched_file_is_still_current(self):
+        """Test that a new mtime with the same contents does not force a reimport"""
+        manifest = ToolManifest(self.manifest_path)
+        manifest.update('echotool', self.module_path, [self.entry])
+        stat = os.stat(self.module_path)
+        os.utime(self.module_path, (stat.st_atime, stat.st_mtime + 10))
+
+        self.assertTrue(manifest.is_current('echotool', self.module_path))
+
+    def test_changed_file_is_stale(self):
+        """Test that edited tool files are detected"""
+        manifest = ToolManifest(self.manifest_path)
+        manifest.update('echotool', self.module_path, [self.entry])
+        self.module_path.write_text('# echo tool, edited\n')
+
+        self.assertFalse(manifest.is_current('echotool', self.module_path))
+
+    def test_invalid_manifest_starts_empty(self):
+        """Test that a corrupt manifest is ignored"""
+        self.manifest_path.write_text('{not json')
+        self.assertEqual(ToolManifest.load(self.manifest_path).modules, {})
+
+    def test_prune_removed_modules(self):
+        """Test that deleted tool modules are dropped"""
+        manifest = ToolManifest(self.manifest_path)
+        manifest.update('echotool', self.module_path, [self.entry])
+        manifest.prune(['othertool'])
+        self.assertEqual(manifest.modules, {})
+
+
+
+class TestReloadReport(unittest.TestCase):
+    def test_summary(self):
+        """Test the one-line description of a reload"""
+        self.assertEqual(ReloadReport().summary(), "No tool modules changed")
+        report = ReloadReport(added=['a'], removed=['b', 'c'])
+        self.assertTrue(report.changed)
+        self.assertEqual(report.summary(), "added: a; removed: b, c")
+
+
+if __name__ == '__main__':
+    unittest.main()
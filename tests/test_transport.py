@@ -0,0 +1,79 @@
+"""Tests for the shared HTTP transport."""
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from omni_core.transport import HTTPTransport, PoolStats, TransportConfig
+
+
+@pytest_asyncio.fixture
+async def local_server():
+    """Start a small local HTTP server for keep-alive tests."""
+    async def handler(request):
+        return web.json_response({"models": []})
+
+    app = web.Application()
+    app.router.add_get("/api/tags", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    await runner.cleanup()
+
+
+def test_config_from_env(monkeypatch):
+    """Test reading transport settings from the environment."""
+    monkeypatch.setenv("OMNI_HTTP_LIMIT_PER_HOST", "4")
+    monkeypatch.setenv("OMNI_HTTP_TIMEOUT", "none")
+    monkeypatch.setenv("OMNI_HTTP_KEEPALIVE", "not-a-number")
+
+    config = TransportConfig.from_env()
+    assert config.limit_per_host == 4
+    assert config.total_timeout is None
+    assert config.keepalive_timeout == TransportConfig().keepalive_timeout
+
+
+def test_reuse_ratio():
+    """Test the reuse ratio calculation."""
+    assert PoolStats().reuse_ratio == 0.0
+    stats = PoolStats(connections_created=1, connections_reused=3)
+    assert stats.reuse_ratio == 0.75
+    assert stats.to_dict()["reuse_ratio"] == 0.75
+
+
+@pytest.mark.asyncio
+async def test_session_shared_within_loop():
+    """Test that callers on one loop share a session until it is closed."""
+    transport = HTTPTransport(TransportConfig())
+    first = await transport.session()
+    second = await transport.session()
+    assert first is second
+    assert transport.stats().sessions == 1
+
+    await transport.close()
+    assert first.closed
+    third = await transport.session()
+    assert third is not first
+    await transport.close()
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused(local_server):
+    """Test that sequential requests reuse one keep-alive connection."""
+    transport = HTTPTransport(TransportConfig(limit_per_host=2))
+    for _ in range(3):
+        session = await transport.session()
+        async with session.get(f"{local_server}/api/tags") as response:
+            assert response.status == 200
+            await response.json()
+
+    stats = transport.stats()
+    assert stats.requests == 3
+    assert stats.connections_created == 1
+    assert stats.connections_reused == 2
+    assert stats.idle_connections == 1
+    assert stats.open_connections == 1
+    await transport.close()
@@ -0,0 +1,117 @@
+import os
+import json
+import pickle
+import tempfile
+import time
+import unittest
+
+from omni_core.trigram import TrigramIndex, query_trigrams, required_literals, trigrams
+
+
+def write(root, path, data):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    mode = 'wb' if isinstance(data, bytes) else 'w'
+    with open(full, mode) as file:
+        file.write(data)
+    return full
+
+
+class TestQueryPlanning(unittest.TestCase):
+    def test_trigrams(self):
+        """Test that trigrams are lowercased and queries ignore line breaks"""
+        self.assertEqual(trigrams('AbCd'), {'abc', 'bcd'})
+        self.assertEqual(query_trigrams(['ab\ncdef']), {'cde', 'def'})
+
+    def test_required_literals(self):
+        """Test the literal runs extracted from regular expressions"""
+        self.assertEqual(required_literals(r'def\s+(foo|bar)_baz\w+'), ['def', '_baz'])
+        self.assertEqual(required_literals(r'class (Tool)+Base'), ['class ', 'Tool', 'Base'])
+        self.assertEqual(required_literals(r'(optional)?x'), ['x'])
+        self.assertEqual(required_literals('a.b(', regex=False), ['a.b('])
+        self.assertEqual(required_literals('(unbalanced'), [])
+
+
+class TestTrigramIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'repo')
+        self.index_dir = os.path.join(self.tmp.name, 'index')
+        write(self.root, 'app/main.py', 'import os\n\ndef handle_request(req):\n    return req\n')
+        write(self.root, 'app/util.py', 'def helper():\n    pass\n')
+        write(self.root, 'data.bin', b'\0handle_request')
+        write(self.root, '.gitignore', 'build/\n')
+        write(self.root, 'build/gen.py', 'def handle_request(): pass\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def index(self):
+        return TrigramIndex(self.root, index_dir=self.index_dir)
+
+    def test_literal_search_with_context(self):
+        """Test that literal hits carry line numbers and context"""
+        hits, stats = self.index().search('handle_request', context_lines=1)
+        self.assertEqual(len(hits), 1)
+        hit = hits[0]
+        self.assertEqual((hit.path, hit.line, hit.text), (os.path.join('app', 'main.py'), 3, 'def handle_request(req):'))
+        self.assertEqual(hit.before, [''])
+        self.assertEqual(hit.after, ['    return req'])
+        self.assertEqual(stats.candidates, 1)
+        self.assertEqual(stats.files_indexed, 3)  # .gitignore, main.py and util.py
+        self.assertEqual(stats.files_skipped, 1)  # data.bin
+
+    def test_regex_and_case(self):
+        """Test regular expression and case-insensitive queries"""
+        index = self.index()
+        hits, _ = index.search(r'^def \w+\(\):', regex=True)
+        self.assertEqual([hit.path for hit in hits], [os.path.join('app', 'util.py')])
+        self.assertEqual(index.search('DEF HELPER')[0], [])
+        self.assertEqual(len(index.search('DEF HELPER', case_sensitive=False)[0]), 1)
+        with self.assertRaises(ValueError):
+            index.search('(', regex=True)
+
+    def test_incremental_update(self):
+        """Test that only changed files are re-indexed and removals are dropped"""
+        index = self.index()
+        index.update()
+        path = os.path.join(self.root, 'app', 'util.py')
+        write(self.root, 'app/util.py', 'def helper():\n    return handle_request(None)\n')
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        os.remove(os.path.join(self.root, 'app', 'main.py'))
+        hits, stats = index.search('handle_request')
+        self.assertEqual(stats.files_updated, 1)
+        self.assertEqual(stats.files_removed, 1)
+        self.assertEqual([(hit.path, hit.line) for hit in hits], [(os.path.join('app', 'util.py'), 2)])
+
+    def test_persisted_index_is_reused(self):
+        """Test that a saved index is loaded instead of rebuilt"""
+        self.index().search('helper')
+        hits, stats = self.index().search('helper')
+        self.assertEqual(stats.files_updated, 0)
+        self.assertEqual(len(hits), 1)
+
+    def test_persisted_index_is_json(self):
+        """Test that the index is saved as JSON and an old pickled index is removed unread"""
+        index = self.index()
+        index.search('helper')
+        legacy = index.index_path[:-len('.json')] + '.idx'
+        with open(legacy, 'wb') as file:
+            pickle.dump({'format': 1}, file)
+        with open(index.index_path, encoding='utf-8') as file:
+            self.assertEqual(json.load(file)['root'], index.root)
+        reopened = self.index()
+        self.assertFalse(os.path.exists(legacy))
+        self.assertEqual(reopened.postings, index.postings)
+        self.assertEqual(reopened.files, index.files)
+
+    def test_max_results(self):
+        """Test that searches stop at max_results"""
+        write(self.root, 'many.py', 'x = 1\n' * 20)
+        hits, stats = self.index().search('x = 1', max_results=5)
+        self.assertEqual(len(hits), 5)
+        self.assertTrue(stats.truncated)
+
+
+if __name__ == '__main__':
+    unittest.main()
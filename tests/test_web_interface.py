@@ -1,3 +1,4 @@
+import json
 import unittest
 from unittest.mock import patch, MagicMock
 from flask import url_for
@@ -294,5 +295,58 @@ class TestWebInterface(unittest.TestCase):
         self.assertFalse(response.json['success'])
         self.assertIn('error', response.json)
 
+    def test_chat_stream_route(self):
+        """Test streaming chat route emits server-sent events."""
+        with self.client.session_transaction() as session:
+            session['current_model'] = 'lbl/cborg-coder:latest'
+
+        events = [
+            {'type': 'token', 'content': 'Hel'},
+            {'type': 'tool', 'name': 'mock_tool'},
+            {'type': 'token', 'content': 'lo'}
+        ]
+        with patch('app.Assistant') as mock_class:
+            mock_assistant = MagicMock()
+            mock_assistant.provider = 'cborg'
+            mock_assistant.chat_stream.return_value = iter(events)
+            mock_class.return_value = mock_assistant
+
+            response = self.client.post('/chat/stream', json={'message': 'Hi'})
+            body = response.get_data(as_text=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        payloads = [
+            json.loads(chunk[len('data: '):])
+            for chunk in body.split('\n\n') if chunk
+        ]
+        self.assertEqual(payloads, events + [{'type': 'done'}])
+        mock_assistant.chat_stream.assert_called_once_with('Hi')
+
+    def test_sessions_get_separate_assistants(self):
+        """Test that each browser session chats with its own assistant."""
+        with patch('app.Assistant') as mock_class:
+            first, second = MagicMock(provider='cborg'), MagicMock(provider='cborg')
+            first.chat.return_value = 'first'
+            second.chat.return_value = 'second'
+            mock_class.side_effect = [first, second]
+
+            other_client = app.test_client()
+            for client in (self.client, other_client):
+                with client.session_transaction() as session:
+                    session['current_model'] = 'lbl/cborg-coder:latest'
+
+            self.assertEqual(self.client.post('/chat', json={'message': 'a'}).json['response'], 'first')
+            self.assertEqual(other_client.post('/chat', json={'message': 'b'}).json['response'], 'second')
+            self.assertEqual(self.client.post('/chat', json={'message': 'c'}).json['response'], 'first')
+
+        self.assertEqual(mock_class.call_count, 2)
+        self.assertEqual(first.chat.call_count, 2)
+
+    def test_chat_stream_requires_message(self):
+        """Test streaming chat route rejects empty requests."""
+        response = self.client.post('/chat/stream', json={})
+        self.assertEqual(response.status_code, 400)
+
 if __name__ == '__main__':
     unittest.main()
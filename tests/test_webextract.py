@@ -0,0 +1,66 @@
+import unittest
+
+from omni_core.webextract import detect_encoding, extract_page
+
+PAGE = '''<!DOCTYPE html>
+<html><head><title> Guide </title><meta name="description" content="How to use it"></head>
+<body>
+<header><a href="/">Home</a></header>
+<nav><ul><li>Menu entry</li></ul></nav>
+<div class="sidebar">Related links</div>
+<main>
+  <h1>Install</h1>
+  <!-- build note -->
+  <p>Run <code>pip install tool</code> then see <a href="setup.html">setup</a>.</p>
+  <div class="ad-slot">Buy now</div>
+  <div style="display: none">Hidden text</div>
+  <ul><li>First <span class="hl">step</span></li><li>Second step</li></ul>
+  <div class="download-header"><p>Downloads</p></div>
+  <script>track()</script>
+</main>
+<footer>Copyright</footer>
+</body></html>'''
+
+
+class TestWebExtract(unittest.TestCase):
+    def test_main_content_as_markdown(self):
+        """Test that the main container is kept once, as markdown, without page furniture"""
+        page = extract_page(PAGE.encode('utf-8'), url='https://example.com/docs/')
+        self.assertEqual(page.title, 'Guide')
+        self.assertEqual(page.description, 'How to use it')
+        self.assertIn('# Install', page.content)
+        self.assertIn('`pip install tool`', page.content)
+        self.assertIn('[setup](https://example.com/docs/setup.html)', page.content)
+        self.assertIn('- First step\n- Second step', page.content)
+        self.assertIn('Downloads', page.content)
+        for junk in ('Home', 'Menu entry', 'Related links', 'Buy now', 'Hidden text', 'track', 'build note', 'Copyright'):
+            self.assertNotIn(junk, page.content)
+        self.assertEqual(page.content.count('Second step'), 1)
+        self.assertTrue(page.render().startswith('Title: Guide\n\nDescription: How to use it\n\nContent:\n\n# Install'))
+
+    def test_readability_fallback_and_limit(self):
+        """Test pages without a main container, and cutting the content at the character limit"""
+        article = ''.join(f'<p>Paragraph {i} explains one more detail of the topic at length.</p>' for i in range(50))
+        html = f'<html><body><div class="links"><a href="/a">A</a> <a href="/b">B</a></div><div>{article}</div></body></html>'
+        page = extract_page(html)
+        self.assertIn('Paragraph 49', page.content)
+        self.assertFalse(page.truncated)
+
+        page = extract_page(html, max_chars=300)
+        self.assertTrue(page.truncated)
+        self.assertIn('Paragraph 0', page.content)
+        self.assertNotIn('Paragraph 10', page.content)
+        self.assertIn('only its beginning is shown', page.render())
+
+    def test_encoding(self):
+        """Test charset detection from the header, BOM and meta tag"""
+        latin = '<html><head><meta charset="iso-8859-1"></head><body><p>Café</p></body></html>'.encode('latin-1')
+        self.assertEqual(detect_encoding(latin), 'iso-8859-1')
+        self.assertEqual(detect_encoding(latin, 'text/html; charset=UTF-8'), 'UTF-8')
+        self.assertEqual(detect_encoding(b'\xef\xbb\xbf<p>x</p>'), 'utf-8-sig')
+        self.assertIn('Café', extract_page(latin).content)
+        self.assertEqual(extract_page(b'').content, '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,282 @@
+# tool_registry.py
+"""
+Name-indexed registry of loaded tools.
+
+The Assistant fills a registry once when it loads the tools directory.
+Dispatching a tool call is then a dictionary lookup instead of a scan over
+every tool module. The registry also keeps per-tool dispatch timings.
+
+Tools described by the persisted ToolManifest are registered lazily: their
+module is imported and the tool constructed on first use.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from tools.base import BaseTool
+
+
+@dataclass
+class DispatchStats:
+    """Timing of the calls made to one tool"""
+    calls: int = 0
+    errors: int = 0
+    lookup_seconds: float = 0.0  # Total time spent finding the tool
+    execute_seconds: float = 0.0  # Total time spent running the tool
+    max_execute_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['mean_lookup_us'] = round(self.lookup_seconds / self.calls * 1e6, 2) if self.calls else 0.0
+        data['mean_execute_ms'] = round(self.execute_seconds / self.calls * 1e3, 2) if self.calls else 0.0
+        return data
+
+
+class ToolRegistry:
+    """
+    Maps tool names to tool instances and holds the specs sent to the model.
+    Registries are shared between Assistants of the same provider, so the
+    timing counters are updated under a lock.
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, Optional[BaseTool]] = {}
+        self._loaders: Dict[str, Callable[[], BaseTool]] = {}
+        self._modules: Dict[str, str] = {}
+        self._descriptions: Dict[str, str] = {}
+        self._read_only: Dict[str, bool] = {}
+        self._stats: Dict[str, DispatchStats] = {}
+        self._lock = threading.Lock()
+        self.specs: List[Dict[str, Any]] = []
+        self.module_hashes: Dict[str, str] = {}  # Tool module name -> file hash it was loaded from
+
+    def register(self, tool: BaseTool, spec: Dict[str, Any], module_name: Optional[str] = None) -> None:
+        """Add a tool instance and the spec describing it to the model."""
+        if tool.name in self._tools:
+            # Keep the first definition, as the module scan used to
+            return
+        self._tools[tool.name] = tool
+        self._modules[tool.name] = module_name or type(tool).__module__
+        self._descriptions[tool.name] = tool.description or ''
+        self._read_only[tool.name] = bool(getattr(tool, 'read_only', False))
+        self.specs.append(spec)
+
+    def register_lazy(
+        self,
+        name: str,
+        description: str,
+        spec: Dict[str, Any],
+        module_name: str,
+        loader: Callable[[], BaseTool],
+        read_only: bool = False
+    ) -> None:
+        """
+        Add a tool that is only imported and constructed, by calling loader,
+        the first time it is dispatched. read_only is the tool's recorded flag.
+        """
+        if name in self._tools:
+            return
+        self._tools[name] = None
+        self._loaders[name] = loader
+        self._modules[name] = module_name
+        self._descriptions[name] = description or ''
+        self._read_only[name] = read_only
+        self.specs.append(spec)
+
+    def get(self, name: str) -> Optional[BaseTool]:
+        """
+        Return the tool registered under name, if any, loading it on first use.
+        Errors raised while importing the tool's module propagate.
+        """
+        tool = self._tools.get(name)
+        if tool is not None or name not in self._loaders:
+            return tool
+        with self._lock:
+            tool = self._tools.get(name)
+            if tool is None:
+                tool = self._loaders[name]()
+                self._tools[name] = tool
+                del self._loaders[name]
+            return tool
+
+    def is_loaded(self, name: str) -> bool:
+        """Return True if the tool has been imported and constructed."""
+        return self._tools.get(name) is not None
+
+    def description(self, name: str) -> Optional[str]:
+        """Return a tool's description without loading it."""
+        return self._descriptions.get(name)
+
+    def is_read_only(self, name: str) -> bool:
+        """Return True if the tool may run alongside other calls, without loading it."""
+        return self._read_only.get(name, False)
+
+    def loaded_tool(self, name: str) -> Optional[BaseTool]:
+        """Return the tool instance if it has already been constructed."""
+        return self._tools.get(name)
+
+    def module_of(self, name: str) -> Optional[str]:
+        """Return the module a tool was loaded from."""
+        return self._modules.get(name)
+
+    def names(self) -> List[str]:
+        """Return the registered tool names in load order."""
+        return list(self._tools)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def record(self, name: str, lookup_seconds: float, execute_seconds: float, error: bool = False) -> None:
+        """Record the timing of one dispatch."""
+        with self._lock:
+            stats = self._stats.setdefault(name, DispatchStats())
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.lookup_seconds += lookup_seconds
+            stats.execute_seconds += execute_seconds
+            stats.max_execute_seconds = max(stats.max_execute_seconds, execute_seconds)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the dispatch timings per tool."""
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._stats.items()}
+
+
+@dataclass
+class ReloadReport:
+    """Tool modules that changed between two loads of the tools directory"""
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    reused: int = 0  # Tool instances carried over from the previous registry
+    seconds: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+    def summary(self) -> str:
+        """Describe the changes in one line."""
+        parts = []
+        for label, modules in (('added', self.added), ('modified', self.modified), ('removed', self.removed)):
+            if modules:
+                parts.append(f"{label}: {', '.join(modules)}")
+        if not parts:
+            return "No tool modules changed"
+        return "; ".join(parts)
+
+
+class ToolManifest:
+    """
+    Persisted description of the tools in the tools directory.
+
+    For every tool module the manifest stores the file's size, mtime and
+    SHA-256 together with the name, description, input schema, class and
+    read_only flag of each tool it defines. A module whose file is unchanged does not have to
+    be imported to advertise its tools to the model.
+    """
+
+    VERSION = 2
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.modules: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> "ToolManifest":
+        """Read the manifest at path, starting empty if it is missing or invalid."""
+        manifest = cls(path)
+        try:
+            with open(manifest.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return manifest
+        except (OSError, ValueError) as e:
+            logging.error(f"Ignoring unreadable tool manifest {path}: {str(e)}")
+            return manifest
+        if data.get('version') == cls.VERSION and isinstance(data.get('modules'), dict):
+            manifest.modules = data['modules']
+        return manifest
+
+    def save(self) -> None:
+        """Write the manifest if it changed, replacing the file atomically."""
+        if not self.dirty:
+            return
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'modules': self.modules}, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except (OSError, TypeError, ValueError) as e:
+            logging.error(f"Could not write tool manifest {self.path}: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def file_hash(path: Path) -> str:
+        """Return the SHA-256 of a file's contents."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(65536), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def is_current(self, module_name: str, path: Path) -> bool:
+        """
+        Return True if the entry for module_name still describes the file at
+        path. Size and mtime are checked first; the file is only hashed when
+        they differ, so a touched but unchanged file stays current.
+        """
+        entry = self.modules.get(module_name)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+            return True
+        if entry.get('hash') != self.file_hash(path):
+            return False
+        entry['size'] = stat.st_size
+        entry['mtime'] = stat.st_mtime
+        self.dirty = True
+        return True
+
+    def update(self, module_name: str, path: Path, tools: List[Dict[str, Any]]) -> None:
+        """Record the tools found in the module at path."""
+        stat = os.stat(path)
+        self.modules[module_name] = {
+            'hash': self.file_hash(path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'tools': tools
+        }
+        self.dirty = True
+
+    def file_hash_of(self, module_name: str) -> Optional[str]:
+        """Return the recorded file hash of a module."""
+        return self.modules.get(module_name, {}).get('hash')
+
+    def tools(self, module_name: str) -> List[Dict[str, Any]]:
+        """Return the recorded tools of a module."""
+        return self.modules.get(module_name, {}).get('tools', [])
+
+    def prune(self, module_names: List[str]) -> None:
+        """Forget modules that are no longer in the tools directory."""
+        for name in list(self.modules):
+            if name not in module_names:
+                del self.modules[name]
+                self.dirty = True
@@ -1,6 +1,46 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+
+DEFAULT_TOOL_TIMEOUT = 120.0  # Seconds a tool may run before aexecute gives up
+TOOL_THREADS = int(os.getenv("OMNI_TOOL_THREADS", 8))  # Worker threads for synchronous tools
+
+_tool_executor: Optional[ThreadPoolExecutor] = None
+_tool_executor_lock = threading.Lock()
+_call_cancelled: ContextVar[Optional[threading.Event]] = ContextVar("call_cancelled", default=None)
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """
+    Return the thread pool synchronous tools run in.
+    It is separate from the event loop's default executor, so tools that
+    time out and keep running cannot starve the repo map or the scheduler.
+    """
+    global _tool_executor
+    with _tool_executor_lock:
+        if _tool_executor is None:
+            _tool_executor = ThreadPoolExecutor(max_workers=TOOL_THREADS, thread_name_prefix="tool")
+        return _tool_executor
+
+
+def call_cancelled() -> bool:
+    """
+    Return True once aexecute has given up on the tool call running in
+    this thread. Long-running synchronous tools can check it between steps
+    and stop early instead of finishing work nobody will see.
+    """
+    event = _call_cancelled.get()
+    return event is not None and event.is_set()
 
 @dataclass
 class ProviderContext:
@@ -29,6 +69,8 @@ class BaseTool(ABC):
     name: str = None
     description: str = None
     input_schema: Dict[str, Any] = None
+    read_only: bool = False  # True if the tool has no side effects and may run alongside other calls
+    timeout: Optional[float] = DEFAULT_TOOL_TIMEOUT  # Seconds aexecute waits for a result; None waits forever
     provider_context: Optional[ProviderContext] = None
 
     def __init__(self, provider_context: ProviderContext = None):
@@ -63,67 +105,151 @@ class BaseTool(ABC):
 
     def execute(self, **kwargs) -> Dict[str, Any]:
         """Execute the tool with the given arguments"""
-        import logging
         logging.debug(f"[{self.name}] Executing with parameters: {kwargs}")
+        start = time.perf_counter()
         try:
             self.validate_input(**kwargs)
             logging.debug(f"[{self.name}] Input validation passed")
             result = self._execute(**kwargs)
-            logging.debug(f"[{self.name}] Execution result: {result}")
-            
-            # Handle string responses
-            if isinstance(result, str):
-                result = {"response": result}
-            
-            # Ensure result has a response key
-            if "response" not in result:
-                raise ValueError("Tool response must contain a 'response' key")
-            
-            # Format response based on provider
-            if self.provider_context and self.provider_context.provider_type == "cborg":
-                formatted_result = {
-                    "choices": [{
-                        "message": {
-                            "role": "assistant",
-                            "content": result["response"],
-                            "tool_call_result": True
-                        }
-                    }]
-                }
-            else:  # Ollama format
-                formatted_result = {
-                    "response": result["response"],
-                    "tool_call_id": kwargs.get("tool_call_id", ""),
-                    "name": self.name
-                }
-            logging.debug(f"[{self.name}] Formatted result: {formatted_result}")
-            return formatted_result
-                
+            return self._format_result(result, kwargs, start)
+        except Exception as e:
+            return self._format_error(f"Tool execution failed: {str(e)}", kwargs, start)
+
+    async def aexecute(self, **kwargs) -> Dict[str, Any]:
+        """
+        Execute the tool without blocking the event loop.
+        Tools that override _aexecute run on the loop, others run _execute in
+        the tool thread pool. After timeout seconds an error result is
+        returned instead. Coroutines are cancelled, but a thread cannot be
+        stopped: a timed-out synchronous tool is abandoned and may still
+        finish, side effects included, unless it checks call_cancelled().
+        """
+        logging.debug(f"[{self.name}] Executing asynchronously with parameters: {kwargs}")
+        start = time.perf_counter()
+        cancelled = threading.Event()
+        token = _call_cancelled.set(cancelled)
+        try:
+            self.validate_input(**kwargs)
+            if self.timeout is None:
+                result = await self._aexecute(**kwargs)
+            else:
+                result = await asyncio.wait_for(self._aexecute(**kwargs), self.timeout)
+            return self._format_result(result, kwargs, start)
+        except asyncio.TimeoutError:
+            cancelled.set()
+            message = f"Tool timed out after {self.timeout:g} seconds"
+            if self._runs_in_thread():
+                message += "; it was abandoned and may still finish in the background"
+            return self._format_error(message, kwargs, start, timed_out=True)
         except Exception as e:
-            error_msg = f"Tool execution failed: {str(e)}"
-            logging.error(f"[{self.name}] {error_msg}")
-            if self.provider_context and self.provider_context.provider_type == "cborg":
-                error_result = {
-                    "choices": [{
-                        "message": {
-                            "role": "assistant",
-                            "content": error_msg,
-                            "tool_call_result": True,
-                            "error": True
-                        }
-                    }]
-                }
-            else:  # Ollama format
-                error_result = {
-                    "response": error_msg,
-                    "tool_call_id": kwargs.get("tool_call_id", ""),
-                    "name": self.name,
-                    "error": True
-                }
-            logging.debug(f"[{self.name}] Error result: {error_result}")
-            return error_result
+            return self._format_error(f"Tool execution failed: {str(e)}", kwargs, start)
+        finally:
+            _call_cancelled.reset(token)
+
+    async def _aexecute(self, **kwargs) -> Any:
+        """
+        Execute tool-specific logic asynchronously.
+        Runs _execute in the tool thread pool; I/O-bound tools override this
+        with a native coroutine so they can be cancelled cleanly.
+        """
+        if inspect.iscoroutinefunction(self._execute):
+            return await self._execute(**kwargs)
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()  # Lets the thread see call_cancelled()
+        return await loop.run_in_executor(
+            get_tool_executor(), functools.partial(context.run, self._execute, **kwargs)
+        )
+
+    def _runs_in_thread(self) -> bool:
+        """Whether aexecute runs this tool's _execute in a worker thread"""
+        return type(self)._aexecute is BaseTool._aexecute and not inspect.iscoroutinefunction(self._execute)
+
+    def _metadata(self, start: float, timed_out: bool = False) -> Dict[str, Any]:
+        """Timing information attached to every result"""
+        return {
+            "tool": self.name,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+            "timed_out": timed_out
+        }
+
+    def _format_result(self, result: Any, kwargs: Dict[str, Any], start: float) -> Dict[str, Any]:
+        """Wrap a tool result in the response format of the provider"""
+        logging.debug(f"[{self.name}] Execution result: {result}")
+        
+        # Handle string responses
+        if isinstance(result, str):
+            result = {"response": result}
+        
+        # Ensure result has a response key
+        if "response" not in result:
+            return self._format_error(
+                "Tool execution failed: Tool response must contain a 'response' key", kwargs, start
+            )
+        
+        # Format response based on provider
+        if self.provider_context and self.provider_context.provider_type == "cborg":
+            formatted_result = {
+                "choices": [{
+                    "message": {
+                        "role": "assistant",
+                        "content": result["response"],
+                        "tool_call_result": True
+                    }
+                }]
+            }
+        else:  # Ollama format
+            formatted_result = {
+                "response": result["response"],
+                "tool_call_id": kwargs.get("tool_call_id", ""),
+                "name": self.name
+            }
+        formatted_result["metadata"] = self._metadata(start)
+        logging.debug(f"[{self.name}] Formatted result: {formatted_result}")
+        return formatted_result
+
+    def _format_error(
+        self, error_msg: str, kwargs: Dict[str, Any], start: float, timed_out: bool = False
+    ) -> Dict[str, Any]:
+        """Wrap an error message in the response format of the provider"""
+        logging.error(f"[{self.name}] {error_msg}")
+        if self.provider_context and self.provider_context.provider_type == "cborg":
+            error_result = {
+                "choices": [{
+                    "message": {
+                        "role": "assistant",
+                        "content": error_msg,
+                        "tool_call_result": True,
+                        "error": True
+                    }
+                }]
+            }
+        else:  # Ollama format
+            error_result = {
+                "response": error_msg,
+                "tool_call_id": kwargs.get("tool_call_id", ""),
+                "name": self.name,
+                "error": True
+            }
+        error_result["metadata"] = self._metadata(start, timed_out)
+        logging.debug(f"[{self.name}] Error result: {error_result}")
+        return error_result
 
     @abstractmethod
     def _execute(self, **kwargs) -> Dict[str, Any]:
         """Execute tool-specific logic"""
         pass
+
+
+def unwrap_result(result: Any) -> Tuple[str, bool]:
+    """
+    Return the text and error flag of a result from execute or aexecute,
+    in either provider format.
+    """
+    if not isinstance(result, dict):
+        return str(result), False
+    if "choices" in result:
+        message = result["choices"][0]["message"]
+        return str(message.get("content", "")), bool(message.get("error"))
+    if "response" in result:
+        return str(result["response"]), bool(result.get("error"))
+    return str(result), False
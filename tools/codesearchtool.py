@@ -0,0 +1,98 @@
+from tools.base import BaseTool
+from tools import filecontentreadertool
+from omni_core.trigram import DEFAULT_INDEX_DIR, get_index
+import os
+import logging
+
+class CodeSearchTool(BaseTool):
+    name = "codesearchtool"
+    read_only = True
+    description = '''
+    Searches the text files of a directory for a literal string or a regular expression and returns
+    the matching lines as "path:line: text", with context lines as "path-line- text".
+    Uses a trigram index of the workspace that is kept up to date automatically, so searches take
+    milliseconds even on large repositories. Prefer this over reading whole directories to find where
+    a symbol is defined or used. Skips binary, ignored (.gitignore and common build/cache directories)
+    and very large files, like filecontentreadertool.
+    '''
+
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "pattern": {
+                "type": "string",
+                "description": "Text or regular expression to search for"
+            },
+            "path": {
+                "type": "string",
+                "description": "Directory to search (default: current directory)"
+            },
+            "regex": {
+                "type": "boolean",
+                "default": False,
+                "description": "Treat pattern as a Python regular expression"
+            },
+            "case_sensitive": {
+                "type": "boolean",
+                "default": True,
+                "description": "Match case"
+            },
+            "context_lines": {
+                "type": "integer",
+                "default": 2,
+                "description": "Lines of context shown before and after each match"
+            },
+            "max_results": {
+                "type": "integer",
+                "default": 50,
+                "description": "Maximum number of matching lines returned"
+            }
+        },
+        "required": ["pattern"]
+    }
+
+    MAX_CONTEXT_LINES = 10
+    MAX_RESULTS = 500
+    INDEX_DIR = DEFAULT_INDEX_DIR  # Where indexes persist between sessions
+
+    def _execute(self, **kwargs) -> str:
+        pattern = kwargs.get('pattern')
+        root = kwargs.get('path') or '.'
+        if not pattern:
+            return "Error: pattern must not be empty"
+        if not os.path.isdir(root):
+            return f"Error: Directory not found: {root}"
+
+        context_lines = min(max(int(kwargs.get('context_lines', 2)), 0), self.MAX_CONTEXT_LINES)
+        max_results = min(max(int(kwargs.get('max_results', 50)), 1), self.MAX_RESULTS)
+        # Same ignore rules as the file reader
+        skip = filecontentreadertool.FileContentReaderTool.skip_name
+        try:
+            hits, stats = get_index(root, skip=skip, index_dir=self.INDEX_DIR).search(
+                pattern,
+                regex=bool(kwargs.get('regex', False)),
+                case_sensitive=bool(kwargs.get('case_sensitive', True)),
+                context_lines=context_lines,
+                max_results=max_results
+            )
+        except ValueError as e:
+            return f"Error: {str(e)}"
+        logging.debug(f"[CodeSearchTool] {pattern!r} in {root}: {stats.to_dict()}")
+
+        if not hits:
+            return f"No matches for {pattern!r} in {stats.files_indexed} files"
+
+        blocks = []
+        for hit in hits:
+            path = os.path.join(root, hit.path)
+            first = hit.line - len(hit.before)
+            block = [f"{path}-{first + i}- {text}" for i, text in enumerate(hit.before)]
+            block.append(f"{path}:{hit.line}: {hit.text}")
+            block.extend(f"{path}-{hit.line + 1 + i}- {text}" for i, text in enumerate(hit.after))
+            blocks.append("\n".join(block))
+
+        summary = f"{stats.hits} matches in {stats.files_matched} files ({stats.files_indexed} files indexed)"
+        if stats.truncated:
+            summary += f"; stopped at max_results={max_results}"
+        separator = "\n--\n" if context_lines else "\n"
+        return f"{summary}\n{separator.join(blocks)}"
@@ -1,4 +1,6 @@
 from tools.base import BaseTool
+from omni_core.atomicfile import atomic_write
+from omni_core.diffs import DEFAULT_CONTEXT_LINES, unified_diff
 import os
 from typing import Dict
 
@@ -15,8 +17,9 @@ class DiffEditorTool(BaseTool):
     1. Read the file contents.
     2. Search for `old_text` within the file.
     3. If found, replace the first occurrence of `old_text` with `new_text`.
-    4. Write the modified content back to the file.
-    5. Return a success message if successful, or indicate that the old_text was not found.
+    4. Write the modified content back to the file atomically.
+    5. Return a unified diff of the change (with context_lines unchanged lines around it, default 3),
+       or indicate that the old_text was not found.
     '''
 
     input_schema = {
@@ -33,15 +36,23 @@ class DiffEditorTool(BaseTool):
             "new_text": {
                 "type": "string",
                 "description": "New substring that will replace old_text."
+            },
+            "context_lines": {
+                "type": "integer",
+                "default": DEFAULT_CONTEXT_LINES,
+                "description": "Unchanged lines shown around the change in the returned diff."
             }
         },
         "required": ["path", "old_text", "new_text"]
     }
 
+    MAX_CONTEXT_LINES = 20
+
     def _execute(self, **kwargs) -> str:
         path = kwargs.get("path")
         old_text = kwargs.get("old_text")
         new_text = kwargs.get("new_text")
+        context_lines = min(max(int(kwargs.get("context_lines", DEFAULT_CONTEXT_LINES)), 0), self.MAX_CONTEXT_LINES)
 
         # Check if file exists
         if not os.path.isfile(path):
@@ -65,9 +76,11 @@ class DiffEditorTool(BaseTool):
 
         # Write the updated content back to the file
         try:
-            with open(path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            atomic_write(path, new_content)
         except Exception as e:
             return f"Error writing updated content to file {path}: {str(e)}"
 
-        return f"Successfully replaced '{old_text}' with '{new_text}' in {path}."
+        diff = unified_diff(content, new_content, path, context_lines)
+        if not diff:
+            return f"No changes made to {path}: old_text and new_text are identical."
+        return f"Successfully replaced text in {path}:\n{diff}"
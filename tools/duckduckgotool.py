@@ -5,6 +5,7 @@ from urllib.parse import quote_plus
 
 class DuckduckgoTool(BaseTool):
     name = "duckduckgotool"
+    read_only = True
     description = '''
     Performs a search using DuckDuckGo and returns the top search results.
     Returns titles, snippets, and URLs of the search results.
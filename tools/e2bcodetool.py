@@ -8,6 +8,7 @@ import base64
 
 class E2bCodeTool(BaseTool):
     name = "e2bcodetool"
+    timeout = 300.0
     description = '''
     Executes Python code in a sandboxed environment using e2b-code-interpreter.
     Features:
@@ -87,8 +88,8 @@ class E2bCodeTool(BaseTool):
                         "stderr": ""
                     }, indent=2)
 
-            # Execute code
-            result = sandbox.run_code(code)
+            # Execute code, leaving time to download results before the tool deadline
+            result = sandbox.run_code(code, timeout=self.timeout * 0.9 if self.timeout else None)
             
             # Download requested files
             downloaded_files = {}
@@ -1,16 +1,29 @@
 from tools.base import BaseTool
+from omni_core.fswalk import SNIFF_BYTES, WalkStats, is_binary, iter_files, read_text, walk_files
+from omni_core.lineindex import read_bytes, read_lines
+from typing import Generator, Iterator, List, Optional, Tuple
+import io
 import os
 import json
-import mimetypes
+import logging
 
 class FileContentReaderTool(BaseTool):
     name = "filecontentreadertool"
+    read_only = True
     description = '''
     Reads content from multiple files and returns their contents.
     Accepts a list of file paths and returns a dictionary with file paths as keys
     and their content as values.
     Handles file reading errors gracefully with built-in Python exceptions.
-    When given a directory, recursively reads all text files while skipping binaries and common ignore patterns.
+    When given a directory, recursively reads all text files while skipping binaries, .gitignore'd files
+    and common ignore patterns. Large files and output beyond a total size cap are skipped; the "_summary"
+    entry reports how many files and bytes were read and skipped.
+    To page through large files, pass start_line/end_line (1-based, inclusive) or byte_offset/byte_length;
+    only that window of each listed file is returned, prefixed with the lines or bytes it covers.
+    Files too large to read whole return their first lines in the same way.
+    For large reads, set output_format to "text": files are returned one after another as a
+    "==> path <==" line and the raw content, optionally truncated per file (max_chars_per_file)
+    and within a total budget (max_total_chars).
     '''
     
     # Files and directories to ignore
@@ -48,94 +61,193 @@ class FileContentReaderTool(BaseTool):
                     "type": "string"
                 },
                 "description": "List of file paths to read"
+            },
+            "start_line": {
+                "type": "integer",
+                "description": "First line to read from each file (1-based)"
+            },
+            "end_line": {
+                "type": "integer",
+                "description": "Last line to read from each file (inclusive)"
+            },
+            "byte_offset": {
+                "type": "integer",
+                "description": "Byte offset to start reading each file at"
+            },
+            "byte_length": {
+                "type": "integer",
+                "description": "Number of bytes to read from each file"
+            },
+            "output_format": {
+                "type": "string",
+                "enum": ["json", "text"],
+                "default": "json",
+                "description": "json: an object of path to content; text: each file as a '==> path <==' line followed by its raw content, which costs fewer tokens"
+            },
+            "max_chars_per_file": {
+                "type": "integer",
+                "description": "Text format only: truncate each file's content to this many characters"
+            },
+            "max_total_chars": {
+                "type": "integer",
+                "description": "Text format only: stop adding files once the output would exceed this many characters"
             }
         },
         "required": ["file_paths"]
     }
 
-    def _should_skip(self, path: str) -> bool:
-        """Determine if a file or directory should be skipped."""
-        name = os.path.basename(path)
+    # Size caps for what a single call returns
+    MAX_FILE_BYTES = 1024 * 1024
+    MAX_TOTAL_BYTES = 4 * 1024 * 1024
+    MAX_WORKERS = 8  # Threads reading files of a directory
+    MAX_WINDOW_BYTES = 256 * 1024  # Size cap of a ranged read
+
+    @classmethod
+    def skip_name(cls, name: str, is_dir: bool = False) -> bool:
+        """Determine if a file or directory name should be skipped."""
         ext = os.path.splitext(name)[1].lower()
 
         # Skip if name or extension matches ignore patterns
-        if name in self.IGNORE_PATTERNS or ext in self.IGNORE_PATTERNS:
+        if name in cls.IGNORE_PATTERNS or ext in cls.IGNORE_PATTERNS:
             return True
 
         # Skip hidden files/directories (starting with .)
-        if name.startswith('.'):
-            return True
-
-        # If it's a file, check if it's binary using mimetype
-        if os.path.isfile(path):
-            mime_type, _ = mimetypes.guess_type(path)
-            if mime_type and not mime_type.startswith('text/'):
-                return True
+        return name.startswith('.')
 
-        return False
+    def _should_skip(self, path: str) -> bool:
+        """Determine if a file or directory should be skipped."""
+        return self.skip_name(os.path.basename(path))
 
     def _read_file(self, file_path: str) -> str:
         """Safely read a file and handle errors."""
-        try:
-            if not os.path.exists(file_path):
-                return "Error: File not found"
-
-            if self._should_skip(file_path):
-                return "Skipped: Binary or ignored file type"
+        if not os.path.exists(file_path):
+            return "Error: File not found"
 
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+        if self._should_skip(file_path):
+            return "Skipped: Binary or ignored file type"
 
-        except PermissionError:
-            return "Error: Permission denied"
-        except IsADirectoryError:
-            return "Error: Path is a directory"
-        except UnicodeDecodeError:
+        # Binary files are detected from their first bytes, not their extension
+        text, status = read_text(file_path, self.MAX_FILE_BYTES)
+        if status == "ok":
+            return text
+        if status == "binary":
             return "Error: Unable to decode file (likely binary)"
-        except Exception as e:
+        if status == "too_large":
+            # Return the first lines rather than nothing
+            return self._read_window(file_path, start_line=1)
+        return status
+
+    def _read_window(self, file_path: str, start_line: Optional[int] = None, end_line: Optional[int] = None,
+                     byte_offset: Optional[int] = None, byte_length: Optional[int] = None) -> str:
+        """Read a line or byte range of a file without loading the rest of it."""
+        if not os.path.isfile(file_path):
+            return "Error: File not found"
+        try:
+            with open(file_path, 'rb') as file:
+                if is_binary(file.read(SNIFF_BYTES)):
+                    return "Error: Unable to decode file (likely binary)"
+            if byte_offset is not None or byte_length is not None:
+                window = read_bytes(file_path, byte_offset or 0, byte_length, max_bytes=self.MAX_WINDOW_BYTES)
+            else:
+                window = read_lines(file_path, start_line or 1, end_line, max_bytes=self.MAX_WINDOW_BYTES)
+        except ValueError as e:
             return f"Error: {str(e)}"
-
-    def _read_directory(self, dir_path: str) -> dict:
-        """Recursively read all files in a directory."""
-        results = {}
-
+        except OSError as e:
+            return f"Error: {str(e)}"
+        header = window.header()
+        if window.start_line and window.end_line < window.total_lines:
+            header += f" use start_line={window.end_line + 1} to continue"
+        return f"{header}\n{window.text}"
+
+    def _iter_directory(self, dir_path: str, stats: WalkStats) -> Iterator[Tuple[str, str]]:
+        """
+        Recursively read the text files in a directory, honouring .gitignore
+        and IGNORE_PATTERNS, within MAX_FILE_BYTES and MAX_TOTAL_BYTES.
+        Files are yielded as they are read.
+        """
         try:
-            for root, dirs, files in os.walk(dir_path):
-                # Filter out directories to skip
-                dirs[:] = [d for d in dirs if not self._should_skip(os.path.join(root, d))]
-
-                # Process files
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    if not self._should_skip(file_path):
-                        content = self._read_file(file_path)
-                        results[file_path] = content
-
+            files = walk_files(dir_path, skip=self.skip_name, stats=stats)
+            yield from iter_files(
+                files,
+                max_file_bytes=self.MAX_FILE_BYTES,
+                max_total_bytes=max(self.MAX_TOTAL_BYTES - stats.bytes_read, 0),
+                workers=self.MAX_WORKERS,
+                stats=stats
+            )
         except Exception as e:
-            results[dir_path] = f"Error reading directory: {str(e)}"
-
-        return results
+            yield dir_path, f"Error reading directory: {str(e)}"
+
+    def _read_directory(self, dir_path: str, stats: Optional[WalkStats] = None) -> dict:
+        """Read the text files in a directory into a dictionary."""
+        return dict(self._iter_directory(dir_path, stats if stats is not None else WalkStats()))
+
+    def _iter_results(self, file_paths: List[str], window: dict, stats: WalkStats) -> Generator[Tuple[str, str], None, None]:
+        """Yield (path, content or error) for every file to return, one at a time."""
+        ranged = any(value is not None for value in window.values())
+        for path in file_paths:
+            if os.path.isdir(path):
+                # If it's a directory, read it recursively; the caps span all directories
+                yield from self._iter_directory(path, stats)
+            elif ranged:
+                # Only the requested window of the file is read
+                yield path, self._read_window(path, **window)
+            else:
+                # If it's a file, read it directly
+                yield path, self._read_file(path)
+
+    def _write_text(self, results: Generator[Tuple[str, str], None, None], out: io.StringIO,
+                    max_chars_per_file: Optional[int], max_total_chars: Optional[int]) -> bool:
+        """
+        Write results in the compact text framing, a header line per file
+        followed by its raw content. Returns whether output stopped at
+        max_total_chars; the files after that point are not read.
+        """
+        written = 0
+        for path, content in results:
+            if max_chars_per_file is not None and len(content) > max_chars_per_file:
+                # Say where to resume with a ranged read
+                next_line = content.count("\n", 0, max_chars_per_file) + 1
+                content = (
+                    f"{content[:max_chars_per_file]}\n"
+                    f"[truncated {len(content) - max_chars_per_file} characters; use start_line={next_line} to continue]"
+                )
+            block = f"==> {path} <==\n{content}" + ("" if content.endswith("\n") else "\n")
+            if max_total_chars is not None and written + len(block) > max_total_chars:
+                results.close()  # Stop reading ahead
+                return True
+            out.write(block)
+            written += len(block)
+        return False
 
     def _execute(self, **kwargs) -> str:
-        import logging
         logging.debug(f"[FileContentReaderTool] Raw kwargs: {kwargs}")
         file_paths = kwargs.get('file_paths', [])
         logging.debug(f"[FileContentReaderTool] Extracted file_paths: {file_paths}")
-        results = {}
+        window = {key: kwargs.get(key) for key in ('start_line', 'end_line', 'byte_offset', 'byte_length')}
+        stats = WalkStats()
+        read_directory = any(os.path.isdir(path) for path in file_paths)
+        results = self._iter_results(file_paths, window, stats)
 
         try:
-            for path in file_paths:
-                if os.path.isdir(path):
-                    # If it's a directory, read it recursively
-                    dir_results = self._read_directory(path)
-                    results.update(dir_results)
-                else:
-                    # If it's a file, read it directly
-                    content = self._read_file(path)
-                    results[path] = content
+            if kwargs.get('output_format') == 'text':
+                out = io.StringIO()
+                over_budget = self._write_text(
+                    results, out, kwargs.get('max_chars_per_file'), kwargs.get('max_total_chars')
+                )
+                if read_directory or over_budget:
+                    # Report what was left out
+                    summary = stats.to_dict()
+                    summary['stopped_at_max_total_chars'] = over_budget
+                    out.write("==> _summary <==\n" + " ".join(f"{key}={value}" for key, value in summary.items()) + "\n")
+                return out.getvalue()
+
+            results = dict(results)
+            if read_directory:
+                # Report what the directory reads left out
+                results["_summary"] = stats.to_dict()
 
             return json.dumps(results, indent=2)
 
         except Exception as e:
             logging.error(f"[FileContentReaderTool] Error in _execute: {e}")
-            return json.dumps({"error": str(e)}, indent=2)
\ No newline at end of file
+            return json.dumps({"error": str(e)}, indent=2)
@@ -1,4 +1,7 @@
 from tools.base import BaseTool
+from omni_core.atomicfile import atomic_write
+from omni_core.diffs import DEFAULT_CONTEXT_LINES, unified_diff
+from omni_core.lineindex import line_index, read_lines, splice_lines
 import os
 import re
 
@@ -22,6 +25,9 @@ class FileEditTool(BaseTool):
         "new_content": "print('Hello world')"
     }
 
+    The result is a unified diff of the change, not the whole file. Use context_lines
+    to choose how many unchanged lines surround each change (default 3).
+
     For partial edits, additional parameters:
     - start_line & end_line: Edit specific lines
     - search_pattern & replacement_text: Find and replace text
@@ -44,53 +50,73 @@ class FileEditTool(BaseTool):
             "start_line": {"type": "integer", "description": "Starting line number for partial edits"},
             "end_line": {"type": "integer", "description": "Ending line number for partial edits"},
             "search_pattern": {"type": "string", "description": "Pattern to search for in partial edits"},
-            "replacement_text": {"type": "string", "description": "Text to replace matched patterns"}
+            "replacement_text": {"type": "string", "description": "Text to replace matched patterns"},
+            "context_lines": {"type": "integer", "default": DEFAULT_CONTEXT_LINES, "description": "Unchanged lines shown around each change in the returned diff"}
         },
         "required": ["file_path", "edit_type", "new_content"]
     }
 
+    MAX_CONTEXT_LINES = 20
+
     def _execute(self, **kwargs) -> str:
         file_path = kwargs.get('file_path')
         edit_type = kwargs.get('edit_type')
         new_content = kwargs.get('new_content')
+        context_lines = min(max(int(kwargs.get('context_lines', DEFAULT_CONTEXT_LINES)), 0), self.MAX_CONTEXT_LINES)
         
         try:
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"File not found: {file_path}")
 
+            start_line = kwargs.get('start_line')
+            end_line = kwargs.get('end_line')
+            if edit_type != "full" and start_line is not None and end_line is not None:
+                # Line edits splice the file without loading all of it
+                return self._edit_by_lines(file_path, start_line, end_line, new_content, context_lines)
+
             with open(file_path, 'r', encoding='utf-8') as file:
                 original_content = file.read()
-                lines = original_content.splitlines()
 
             if edit_type == "full":
                 updated_content = new_content
             else:
-                start_line = kwargs.get('start_line')
-                end_line = kwargs.get('end_line')
                 search_pattern = kwargs.get('search_pattern')
                 replacement_text = kwargs.get('replacement_text')
 
-                if start_line is not None and end_line is not None:
-                    updated_content = self._edit_by_lines(lines, start_line, end_line, new_content)
-                elif search_pattern and replacement_text:
+                if search_pattern and replacement_text:
                     updated_content = self._find_and_replace(original_content, search_pattern, replacement_text)
                 else:
                     raise ValueError("Invalid partial edit parameters")
 
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(updated_content)
-
-            return f"File successfully updated: {file_path}\n{updated_content}"
+            diff = unified_diff(original_content, updated_content, file_path, context_lines)
+            if not diff:
+                return f"No changes made to {file_path}"
+            atomic_write(file_path, updated_content)
+            return f"File successfully updated: {file_path}\n{diff}"
 
         except Exception as e:
             return f"Error editing file: {str(e)}"
 
-    def _edit_by_lines(self, lines: list, start_line: int, end_line: int, new_content: str) -> str:
-        if start_line < 1 or end_line > len(lines) or start_line > end_line:
-            raise ValueError("Invalid line numbers")
+    def _edit_by_lines(self, file_path: str, start_line: int, end_line: int, new_content: str,
+                       context_lines: int = DEFAULT_CONTEXT_LINES) -> str:
+        """Replace a line range and return a diff of the lines around it rather than the whole file."""
+        first = max(start_line - context_lines, 1)
+        before = self._lines_text(file_path, first, end_line + context_lines)
+        new_first, new_last = splice_lines(file_path, start_line, end_line, new_content)
+        after = self._lines_text(file_path, first, max(new_last, new_first - 1) + context_lines)
+        diff = unified_diff(before, after, file_path, context_lines, start_line=first)
+        if not diff:
+            return f"No changes made to {file_path}"
+        return f"File successfully updated: {file_path}\n{diff}"
 
-        lines[start_line-1:end_line] = new_content.splitlines()
-        return '\n'.join(lines)
+    @staticmethod
+    def _lines_text(file_path: str, first: int, last: int) -> str:
+        """Return lines first..last of a file, clamped to its length, without a size cap."""
+        index = line_index(file_path)
+        last = min(last, index.line_count)
+        if first > last:
+            return ""
+        return read_lines(file_path, first, last, max_bytes=index.size).text
 
     def _find_and_replace(self, content: str, pattern: str, replacement: str) -> str:
         try:
@@ -5,6 +5,7 @@ import json
 
 class LintingTool(BaseTool):
     name = "lintingtool"
+    timeout = 300.0  # Also ends watch mode
     description = '''
     Runs the Ruff linter on the given Python files or directories to detect and fix coding style or syntax issues.
     Supports configurable rule selection, automatic fixes, unsafe fixes, adding noqa directives, and watch mode.
@@ -103,8 +104,16 @@ class LintingTool(BaseTool):
                 cmd,
                 text=True,
                 capture_output=True,
-                check=False
+                check=False,
+                # Stop before the tool deadline so the output so far is returned
+                timeout=self.timeout * 0.9 if self.timeout else None
             )
             return result.stdout + result.stderr
+        except subprocess.TimeoutExpired as e:
+            output = "".join(
+                part.decode(errors="replace") if isinstance(part, bytes) else part
+                for part in (e.stdout, e.stderr) if part
+            )
+            return f"{output}\nruff check stopped after {e.timeout:g} seconds"
         except Exception as e:
             return f"Error running ruff check: {str(e)}"
@@ -0,0 +1,60 @@
+from tools.base import BaseTool
+from omni_core.patch import apply_patch, edits_to_patches, parse_patch
+import logging
+
+class PatchTool(BaseTool):
+    name = "patchtool"
+    description = '''
+    Applies changes to several files in one call, all or nothing. Provide either:
+    - patch: a unified diff covering any number of files ("--- a/path", "+++ b/path", "@@ ... @@" hunks).
+      Use "--- /dev/null" to create a file and "+++ /dev/null" to delete one.
+    - edits: a list of {"path", "old_text", "new_text"} replacements; each old_text must occur
+      exactly once in its file.
+
+    Every hunk is checked before anything is written. If any hunk does not apply, no file is
+    changed and the result says which hunks failed and why, so they can be fixed and the whole
+    patch resent. Set dry_run to only check the patch.
+    '''
+
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "patch": {
+                "type": "string",
+                "description": "Unified diff to apply"
+            },
+            "edits": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "path": {"type": "string"},
+                        "old_text": {"type": "string"},
+                        "new_text": {"type": "string"}
+                    },
+                    "required": ["path", "old_text", "new_text"]
+                },
+                "description": "Replacements across files, used instead of patch"
+            },
+            "dry_run": {
+                "type": "boolean",
+                "default": False,
+                "description": "Check the patch without writing any file"
+            }
+        }
+    }
+
+    def _execute(self, **kwargs) -> str:
+        patch = kwargs.get('patch')
+        edits = kwargs.get('edits')
+        if bool(patch) == bool(edits):
+            return "Error: Provide either patch or edits"
+
+        try:
+            patches = parse_patch(patch) if patch else edits_to_patches(edits)
+        except (KeyError, TypeError, ValueError) as e:
+            return f"Error: Invalid patch: {str(e)}"
+
+        result = apply_patch(patches, dry_run=bool(kwargs.get('dry_run')))
+        logging.debug(f"[PatchTool] {len(result.hunks)} hunks, applied={result.applied}")
+        return result.summary()
@@ -0,0 +1,56 @@
+from tools.base import BaseTool
+from tools import filecontentreadertool
+from omni_core.repomap import get_repo_map
+import os
+import logging
+
+class RepoMapTool(BaseTool):
+    name = "repomaptool"
+    read_only = True
+    description = '''
+    Returns a compact outline of the Python classes, functions, methods and constants in a directory,
+    most referenced first, cut to fit a token budget. Use it to get an overview of a codebase and find
+    where things are defined before reading specific files. Pass focus_files to rank the code around
+    the files you are working on higher.
+    '''
+
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "path": {
+                "type": "string",
+                "description": "Directory to map (default: current directory)"
+            },
+            "max_tokens": {
+                "type": "integer",
+                "default": 1024,
+                "description": "Approximate size limit of the outline in tokens"
+            },
+            "focus_files": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Files whose related symbols should rank higher"
+            }
+        }
+    }
+
+    MAX_TOKENS = 8192
+
+    def _execute(self, **kwargs) -> str:
+        root = kwargs.get('path') or '.'
+        if not os.path.isdir(root):
+            return f"Error: Directory not found: {root}"
+        max_tokens = min(max(int(kwargs.get('max_tokens', 1024)), 1), self.MAX_TOKENS)
+        # Focus files may be given relative to the working directory or to path
+        focus = [
+            os.path.abspath(path) if os.path.exists(path) else path
+            for path in kwargs.get('focus_files') or []
+        ]
+
+        # Same ignore rules as the file reader
+        repo_map = get_repo_map(root, skip=filecontentreadertool.FileContentReaderTool.skip_name)
+        outline = repo_map.outline(max_tokens, focus=focus or None)
+        logging.debug(f"[RepoMapTool] {len(repo_map.files)} files mapped in {root}")
+        if not outline:
+            return f"No Python definitions found in {root}"
+        return outline
@@ -14,6 +14,7 @@ except ImportError as e:
 
 class ScreenshotTool(BaseTool):
     name = "screenshottool"
+    read_only = True
     description = '''
     Captures a screenshot of the current screen and returns an image block ready to be sent to Claude.
     Optionally, a specific region of the screen can be captured by providing coordinates.
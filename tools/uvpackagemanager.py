@@ -7,6 +7,7 @@ from tools.base import BaseTool
 
 class UVPackageManager(BaseTool):
     name = "uvpackagemanager"
+    timeout = 600.0  # Installs can be slow
     description = '''
     Comprehensive interface to the uv package manager providing package management,
     project management, Python version management, tool management, and script support.
@@ -83,11 +84,14 @@ class UVPackageManager(BaseTool):
                 ["uv"] + args,
                 capture_output=True,
                 text=True,
-                check=True
+                check=True,
+                timeout=self.timeout
             )
             return result.stdout
         except subprocess.CalledProcessError as e:
             raise Exception(f"UV command failed: {e.stderr}")
+        except subprocess.TimeoutExpired:
+            raise Exception(f"UV command timed out after {self.timeout:g} seconds")
 
     def _install_packages(self, packages: List[str], requirements_file: Optional[str], global_install: bool) -> str:
         args = ["pip", "install"]
@@ -1,15 +1,26 @@
 from tools.base import BaseTool
+from omni_core.crawl import MAX_DEPTH, MAX_PAGES, MIN_PAGE_CHARS, USER_AGENT, crawl
+from omni_core.httpcache import DEFAULT_CACHE_DIR, get_cache
+from omni_core.webextract import DEFAULT_MAX_CHARS, extract_page
+import aiohttp
+import asyncio
 import requests
-from bs4 import BeautifulSoup, Comment
-import re
+import logging
+import os
 
 class WebScraperTool(BaseTool):
     name = "webscrapertool"
+    read_only = True
     description = '''
-    An enhanced web scraper that fetches a web page, extracts and returns its main textual content,
-    along with the page title and meta description if available. It attempts to identify the main
-    article content more intelligently, remove navigational and advertising elements, and preserve
-    heading structure for context. Useful for obtaining cleaner, more relevant textual information.
+    An enhanced web scraper that fetches a web page, extracts and returns its main content as markdown,
+    along with the page title and meta description if available. It identifies the main article
+    content, removes navigational and advertising elements, and keeps headings, lists, links, code
+    and tables. Useful for obtaining cleaner, more relevant textual information.
+    Pages are cached; set refresh to check the site for a newer version of a page fetched recently.
+
+    To read several pages in one call, pass them as urls; they are fetched concurrently. Set depth
+    to also follow links on the same site, up to max_pages pages. Batches respect robots.txt, and
+    duplicate pages (same URL or near-identical content) are reported once.
     '''
 
     input_schema = {
@@ -18,105 +29,97 @@ class WebScraperTool(BaseTool):
             "url": {
                 "type": "string",
                 "description": "The URL of the webpage to scrape"
+            },
+            "urls": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Several webpages to scrape at once, or the starting pages of a crawl"
+            },
+            "depth": {
+                "type": "integer",
+                "default": 0,
+                "description": f"Link depth to follow from the given pages on the same site (at most {MAX_DEPTH})"
+            },
+            "max_pages": {
+                "type": "integer",
+                "default": 10,
+                "description": f"Most pages to fetch in a batch or crawl (at most {MAX_PAGES})"
+            },
+            "refresh": {
+                "type": "boolean",
+                "default": False,
+                "description": "Revalidate a cached copy of the page with the site"
             }
-        },
-        "required": ["url"]
+        }
     }
 
-    def _execute(self, **kwargs) -> str:
-        url = kwargs.get("url")
-
-        try:
-            headers = {
-                'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                               'AppleWebKit/537.36 (KHTML, like Gecko) '
-                               'Chrome/91.0.4472.124 Safari/537.36')
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Remove script, style, and other irrelevant elements
-            for elem in soup(["script", "style", "noscript", "iframe", "svg", "canvas", "object"]):
-                elem.decompose()
-
-            # Remove comments
-            for comment in soup.find_all(text=lambda text: isinstance(text, Comment)):
-                comment.extract()
-
-            # Identify main content container
-            main_container = (
-                soup.find('main') or
-                soup.find('article') or
-                soup.find(attrs={'id': re.compile(r'(main|content|article)', re.I)}) or
-                soup.find(attrs={'class': re.compile(r'(main|content|article)', re.I)})
-            )
-
-            # If no main-like container found, fallback to body or entire doc
-            if not main_container:
-                main_container = soup.find('body')
-            if not main_container:
-                main_container = soup
-
-            # Remove elements likely not part of main content
-            # including nav, footer, aside, forms, and common ad-based sections
-            for tag_name in ["nav", "footer", "aside", "form", "header"]:
-                for elem in main_container.find_all(tag_name):
-                    elem.decompose()
+    CACHE_DIR = DEFAULT_CACHE_DIR
+    MAX_BYTES = int(os.getenv("OMNI_SCRAPE_MAX_BYTES", 5 * 1024 * 1024))  # Longer pages are cut off
 
-            # Remove known ad or irrelevant containers by class or id hints
-            # E.g., "sidebar", "ad", "advertisement"
-            for elem in main_container.find_all(attrs={'class': re.compile(r'(sidebar|nav|menu|ad|advert)', re.I)}):
-                elem.decompose()
-            for elem in main_container.find_all(attrs={'id': re.compile(r'(sidebar|nav|menu|ad|advert)', re.I)}):
-                elem.decompose()
-
-            # Remove empty elements that are not headings or block-level content
-            for elem in main_container.find_all(lambda e: (e.name not in ['h1','h2','h3','h4','h5','h6','p','div','ul','ol','li','section','article','main'] and not e.get_text(strip=True))):
-                elem.decompose()
-
-            # Extract page title
-            title_elem = soup.find('title')
-            page_title = title_elem.get_text(strip=True) if title_elem else ''
-
-            # Extract meta description
-            meta_desc = ''
-            desc_tag = soup.find('meta', attrs={"name": "description"})
-            if desc_tag and desc_tag.get('content'):
-                meta_desc = desc_tag['content'].strip()
+    # Single pages are fetched as a browser; batches and crawls identify as
+    # crawl.USER_AGENT, the agent whose robots.txt rules they follow
+    HEADERS = {
+        'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                       'AppleWebKit/537.36 (KHTML, like Gecko) '
+                       'Chrome/91.0.4472.124 Safari/537.36')
+    }
 
-            # Convert main content to text
-            # We'll use get_text with a separator to maintain some structure
-            # but we need to carefully handle headings.
-            # Let's extract text in a structured way:
-            # We'll join block-level elements with newlines, and strip excess whitespace.
-            block_elements = ['p','h1','h2','h3','h4','h5','h6','li','section','article','main','div']
-            text_chunks = []
-            for elem in main_container.find_all(block_elements):
-                # Get the text, strip whitespace
-                block_text = elem.get_text(" ", strip=True)
-                if block_text:
-                    text_chunks.append(block_text)
+    @staticmethod
+    def _batch(kwargs) -> list:
+        """Return the URLs of a batch or crawl, or an empty list for a single page."""
+        urls = list(kwargs.get("urls") or [])
+        if kwargs.get("url") and (urls or kwargs.get("depth")):
+            urls.insert(0, kwargs["url"])
+        return urls
+
+    async def _crawl(self, urls: list, kwargs: dict, session=None) -> str:
+        max_pages = kwargs.get("max_pages") or 10
+        report = await crawl(
+            urls,
+            depth=kwargs.get("depth") or 0,
+            max_pages=max_pages,
+            session=session,
+            cache=get_cache(self.CACHE_DIR),
+            refresh=bool(kwargs.get("refresh")),
+            max_bytes=self.MAX_BYTES,
+            max_chars=max(DEFAULT_MAX_CHARS // min(max_pages, MAX_PAGES), MIN_PAGE_CHARS),
+            headers={'User-Agent': USER_AGENT},
+        )
+        logging.debug(f"[WebScraperTool] {report.summary()}")
+        return report.render()
+
+    async def _aexecute(self, **kwargs) -> str:
+        urls = self._batch(kwargs)
+        if not urls:
+            return await asyncio.to_thread(self._execute, **kwargs)
+        # Batches share the process-wide connection pool
+        return await self._crawl(urls, kwargs)
+
+    async def _crawl_with_session(self, urls: list, kwargs: dict) -> str:
+        async with aiohttp.ClientSession() as session:
+            return await self._crawl(urls, kwargs, session)
 
-            cleaned_text = "\n\n".join(text_chunks)
+    def _execute(self, **kwargs) -> str:
+        url = kwargs.get("url")
+        urls = self._batch(kwargs)
+        if urls:
+            return asyncio.run(self._crawl_with_session(urls, kwargs))
+        if not url:
+            return "Error: Provide url or urls"
 
-            if not cleaned_text.strip():
+        try:
+            # Repeated fetches are served or revalidated by the cache
+            cache = get_cache(self.CACHE_DIR)
+            response = cache.fetch(url, headers=self.HEADERS, timeout=10, refresh=bool(kwargs.get("refresh")),
+                                   max_bytes=self.MAX_BYTES)
+            logging.debug(f"[WebScraperTool] {url} from_cache={response.from_cache} {cache.stats.to_dict()}")
+
+            page = extract_page(response.content, url=url, content_type=response.headers.get("content-type", ""),
+                                truncated=response.truncated)
+            if not page.content.strip():
                 # If no text found, return a default message
                 return "No readable content found on the webpage."
-
-            # Construct final output
-            output_parts = []
-            if page_title:
-                output_parts.append(f"Title: {page_title}")
-            if meta_desc:
-                output_parts.append(f"Description: {meta_desc}")
-            output_parts.append("Content:")
-            output_parts.append(cleaned_text)
-
-            final_output = "\n\n".join(output_parts)
-
-            return final_output
+            return page.render()
 
         except requests.RequestException as e:
             return f"Error scraping the webpage: {str(e)}"